@@ -1,6 +1,6 @@
-from api.v1 import auth, users, craftsmen, equipment, inventory, work_orders, maintenance, production, company, quality, reports, sales
+from api.v1 import auth, users, craftsmen, equipment, inventory, work_orders, maintenance, production, company, quality, reports, sales, meters
 
 __all__ = [
     "auth", "users", "craftsmen", "equipment", "inventory", "work_orders",
-    "maintenance", "production", "company", "quality", "reports", "sales"
+    "maintenance", "production", "company", "quality", "reports", "sales", "meters"
 ]
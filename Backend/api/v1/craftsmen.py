@@ -2,6 +2,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from db.session import get_db
+from db.loaders import get_loaders
 from core.security import get_current_active_user
 from models.user import User
 from schemas.craftsman import (
@@ -41,17 +42,21 @@ async def list_craftsmen(
     # Get craftsmen list
     craftsmen = craftsman_service.get_craftsmen(db, skip=skip, limit=limit, search=search)
     
-    # Enrich with user data and role
+    # Enrich with user data and role, one query each for the whole page
+    loaders = get_loaders(db)
+    loaders.users.prime(craftsman.user_id for craftsman in craftsmen)
+    loaders.roles.prime(craftsman.role_id for craftsman in craftsmen)
     result = []
     for craftsman in craftsmen:
-        role_name = craftsman.role.name if craftsman.role else None
+        user = loaders.users.load(craftsman.user_id)
+        role = loaders.roles.load(craftsman.role_id)
         result.append(CraftsmanWithUser(
             **craftsman.__dict__,
-            username=craftsman.user.username,
-            email=craftsman.user.email,
-            full_name=craftsman.user.full_name,
-            phone=craftsman.user.phone,
-            role_name=role_name
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            phone=user.phone,
+            role_name=role.name if role else None
         ))
     
     total_pages = math.ceil(total / limit) if limit > 0 else 0
@@ -1,13 +1,17 @@
+from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from db.session import get_db
+from core.scheduler import scheduler
 from core.security import get_current_active_user
 from models.user import User
 from models.equipment import EquipmentStatus
-from schemas.equipment import EquipmentCreate, EquipmentUpdate, EquipmentResponse
+from schemas.equipment import (
+    EquipmentCreate, EquipmentUpdate, EquipmentResponse, EquipmentTreeNodeResponse, EquipmentStateChangeResponse
+)
 from schemas.common import PaginatedResponse
-from services import equipment_service
+from services import equipment_service, equipment_hierarchy_service, equipment_timeline_service
 import math
 
 router = APIRouter()
@@ -68,6 +72,16 @@ async def create_equipment(
     return equipment_service.create_equipment(db, equipment)
 
 
+@router.post("/hierarchy/rebuild", status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_equipment_hierarchy(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Rebuild the equipment hierarchy index from parent links in the background."""
+    background_tasks.add_task(scheduler.run_job, "equipment_closure_rebuild")
+    return {"status": "accepted", "job": "equipment_closure_rebuild"}
+
+
 @router.get("/export")
 async def export_equipment(
     category: Optional[str] = None,
@@ -198,6 +212,70 @@ async def get_equipment_children(
     return equipment_service.get_equipment_children(db, equipment_id)
 
 
+@router.get("/{equipment_id}/subtree", response_model=List[EquipmentTreeNodeResponse])
+async def get_equipment_subtree(
+    equipment_id: int,
+    max_depth: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the equipment and everything below it, each with its depth under the equipment."""
+    equipment = equipment_service.get_equipment(db, equipment_id)
+    if not equipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+    
+    return [
+        EquipmentTreeNodeResponse(**EquipmentResponse.model_validate(node).model_dump(), depth=depth)
+        for node, depth in equipment_hierarchy_service.get_subtree(db, equipment_id, max_depth=max_depth)
+    ]
+
+
+@router.get("/{equipment_id}/ancestors", response_model=List[EquipmentResponse])
+async def get_equipment_ancestors(
+    equipment_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the path from the root of the hierarchy down to the equipment's parent."""
+    equipment = equipment_service.get_equipment(db, equipment_id)
+    if not equipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+    
+    return equipment_hierarchy_service.get_ancestors(db, equipment_id)
+
+
+@router.get("/{equipment_id}/rollup")
+async def get_equipment_rollup(
+    equipment_id: int,
+    days: int = Query(30, ge=1, le=3650),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Roll up status, work orders, maintenance cost and downtime over the equipment's whole subtree."""
+    equipment = equipment_service.get_equipment(db, equipment_id)
+    if not equipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+    
+    return equipment_hierarchy_service.get_subtree_rollup(db, equipment_id, days=days)
+
+
+@router.get("/{equipment_id}/timeline", response_model=List[EquipmentStateChangeResponse])
+async def get_equipment_timeline(
+    equipment_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the equipment's state changes (status changes, work started and ended), newest first."""
+    equipment = equipment_service.get_equipment(db, equipment_id)
+    if not equipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+    
+    return equipment_timeline_service.get_equipment_timeline(db, equipment_id, start=start, end=end, limit=limit)
+
+
 @router.get("/by-code/{equipment_code}", response_model=EquipmentResponse)
 async def get_equipment_by_code(
     equipment_code: str,
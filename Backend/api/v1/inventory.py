@@ -1,10 +1,11 @@
+from datetime import date
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Body
 from sqlalchemy.orm import Session
 from db.session import get_db
 from core.security import get_current_active_user
 from models.user import User
-from models.inventory import TransactionType, RequisitionStatus, RequisitionPriority
+from models.inventory import TransactionType, RequisitionStatus, RequisitionPriority, ReplenishmentStatus
 from schemas.inventory import (
     InventoryItemCreate, InventoryItemUpdate, InventoryItemResponse, InventoryItemWithCategory,
     InventoryTransactionCreate, InventoryTransactionResponse,
@@ -12,11 +13,20 @@ from schemas.inventory import (
     InventoryRequisitionCreate, InventoryRequisitionUpdate, InventoryRequisitionResponse,
     InventoryRequisitionListResponse, InventoryRequisitionApprovalRequest,
     InventoryRequisitionRejectRequest, InventoryRequisitionFulfillmentRequest,
-    InventoryRequisitionApproverAssignmentRequest, InventoryRequisitionApproverResponse
+    InventoryRequisitionApproverAssignmentRequest, InventoryRequisitionApproverResponse,
+    InventoryCostLayerResponse, InventoryValuationSummary, InventoryBalanceResponse,
+    ReorderRecommendationResponse, ReplenishmentProposalListResponse, ReplenishmentProposalResponse,
+    AvailableToPromiseRequest, AvailableToPromiseResponse, StockReservationResponse,
+    StockLocationCreate, StockLocationUpdate, StockLocationResponse, ItemLocationsResponse, LocationStockResponse,
+    InventoryTransferRequest, InventoryLotResponse, ExpiringLotResponse, LotTraceResponse
 )
 from schemas.common import PaginatedResponse
-from services import inventory_service
+from services import (
+    batch_genealogy_service, inventory_service, inventory_balance_service, inventory_forecast_service, inventory_valuation_service,
+    inventory_location_service, inventory_lot_service, replenishment_service, stock_reservation_service
+)
 from services.company_service import get_user_permissions
+from core.scheduler import scheduler
 
 router = APIRouter()
 
@@ -50,11 +60,12 @@ async def list_categories(
 
 @router.get("/categories/tree", response_model=List[InventoryCategoryTree])
 async def get_category_tree(
+    include_inactive: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get categories in tree structure."""
-    return inventory_service.get_category_tree(db)
+    """Get categories in tree structure, with item counts and stock value rolled up over subcategories."""
+    return inventory_service.get_category_tree(db, include_inactive)
 
 
 @router.post("/categories", response_model=InventoryCategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -166,6 +177,395 @@ async def get_low_stock_items(
     return inventory_service.get_low_stock_items(db)
 
 
+# ==================== VALUATION ENDPOINTS ====================
+
+@router.get("/valuation", response_model=InventoryValuationSummary)
+async def get_inventory_valuation(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get stock value from cost layers alongside the item-level valuation."""
+    return inventory_valuation_service.get_inventory_valuation(db)
+
+
+@router.post("/valuation/revalue", status_code=status.HTTP_202_ACCEPTED)
+async def revalue_inventory(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Recost the full transaction history and rebuild cost layers in the background."""
+    require_any_permission(db, current_user, ["inventory.adjust"])
+    background_tasks.add_task(scheduler.run_job, "inventory_revalue")
+    return {"status": "accepted", "job": "inventory_revalue"}
+
+
+@router.get("/balances", response_model=PaginatedResponse[InventoryBalanceResponse])
+async def get_stock_balances(
+    as_of: str = Query(..., description="ISO date (end of day) or datetime"),
+    item_id: Optional[List[int]] = Query(None),
+    category_id: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get item stock quantities and values as of a past date from balance checkpoints."""
+    moment = inventory_balance_service.parse_as_of(as_of)
+    skip = (page - 1) * limit
+    balances, total = inventory_balance_service.get_stock_balances(
+        db, moment, item_ids=item_id, category_id=category_id, skip=skip, limit=limit
+    )
+
+    return PaginatedResponse(
+        success=True,
+        data=balances,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+
+# ==================== REORDER RECOMMENDATION ENDPOINTS ====================
+
+@router.get("/reorder-recommendations", response_model=PaginatedResponse[ReorderRecommendationResponse])
+async def get_reorder_recommendations(
+    service_level: Optional[float] = Query(None, gt=0, lt=1),
+    lead_time_days: Optional[float] = Query(None, ge=0),
+    review_period_days: Optional[float] = Query(None, ge=0),
+    lookback_days: Optional[int] = Query(None, ge=2, le=1095),
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Forecast demand from issue history and recommend reorder points and safety stock."""
+    parameters = inventory_forecast_service.ForecastParameters.resolve(
+        service_level, lead_time_days, review_period_days, lookback_days
+    )
+    skip = (page - 1) * limit
+    recommendations, total = inventory_forecast_service.get_reorder_recommendations(
+        db, parameters, skip=skip, limit=limit
+    )
+
+    return PaginatedResponse(
+        success=True,
+        data=recommendations,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/reorder-recommendations/apply", status_code=status.HTTP_202_ACCEPTED)
+async def apply_reorder_recommendations(
+    background_tasks: BackgroundTasks,
+    service_level: Optional[float] = Query(None, gt=0, lt=1),
+    lead_time_days: Optional[float] = Query(None, ge=0),
+    review_period_days: Optional[float] = Query(None, ge=0),
+    lookback_days: Optional[int] = Query(None, ge=2, le=1095),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Write recommended reorder points and min/max quantities to all forecast items in the background."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    parameters = inventory_forecast_service.ForecastParameters.resolve(
+        service_level, lead_time_days, review_period_days, lookback_days
+    )
+    background_tasks.add_task(
+        scheduler.run_job, "inventory_reorder_points_apply",
+        service_level=parameters.service_level,
+        lead_time_days=parameters.lead_time_days,
+        review_period_days=parameters.review_period_days,
+        lookback_days=parameters.lookback_days
+    )
+    return {"status": "accepted", "job": "inventory_reorder_points_apply"}
+
+
+# ==================== RESERVATION ENDPOINTS ====================
+
+@router.post("/available-to-promise", response_model=List[AvailableToPromiseResponse])
+async def get_available_to_promise(
+    request: AvailableToPromiseRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get on-hand, reserved and available-to-promise quantities for up to 1000 items."""
+    return stock_reservation_service.available_to_promise(db, request.item_ids)
+
+
+@router.post("/reservations/reconcile", status_code=status.HTTP_202_ACCEPTED)
+async def reconcile_stock_reservations(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Align the reservation ledger with open demand and rebuild reserved counters in the background."""
+    require_any_permission(db, current_user, ["inventory.adjust"])
+    background_tasks.add_task(scheduler.run_job, "inventory_reservations_reconcile")
+    return {"status": "accepted", "job": "inventory_reservations_reconcile"}
+
+
+# ==================== LOCATION ENDPOINTS ====================
+
+@router.get("/locations", response_model=PaginatedResponse[StockLocationResponse])
+async def list_locations(
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    search: Optional[str] = None,
+    warehouse: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get stock locations (warehouse, zone, bin)."""
+    skip = (page - 1) * limit
+    locations = inventory_location_service.get_locations(
+        db, skip=skip, limit=limit, search=search, warehouse=warehouse, is_active=is_active
+    )
+    total = inventory_location_service.get_locations_count(db, search=search, warehouse=warehouse, is_active=is_active)
+
+    return PaginatedResponse(
+        success=True,
+        data=locations,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/locations", response_model=StockLocationResponse, status_code=status.HTTP_201_CREATED)
+async def create_location(
+    location: StockLocationCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a stock location."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    return inventory_location_service.create_location(db, location)
+
+
+@router.get("/locations/{location_id}", response_model=StockLocationResponse)
+async def get_location(
+    location_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get stock location by ID."""
+    location = inventory_location_service.get_location(db, location_id)
+    if not location:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock location not found")
+    return location
+
+
+@router.put("/locations/{location_id}", response_model=StockLocationResponse)
+async def update_location(
+    location_id: int,
+    location: StockLocationUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Update stock location."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    updated = inventory_location_service.update_location(db, location_id, location)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock location not found")
+    return updated
+
+
+@router.delete("/locations/{location_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_location(
+    location_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Delete a stock location that holds no stock."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    deleted = inventory_location_service.delete_location(db, location_id)
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock location not found")
+
+
+@router.get("/locations/{location_id}/stock", response_model=PaginatedResponse[LocationStockResponse])
+async def get_location_stock(
+    location_id: int,
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the items held at a location."""
+    if not inventory_location_service.get_location(db, location_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stock location not found")
+    skip = (page - 1) * limit
+    stock, total = inventory_location_service.get_location_stock(db, location_id, skip=skip, limit=limit)
+
+    return PaginatedResponse(
+        success=True,
+        data=stock,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+# ==================== LOT ENDPOINTS ====================
+
+@router.get("/lots/expiring", response_model=PaginatedResponse[ExpiringLotResponse])
+async def get_expiring_lots(
+    days: int = Query(14, ge=0, le=3650),
+    include_expired: bool = True,
+    item_id: Optional[int] = None,
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get lots with stock expiring within the given number of days, soonest first."""
+    skip = (page - 1) * limit
+    lots, total = inventory_lot_service.get_expiring_lots(
+        db, days, include_expired=include_expired, item_id=item_id, skip=skip, limit=limit
+    )
+
+    return PaginatedResponse(
+        success=True,
+        data=lots,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.get("/lots", response_model=List[InventoryLotResponse])
+async def find_lots(
+    lot_number: str = Query(..., min_length=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Find lots by lot number across items."""
+    return inventory_lot_service.find_lots(db, lot_number)
+
+
+@router.get("/lots/{lot_id}/trace", response_model=LotTraceResponse)
+async def trace_lot(
+    lot_id: int,
+    direction: str = Query("forward"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Trace a lot through production. Backward lists the lots and batches it
+    was made from; forward lists what was made from it and the sales orders
+    that received any of those lots.
+    """
+    trace = batch_genealogy_service.trace_lot(db, lot_id, direction)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lot not found")
+    return trace
+
+
+# ==================== REPLENISHMENT ENDPOINTS ====================
+
+@router.get("/replenishment/proposals", response_model=PaginatedResponse[ReplenishmentProposalListResponse])
+async def list_replenishment_proposals(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    status_filter: Optional[ReplenishmentStatus] = Query(None, alias="status"),
+    supplier: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get replenishment proposals with optional filters."""
+    require_any_permission(db, current_user, ["inventory.view"])
+    skip = (page - 1) * limit
+    proposals = replenishment_service.get_replenishment_proposals(
+        db, skip=skip, limit=limit, status_filter=status_filter, supplier=supplier
+    )
+    total = replenishment_service.get_replenishment_proposal_count(db, status_filter=status_filter, supplier=supplier)
+
+    return PaginatedResponse(
+        success=True,
+        data=proposals,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/replenishment/proposals/generate", status_code=status.HTTP_202_ACCEPTED)
+async def generate_replenishment_proposals(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Re-plan replenishment for all items in the background, replacing current drafts."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    background_tasks.add_task(scheduler.run_job, "inventory_replenishment_plan")
+    return {"status": "accepted", "job": "inventory_replenishment_plan"}
+
+
+@router.get("/replenishment/proposals/{proposal_id}", response_model=ReplenishmentProposalResponse)
+async def get_replenishment_proposal(
+    proposal_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a replenishment proposal with its lines."""
+    require_any_permission(db, current_user, ["inventory.view"])
+    proposal = replenishment_service.get_replenishment_proposal(db, proposal_id)
+    if not proposal:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replenishment proposal not found")
+    return proposal
+
+
+@router.post("/replenishment/proposals/{proposal_id}/approve", response_model=ReplenishmentProposalResponse)
+async def approve_replenishment_proposal(
+    proposal_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Approve a draft proposal; its quantities count as on order from then on."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    proposal = replenishment_service.approve_replenishment_proposal(db, proposal_id, current_user.id)
+    if not proposal:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replenishment proposal not found")
+    return proposal
+
+
+@router.post("/replenishment/proposals/{proposal_id}/close", response_model=ReplenishmentProposalResponse)
+async def close_replenishment_proposal(
+    proposal_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Close an approved proposal once its stock has been received."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    proposal = replenishment_service.close_replenishment_proposal(db, proposal_id)
+    if not proposal:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replenishment proposal not found")
+    return proposal
+
+
+@router.post("/replenishment/proposals/{proposal_id}/cancel", response_model=ReplenishmentProposalResponse)
+async def cancel_replenishment_proposal(
+    proposal_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Cancel a draft or approved proposal."""
+    require_any_permission(db, current_user, ["inventory.edit", "inventory.adjust"])
+    proposal = replenishment_service.cancel_replenishment_proposal(db, proposal_id)
+    if not proposal:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Replenishment proposal not found")
+    return proposal
+
 # ==================== REQUISITION ENDPOINTS ====================
 
 @router.get("/requisitions", response_model=PaginatedResponse[InventoryRequisitionListResponse])
@@ -407,13 +807,102 @@ async def adjust_inventory(
     transaction_type: TransactionType = Body(..., embed=True),
     notes: Optional[str] = Body(None, embed=True),
     reference: Optional[str] = Body(None, embed=True),
+    unit_cost: Optional[float] = Body(None, embed=True, ge=0),
+    location_id: Optional[int] = Body(None, embed=True),
+    lot_id: Optional[int] = Body(None, embed=True),
+    lot_number: Optional[str] = Body(None, embed=True, max_length=100),
+    expiry_date: Optional[date] = Body(None, embed=True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Adjust inventory quantity."""
+    """
+    Adjust inventory quantity. ``unit_cost`` is the receipt cost for inbound movements;
+    ``location_id`` books the movement at a stock location. Receipts with ``lot_number``
+    (and ``expiry_date``) go to that lot; issues take from ``lot_id``/``lot_number`` or FEFO.
+    A lot is held at the location of its first receipt and only moves stock there.
+    """
     return inventory_service.adjust_inventory_quantity(
         db, item_id, quantity, transaction_type,
-        current_user.id, notes, reference
+        current_user.id, notes, reference, unit_cost, location_id,
+        lot_id, lot_number, expiry_date
+    )
+
+
+@router.get("/{item_id}/lots", response_model=List[InventoryLotResponse])
+async def get_item_lots(
+    item_id: int,
+    include_empty: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the lots of an item in first-expired-first-out order."""
+    item = inventory_service.get_inventory_item(db, item_id)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return inventory_lot_service.get_item_lots(db, item_id, include_empty)
+
+
+@router.get("/{item_id}/locations", response_model=ItemLocationsResponse)
+async def get_item_locations(
+    item_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get where an item is held, per location, with its unassigned remainder."""
+    locations = inventory_location_service.get_item_locations(db, item_id)
+    if locations is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return locations
+
+
+@router.post("/{item_id}/transfer", response_model=ItemLocationsResponse)
+async def transfer_stock(
+    item_id: int,
+    transfer: InventoryTransferRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Move stock between locations; the item total is unchanged."""
+    require_any_permission(db, current_user, ["inventory.adjust"])
+    return inventory_location_service.transfer_stock(db, item_id, transfer, current_user.id)
+
+
+@router.get("/{item_id}/cost-layers", response_model=List[InventoryCostLayerResponse])
+async def get_item_cost_layers(
+    item_id: int,
+    include_consumed: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the receipt cost layers of an item, oldest first."""
+    item = inventory_service.get_inventory_item(db, item_id)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return inventory_valuation_service.get_cost_layers(db, item_id, include_consumed)
+
+
+@router.get("/{item_id}/reservations", response_model=PaginatedResponse[StockReservationResponse])
+async def get_item_reservations(
+    item_id: int,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the reservation ledger of an item, newest first."""
+    item = inventory_service.get_inventory_item(db, item_id)
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    skip = (page - 1) * limit
+    reservations, total = stock_reservation_service.get_item_reservations(db, item_id, skip=skip, limit=limit)
+
+    return PaginatedResponse(
+        success=True,
+        data=reservations,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
     )
 
 
@@ -1,19 +1,22 @@
 from pathlib import Path
 from typing import List, Optional
 from uuid import uuid4
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile, status, Query
 from sqlalchemy.orm import Session
 from db.session import get_db
 from core.security import get_current_active_user
 from core.config import settings
+from core.scheduler import scheduler
 from models.user import User
 from models.maintenance import MaintenanceCatalogueItemType
 from schemas.maintenance import (
     MaintenanceReportCreate, MaintenanceReportUpdate, MaintenanceReportResponse,
-    MaintenanceCatalogueItemCreate, MaintenanceCatalogueItemUpdate, MaintenanceCatalogueItemResponse
+    MaintenanceCatalogueItemCreate, MaintenanceCatalogueItemUpdate, MaintenanceCatalogueItemResponse,
+    PreventiveMaintenancePlanCreate, PreventiveMaintenancePlanUpdate, PreventiveMaintenancePlanResponse,
+    PreventiveMaintenanceScheduleResponse
 )
 from schemas.common import PaginatedResponse
-from services import maintenance_service
+from services import maintenance_service, preventive_maintenance_service
 from services.company_service import get_user_permissions
 
 router = APIRouter()
@@ -321,3 +324,128 @@ async def delete_catalogue_item(
     deleted = maintenance_service.delete_catalogue_item(db, item_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Catalogue item not found")
+
+
+# ==================== PREVENTIVE MAINTENANCE PLANS ====================
+
+@router.get("/pm-plans", response_model=PaginatedResponse[PreventiveMaintenancePlanResponse])
+async def list_pm_plans(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    equipment_id: Optional[int] = None,
+    equipment_category: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get preventive maintenance plans with optional filters."""
+    require_any_permission(db, current_user, ["maintenance.view", "maintenance.schedule"])
+    skip = (page - 1) * limit
+    plans = preventive_maintenance_service.get_pm_plans(
+        db, skip=skip, limit=limit, equipment_id=equipment_id,
+        equipment_category=equipment_category, is_active=is_active
+    )
+    total = preventive_maintenance_service.get_pm_plans_count(
+        db, equipment_id=equipment_id, equipment_category=equipment_category, is_active=is_active
+    )
+
+    return PaginatedResponse(
+        success=True,
+        data=plans,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/pm-plans", response_model=PreventiveMaintenancePlanResponse, status_code=status.HTTP_201_CREATED)
+async def create_pm_plan(
+    plan: PreventiveMaintenancePlanCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a preventive maintenance plan for an equipment or a whole category."""
+    require_any_permission(db, current_user, ["maintenance.schedule"])
+    return preventive_maintenance_service.create_pm_plan(db, plan, current_user.id)
+
+
+@router.get("/pm-plans/forecast")
+async def forecast_pm_workload(
+    days: int = Query(90, ge=1, le=730),
+    equipment_category: Optional[str] = None,
+    limit: int = Query(100, ge=0, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Project preventive maintenance occurrences and hours over the coming days."""
+    require_any_permission(db, current_user, ["maintenance.view", "maintenance.schedule"])
+    return preventive_maintenance_service.forecast_pm_workload(
+        db, days=days, equipment_category=equipment_category, limit=limit
+    )
+
+
+@router.post("/pm-plans/generate", status_code=status.HTTP_202_ACCEPTED)
+async def generate_pm_work_orders(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Raise work orders for due preventive maintenance in the background."""
+    require_any_permission(db, current_user, ["maintenance.schedule"])
+    background_tasks.add_task(scheduler.run_job, "maintenance_pm_generate")
+    return {"status": "accepted", "job": "maintenance_pm_generate"}
+
+
+@router.get("/pm-plans/{plan_id}", response_model=PreventiveMaintenancePlanResponse)
+async def get_pm_plan(
+    plan_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a preventive maintenance plan by ID."""
+    require_any_permission(db, current_user, ["maintenance.view", "maintenance.schedule"])
+    plan = preventive_maintenance_service.get_pm_plan(db, plan_id)
+    if not plan:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preventive maintenance plan not found")
+    return plan
+
+
+@router.put("/pm-plans/{plan_id}", response_model=PreventiveMaintenancePlanResponse)
+async def update_pm_plan(
+    plan_id: int,
+    plan: PreventiveMaintenancePlanUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Update a preventive maintenance plan."""
+    require_any_permission(db, current_user, ["maintenance.schedule"])
+    updated = preventive_maintenance_service.update_pm_plan(db, plan_id, plan)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preventive maintenance plan not found")
+    return updated
+
+
+@router.delete("/pm-plans/{plan_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_pm_plan(
+    plan_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Deactivate a preventive maintenance plan."""
+    require_any_permission(db, current_user, ["maintenance.schedule"])
+    if not preventive_maintenance_service.delete_pm_plan(db, plan_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preventive maintenance plan not found")
+
+
+@router.get("/pm-plans/{plan_id}/schedules", response_model=List[PreventiveMaintenanceScheduleResponse])
+async def get_pm_schedules(
+    plan_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the plan's next due occurrence on each equipment."""
+    require_any_permission(db, current_user, ["maintenance.view", "maintenance.schedule"])
+    if not preventive_maintenance_service.get_pm_plan(db, plan_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Preventive maintenance plan not found")
+    return preventive_maintenance_service.get_pm_schedules(db, plan_id)
@@ -0,0 +1,173 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query
+from sqlalchemy.orm import Session
+from db.session import get_db
+from core.scheduler import scheduler
+from core.security import get_current_active_user
+from models.user import User
+from schemas.meter import (
+    EquipmentMeterCreate, EquipmentMeterUpdate, EquipmentMeterResponse,
+    MeterReadingResponse, MeterReadingRollupResponse, MeterIngestResult,
+    MeterRuleCreate, MeterRuleUpdate, MeterRuleResponse
+)
+from services import meter_service
+
+router = APIRouter()
+
+
+# ==================== READINGS ====================
+
+@router.post("/readings", response_model=MeterIngestResult)
+async def ingest_readings(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Ingest a batch of meter readings.
+
+    Send JSON lines (``application/x-ndjson``) or a MessagePack array
+    (``application/msgpack``) of ``{"meter_id", "recorded_at", "value"}``.
+    Rules on the affected meters are evaluated and may raise work orders.
+    """
+    readings = meter_service.decode_readings(await request.body(), request.headers.get("content-type"))
+    return meter_service.ingest_readings(db, readings)
+
+
+@router.post("/readings/compact", status_code=status.HTTP_202_ACCEPTED)
+async def compact_readings(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Downsample expired raw readings into rollups in the background."""
+    background_tasks.add_task(scheduler.run_job, "meter_readings_compact")
+    return {"status": "accepted", "job": "meter_readings_compact"}
+
+
+# ==================== RULES ====================
+
+@router.put("/rules/{rule_id}", response_model=MeterRuleResponse)
+async def update_meter_rule(
+    rule_id: int,
+    rule: MeterRuleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Update a meter rule."""
+    updated = meter_service.update_meter_rule(db, rule_id, rule)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter rule not found")
+    return updated
+
+
+@router.delete("/rules/{rule_id}")
+async def delete_meter_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Delete a meter rule."""
+    if not meter_service.delete_meter_rule(db, rule_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter rule not found")
+    return {"message": "Meter rule deleted successfully"}
+
+
+# ==================== METERS ====================
+
+@router.get("/", response_model=List[EquipmentMeterResponse])
+async def list_meters(
+    equipment_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get meters, optionally for one equipment."""
+    return meter_service.get_meters(db, equipment_id=equipment_id)
+
+
+@router.post("/", response_model=EquipmentMeterResponse, status_code=status.HTTP_201_CREATED)
+async def create_meter(
+    meter: EquipmentMeterCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a meter on an equipment."""
+    return meter_service.create_meter(db, meter)
+
+
+@router.get("/{meter_id}", response_model=EquipmentMeterResponse)
+async def get_meter(
+    meter_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a meter by ID."""
+    meter = meter_service.get_meter(db, meter_id)
+    if not meter:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter not found")
+    return meter
+
+
+@router.put("/{meter_id}", response_model=EquipmentMeterResponse)
+async def update_meter(
+    meter_id: int,
+    meter: EquipmentMeterUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Update a meter."""
+    updated = meter_service.update_meter(db, meter_id, meter)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter not found")
+    return updated
+
+
+@router.get("/{meter_id}/readings", response_model=List[MeterReadingResponse])
+async def get_meter_readings(
+    meter_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a meter's raw readings within the retention window, newest first."""
+    if not meter_service.get_meter(db, meter_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter not found")
+    return meter_service.get_meter_readings(db, meter_id, start=start, end=end, limit=limit)
+
+
+@router.get("/{meter_id}/rollups", response_model=List[MeterReadingRollupResponse])
+async def get_meter_rollups(
+    meter_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a meter's downsampled history, newest first."""
+    if not meter_service.get_meter(db, meter_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter not found")
+    return meter_service.get_meter_rollups(db, meter_id, start=start, end=end, limit=limit)
+
+
+@router.get("/{meter_id}/rules", response_model=List[MeterRuleResponse])
+async def list_meter_rules(
+    meter_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get a meter's trigger rules."""
+    return meter_service.get_meter_rules(db, meter_id)
+
+
+@router.post("/{meter_id}/rules", response_model=MeterRuleResponse, status_code=status.HTTP_201_CREATED)
+async def create_meter_rule(
+    meter_id: int,
+    rule: MeterRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a rule that raises a work order when the meter's readings meet its condition."""
+    return meter_service.create_meter_rule(db, meter_id, rule, current_user.id)
@@ -1,11 +1,15 @@
-from typing import Optional
+import asyncio
+import json
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from core.security import get_current_active_user
-from db.session import get_db
-from models.notification import Notification
+from core.config import settings
+from core.notification_bus import notification_bus
+from core.security import decode_token, get_current_active_user
+from db.session import SessionLocal, get_db
 from models.user import User
 from schemas.notification import NotificationListResponse, NotificationResponse
 from services import notification_service
@@ -34,21 +38,95 @@ async def list_notifications(
     return NotificationListResponse(data=data, total=total, unread_count=unread_count)
 
 
+@router.get("/unread-count")
+async def get_unread_count(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    return {"unread_count": notification_service.get_unread_count(db, current_user.id)}
+
+
+def _stream_user(request: Request, token: Optional[str]) -> Tuple[int, int]:
+    """
+    Authenticate a stream and read the starting unread count, then release the
+    session so an open stream holds no connection. EventSource cannot set
+    headers, so the access token may also come as a query parameter.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise credentials_exception
+    payload = decode_token(token)
+    if payload.get("type") != "access":
+        raise credentials_exception
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise credentials_exception
+
+    with SessionLocal() as db:
+        is_active = db.query(User.is_active).filter(User.id == user_id).scalar()
+        if is_active is None:
+            raise credentials_exception
+        if not is_active:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        return user_id, notification_service.get_unread_count(db, user_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/stream")
+async def stream_notifications(request: Request, token: Optional[str] = None):
+    """
+    Server-Sent Events stream of the user's notifications.
+
+    Sends ``unread`` with the current count on connect, then ``notification``
+    for each new notification and ``unread`` whenever the count changes.
+    Comment lines keep idle connections open; an idle stream makes no
+    database queries.
+    """
+    user_id, unread_count = _stream_user(request, token)
+    queue = notification_bus.subscribe(user_id)
+
+    async def events():
+        try:
+            yield _sse("unread", {"unread_count": unread_count})
+            while not await request.is_disconnected():
+                try:
+                    event, data = await asyncio.wait_for(
+                        queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event, data)
+        finally:
+            notification_bus.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/{notification_id}/read", response_model=NotificationResponse)
 async def mark_notification_read(
     notification_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id,
-    ).first()
+    notification = notification_service.mark_notification_read(db, current_user.id, notification_id)
     if not notification:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
-    notification.read = True
-    db.commit()
-    db.refresh(notification)
     return notification
 
 
@@ -57,11 +135,7 @@ async def mark_all_notifications_read(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.read.is_(False),
-    ).update({Notification.read: True}, synchronize_session=False)
-    db.commit()
+    notification_service.mark_all_notifications_read(db, current_user.id)
 
 
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -70,11 +144,5 @@ async def delete_notification(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id,
-    ).first()
-    if not notification:
+    if not notification_service.delete_notification(db, current_user.id, notification_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
-    db.delete(notification)
-    db.commit()
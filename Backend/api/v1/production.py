@@ -2,6 +2,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
 from sqlalchemy.orm import Session
 from db.session import get_db
+from db.loaders import get_loaders
 from core.security import get_current_active_user
 from models.user import User
 from models.production import ProductionLineStatus, ProductionOrderStatus
@@ -9,11 +10,17 @@ from schemas.production import (
     ProductionLineCreate, ProductionLineUpdate, ProductionLineResponse,
     ProductionLineEquipmentCreate, ProductionLineEquipmentUpdate, ProductionLineEquipmentResponse,
     ShiftCreate, ShiftUpdate, ShiftResponse,
-    ProductionOrderCreate, ProductionOrderUpdate, ProductionOrderResponse,
+    ProductionOrderCreate, ProductionOrderUpdate, ProductionOrderResponse, ProductionScheduleRequest,
+    ProductionOutputCreate,
+    ProductionSimulationRequest,
+    BillOfMaterialsCreate, BillOfMaterialsUpdate, BillOfMaterialsResponse, MrpRunRequest,
     PackagingOrderCreate, PackagingOrderUpdate, PackagingOrderResponse
 )
+from schemas.inventory import InventoryLotResponse, LotTraceResponse
 from schemas.common import PaginatedResponse
-from services import production_service
+from services import (
+    batch_genealogy_service, bom_service, mrp_service, production_service, production_scheduling_service, production_simulation_service
+)
 
 router = APIRouter()
 
@@ -169,21 +176,20 @@ async def list_line_equipment_stations(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all equipment stations for a production line in sequence order with enriched data."""
-    from sqlalchemy.orm import joinedload
-    
     stations = production_service.get_line_equipment_stations(db, line_id)
     
-    # Enrich with equipment and craftsmen data
-    from models.equipment import Equipment
-    from models.craftsman import Craftsman
-    from models.user import User as UserModel
+    # Batch the equipment, craftsmen and user lookups across all stations
+    loaders = get_loaders(db)
+    operator_ids = [operator_id for station in stations for operator_id in station.operators or []]
+    loaders.equipment.prime(station.equipment_id for station in stations)
+    loaders.users.prime(craftsman.user_id for craftsman in loaders.craftsmen.load_many(operator_ids) if craftsman)
     
     enriched_stations = []
     for station in stations:
         station_dict = ProductionLineEquipmentResponse.model_validate(station).model_dump()
         
         # Get equipment details
-        equipment = db.query(Equipment).filter(Equipment.id == station.equipment_id).first()
+        equipment = loaders.equipment.load(station.equipment_id)
         if equipment:
             station_dict['equipment'] = {
                 'id': equipment.id,
@@ -196,16 +202,13 @@ async def list_line_equipment_stations(
         # Get operators details with user data
         if station.operators:
             operators_data = []
-            for operator_id in station.operators:
-                craftsman = db.query(Craftsman).options(
-                    joinedload(Craftsman.user)
-                ).filter(Craftsman.id == operator_id).first()
-                
-                if craftsman and craftsman.user:
+            for craftsman in loaders.craftsmen.load_many(station.operators):
+                user = loaders.users.load(craftsman.user_id) if craftsman else None
+                if user:
                     operators_data.append({
                         'id': craftsman.id,
                         'employee_id': craftsman.employee_id,
-                        'full_name': craftsman.user.full_name,
+                        'full_name': user.full_name,
                         'position': craftsman.position,
                     })
             station_dict['operators_data'] = operators_data
@@ -258,6 +261,22 @@ async def remove_equipment_from_line(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment station not found")
 
 
+@router.post("/lines/{line_id}/simulate")
+def simulate_production_line(
+    line_id: int,
+    request: ProductionSimulationRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Simulate the line's station sequence for throughput, station utilization and the bottleneck.
+    
+    Station overrides (e.g. a second machine at one station) answer what-if questions against the current line.
+    CPU-bound, so it runs in the threadpool rather than on the event loop.
+    """
+    return production_simulation_service.simulate_production_line(db, line_id, **request.model_dump())
+
+
 @router.post("/lines/{line_id}/equipment/reorder", response_model=List[ProductionLineEquipmentResponse])
 async def reorder_equipment_stations(
     line_id: int,
@@ -279,6 +298,20 @@ async def get_order_statistics(
     return production_service.get_production_order_statistics(db)
 
 
+@router.post("/orders/schedule")
+async def schedule_production_orders(
+    request: ProductionScheduleRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Schedule pending production orders against line capacity and shift calendars.
+    
+    Returns a Gantt-ready plan per line; unless ``dry_run`` it is also written to the orders.
+    """
+    return production_scheduling_service.schedule_production(db, **request.model_dump())
+
+
 @router.get("/orders", response_model=PaginatedResponse[ProductionOrderResponse])
 async def list_production_orders(
     page: int = Query(1, ge=1),
@@ -357,7 +390,123 @@ async def delete_production_order(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Production order not found")
 
 
+@router.post("/orders/{order_id}/output", response_model=InventoryLotResponse, status_code=status.HTTP_201_CREATED)
+async def record_production_output(
+    order_id: int,
+    output: ProductionOutputCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Receive finished goods from a production order into stock as a lot."""
+    lot = production_service.record_production_output(db, order_id, output, current_user.id)
+    if not lot:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Production order not found")
+    return lot
+
+
+@router.get("/orders/{order_id}/trace", response_model=LotTraceResponse)
+async def trace_production_order(
+    order_id: int,
+    direction: str = Query("backward"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Trace a batch back to the lots it consumed, or forward to its lots and where they were shipped."""
+    trace = batch_genealogy_service.trace_production_order(db, order_id, direction)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Production order not found")
+    return trace
+
+
 # Packaging Order Endpoints
+# Bill of Materials Endpoints
+@router.get("/boms", response_model=PaginatedResponse[BillOfMaterialsResponse])
+async def list_boms(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get bills of materials with their component lines and routing."""
+    skip = (page - 1) * limit
+    boms = bom_service.get_boms(db, skip=skip, limit=limit, search=search, is_active=is_active)
+    total = bom_service.get_boms_count(db, search=search, is_active=is_active)
+    
+    return PaginatedResponse(
+        success=True,
+        data=boms,
+        total=total,
+        page=page,
+        pageSize=limit,
+        totalPages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/boms", response_model=BillOfMaterialsResponse, status_code=status.HTTP_201_CREATED)
+async def create_bom(
+    bom: BillOfMaterialsCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create a bill of materials with component lines and routing operations."""
+    return bom_service.create_bom(db, bom)
+
+
+@router.get("/boms/{bom_id}", response_model=BillOfMaterialsResponse)
+async def get_bom(
+    bom_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get bill of materials by ID."""
+    bom = bom_service.get_bom(db, bom_id)
+    if not bom:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bill of materials not found")
+    return bom
+
+
+@router.put("/boms/{bom_id}", response_model=BillOfMaterialsResponse)
+async def update_bom(
+    bom_id: int,
+    bom: BillOfMaterialsUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Update bill of materials; given lines or operations replace the existing ones."""
+    updated = bom_service.update_bom(db, bom_id, bom)
+    if not updated:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bill of materials not found")
+    return updated
+
+
+@router.delete("/boms/{bom_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_bom(
+    bom_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Delete bill of materials."""
+    deleted = bom_service.delete_bom(db, bom_id)
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bill of materials not found")
+
+
+@router.post("/mrp/run")
+async def run_mrp(
+    request: MrpRunRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Explode open production orders through their BOMs, net against stock and open requisitions.
+    
+    Unless ``dry_run``, writes one draft requisition per order (replacing earlier planned drafts).
+    """
+    return mrp_service.run_mrp(db, requested_by=current_user.id, **request.model_dump())
+
+
 @router.get("/packaging/statistics")
 async def get_packaging_statistics(
     db: Session = Depends(get_db),
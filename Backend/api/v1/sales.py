@@ -6,13 +6,14 @@ from core.security import get_current_active_user
 from models.user import User
 from models.sales import SalesOrderStatus, SalesOrderPriority, SalesInvoiceStatus
 from schemas.common import PaginatedResponse
+from schemas.inventory import LotTraceResponse
 from schemas.sales import (
     CustomerCreate, CustomerUpdate, CustomerResponse,
     SalesOrderCreate, SalesOrderUpdate, SalesOrderResponse, SalesOrderListResponse,
     SalesOrderFulfillmentRequest, SalesOrderCancelRequest,
     SalesInvoiceResponse, SalesInvoiceReceiptCreate, SalesInvoiceVoidRequest,
 )
-from services import sales_service
+from services import batch_genealogy_service, sales_service
 from services.company_service import get_user_permissions
 
 router = APIRouter()
@@ -258,6 +259,20 @@ async def cancel_sales_order(
     return order
 
 
+@router.get("/orders/{order_id}/trace", response_model=LotTraceResponse)
+async def trace_sales_order(
+    order_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """Trace the lots a sales order shipped back to the batches and lots they were made from."""
+    require_any_permission(db, current_user, ["sales.orders.view", "sales.view"])
+    trace = batch_genealogy_service.trace_sales_order(db, order_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sales order not found")
+    return trace
+
+
 # ==================== INVOICE & RECEIPT ENDPOINTS ====================
 
 @router.get("/invoices", response_model=PaginatedResponse[SalesInvoiceResponse])
@@ -7,10 +7,10 @@ from models.user import User
 from models.work_order import WorkOrderStatus, WorkOrderPriority
 from schemas.work_order import (
     WorkOrderCreate, WorkOrderUpdate, WorkOrderResponse,
-    WorkOrderStatusUpdate, WorkOrderAssign
+    WorkOrderStatusUpdate, WorkOrderAssign, WorkOrderAutoAssignRequest
 )
 from schemas.common import PaginatedResponse
-from services import work_order_service
+from services import assignment_service, work_order_service
 
 router = APIRouter()
 
@@ -104,6 +104,26 @@ async def delete_work_order(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Work order not found")
 
 
+@router.post("/auto-assign")
+async def auto_assign_work_orders(
+    request: WorkOrderAutoAssignRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Match pending work orders to craftsmen by skills, equipment qualification,
+    open workload, rostered shifts, priority and due date. Dry runs (the
+    default) return the proposed plan without assigning anything.
+    """
+    return assignment_service.plan_assignments(
+        db,
+        work_order_ids=request.work_order_ids,
+        craftsman_ids=request.craftsman_ids,
+        horizon_days=request.horizon_days,
+        dry_run=request.dry_run
+    )
+
+
 @router.post("/{work_order_id}/assign", response_model=WorkOrderResponse)
 async def assign_work_order(
     work_order_id: int,
@@ -37,7 +37,68 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "./logs/icms.log"
-    
+
+    # Background jobs
+    BACKGROUND_JOBS_ENABLED: bool = True
+    INVENTORY_AGGREGATES_RECONCILE_SECONDS: int = 3600
+
+    # Inventory valuation ("fifo" or "weighted_average")
+    INVENTORY_COSTING_METHOD: str = "fifo"
+    INVENTORY_REVALUE_ITEMS_PER_BATCH: int = 500
+
+    # Demand forecasting and reorder-point recommendations
+    INVENTORY_FORECAST_LOOKBACK_DAYS: int = 180
+    INVENTORY_FORECAST_SMOOTHING_ALPHA: float = 0.2
+    INVENTORY_SERVICE_LEVEL: float = 0.95
+    INVENTORY_LEAD_TIME_DAYS: float = 7
+    INVENTORY_REVIEW_PERIOD_DAYS: float = 30
+    INVENTORY_FORECAST_WORKERS: int = 4
+    INVENTORY_FORECAST_PARALLEL_MIN_ROWS: int = 1000000
+
+    # Stock balance checkpoints ("daily" or "monthly")
+    INVENTORY_CHECKPOINT_PERIOD: str = "daily"
+    INVENTORY_CHECKPOINT_INTERVAL_SECONDS: int = 3600
+
+    # Replenishment planner (nightly by default)
+    INVENTORY_REPLENISHMENT_PLAN_SECONDS: int = 86400
+
+    # Equipment reliability cache (full rebuild; completions update it incrementally)
+    MAINTENANCE_RELIABILITY_REBUILD_SECONDS: int = 86400
+
+    # Preventive maintenance work order generation
+    MAINTENANCE_PM_GENERATE_SECONDS: int = 3600
+
+    # Meter readings: raw readings are kept this long, then downsampled into rollup buckets
+    METER_INGEST_MAX_READINGS: int = 100000
+    METER_RAW_RETENTION_DAYS: int = 30
+    METER_ROLLUP_BUCKET_SECONDS: int = 3600
+    METER_ROLLUP_RETENTION_DAYS: int = 730
+    METER_COMPACTION_INTERVAL_SECONDS: int = 3600
+
+    # Production line simulation: replications run in a process pool once there are enough of them
+    PRODUCTION_SIMULATION_WORKERS: int = 4
+    PRODUCTION_SIMULATION_PARALLEL_MIN_REPLICATIONS: int = 8
+    PRODUCTION_SIMULATION_MAX_EVENTS: int = 20000000  # Estimated cycle completions per request (~300k/s per core)
+
+    # Per-shift OEE store (incremental; completed days only)
+    PRODUCTION_OEE_REFRESH_SECONDS: int = 3600
+
+    # Daily report rollups
+    REPORT_ROLLUP_REFRESH_SECONDS: int = 300
+    REPORT_ROLLUP_WATERMARK_LAG_SECONDS: int = 300
+
+    # Asynchronous report jobs (0 workers leaves jobs to scripts/run_report_worker.py)
+    REPORT_JOB_WORKERS: int = 2
+    REPORT_JOB_RESULT_TTL_SECONDS: int = 900
+    REPORT_JOB_TIMEOUT_SECONDS: int = 3600
+
+    # Notification push: events stay in this process unless a redis:// broker URL is set
+    NOTIFICATION_BROKER_URL: str = ""
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: int = 25
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100
+    # Repeats of an unread notification (same type and link) within this window update it instead
+    NOTIFICATION_DIGEST_WINDOW_SECONDS: int = 900
+
     @property
     def cors_origins(self) -> List[str]:
         """Parse ALLOWED_ORIGINS string to list."""
@@ -1,15 +1,42 @@
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from core.config import settings
-from api.v1 import auth, users, craftsmen, equipment, inventory, work_orders, maintenance, production, company, quality, reports, sales, notifications
+from core.scheduler import scheduler
+from core.workers import report_workers
+from core.notification_bus import notification_bus
+from db.session import SessionLocal
+from services.scheduled_jobs import register_jobs
+from services.report_job_service import resume_report_jobs
+from services.production_simulation_service import shutdown_simulation_pool
+from api.v1 import auth, users, craftsmen, equipment, inventory, work_orders, maintenance, production, company, quality, reports, sales, notifications, meters
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the in-process background job scheduler, report workers and notification push; stop the simulation pool."""
+    register_jobs(scheduler)
+    notification_bus.start()
+    if settings.BACKGROUND_JOBS_ENABLED:
+        scheduler.start()
+        report_workers.start()
+        with SessionLocal() as db:
+            resume_report_jobs(db)
+    yield
+    report_workers.stop()
+    scheduler.stop()
+    notification_bus.stop()
+    shutdown_simulation_pool()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 upload_directory = Path(settings.UPLOAD_DIR)
@@ -31,6 +58,7 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(craftsmen.router, prefix="/api/v1/craftsmen", tags=["Craftsmen"])
 app.include_router(equipment.router, prefix="/api/v1/equipment", tags=["Equipment"])
+app.include_router(meters.router, prefix="/api/v1/meters", tags=["Meters"])
 app.include_router(inventory.router, prefix="/api/v1/inventory", tags=["Inventory"])
 app.include_router(work_orders.router, prefix="/api/v1/work-orders", tags=["Work Orders"])
 app.include_router(maintenance.router, prefix="/api/v1/maintenance", tags=["Maintenance"])
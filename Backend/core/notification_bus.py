@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "icms:notifications"
+
+# (queue, loop that owns it)
+Subscriber = Tuple[asyncio.Queue, asyncio.AbstractEventLoop]
+
+
+class LocalBroker:
+    """Delivers published events straight to this process's subscribers."""
+
+    def __init__(self, deliver):
+        self._deliver = deliver
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def publish(self, message: str) -> None:
+        self._deliver(message)
+
+
+class RedisBroker:
+    """
+    Shares events between worker processes through Redis pub/sub.
+
+    Every process publishes to one channel and a listener thread delivers what
+    arrives to local subscribers, including the process's own events.
+    Requires the optional ``redis`` package.
+    """
+
+    def __init__(self, url: str, deliver):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("NOTIFICATION_BROKER_URL requires the redis package")
+        self._client = redis.Redis.from_url(url)
+        self._deliver = deliver
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{CHANNEL: lambda item: self._deliver(item["data"].decode("utf-8"))})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.stop()
+            self._pubsub.close()
+
+    def publish(self, message: str) -> None:
+        self._client.publish(CHANNEL, message)
+
+
+class NotificationBus:
+    """
+    Pushes notification events to connected streaming clients.
+
+    Subscribers are bounded asyncio queues per user, owned by the event loop
+    serving the stream. ``publish`` is thread-safe, so sessions committed in
+    request handlers, scheduler jobs or worker threads can all publish; a
+    client too slow to drain its queue loses its oldest events rather than
+    holding memory. Idle subscribers cost no database work.
+    """
+
+    def __init__(self, broker_url: str = "", queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, List[Subscriber]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self._broker = RedisBroker(broker_url, self._deliver) if broker_url else LocalBroker(self._deliver)
+
+    def start(self) -> None:
+        self._broker.start()
+
+    def stop(self) -> None:
+        self._broker.stop()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Register a queue for a user's events; call from the serving event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].append((queue, asyncio.get_running_loop()))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            remaining = [subscriber for subscriber in self._subscribers.get(user_id, []) if subscriber[0] is not queue]
+            if remaining:
+                self._subscribers[user_id] = remaining
+            else:
+                self._subscribers.pop(user_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id: int, event: str, data: dict) -> None:
+        """Send an event to a user's open streams, in every worker when a broker is configured."""
+        message = json.dumps({"user_id": user_id, "event": event, "data": data}, default=str)
+        try:
+            self._broker.publish(message)
+        except Exception:
+            # Push is best effort; clients still see the notification on their next fetch
+            logger.exception("Failed to publish notification event")
+
+    def _deliver(self, message: str) -> None:
+        payload = json.loads(message)
+        with self._lock:
+            subscribers = list(self._subscribers.get(payload["user_id"], []))
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_enqueue, queue, (payload["event"], payload["data"]))
+            except RuntimeError:
+                # The loop serving this subscriber has closed
+                self.unsubscribe(payload["user_id"], queue)
+
+
+def _enqueue(queue: asyncio.Queue, item: tuple) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
+
+notification_bus = NotificationBus(settings.NOTIFICATION_BROKER_URL, settings.NOTIFICATION_STREAM_QUEUE_SIZE)
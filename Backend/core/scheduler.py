@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledJob:
+    """A maintenance task that runs on a fixed interval with its own session."""
+    name: str
+    interval_seconds: int
+    func: Callable[[Session], object]
+    last_run_at: Optional[float] = None
+    last_error: Optional[str] = None
+    running: bool = field(default=False, repr=False)
+
+
+class JobScheduler:
+    """
+    Minimal in-process scheduler for periodic background jobs.
+
+    Jobs run on a single daemon thread, one at a time, each with a fresh
+    database session. The same jobs can be run once from the command line
+    (see scripts/run_job.py) when an external cron or sidecar is preferred.
+    """
+
+    def __init__(self, tick_seconds: float = 1.0):
+        self.tick_seconds = tick_seconds
+        self._jobs: Dict[str, ScheduledJob] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, interval_seconds: int, func: Callable[[Session], object]) -> None:
+        """Register (or replace) a periodic job."""
+        with self._lock:
+            self._jobs[name] = ScheduledJob(name=name, interval_seconds=interval_seconds, func=func)
+
+    def jobs(self) -> List[ScheduledJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def run_job(self, name: str, **kwargs):
+        """Run a registered job immediately, with optional keyword overrides, and return its result."""
+        job = self._jobs.get(name)
+        if job is None:
+            raise KeyError(f"Unknown job: {name}")
+        return self._execute(job, **kwargs)
+
+    def _execute(self, job: ScheduledJob, **kwargs):
+        job.running = True
+        db = SessionLocal()
+        try:
+            result = job.func(db, **kwargs)
+            job.last_error = None
+            return result
+        except Exception as exc:
+            db.rollback()
+            job.last_error = str(exc)
+            logger.exception("Background job %s failed", job.name)
+            return None
+        finally:
+            job.last_run_at = time.monotonic()
+            job.running = False
+            db.close()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self.jobs():
+                if job.interval_seconds <= 0 or job.running:
+                    continue
+                if job.last_run_at is None or now - job.last_run_at >= job.interval_seconds:
+                    self._execute(job)
+                if self._stop.is_set():
+                    break
+            self._stop.wait(self.tick_seconds)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="icms-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+scheduler = JobScheduler()
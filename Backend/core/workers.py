@@ -0,0 +1,63 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    In-process pool that runs submitted tasks on worker threads.
+
+    Each task gets its own database session. While the pool is stopped (or
+    configured with zero workers) submissions are ignored, leaving the work to a
+    sidecar process that polls the database instead.
+    """
+
+    def __init__(self, max_workers: int, name: str = "worker"):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None and self.max_workers > 0:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, func: Callable[..., object], *args) -> bool:
+        """Queue ``func(db, *args)``; returns False when no in-process workers are running."""
+        with self._lock:
+            if self._executor is None:
+                return False
+            self._executor.submit(self._run, func, *args)
+            return True
+
+    def _run(self, func: Callable[..., object], *args) -> None:
+        db: Session = SessionLocal()
+        try:
+            func(db, *args)
+        except Exception:
+            db.rollback()
+            logger.exception("Worker task %s failed", getattr(func, "__name__", func))
+        finally:
+            db.close()
+
+
+report_workers = WorkerPool(settings.REPORT_JOB_WORKERS, name="report-worker")
@@ -0,0 +1,113 @@
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models.company import Role
+from models.craftsman import Craftsman, equipment_operators
+from models.equipment import Equipment
+from models.inventory import InventoryCategory
+from models.user import User
+
+KEYS_PER_QUERY = 1000
+
+
+class BatchLoader:
+    """
+    DataLoader-style batching for one entity type.
+
+    Keys are collected with ``prime`` while a response is assembled; the first
+    ``load`` resolves everything pending with one ``IN`` query (chunked for
+    very long key lists). Results, including misses, are cached until the
+    session commits or rolls back.
+    """
+
+    def __init__(self, fetch: Callable[[List[Hashable]], Dict[Hashable, Any]], default: Callable[[], Any] = lambda: None):
+        self._fetch = fetch
+        self._default = default
+        self._cache: Dict[Hashable, Any] = {}
+        self._pending: set = set()
+
+    def prime(self, keys: Iterable[Optional[Hashable]]) -> "BatchLoader":
+        """Queue keys for the next batch; ``None`` and cached keys are skipped."""
+        self._pending.update(key for key in keys if key is not None and key not in self._cache)
+        return self
+
+    def _dispatch(self) -> None:
+        if not self._pending:
+            return
+        keys = sorted(self._pending)
+        self._pending.clear()
+        for offset in range(0, len(keys), KEYS_PER_QUERY):
+            chunk = keys[offset:offset + KEYS_PER_QUERY]
+            found = self._fetch(chunk)
+            for key in chunk:
+                self._cache[key] = found.get(key, self._default())
+
+    def load(self, key: Optional[Hashable]) -> Any:
+        if key is None:
+            return self._default()
+        if key not in self._cache:
+            self._pending.add(key)
+            self._dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys: Iterable[Optional[Hashable]]) -> List[Any]:
+        keys = list(keys)
+        self.prime(keys)
+        self._dispatch()
+        return [self.load(key) for key in keys]
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._pending.clear()
+
+
+def _by_id(db: Session, model) -> Callable[[List[int]], Dict[int, Any]]:
+    def fetch(keys: List[int]) -> Dict[int, Any]:
+        return {row.id: row for row in db.query(model).filter(model.id.in_(keys))}
+    return fetch
+
+
+def _grouped(db: Session, key_column, value_column) -> Callable[[List[int]], Dict[int, List[int]]]:
+    def fetch(keys: List[int]) -> Dict[int, List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for key, value in db.execute(
+            select(key_column, value_column).where(key_column.in_(keys)).order_by(key_column, value_column)
+        ):
+            groups.setdefault(key, []).append(value)
+        return groups
+    return fetch
+
+
+class Loaders:
+    """The batch loaders of one request, bound to its session."""
+
+    def __init__(self, db: Session):
+        self.equipment = BatchLoader(_by_id(db, Equipment))
+        self.craftsmen = BatchLoader(_by_id(db, Craftsman))
+        self.users = BatchLoader(_by_id(db, User))
+        self.roles = BatchLoader(_by_id(db, Role))
+        self.inventory_categories = BatchLoader(_by_id(db, InventoryCategory))
+        # Many-to-many links, as sorted id lists
+        self.equipment_operator_ids = BatchLoader(
+            _grouped(db, equipment_operators.c.equipment_id, equipment_operators.c.craftsman_id), default=list
+        )
+        self.operated_equipment_ids = BatchLoader(
+            _grouped(db, equipment_operators.c.craftsman_id, equipment_operators.c.equipment_id), default=list
+        )
+
+    def clear(self, *_args) -> None:
+        for loader in vars(self).values():
+            loader.clear()
+
+
+def get_loaders(db: Session) -> Loaders:
+    """
+    Loaders cached on the session, which ``get_db`` opens per request, so
+    every lookup in one response shares them.
+    """
+    loaders = db.info.get("loaders")
+    if loaders is None:
+        loaders = db.info["loaders"] = Loaders(db)
+        event.listen(db, "after_commit", loaders.clear)
+        event.listen(db, "after_soft_rollback", loaders.clear)
+    return loaders
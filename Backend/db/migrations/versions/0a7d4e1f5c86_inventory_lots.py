@@ -0,0 +1,79 @@
+"""add inventory lots and lot ledger
+
+Revision ID: 0a7d4e1f5c86
+Revises: f2c6d3e9b475
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0a7d4e1f5c86"
+down_revision: Union[str, None] = "f2c6d3e9b475"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_lots",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("lot_number", sa.String(length=100), nullable=False),
+        sa.Column("expiry_date", sa.Date(), nullable=True),
+        sa.Column("received_quantity", sa.Float(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("item_id", "lot_number", name="uq_inventory_lots_item_lot_number"),
+    )
+    op.create_index(op.f("ix_inventory_lots_id"), "inventory_lots", ["id"], unique=False)
+    op.create_index(
+        "ix_inventory_lots_item_expiry", "inventory_lots", ["item_id", "expiry_date", "id", "quantity"], unique=False
+    )
+    op.create_index("ix_inventory_lots_expiry", "inventory_lots", ["expiry_date", "quantity"], unique=False)
+
+    op.create_table(
+        "inventory_lot_movements",
+        sa.Column("lot_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column("reference_number", sa.String(length=100), nullable=True),
+        sa.Column("performed_by", sa.Integer(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["lot_id"], ["inventory_lots.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["transaction_id"], ["inventory_transactions.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["performed_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_inventory_lot_movements_id"), "inventory_lot_movements", ["id"], unique=False)
+    op.create_index(
+        "ix_inventory_lot_movements_lot_created", "inventory_lot_movements", ["lot_id", "created_at"], unique=False
+    )
+    op.create_index(
+        "ix_inventory_lot_movements_transaction", "inventory_lot_movements", ["transaction_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_lot_movements_transaction", table_name="inventory_lot_movements")
+    op.drop_index("ix_inventory_lot_movements_lot_created", table_name="inventory_lot_movements")
+    op.drop_index(op.f("ix_inventory_lot_movements_id"), table_name="inventory_lot_movements")
+    op.drop_table("inventory_lot_movements")
+    op.drop_index("ix_inventory_lots_expiry", table_name="inventory_lots")
+    op.drop_index("ix_inventory_lots_item_expiry", table_name="inventory_lots")
+    op.drop_index(op.f("ix_inventory_lots_id"), table_name="inventory_lots")
+    op.drop_table("inventory_lots")
@@ -0,0 +1,84 @@
+"""add batch genealogy edges and producing order on lots
+
+Revision ID: 1b8e5f2a6d97
+Revises: 0a7d4e1f5c86
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "1b8e5f2a6d97"
+down_revision: Union[str, None] = "0a7d4e1f5c86"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.add_column("inventory_lots", sa.Column("production_order_id", sa.Integer(), nullable=True))
+    op.create_index(
+        op.f("ix_inventory_lots_production_order_id"), "inventory_lots", ["production_order_id"], unique=False
+    )
+    op.create_foreign_key(
+        "fk_inventory_lots_production_order_id_production_orders",
+        "inventory_lots",
+        "production_orders",
+        ["production_order_id"],
+        ["id"],
+    )
+
+    op.create_table(
+        "batch_genealogy_edges",
+        sa.Column(
+            "edge_type",
+            sa.Enum("INPUT", "OUTPUT", "SHIPPED", name="genealogyedgetype"),
+            nullable=False,
+        ),
+        sa.Column("lot_id", sa.Integer(), nullable=False),
+        sa.Column("production_order_id", sa.Integer(), nullable=True),
+        sa.Column("sales_order_id", sa.Integer(), nullable=True),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["lot_id"], ["inventory_lots.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["production_order_id"], ["production_orders.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["sales_order_id"], ["sales_orders.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["transaction_id"], ["inventory_transactions.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_batch_genealogy_edges_id"), "batch_genealogy_edges", ["id"], unique=False)
+    op.create_index(
+        "ix_batch_genealogy_edges_lot", "batch_genealogy_edges", ["lot_id", "edge_type", "production_order_id"],
+        unique=False
+    )
+    op.create_index(
+        "ix_batch_genealogy_edges_order", "batch_genealogy_edges", ["production_order_id", "edge_type", "lot_id"],
+        unique=False
+    )
+    op.create_index(
+        "ix_batch_genealogy_edges_sales_order", "batch_genealogy_edges", ["sales_order_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_genealogy_edges_sales_order", table_name="batch_genealogy_edges")
+    op.drop_index("ix_batch_genealogy_edges_order", table_name="batch_genealogy_edges")
+    op.drop_index("ix_batch_genealogy_edges_lot", table_name="batch_genealogy_edges")
+    op.drop_index(op.f("ix_batch_genealogy_edges_id"), table_name="batch_genealogy_edges")
+    op.drop_table("batch_genealogy_edges")
+    sa.Enum(name="genealogyedgetype").drop(op.get_bind(), checkfirst=True)
+    op.drop_constraint(
+        "fk_inventory_lots_production_order_id_production_orders", "inventory_lots", type_="foreignkey"
+    )
+    op.drop_index(op.f("ix_inventory_lots_production_order_id"), table_name="inventory_lots")
+    op.drop_column("inventory_lots", "production_order_id")
@@ -0,0 +1,51 @@
+"""add per-user unread notification counters
+
+Revision ID: 2c9f6a3b7e18
+Revises: 1b8e5f2a6d97
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "2c9f6a3b7e18"
+down_revision: Union[str, None] = "1b8e5f2a6d97"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_counters",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index(op.f("ix_notification_counters_id"), "notification_counters", ["id"], unique=False)
+
+    # Backfill from existing unread notifications
+    notifications = sa.table("notifications", sa.column("user_id", sa.Integer()), sa.column("read", sa.Boolean()))
+    counters = sa.table(
+        "notification_counters",
+        sa.column("user_id", sa.Integer()),
+        sa.column("unread_count", sa.Integer()),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("updated_at", sa.DateTime()),
+    )
+    op.execute(counters.insert().from_select(
+        ["user_id", "unread_count", "created_at", "updated_at"],
+        sa.select(
+            notifications.c.user_id, sa.func.count(), sa.func.current_timestamp(), sa.func.current_timestamp()
+        ).where(notifications.c.read.is_(False)).group_by(notifications.c.user_id),
+    ))
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_notification_counters_id"), table_name="notification_counters")
+    op.drop_table("notification_counters")
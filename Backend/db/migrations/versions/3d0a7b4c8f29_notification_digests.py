@@ -0,0 +1,34 @@
+"""add notification digest counts
+
+Revision ID: 3d0a7b4c8f29
+Revises: 2c9f6a3b7e18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3d0a7b4c8f29"
+down_revision: Union[str, None] = "2c9f6a3b7e18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications",
+        sa.Column("digest_count", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.create_index(
+        "ix_notifications_digest",
+        "notifications",
+        ["user_id", "type", "link", "read"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_digest", table_name="notifications")
+    op.drop_column("notifications", "digest_count")
@@ -0,0 +1,28 @@
+"""index notifications by user and last update
+
+Revision ID: 4e1b8c5d9a30
+Revises: 3d0a7b4c8f29
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "4e1b8c5d9a30"
+down_revision: Union[str, None] = "3d0a7b4c8f29"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_notifications_user_updated",
+        "notifications",
+        ["user_id", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_updated", table_name="notifications")
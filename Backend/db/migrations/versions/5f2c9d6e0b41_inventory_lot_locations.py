@@ -0,0 +1,36 @@
+"""add holding location to inventory lots
+
+Revision ID: 5f2c9d6e0b41
+Revises: 4e1b8c5d9a30
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "5f2c9d6e0b41"
+down_revision: Union[str, None] = "4e1b8c5d9a30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing lots start as unassigned stock
+    op.add_column("inventory_lots", sa.Column("location_id", sa.Integer(), nullable=True))
+    op.create_index(op.f("ix_inventory_lots_location_id"), "inventory_lots", ["location_id"], unique=False)
+    op.create_foreign_key(
+        "fk_inventory_lots_location_id_stock_locations",
+        "inventory_lots",
+        "stock_locations",
+        ["location_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_inventory_lots_location_id_stock_locations", "inventory_lots", type_="foreignkey")
+    op.drop_index(op.f("ix_inventory_lots_location_id"), table_name="inventory_lots")
+    op.drop_column("inventory_lots", "location_id")
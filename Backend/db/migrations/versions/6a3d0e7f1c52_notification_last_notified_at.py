@@ -0,0 +1,44 @@
+"""order notifications by when they were last notified
+
+Revision ID: 6a3d0e7f1c52
+Revises: 5f2c9d6e0b41
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "6a3d0e7f1c52"
+down_revision: Union[str, None] = "5f2c9d6e0b41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("last_notified_at", sa.DateTime(), nullable=True))
+    # Only digests move an unread row's updated_at; a read row may have moved since its last event
+    op.execute(
+        "UPDATE notifications SET last_notified_at = CASE WHEN read THEN created_at ELSE updated_at END"
+    )
+    with op.batch_alter_table("notifications") as batch_op:
+        batch_op.alter_column("last_notified_at", existing_type=sa.DateTime(), nullable=False)
+    op.drop_index("ix_notifications_user_updated", table_name="notifications")
+    op.create_index(
+        "ix_notifications_user_notified",
+        "notifications",
+        ["user_id", "last_notified_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_notified", table_name="notifications")
+    op.create_index(
+        "ix_notifications_user_updated",
+        "notifications",
+        ["user_id", "updated_at"],
+        unique=False,
+    )
+    op.drop_column("notifications", "last_notified_at")
@@ -0,0 +1,52 @@
+"""add cached equipment reliability statistics
+
+Revision ID: a07b3e8d2c61
+Revises: f85a2c6b1d49
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a07b3e8d2c61"
+down_revision: Union[str, None] = "f85a2c6b1d49"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "equipment_reliability",
+        sa.Column("equipment_id", sa.Integer(), nullable=False),
+        sa.Column("failure_count", sa.Integer(), nullable=False),
+        sa.Column("repair_count", sa.Integer(), nullable=False),
+        sa.Column("total_repair_hours", sa.Float(), nullable=False),
+        sa.Column("total_uptime_hours", sa.Float(), nullable=False),
+        sa.Column("first_failure_at", sa.DateTime(), nullable=True),
+        sa.Column("last_failure_at", sa.DateTime(), nullable=True),
+        sa.Column("last_repair_hours", sa.Float(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["equipment_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_equipment_reliability_id", "equipment_reliability", ["id"], unique=False)
+    op.create_index("ix_equipment_reliability_equipment_id", "equipment_reliability", ["equipment_id"], unique=True)
+
+    # Failure history scans read corrective/emergency orders per equipment in time order
+    op.create_index(
+        "ix_work_orders_equipment_type_created",
+        "work_orders",
+        ["equipment_id", "work_order_type", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_work_orders_equipment_type_created", table_name="work_orders")
+    op.drop_index("ix_equipment_reliability_equipment_id", table_name="equipment_reliability")
+    op.drop_index("ix_equipment_reliability_id", table_name="equipment_reliability")
+    op.drop_table("equipment_reliability")
@@ -0,0 +1,51 @@
+"""add inventory category closure table
+
+Revision ID: a6d1e94c8f27
+Revises: f5c0d83b7e16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a6d1e94c8f27"
+down_revision: Union[str, None] = "f5c0d83b7e16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_category_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["inventory_categories.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["inventory_categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(
+        op.f("ix_inventory_category_closure_descendant_id"), "inventory_category_closure", ["descendant_id"],
+        unique=False
+    )
+
+    # Backfill from the existing parent links
+    op.execute(
+        """
+        INSERT INTO inventory_category_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM inventory_categories
+            UNION ALL
+            SELECT paths.ancestor_id, inventory_categories.id, paths.depth + 1
+            FROM paths JOIN inventory_categories ON inventory_categories.parent_id = paths.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM paths
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_inventory_category_closure_descendant_id"), table_name="inventory_category_closure")
+    op.drop_table("inventory_category_closure")
@@ -0,0 +1,40 @@
+"""add maintained inventory aggregate counters
+
+Revision ID: af9d73a1e2f3
+Revises: 9e5f8a2c4b71
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "af9d73a1e2f3"
+down_revision: Union[str, None] = "9e5f8a2c4b71"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "inventory_aggregates",
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.Column("total_value", sa.Float(), nullable=False),
+        sa.Column("low_stock_count", sa.Integer(), nullable=False),
+        sa.Column("out_of_stock_count", sa.Integer(), nullable=False),
+        sa.Column("reconciled_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["category_id"], ["inventory_categories.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("category_id"),
+    )
+    op.create_index("ix_inventory_aggregates_id", "inventory_aggregates", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_aggregates_id", table_name="inventory_aggregates")
+    op.drop_table("inventory_aggregates")
@@ -0,0 +1,86 @@
+"""add append-only equipment state timeline
+
+Revision ID: b18c4f9e3d72
+Revises: a07b3e8d2c61
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "b18c4f9e3d72"
+down_revision: Union[str, None] = "a07b3e8d2c61"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def existing_enum(*values: str, name: str) -> sa.types.TypeEngine:
+    """Reference an enum type created by an earlier revision without recreating it."""
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "equipment_state_changes",
+        sa.Column("equipment_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "event",
+            sa.Enum("STATUS", "WORK_STARTED", "WORK_ENDED", name="equipmentstateevent"),
+            nullable=False,
+        ),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("work_order_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "status",
+            existing_enum("OPERATIONAL", "MAINTENANCE", "BREAKDOWN", "RETIRED", name="equipmentstatus"),
+            nullable=False,
+        ),
+        sa.Column("active_work_orders", sa.Integer(), nullable=False),
+        sa.Column("is_down", sa.Boolean(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["equipment_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["work_order_id"], ["work_orders.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_equipment_state_changes_id", "equipment_state_changes", ["id"], unique=False)
+    op.create_index(
+        "ix_equipment_state_changes_equipment_occurred",
+        "equipment_state_changes",
+        ["equipment_id", "occurred_at"],
+        unique=False,
+    )
+    op.create_index("ix_equipment_state_changes_occurred_at", "equipment_state_changes", ["occurred_at"], unique=False)
+
+    # Open the timeline with every asset's current state; earlier history is unknown
+    op.execute(
+        """
+        INSERT INTO equipment_state_changes
+            (equipment_id, event, occurred_at, work_order_id, status, active_work_orders, is_down, created_at, updated_at)
+        SELECT e.id, 'STATUS', now() AT TIME ZONE 'utc', NULL, e.status,
+               COALESCE(w.active, 0),
+               e.status IN ('MAINTENANCE', 'BREAKDOWN') OR COALESCE(w.active, 0) > 0,
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM equipment e
+        LEFT JOIN (
+            SELECT equipment_id, COUNT(*) AS active
+            FROM work_orders
+            WHERE status = 'IN_PROGRESS' AND equipment_id IS NOT NULL
+            GROUP BY equipment_id
+        ) w ON w.equipment_id = e.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_equipment_state_changes_occurred_at", table_name="equipment_state_changes")
+    op.drop_index("ix_equipment_state_changes_equipment_occurred", table_name="equipment_state_changes")
+    op.drop_index("ix_equipment_state_changes_id", table_name="equipment_state_changes")
+    op.drop_table("equipment_state_changes")
+    sa.Enum(name="equipmentstateevent").drop(op.get_bind(), checkfirst=True)
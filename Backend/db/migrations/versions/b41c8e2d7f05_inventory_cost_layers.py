@@ -0,0 +1,56 @@
+"""add inventory cost layers and costed transactions
+
+Revision ID: b41c8e2d7f05
+Revises: af9d73a1e2f3
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b41c8e2d7f05"
+down_revision: Union[str, None] = "af9d73a1e2f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("inventory_transactions", sa.Column("total_cost", sa.Float(), nullable=True))
+    op.create_index(
+        "ix_inventory_transactions_item_created",
+        "inventory_transactions",
+        ["item_id", "created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "inventory_cost_layers",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column("received_quantity", sa.Float(), nullable=False),
+        sa.Column("remaining_quantity", sa.Float(), nullable=False),
+        sa.Column("unit_cost", sa.Float(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["transaction_id"], ["inventory_transactions.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_inventory_cost_layers_id", "inventory_cost_layers", ["id"], unique=False)
+    op.create_index(
+        "ix_inventory_cost_layers_item_open",
+        "inventory_cost_layers",
+        ["item_id", "remaining_quantity", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_cost_layers_item_open", table_name="inventory_cost_layers")
+    op.drop_index("ix_inventory_cost_layers_id", table_name="inventory_cost_layers")
+    op.drop_table("inventory_cost_layers")
+    op.drop_index("ix_inventory_transactions_item_created", table_name="inventory_transactions")
+    op.drop_column("inventory_transactions", "total_cost")
@@ -0,0 +1,24 @@
+"""add due date to production orders
+
+Revision ID: b7e2fa5d9038
+Revises: a6d1e94c8f27
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b7e2fa5d9038"
+down_revision: Union[str, None] = "a6d1e94c8f27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("production_orders", sa.Column("due_date", sa.String(length=30), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("production_orders", "due_date")
@@ -0,0 +1,122 @@
+"""add equipment meters, compact reading storage, rollups and trigger rules
+
+Revision ID: c29d5a0f4e83
+Revises: b18c4f9e3d72
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "c29d5a0f4e83"
+down_revision: Union[str, None] = "b18c4f9e3d72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def existing_enum(*values: str, name: str) -> sa.types.TypeEngine:
+    """Reference an enum type created by an earlier revision without recreating it."""
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "equipment_meters",
+        sa.Column("equipment_id", sa.Integer(), nullable=False),
+        sa.Column("code", sa.String(length=100), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column(
+            "meter_type",
+            sa.Enum("RUNTIME_HOURS", "CYCLE_COUNT", "SENSOR", name="metertype"),
+            nullable=False,
+        ),
+        sa.Column("unit", sa.String(length=50), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=True),
+        sa.Column("last_recorded_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["equipment_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("equipment_id", "code", name="uq_equipment_meters_equipment_code"),
+    )
+    op.create_index("ix_equipment_meters_id", "equipment_meters", ["id"], unique=False)
+    op.create_index("ix_equipment_meters_equipment_id", "equipment_meters", ["equipment_id"], unique=False)
+
+    # Compact time series: the composite primary key is the only index
+    op.create_table(
+        "meter_readings",
+        sa.Column("meter_id", sa.Integer(), nullable=False),
+        sa.Column("recorded_at", sa.DateTime(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["meter_id"], ["equipment_meters.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("meter_id", "recorded_at"),
+    )
+
+    op.create_table(
+        "meter_reading_rollups",
+        sa.Column("meter_id", sa.Integer(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("bucket_seconds", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("min_value", sa.Float(), nullable=False),
+        sa.Column("max_value", sa.Float(), nullable=False),
+        sa.Column("sum_value", sa.Float(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["meter_id"], ["equipment_meters.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("meter_id", "bucket_start"),
+    )
+
+    op.create_table(
+        "meter_rules",
+        sa.Column("meter_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column(
+            "rule_type",
+            sa.Enum("ABOVE", "BELOW", "RATE_OF_CHANGE", name="meterruletype"),
+            nullable=False,
+        ),
+        sa.Column("threshold", sa.Float(), nullable=False),
+        sa.Column("cooldown_minutes", sa.Integer(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("work_order_type", existing_enum(
+            "PREVENTIVE", "CORRECTIVE", "PREDICTIVE", "EMERGENCY", "MODIFICATION", "INSPECTION",
+            name="workordertype"
+        ), nullable=False),
+        sa.Column("priority", existing_enum("LOW", "MEDIUM", "HIGH", "URGENT", name="workorderpriority"), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("in_alarm", sa.Boolean(), nullable=False),
+        sa.Column("last_value", sa.Float(), nullable=True),
+        sa.Column("last_recorded_at", sa.DateTime(), nullable=True),
+        sa.Column("last_triggered_at", sa.DateTime(), nullable=True),
+        sa.Column("last_work_order_id", sa.Integer(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["meter_id"], ["equipment_meters.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["last_work_order_id"], ["work_orders.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_meter_rules_id", "meter_rules", ["id"], unique=False)
+    op.create_index("ix_meter_rules_meter_id", "meter_rules", ["meter_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_meter_rules_meter_id", table_name="meter_rules")
+    op.drop_index("ix_meter_rules_id", table_name="meter_rules")
+    op.drop_table("meter_rules")
+    op.drop_table("meter_reading_rollups")
+    op.drop_table("meter_readings")
+    op.drop_index("ix_equipment_meters_equipment_id", table_name="equipment_meters")
+    op.drop_index("ix_equipment_meters_id", table_name="equipment_meters")
+    op.drop_table("equipment_meters")
+    sa.Enum(name="meterruletype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="metertype").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,50 @@
+"""add inventory balance checkpoints
+
+Revision ID: c52d9f3e8a16
+Revises: b41c8e2d7f05
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c52d9f3e8a16"
+down_revision: Union[str, None] = "b41c8e2d7f05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_inventory_transactions_created_at",
+        "inventory_transactions",
+        ["created_at"],
+        unique=False,
+    )
+
+    op.create_table(
+        "inventory_balance_checkpoints",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("as_of", sa.DateTime(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("item_id", "as_of", name="uq_inventory_balance_checkpoints_item_as_of"),
+    )
+    op.create_index("ix_inventory_balance_checkpoints_id", "inventory_balance_checkpoints", ["id"], unique=False)
+    op.create_index(
+        "ix_inventory_balance_checkpoints_as_of", "inventory_balance_checkpoints", ["as_of"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_balance_checkpoints_as_of", table_name="inventory_balance_checkpoints")
+    op.drop_index("ix_inventory_balance_checkpoints_id", table_name="inventory_balance_checkpoints")
+    op.drop_table("inventory_balance_checkpoints")
+    op.drop_index("ix_inventory_transactions_created_at", table_name="inventory_transactions")
@@ -0,0 +1,49 @@
+"""add per-shift production OEE table
+
+Revision ID: c8f3a0b6e149
+Revises: b7e2fa5d9038
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c8f3a0b6e149"
+down_revision: Union[str, None] = "b7e2fa5d9038"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "production_shift_oee",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("production_line_id", sa.Integer(), nullable=False),
+        sa.Column("shift_id", sa.Integer(), nullable=True),
+        sa.Column("window_start", sa.DateTime(), nullable=False),
+        sa.Column("window_end", sa.DateTime(), nullable=False),
+        sa.Column("scheduled_minutes", sa.Float(), nullable=False),
+        sa.Column("planned_stop_minutes", sa.Float(), nullable=False),
+        sa.Column("downtime_minutes", sa.Float(), nullable=False),
+        sa.Column("ideal_quantity", sa.Float(), nullable=False),
+        sa.Column("produced_quantity", sa.Float(), nullable=False),
+        sa.Column("defect_quantity", sa.Float(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["production_line_id"], ["production_lines.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["shift_id"], ["shifts.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_production_shift_oee_id"), "production_shift_oee", ["id"], unique=False)
+    op.create_index("ix_production_shift_oee_line_day", "production_shift_oee", ["production_line_id", "day"], unique=False)
+    op.create_index("ix_production_shift_oee_day", "production_shift_oee", ["day"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_production_shift_oee_day", table_name="production_shift_oee")
+    op.drop_index("ix_production_shift_oee_line_day", table_name="production_shift_oee")
+    op.drop_index(op.f("ix_production_shift_oee_id"), table_name="production_shift_oee")
+    op.drop_table("production_shift_oee")
@@ -0,0 +1,88 @@
+"""add preventive maintenance plans and per-equipment schedules
+
+Revision ID: d3ae6b1f5c94
+Revises: c29d5a0f4e83
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "d3ae6b1f5c94"
+down_revision: Union[str, None] = "c29d5a0f4e83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def existing_enum(*values: str, name: str) -> sa.types.TypeEngine:
+    """Reference an enum type created by an earlier revision without recreating it."""
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pm_plans",
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("equipment_id", sa.Integer(), nullable=True),
+        sa.Column("equipment_category", sa.String(length=100), nullable=True),
+        sa.Column("interval_days", sa.Integer(), nullable=True),
+        sa.Column("meter_code", sa.String(length=100), nullable=True),
+        sa.Column("meter_interval", sa.Float(), nullable=True),
+        sa.Column("start_date", sa.DateTime(), nullable=True),
+        sa.Column("lead_days", sa.Integer(), nullable=False),
+        sa.Column("priority", existing_enum("LOW", "MEDIUM", "HIGH", "URGENT", name="workorderpriority"), nullable=False),
+        sa.Column("estimated_hours", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["equipment_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_pm_plans_id", "pm_plans", ["id"], unique=False)
+    op.create_index("ix_pm_plans_equipment_id", "pm_plans", ["equipment_id"], unique=False)
+    op.create_index("ix_pm_plans_equipment_category", "pm_plans", ["equipment_category"], unique=False)
+
+    op.create_table(
+        "pm_schedules",
+        sa.Column("plan_id", sa.Integer(), nullable=False),
+        sa.Column("equipment_id", sa.Integer(), nullable=False),
+        sa.Column("next_due_date", sa.DateTime(), nullable=True),
+        sa.Column("next_due_meter", sa.Float(), nullable=True),
+        sa.Column("last_generated_at", sa.DateTime(), nullable=True),
+        sa.Column("last_work_order_id", sa.Integer(), nullable=True),
+        sa.Column("last_meter_value", sa.Float(), nullable=True),
+        sa.Column("last_meter_at", sa.DateTime(), nullable=True),
+        sa.Column("meter_usage_per_day", sa.Float(), nullable=True),
+        sa.Column("generated_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["plan_id"], ["pm_plans.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["equipment_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["last_work_order_id"], ["work_orders.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("plan_id", "equipment_id", name="uq_pm_schedules_plan_equipment"),
+    )
+    op.create_index("ix_pm_schedules_id", "pm_schedules", ["id"], unique=False)
+    op.create_index("ix_pm_schedules_equipment_id", "pm_schedules", ["equipment_id"], unique=False)
+    op.create_index("ix_pm_schedules_next_due_date", "pm_schedules", ["next_due_date"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pm_schedules_next_due_date", table_name="pm_schedules")
+    op.drop_index("ix_pm_schedules_equipment_id", table_name="pm_schedules")
+    op.drop_index("ix_pm_schedules_id", table_name="pm_schedules")
+    op.drop_table("pm_schedules")
+    op.drop_index("ix_pm_plans_equipment_category", table_name="pm_plans")
+    op.drop_index("ix_pm_plans_equipment_id", table_name="pm_plans")
+    op.drop_index("ix_pm_plans_id", table_name="pm_plans")
+    op.drop_table("pm_plans")
@@ -0,0 +1,154 @@
+"""add daily report rollup tables
+
+Revision ID: d63e0a4f9b27
+Revises: c52d9f3e8a16
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "d63e0a4f9b27"
+down_revision: Union[str, None] = "c52d9f3e8a16"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def existing_enum(*values: str, name: str) -> sa.types.TypeEngine:
+    """Reference an enum type created by an earlier revision without recreating it."""
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), "postgresql"
+    )
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "work_order_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("work_order_type", existing_enum(
+            "PREVENTIVE", "CORRECTIVE", "PREDICTIVE", "EMERGENCY", "MODIFICATION", "INSPECTION",
+            name="workordertype"
+        ), nullable=False),
+        sa.Column("priority", existing_enum("LOW", "MEDIUM", "HIGH", "URGENT", name="workorderpriority"), nullable=False),
+        sa.Column("status", existing_enum(
+            "PENDING", "ASSIGNED", "IN_PROGRESS", "ON_HOLD", "COMPLETED", "CANCELLED", name="workorderstatus"
+        ), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("actual_hours", sa.Float(), nullable=False),
+        sa.Column("actual_hours_count", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("day", "work_order_type", "priority", "status", name="uq_work_order_daily_rollups_key"),
+    )
+    op.create_index("ix_work_order_daily_rollups_id", "work_order_daily_rollups", ["id"], unique=False)
+
+    op.create_table(
+        "inventory_transaction_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("transaction_type", existing_enum(
+            "RECEIPT", "ISSUE", "TRANSFER", "ADJUSTMENT", "RETURN", "SCRAP", name="transactiontype"
+        ), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("day", "transaction_type", name="uq_inventory_transaction_daily_rollups_key"),
+    )
+    op.create_index(
+        "ix_inventory_transaction_daily_rollups_id", "inventory_transaction_daily_rollups", ["id"], unique=False
+    )
+
+    op.create_table(
+        "production_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("production_line_id", sa.Integer(), nullable=False),
+        sa.Column("status", existing_enum(
+            "PENDING", "IN_PROGRESS", "PAUSED", "COMPLETED", "CANCELLED", name="productionorderstatus"
+        ), nullable=False),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.Column("produced_quantity", sa.Float(), nullable=False),
+        sa.Column("efficiency_sum", sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["production_line_id"], ["production_lines.id"], ondelete="CASCADE"),
+        sa.UniqueConstraint("day", "production_line_id", "status", name="uq_production_daily_rollups_key"),
+    )
+    op.create_index("ix_production_daily_rollups_id", "production_daily_rollups", ["id"], unique=False)
+
+    op.create_table(
+        "quality_inspection_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("result", existing_enum("PASS", "FAIL", "CONDITIONAL", "PENDING", name="inspectionresult"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("day", "result", name="uq_quality_inspection_daily_rollups_key"),
+    )
+    op.create_index(
+        "ix_quality_inspection_daily_rollups_id", "quality_inspection_daily_rollups", ["id"], unique=False
+    )
+
+    op.create_table(
+        "ncr_daily_rollups",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("severity", existing_enum("CRITICAL", "MAJOR", "MINOR", name="ncrseverity"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("day", "severity", name="uq_ncr_daily_rollups_key"),
+    )
+    op.create_index("ix_ncr_daily_rollups_id", "ncr_daily_rollups", ["id"], unique=False)
+
+    op.create_table(
+        "report_rollup_watermarks",
+        sa.Column("rollup", sa.String(length=50), nullable=False),
+        sa.Column("watermark", sa.DateTime(), nullable=False),
+        sa.Column("covered_through", sa.Date(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("rollup"),
+    )
+    op.create_index("ix_report_rollup_watermarks_id", "report_rollup_watermarks", ["id"], unique=False)
+
+    op.create_table(
+        "report_rollup_dirty_days",
+        sa.Column("rollup", sa.String(length=50), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *_timestamps(),
+        sa.UniqueConstraint("rollup", "day", name="uq_report_rollup_dirty_days_key"),
+    )
+    op.create_index("ix_report_rollup_dirty_days_id", "report_rollup_dirty_days", ["id"], unique=False)
+
+    # Incremental refresh scans each fact table by updated_at
+    op.create_index("ix_work_orders_updated_at", "work_orders", ["updated_at"], unique=False)
+    op.create_index("ix_inventory_transactions_updated_at", "inventory_transactions", ["updated_at"], unique=False)
+    op.create_index("ix_production_orders_updated_at", "production_orders", ["updated_at"], unique=False)
+    op.create_index("ix_quality_inspections_updated_at", "quality_inspections", ["updated_at"], unique=False)
+    op.create_index("ix_non_conformance_reports_updated_at", "non_conformance_reports", ["updated_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_non_conformance_reports_updated_at", table_name="non_conformance_reports")
+    op.drop_index("ix_quality_inspections_updated_at", table_name="quality_inspections")
+    op.drop_index("ix_production_orders_updated_at", table_name="production_orders")
+    op.drop_index("ix_inventory_transactions_updated_at", table_name="inventory_transactions")
+    op.drop_index("ix_work_orders_updated_at", table_name="work_orders")
+
+    for table in (
+        "report_rollup_dirty_days",
+        "report_rollup_watermarks",
+        "ncr_daily_rollups",
+        "quality_inspection_daily_rollups",
+        "production_daily_rollups",
+        "inventory_transaction_daily_rollups",
+        "work_order_daily_rollups",
+    ):
+        op.drop_index(f"ix_{table}_id", table_name=table)
+        op.drop_table(table)
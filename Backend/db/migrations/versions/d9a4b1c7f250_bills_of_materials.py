@@ -0,0 +1,91 @@
+"""add bills of materials and routing operations
+
+Revision ID: d9a4b1c7f250
+Revises: c8f3a0b6e149
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d9a4b1c7f250"
+down_revision: Union[str, None] = "c8f3a0b6e149"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "bills_of_materials",
+        sa.Column("product_code", sa.String(length=100), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=True),
+        sa.Column("output_quantity", sa.Float(), nullable=False),
+        sa.Column("revision", sa.String(length=20), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"]),
+        sa.UniqueConstraint("item_id"),
+    )
+    op.create_index(op.f("ix_bills_of_materials_id"), "bills_of_materials", ["id"], unique=False)
+    op.create_index(op.f("ix_bills_of_materials_product_code"), "bills_of_materials", ["product_code"], unique=True)
+
+    op.create_table(
+        "bill_of_materials_lines",
+        sa.Column("bom_id", sa.Integer(), nullable=False),
+        sa.Column("component_item_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("scrap_percent", sa.Float(), nullable=False),
+        sa.Column("sequence", sa.Integer(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["bom_id"], ["bills_of_materials.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["component_item_id"], ["inventory_items.id"]),
+    )
+    op.create_index(op.f("ix_bill_of_materials_lines_id"), "bill_of_materials_lines", ["id"], unique=False)
+    op.create_index(op.f("ix_bill_of_materials_lines_bom_id"), "bill_of_materials_lines", ["bom_id"], unique=False)
+    op.create_index(
+        op.f("ix_bill_of_materials_lines_component_item_id"), "bill_of_materials_lines", ["component_item_id"], unique=False
+    )
+
+    op.create_table(
+        "routing_operations",
+        sa.Column("bom_id", sa.Integer(), nullable=False),
+        sa.Column("sequence", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=200), nullable=False),
+        sa.Column("production_line_id", sa.Integer(), nullable=True),
+        sa.Column("station_id", sa.Integer(), nullable=True),
+        sa.Column("setup_minutes", sa.Float(), nullable=False),
+        sa.Column("run_minutes_per_unit", sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["bom_id"], ["bills_of_materials.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["production_line_id"], ["production_lines.id"]),
+        sa.ForeignKeyConstraint(["station_id"], ["production_line_equipment.id"]),
+    )
+    op.create_index(op.f("ix_routing_operations_id"), "routing_operations", ["id"], unique=False)
+    op.create_index(op.f("ix_routing_operations_bom_id"), "routing_operations", ["bom_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_routing_operations_bom_id"), table_name="routing_operations")
+    op.drop_index(op.f("ix_routing_operations_id"), table_name="routing_operations")
+    op.drop_table("routing_operations")
+    op.drop_index(op.f("ix_bill_of_materials_lines_component_item_id"), table_name="bill_of_materials_lines")
+    op.drop_index(op.f("ix_bill_of_materials_lines_bom_id"), table_name="bill_of_materials_lines")
+    op.drop_index(op.f("ix_bill_of_materials_lines_id"), table_name="bill_of_materials_lines")
+    op.drop_table("bill_of_materials_lines")
+    op.drop_index(op.f("ix_bills_of_materials_product_code"), table_name="bills_of_materials")
+    op.drop_index(op.f("ix_bills_of_materials_id"), table_name="bills_of_materials")
+    op.drop_table("bills_of_materials")
@@ -0,0 +1,61 @@
+"""add stock reservation ledger and reserved quantity counter
+
+Revision ID: e1b5c2d8a364
+Revises: d9a4b1c7f250
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e1b5c2d8a364"
+down_revision: Union[str, None] = "d9a4b1c7f250"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "inventory_items",
+        sa.Column("reserved_quantity", sa.Float(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "stock_reservations",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("source_type", sa.Enum("SALES_ORDER", "REQUISITION", name="reservationsource"), nullable=False),
+        sa.Column("source_id", sa.Integer(), nullable=False),
+        sa.Column("source_line_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "event",
+            sa.Enum("RESERVE", "CONSUME", "RELEASE", "ADJUST", name="reservationevent"),
+            nullable=False,
+        ),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("reference", sa.String(length=100), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_stock_reservations_id"), "stock_reservations", ["id"], unique=False)
+    op.create_index(
+        "ix_stock_reservations_source_line", "stock_reservations", ["source_type", "source_line_id"], unique=False
+    )
+    op.create_index("ix_stock_reservations_source", "stock_reservations", ["source_type", "source_id"], unique=False)
+    op.create_index("ix_stock_reservations_item_created", "stock_reservations", ["item_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_reservations_item_created", table_name="stock_reservations")
+    op.drop_index("ix_stock_reservations_source", table_name="stock_reservations")
+    op.drop_index("ix_stock_reservations_source_line", table_name="stock_reservations")
+    op.drop_index(op.f("ix_stock_reservations_id"), table_name="stock_reservations")
+    op.drop_table("stock_reservations")
+    sa.Enum(name="reservationevent").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="reservationsource").drop(op.get_bind(), checkfirst=True)
+    op.drop_column("inventory_items", "reserved_quantity")
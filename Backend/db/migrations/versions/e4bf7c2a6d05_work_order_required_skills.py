@@ -0,0 +1,31 @@
+"""add required skills to work orders
+
+Revision ID: e4bf7c2a6d05
+Revises: d3ae6b1f5c94
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e4bf7c2a6d05"
+down_revision: Union[str, None] = "d3ae6b1f5c94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "work_order_skills",
+        sa.Column("work_order_id", sa.Integer(), nullable=False),
+        sa.Column("skill_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["work_order_id"], ["work_orders.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["skill_id"], ["skills.id"]),
+        sa.PrimaryKeyConstraint("work_order_id", "skill_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("work_order_skills")
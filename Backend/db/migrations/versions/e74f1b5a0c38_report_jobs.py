@@ -0,0 +1,64 @@
+"""add asynchronous report jobs and content-addressed results
+
+Revision ID: e74f1b5a0c38
+Revises: d63e0a4f9b27
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e74f1b5a0c38"
+down_revision: Union[str, None] = "d63e0a4f9b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_results",
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("content", sa.JSON(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("content_hash"),
+    )
+    op.create_index("ix_report_results_id", "report_results", ["id"], unique=False)
+
+    op.create_table(
+        "report_jobs",
+        sa.Column("report_type", sa.String(length=100), nullable=False),
+        sa.Column("parameters", sa.JSON(), nullable=True),
+        sa.Column("params_hash", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.Enum("QUEUED", "RUNNING", "COMPLETED", "FAILED", name="reportjobstatus"), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("result_hash", sa.String(length=64), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("requested_by", sa.Integer(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["result_hash"], ["report_results.content_hash"]),
+        sa.ForeignKeyConstraint(["requested_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_report_jobs_id", "report_jobs", ["id"], unique=False)
+    op.create_index("ix_report_jobs_params_hash", "report_jobs", ["params_hash"], unique=False)
+    op.create_index("ix_report_jobs_status", "report_jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_jobs_status", table_name="report_jobs")
+    op.drop_index("ix_report_jobs_params_hash", table_name="report_jobs")
+    op.drop_index("ix_report_jobs_id", table_name="report_jobs")
+    op.drop_table("report_jobs")
+    op.drop_index("ix_report_results_id", table_name="report_results")
+    op.drop_table("report_results")
+    sa.Enum(name="reportjobstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,114 @@
+"""add stock locations, per-location balances and location ledger
+
+Revision ID: f2c6d3e9b475
+Revises: e1b5c2d8a364
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f2c6d3e9b475"
+down_revision: Union[str, None] = "e1b5c2d8a364"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_locations",
+        sa.Column("code", sa.String(length=100), nullable=False),
+        sa.Column("warehouse", sa.String(length=100), nullable=False),
+        sa.Column("zone", sa.String(length=50), nullable=True),
+        sa.Column("bin", sa.String(length=50), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_stock_locations_id"), "stock_locations", ["id"], unique=False)
+    op.create_index(op.f("ix_stock_locations_code"), "stock_locations", ["code"], unique=True)
+    op.create_index(op.f("ix_stock_locations_warehouse"), "stock_locations", ["warehouse"], unique=False)
+
+    op.create_table(
+        "inventory_location_balances",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("location_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["location_id"], ["stock_locations.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("item_id", "location_id", name="uq_inventory_location_balances_item_location"),
+    )
+    op.create_index(op.f("ix_inventory_location_balances_id"), "inventory_location_balances", ["id"], unique=False)
+    op.create_index(
+        "ix_inventory_location_balances_item",
+        "inventory_location_balances",
+        ["item_id", "location_id", "quantity"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_inventory_location_balances_location",
+        "inventory_location_balances",
+        ["location_id", "item_id", "quantity"],
+        unique=False,
+    )
+
+    op.create_table(
+        "stock_location_movements",
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("location_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "movement_type",
+            sa.Enum("MOVEMENT", "TRANSFER_OUT", "TRANSFER_IN", name="locationmovementtype"),
+            nullable=False,
+        ),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("transaction_id", sa.Integer(), nullable=True),
+        sa.Column("reference_number", sa.String(length=100), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("performed_by", sa.Integer(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["location_id"], ["stock_locations.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["transaction_id"], ["inventory_transactions.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["performed_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_stock_location_movements_id"), "stock_location_movements", ["id"], unique=False)
+    op.create_index(
+        "ix_stock_location_movements_item_created", "stock_location_movements", ["item_id", "created_at"], unique=False
+    )
+    op.create_index(
+        "ix_stock_location_movements_location_created",
+        "stock_location_movements",
+        ["location_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_location_movements_location_created", table_name="stock_location_movements")
+    op.drop_index("ix_stock_location_movements_item_created", table_name="stock_location_movements")
+    op.drop_index(op.f("ix_stock_location_movements_id"), table_name="stock_location_movements")
+    op.drop_table("stock_location_movements")
+    sa.Enum(name="locationmovementtype").drop(op.get_bind(), checkfirst=True)
+    op.drop_index("ix_inventory_location_balances_location", table_name="inventory_location_balances")
+    op.drop_index("ix_inventory_location_balances_item", table_name="inventory_location_balances")
+    op.drop_index(op.f("ix_inventory_location_balances_id"), table_name="inventory_location_balances")
+    op.drop_table("inventory_location_balances")
+    op.drop_index(op.f("ix_stock_locations_warehouse"), table_name="stock_locations")
+    op.drop_index(op.f("ix_stock_locations_code"), table_name="stock_locations")
+    op.drop_index(op.f("ix_stock_locations_id"), table_name="stock_locations")
+    op.drop_table("stock_locations")
@@ -0,0 +1,48 @@
+"""add equipment hierarchy closure table
+
+Revision ID: f5c0d83b7e16
+Revises: e4bf7c2a6d05
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f5c0d83b7e16"
+down_revision: Union[str, None] = "e4bf7c2a6d05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "equipment_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["equipment.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(op.f("ix_equipment_closure_descendant_id"), "equipment_closure", ["descendant_id"], unique=False)
+
+    # Backfill from the existing parent links
+    op.execute(
+        """
+        INSERT INTO equipment_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE paths (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM equipment
+            UNION ALL
+            SELECT paths.ancestor_id, equipment.id, paths.depth + 1
+            FROM paths JOIN equipment ON equipment.parent_id = paths.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM paths
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_equipment_closure_descendant_id"), table_name="equipment_closure")
+    op.drop_table("equipment_closure")
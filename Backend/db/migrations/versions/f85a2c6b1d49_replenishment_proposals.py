@@ -0,0 +1,85 @@
+"""add replenishment proposals generated by the batch planner
+
+Revision ID: f85a2c6b1d49
+Revises: e74f1b5a0c38
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "f85a2c6b1d49"
+down_revision: Union[str, None] = "e74f1b5a0c38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "replenishment_proposals",
+        sa.Column("proposal_number", sa.String(length=100), nullable=False),
+        sa.Column("supplier", sa.String(length=200), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("DRAFT", "APPROVED", "CLOSED", "CANCELLED", name="replenishmentstatus"),
+            nullable=False,
+        ),
+        sa.Column("generated_at", sa.DateTime(), nullable=False),
+        sa.Column("line_count", sa.Integer(), nullable=False),
+        sa.Column("total_value", sa.Float(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("approved_by", sa.Integer(), nullable=True),
+        sa.Column("approved_at", sa.DateTime(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["approved_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_replenishment_proposals_id", "replenishment_proposals", ["id"], unique=False)
+    op.create_index(
+        "ix_replenishment_proposals_proposal_number", "replenishment_proposals", ["proposal_number"], unique=True
+    )
+    op.create_index("ix_replenishment_proposals_supplier", "replenishment_proposals", ["supplier"], unique=False)
+    op.create_index("ix_replenishment_proposals_status", "replenishment_proposals", ["status"], unique=False)
+
+    op.create_table(
+        "replenishment_proposal_lines",
+        sa.Column("proposal_id", sa.Integer(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.Column("on_hand", sa.Float(), nullable=False),
+        sa.Column("open_demand", sa.Float(), nullable=False),
+        sa.Column("on_order", sa.Float(), nullable=False),
+        sa.Column("reorder_point", sa.Float(), nullable=False),
+        sa.Column("target_quantity", sa.Float(), nullable=False),
+        sa.Column("proposed_quantity", sa.Float(), nullable=False),
+        sa.Column("unit_cost", sa.Float(), nullable=True),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["proposal_id"], ["replenishment_proposals.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["item_id"], ["inventory_items.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_replenishment_proposal_lines_id", "replenishment_proposal_lines", ["id"], unique=False)
+    op.create_index(
+        "ix_replenishment_proposal_lines_proposal_id", "replenishment_proposal_lines", ["proposal_id"], unique=False
+    )
+    op.create_index(
+        "ix_replenishment_proposal_lines_item_id", "replenishment_proposal_lines", ["item_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_replenishment_proposal_lines_item_id", table_name="replenishment_proposal_lines")
+    op.drop_index("ix_replenishment_proposal_lines_proposal_id", table_name="replenishment_proposal_lines")
+    op.drop_index("ix_replenishment_proposal_lines_id", table_name="replenishment_proposal_lines")
+    op.drop_table("replenishment_proposal_lines")
+    op.drop_index("ix_replenishment_proposals_status", table_name="replenishment_proposals")
+    op.drop_index("ix_replenishment_proposals_supplier", table_name="replenishment_proposals")
+    op.drop_index("ix_replenishment_proposals_proposal_number", table_name="replenishment_proposals")
+    op.drop_index("ix_replenishment_proposals_id", table_name="replenishment_proposals")
+    op.drop_table("replenishment_proposals")
+    sa.Enum(name="replenishmentstatus").drop(op.get_bind(), checkfirst=True)
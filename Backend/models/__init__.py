@@ -1,17 +1,25 @@
 from models.user import User, UserRole
 from models.company import Company, Facility, Department, Role
 from models.craftsman import Craftsman, Skill
-from models.equipment import Equipment, EquipmentStatus
+from models.equipment import (
+    Equipment, EquipmentStatus, EquipmentClosure, EquipmentReliability, EquipmentStateEvent, EquipmentStateChange
+)
 from models.inventory import (
-    InventoryItem, InventoryTransaction, InventoryCategory, TransactionType,
-    InventoryRequisition, InventoryRequisitionItem, RequisitionStatus,
-    RequisitionLineStatus, RequisitionPriority
+    InventoryItem, InventoryTransaction, InventoryCategory, InventoryCategoryClosure, InventoryAggregate, TransactionType,
+    InventoryCostLayer, CostingMethod, InventoryBalanceCheckpoint, InventoryRequisition, InventoryRequisitionItem, RequisitionStatus,
+    RequisitionLineStatus, RequisitionPriority, ReplenishmentStatus, ReplenishmentProposal, ReplenishmentProposalLine,
+    ReservationSource, ReservationEvent, StockReservation, StockLocation, InventoryLocationBalance, LocationMovementType,
+    StockLocationMovement, InventoryLot, InventoryLotMovement, GenealogyEdgeType, BatchGenealogyEdge
 )
 from models.work_order import WorkOrder, WorkOrderType, WorkOrderPriority, WorkOrderStatus
-from models.maintenance import MaintenanceReport, MaintenanceCatalogueItem, MaintenanceCatalogueItemType
+from models.meter import EquipmentMeter, MeterReading, MeterReadingRollup, MeterRule, MeterType, MeterRuleType
+from models.maintenance import (
+    MaintenanceReport, MaintenanceCatalogueItem, MaintenanceCatalogueItemType,
+    PreventiveMaintenancePlan, PreventiveMaintenanceSchedule
+)
 from models.production import (
     ProductionLine, ProductionLineEquipment, Shift, ProductionOrder, PackagingOrder,
-    ShiftType, ProductionLineStatus, ProductionOrderStatus
+    BillOfMaterials, BillOfMaterialsLine, RoutingOperation, ShiftType, ProductionLineStatus, ProductionOrderStatus
 )
 from models.quality import (
     QualityInspection, QualityInspectionItem, NonConformanceReport, QualityMetric,
@@ -22,7 +30,12 @@ from models.sales import (
     SalesOrderStatus, SalesOrderLineStatus, SalesOrderPriority,
     SalesInvoice, SalesInvoiceItem, SalesReceipt, SalesInvoiceStatus, PaymentMethod
 )
-from models.notification import Notification
+from models.notification import Notification, NotificationCounter
+from models.report_rollup import (
+    WorkOrderDailyRollup, InventoryTransactionDailyRollup, ProductionDailyRollup, ProductionShiftOEE,
+    QualityInspectionDailyRollup, NCRDailyRollup, ReportRollupWatermark, ReportRollupDirtyDay
+)
+from models.report_job import ReportJob, ReportJobStatus, ReportResult
 
 __all__ = [
     "User",
@@ -35,27 +48,61 @@ __all__ = [
     "Skill",
     "Equipment",
     "EquipmentStatus",
+    "EquipmentClosure",
+    "EquipmentReliability",
+    "EquipmentStateEvent",
+    "EquipmentStateChange",
     "InventoryItem",
     "InventoryTransaction",
     "InventoryCategory",
+    "InventoryCategoryClosure",
+    "InventoryAggregate",
     "TransactionType",
+    "InventoryCostLayer",
+    "CostingMethod",
+    "InventoryBalanceCheckpoint",
     "InventoryRequisition",
     "InventoryRequisitionItem",
     "RequisitionStatus",
     "RequisitionLineStatus",
     "RequisitionPriority",
+    "ReplenishmentStatus",
+    "ReplenishmentProposal",
+    "ReplenishmentProposalLine",
+    "ReservationSource",
+    "ReservationEvent",
+    "StockReservation",
+    "StockLocation",
+    "InventoryLocationBalance",
+    "LocationMovementType",
+    "StockLocationMovement",
+    "InventoryLot",
+    "InventoryLotMovement",
+    "GenealogyEdgeType",
+    "BatchGenealogyEdge",
     "WorkOrder",
     "WorkOrderType",
     "WorkOrderPriority",
     "WorkOrderStatus",
+    "EquipmentMeter",
+    "MeterReading",
+    "MeterReadingRollup",
+    "MeterRule",
+    "MeterType",
+    "MeterRuleType",
     "MaintenanceReport",
     "MaintenanceCatalogueItem",
     "MaintenanceCatalogueItemType",
+    "PreventiveMaintenancePlan",
+    "PreventiveMaintenanceSchedule",
     "ProductionLine",
     "ProductionLineEquipment",
     "Shift",
     "ProductionOrder",
     "PackagingOrder",
+    "BillOfMaterials",
+    "BillOfMaterialsLine",
+    "RoutingOperation",
     "ShiftType",
     "ProductionLineStatus",
     "ProductionOrderStatus",
@@ -79,4 +126,16 @@ __all__ = [
     "SalesInvoiceStatus",
     "PaymentMethod",
     "Notification",
+    "NotificationCounter",
+    "WorkOrderDailyRollup",
+    "InventoryTransactionDailyRollup",
+    "ProductionDailyRollup",
+    "ProductionShiftOEE",
+    "QualityInspectionDailyRollup",
+    "NCRDailyRollup",
+    "ReportRollupWatermark",
+    "ReportRollupDirtyDay",
+    "ReportJob",
+    "ReportJobStatus",
+    "ReportResult",
 ]
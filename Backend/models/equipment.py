@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from db.base import Base
 from models.base import BaseModel
@@ -13,6 +13,12 @@ class EquipmentStatus(str, enum.Enum):
     RETIRED = "retired"
 
 
+class EquipmentStateEvent(str, enum.Enum):
+    STATUS = "status"
+    WORK_STARTED = "work_started"
+    WORK_ENDED = "work_ended"
+
+
 class Equipment(Base, BaseModel):
     __tablename__ = "equipment"
     
@@ -37,3 +43,56 @@ class Equipment(Base, BaseModel):
     work_orders = relationship("WorkOrder", back_populates="equipment")
     maintenance_reports = relationship("MaintenanceReport", back_populates="equipment")
     operators = relationship("Craftsman", secondary=equipment_operators, back_populates="operated_equipment")
+
+
+class EquipmentClosure(Base):
+    """
+    Closure table of the equipment tree: one row per ancestor/descendant pair,
+    including each equipment paired with itself at depth 0. Maintained
+    alongside ``parent_id`` so whole subtrees are a single indexed join.
+    """
+    __tablename__ = "equipment_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+
+class EquipmentReliability(Base, BaseModel):
+    """
+    Cached failure statistics per equipment, kept current as corrective and
+    emergency work orders complete. MTBF and MTTR are derived from the sums.
+    """
+    __tablename__ = "equipment_reliability"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)
+    failure_count = Column(Integer, default=0, nullable=False)
+    repair_count = Column(Integer, default=0, nullable=False)  # Failures with a known repair duration
+    total_repair_hours = Column(Float, default=0.0, nullable=False)
+    total_uptime_hours = Column(Float, default=0.0, nullable=False)  # Between a repair and the next failure
+    first_failure_at = Column(DateTime, nullable=True)
+    last_failure_at = Column(DateTime, nullable=True)
+    last_repair_hours = Column(Float, nullable=True)
+
+
+class EquipmentStateChange(Base, BaseModel):
+    """
+    Append-only equipment timeline. Each row carries the full state after the
+    event, so a state holds from ``occurred_at`` until the equipment's next row.
+    """
+    __tablename__ = "equipment_state_changes"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False)
+    event = Column(SQLEnum(EquipmentStateEvent), nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    work_order_id = Column(Integer, ForeignKey("work_orders.id", ondelete="SET NULL"), nullable=True)
+
+    # State after the event
+    status = Column(SQLEnum(EquipmentStatus), nullable=False)
+    active_work_orders = Column(Integer, default=0, nullable=False)
+    is_down = Column(Boolean, default=False, nullable=False)
+
+    __table_args__ = (
+        Index("ix_equipment_state_changes_equipment_occurred", "equipment_id", "occurred_at"),
+        Index("ix_equipment_state_changes_occurred_at", "occurred_at"),
+    )
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Enum as SQLEnum, ForeignKey, Boolean, DateTime
+from sqlalchemy import (
+    Column, Integer, String, Float, Text, Enum as SQLEnum, ForeignKey, Boolean, Date, DateTime, Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from db.base import Base
 from models.base import BaseModel
@@ -21,6 +23,20 @@ class InventoryCategory(Base, BaseModel):
     items = relationship("InventoryItem", back_populates="category")
 
 
+class InventoryCategoryClosure(Base):
+    """
+    Closure table of the category tree: one row per ancestor/descendant pair,
+    including each category paired with itself at depth 0.
+    """
+    __tablename__ = "inventory_category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("inventory_categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(
+        Integer, ForeignKey("inventory_categories.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    depth = Column(Integer, nullable=False)
+
+
 class InventoryItem(Base, BaseModel):
     __tablename__ = "inventory_items"
     
@@ -30,6 +46,7 @@ class InventoryItem(Base, BaseModel):
     category_id = Column(Integer, ForeignKey("inventory_categories.id"), nullable=False)
     unit_of_measure = Column(String(20), nullable=False)
     quantity = Column(Float, default=0.0, nullable=False)
+    reserved_quantity = Column(Float, default=0.0, nullable=False)  # Maintained from stock_reservations
     min_quantity = Column(Float, nullable=True)
     max_quantity = Column(Float, nullable=True)
     reorder_point = Column(Float, nullable=True)
@@ -48,6 +65,25 @@ class InventoryItem(Base, BaseModel):
     requisition_items = relationship("InventoryRequisitionItem", back_populates="item")
 
 
+class InventoryAggregate(Base, BaseModel):
+    """
+    Maintained inventory counters per category, plus one global row (category_id NULL).
+
+    Updated in the same transaction as every item change or stock movement and
+    periodically reconciled against inventory_items.
+    """
+    __tablename__ = "inventory_aggregates"
+
+    category_id = Column(Integer, ForeignKey("inventory_categories.id", ondelete="CASCADE"), nullable=True, unique=True)
+    item_count = Column(Integer, default=0, nullable=False)
+    total_value = Column(Float, default=0.0, nullable=False)
+    low_stock_count = Column(Integer, default=0, nullable=False)
+    out_of_stock_count = Column(Integer, default=0, nullable=False)
+    reconciled_at = Column(DateTime, nullable=True)
+
+    category = relationship("InventoryCategory")
+
+
 class TransactionType(str, enum.Enum):
     RECEIPT = "receipt"
     ISSUE = "issue"
@@ -57,6 +93,11 @@ class TransactionType(str, enum.Enum):
     SCRAP = "scrap"
 
 
+class CostingMethod(str, enum.Enum):
+    FIFO = "fifo"
+    WEIGHTED_AVERAGE = "weighted_average"
+
+
 class InventoryTransaction(Base, BaseModel):
     __tablename__ = "inventory_transactions"
     
@@ -64,6 +105,7 @@ class InventoryTransaction(Base, BaseModel):
     transaction_type = Column(SQLEnum(TransactionType), nullable=False)
     quantity = Column(Float, nullable=False)
     unit_cost = Column(Float, nullable=True)
+    total_cost = Column(Float, nullable=True)  # Extended cost of the movement at valuation cost
     reference_number = Column(String(100), nullable=True)
     notes = Column(Text, nullable=True)
     performed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -71,6 +113,174 @@ class InventoryTransaction(Base, BaseModel):
     # Relationships
     item = relationship("InventoryItem", back_populates="transactions")
 
+    __table_args__ = (
+        Index("ix_inventory_transactions_item_created", "item_id", "created_at"),
+        Index("ix_inventory_transactions_created_at", "created_at"),
+        Index("ix_inventory_transactions_updated_at", "updated_at"),
+    )
+
+
+class InventoryCostLayer(Base, BaseModel):
+    """A receipt cost layer, consumed first-in-first-out as stock is issued."""
+    __tablename__ = "inventory_cost_layers"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(Integer, ForeignKey("inventory_transactions.id", ondelete="SET NULL"), nullable=True)
+    received_quantity = Column(Float, nullable=False)
+    remaining_quantity = Column(Float, nullable=False)
+    unit_cost = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_inventory_cost_layers_item_open", "item_id", "remaining_quantity", "id"),
+    )
+
+
+class InventoryBalanceCheckpoint(Base, BaseModel):
+    """
+    Snapshot of an item's on-hand quantity and value at a period boundary.
+
+    The balance covers every ledger row created strictly before ``as_of``, so the
+    stock at any instant is the nearest checkpoint plus the ledger delta in between.
+    """
+    __tablename__ = "inventory_balance_checkpoints"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    as_of = Column(DateTime, nullable=False, index=True)
+    quantity = Column(Float, nullable=False)
+    value = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("item_id", "as_of", name="uq_inventory_balance_checkpoints_item_as_of"),
+    )
+
+
+class StockLocation(Base, BaseModel):
+    """A storage place for stock: a warehouse, optionally narrowed to a zone and bin."""
+    __tablename__ = "stock_locations"
+
+    code = Column(String(100), unique=True, index=True, nullable=False)
+    warehouse = Column(String(100), nullable=False, index=True)
+    zone = Column(String(50), nullable=True)
+    bin = Column(String(50), nullable=True)
+    description = Column(Text, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+
+class InventoryLocationBalance(Base, BaseModel):
+    """
+    Quantity of an item held at one location. Stock not held at any location
+    is the item's unassigned quantity; the item row keeps the overall total.
+    """
+    __tablename__ = "inventory_location_balances"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    location_id = Column(Integer, ForeignKey("stock_locations.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Float, default=0.0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("item_id", "location_id", name="uq_inventory_location_balances_item_location"),
+        # Both lookups are answered from the index alone
+        Index("ix_inventory_location_balances_item", "item_id", "location_id", "quantity"),
+        Index("ix_inventory_location_balances_location", "location_id", "item_id", "quantity"),
+    )
+
+
+class LocationMovementType(str, enum.Enum):
+    MOVEMENT = "movement"  # Part of a costed stock movement (transaction_id is set)
+    TRANSFER_OUT = "transfer_out"
+    TRANSFER_IN = "transfer_in"
+
+
+class StockLocationMovement(Base, BaseModel):
+    """Location ledger: each row moves an item's balance at one location."""
+    __tablename__ = "stock_location_movements"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    location_id = Column(Integer, ForeignKey("stock_locations.id", ondelete="CASCADE"), nullable=False)
+    movement_type = Column(SQLEnum(LocationMovementType), nullable=False)
+    quantity = Column(Float, nullable=False)
+    transaction_id = Column(Integer, ForeignKey("inventory_transactions.id", ondelete="SET NULL"), nullable=True)
+    reference_number = Column(String(100), nullable=True)
+    notes = Column(Text, nullable=True)
+    performed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_stock_location_movements_item_created", "item_id", "created_at"),
+        Index("ix_stock_location_movements_location_created", "location_id", "created_at"),
+    )
+
+
+class InventoryLot(Base, BaseModel):
+    """
+    A received lot (batch) of an item with its own expiry and remaining
+    quantity, held at one stock location. Stock not held in any lot is the
+    item's unlotted quantity.
+    """
+    __tablename__ = "inventory_lots"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    lot_number = Column(String(100), nullable=False)
+    expiry_date = Column(Date, nullable=True)
+    received_quantity = Column(Float, default=0.0, nullable=False)
+    quantity = Column(Float, default=0.0, nullable=False)
+    notes = Column(Text, nullable=True)
+    production_order_id = Column(Integer, ForeignKey("production_orders.id"), nullable=True, index=True)  # Producing batch
+    # Where the lot is held, fixed by its first receipt; unassigned stock when null
+    location_id = Column(Integer, ForeignKey("stock_locations.id", ondelete="SET NULL"), nullable=True, index=True)
+
+    item = relationship("InventoryItem")
+
+    __table_args__ = (
+        UniqueConstraint("item_id", "lot_number", name="uq_inventory_lots_item_lot_number"),
+        # FEFO allocation scans an item's lots in expiry order from this index
+        Index("ix_inventory_lots_item_expiry", "item_id", "expiry_date", "id", "quantity"),
+        Index("ix_inventory_lots_expiry", "expiry_date", "quantity"),
+    )
+
+
+class InventoryLotMovement(Base, BaseModel):
+    """Lot ledger: each row moves the remaining quantity of one lot."""
+    __tablename__ = "inventory_lot_movements"
+
+    lot_id = Column(Integer, ForeignKey("inventory_lots.id", ondelete="CASCADE"), nullable=False)
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Float, nullable=False)
+    transaction_id = Column(Integer, ForeignKey("inventory_transactions.id", ondelete="SET NULL"), nullable=True)
+    reference_number = Column(String(100), nullable=True)
+    performed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_inventory_lot_movements_lot_created", "lot_id", "created_at"),
+        Index("ix_inventory_lot_movements_transaction", "transaction_id"),
+    )
+
+
+class GenealogyEdgeType(str, enum.Enum):
+    INPUT = "input"  # Lot consumed by a production order
+    OUTPUT = "output"  # Lot produced by a production order
+    SHIPPED = "shipped"  # Lot issued to a sales order
+
+
+class BatchGenealogyEdge(Base, BaseModel):
+    """
+    Traceability graph between lots, production orders (batches) and sales
+    orders, one row per posting. Traces walk lot -> order -> lot hops.
+    """
+    __tablename__ = "batch_genealogy_edges"
+
+    edge_type = Column(SQLEnum(GenealogyEdgeType), nullable=False)
+    lot_id = Column(Integer, ForeignKey("inventory_lots.id", ondelete="CASCADE"), nullable=False)
+    production_order_id = Column(Integer, ForeignKey("production_orders.id", ondelete="CASCADE"), nullable=True)
+    sales_order_id = Column(Integer, ForeignKey("sales_orders.id", ondelete="CASCADE"), nullable=True)
+    quantity = Column(Float, nullable=False)
+    transaction_id = Column(Integer, ForeignKey("inventory_transactions.id", ondelete="SET NULL"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_batch_genealogy_edges_lot", "lot_id", "edge_type", "production_order_id"),
+        Index("ix_batch_genealogy_edges_order", "production_order_id", "edge_type", "lot_id"),
+        Index("ix_batch_genealogy_edges_sales_order", "sales_order_id"),
+    )
+
 
 class RequisitionStatus(str, enum.Enum):
     DRAFT = "draft"
@@ -157,3 +367,90 @@ class InventoryRequisitionItem(Base, BaseModel):
     # Relationships
     requisition = relationship("InventoryRequisition", back_populates="items")
     item = relationship("InventoryItem", back_populates="requisition_items")
+
+
+class ReservationSource(str, enum.Enum):
+    SALES_ORDER = "sales_order"
+    REQUISITION = "requisition"
+
+
+class ReservationEvent(str, enum.Enum):
+    RESERVE = "reserve"
+    CONSUME = "consume"  # Released by issuing the stock
+    RELEASE = "release"  # Released by cancellation
+    ADJUST = "adjust"  # Correction posted by reconciliation
+
+
+class StockReservation(Base, BaseModel):
+    """
+    Reservation ledger: each row moves the quantity reserved for one source line
+    (positive reserves, negative frees). An item's ``reserved_quantity`` is the
+    sum of its rows.
+    """
+    __tablename__ = "stock_reservations"
+
+    item_id = Column(Integer, ForeignKey("inventory_items.id", ondelete="CASCADE"), nullable=False)
+    source_type = Column(SQLEnum(ReservationSource), nullable=False)
+    source_id = Column(Integer, nullable=False)  # Sales order or requisition
+    source_line_id = Column(Integer, nullable=False)
+    event = Column(SQLEnum(ReservationEvent), nullable=False)
+    quantity = Column(Float, nullable=False)
+    reference = Column(String(100), nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_stock_reservations_source_line", "source_type", "source_line_id"),
+        Index("ix_stock_reservations_source", "source_type", "source_id"),
+        Index("ix_stock_reservations_item_created", "item_id", "created_at"),
+    )
+
+
+class ReplenishmentStatus(str, enum.Enum):
+    DRAFT = "draft"
+    APPROVED = "approved"
+    CLOSED = "closed"
+    CANCELLED = "cancelled"
+
+
+class ReplenishmentProposal(Base, BaseModel):
+    """A draft purchase document for one supplier, produced by the replenishment planner."""
+    __tablename__ = "replenishment_proposals"
+
+    proposal_number = Column(String(100), unique=True, index=True, nullable=False)
+    supplier = Column(String(200), nullable=True, index=True)
+    status = Column(SQLEnum(ReplenishmentStatus), default=ReplenishmentStatus.DRAFT, nullable=False, index=True)
+    generated_at = Column(DateTime, nullable=False)
+    line_count = Column(Integer, default=0, nullable=False)
+    total_value = Column(Float, default=0.0, nullable=False)
+    notes = Column(Text, nullable=True)
+
+    # Audit fields
+    approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    approved_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    lines = relationship(
+        "ReplenishmentProposalLine",
+        back_populates="proposal",
+        cascade="all, delete-orphan",
+        order_by="ReplenishmentProposalLine.id"
+    )
+    approver = relationship("User", foreign_keys=[approved_by])
+
+
+class ReplenishmentProposalLine(Base, BaseModel):
+    __tablename__ = "replenishment_proposal_lines"
+
+    proposal_id = Column(Integer, ForeignKey("replenishment_proposals.id", ondelete="CASCADE"), nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False, index=True)
+    on_hand = Column(Float, nullable=False)
+    open_demand = Column(Float, nullable=False)  # Reserved for confirmed sales orders and approved requisitions
+    on_order = Column(Float, nullable=False)  # Quantity on approved replenishment proposals
+    reorder_point = Column(Float, nullable=False)
+    target_quantity = Column(Float, nullable=False)
+    proposed_quantity = Column(Float, nullable=False)
+    unit_cost = Column(Float, nullable=True)
+
+    # Relationships
+    proposal = relationship("ReplenishmentProposal", back_populates="lines")
+    item = relationship("InventoryItem")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from db.base import Base
 from models.base import BaseModel
+from models.work_order import WorkOrderPriority
 import enum
 
 
@@ -72,3 +73,61 @@ class MaintenanceCatalogueItem(Base, BaseModel):
     notes = Column(Text, nullable=True)
 
     inventory_item = relationship("InventoryItem")
+
+
+class PreventiveMaintenancePlan(Base, BaseModel):
+    """
+    Recurring maintenance for one equipment or every equipment in a category.
+    Due on a calendar interval, a meter interval, or whichever comes first.
+    """
+    __tablename__ = "pm_plans"
+
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+
+    # Target: a single equipment or a whole category
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=True, index=True)
+    equipment_category = Column(String(100), nullable=True, index=True)
+
+    # Intervals
+    interval_days = Column(Integer, nullable=True)
+    meter_code = Column(String(100), nullable=True)  # EquipmentMeter.code on each targeted equipment
+    meter_interval = Column(Float, nullable=True)
+    start_date = Column(DateTime, nullable=True)  # First calendar due date
+    lead_days = Column(Integer, default=7, nullable=False)  # Work orders are raised this long before due
+
+    # Work order template
+    priority = Column(SQLEnum(WorkOrderPriority), default=WorkOrderPriority.MEDIUM, nullable=False)
+    estimated_hours = Column(Integer, nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Relationships
+    equipment = relationship("Equipment")
+    schedules = relationship("PreventiveMaintenanceSchedule", back_populates="plan", cascade="all, delete-orphan")
+
+
+class PreventiveMaintenanceSchedule(Base, BaseModel):
+    """Next due occurrence of a plan on one equipment, advanced each time a work order is generated."""
+    __tablename__ = "pm_schedules"
+
+    plan_id = Column(Integer, ForeignKey("pm_plans.id", ondelete="CASCADE"), nullable=False)
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    next_due_date = Column(DateTime, nullable=True)
+    next_due_meter = Column(Float, nullable=True)
+    last_generated_at = Column(DateTime, nullable=True)
+    last_work_order_id = Column(Integer, ForeignKey("work_orders.id", ondelete="SET NULL"), nullable=True)
+    # Meter reading when the schedule last reset, for estimating the usage rate in forecasts
+    last_meter_value = Column(Float, nullable=True)
+    last_meter_at = Column(DateTime, nullable=True)
+    meter_usage_per_day = Column(Float, nullable=True)  # Measured over the last completed meter cycle
+    generated_count = Column(Integer, default=0, nullable=False)
+
+    # Relationships
+    plan = relationship("PreventiveMaintenancePlan", back_populates="schedules")
+    equipment = relationship("Equipment")
+
+    __table_args__ = (
+        UniqueConstraint("plan_id", "equipment_id", name="uq_pm_schedules_plan_equipment"),
+        Index("ix_pm_schedules_next_due_date", "next_due_date"),
+    )
@@ -0,0 +1,99 @@
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Boolean, ForeignKey, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from db.base import Base
+from models.base import BaseModel
+from models.work_order import WorkOrderType, WorkOrderPriority
+import enum
+
+
+class MeterType(str, enum.Enum):
+    RUNTIME_HOURS = "runtime_hours"
+    CYCLE_COUNT = "cycle_count"
+    SENSOR = "sensor"
+
+
+class MeterRuleType(str, enum.Enum):
+    ABOVE = "above"                    # Value rises above the threshold
+    BELOW = "below"                    # Value falls below the threshold
+    RATE_OF_CHANGE = "rate_of_change"  # |change per hour| exceeds the threshold
+
+
+class EquipmentMeter(Base, BaseModel):
+    __tablename__ = "equipment_meters"
+
+    equipment_id = Column(Integer, ForeignKey("equipment.id", ondelete="CASCADE"), nullable=False, index=True)
+    code = Column(String(100), nullable=False)  # Unique per equipment, e.g. "runtime", "bearing_temp"
+    name = Column(String(200), nullable=False)
+    meter_type = Column(SQLEnum(MeterType), nullable=False)
+    unit = Column(String(50), nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    # Latest reading, maintained on ingestion
+    last_value = Column(Float, nullable=True)
+    last_recorded_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    equipment = relationship("Equipment")
+    rules = relationship("MeterRule", back_populates="meter", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("equipment_id", "code", name="uq_equipment_meters_equipment_code"),
+    )
+
+
+class MeterReading(Base):
+    """
+    Raw time-series readings. Deliberately compact: no surrogate id or audit
+    columns, keyed by meter and timestamp.
+    """
+    __tablename__ = "meter_readings"
+
+    meter_id = Column(Integer, ForeignKey("equipment_meters.id", ondelete="CASCADE"), primary_key=True)
+    recorded_at = Column(DateTime, primary_key=True)
+    value = Column(Float, nullable=False)
+
+
+class MeterReadingRollup(Base):
+    """Downsampled readings per meter and time bucket, kept after raw readings expire."""
+    __tablename__ = "meter_reading_rollups"
+
+    meter_id = Column(Integer, ForeignKey("equipment_meters.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    bucket_seconds = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    sum_value = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+
+
+class MeterRule(Base, BaseModel):
+    """
+    Condition-based trigger evaluated as readings stream in. Rules are edge
+    triggered: one work order when the condition starts holding, re-armed once
+    it clears, and never more often than the cooldown.
+    """
+    __tablename__ = "meter_rules"
+
+    meter_id = Column(Integer, ForeignKey("equipment_meters.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(200), nullable=False)
+    rule_type = Column(SQLEnum(MeterRuleType), nullable=False)
+    threshold = Column(Float, nullable=False)
+    cooldown_minutes = Column(Integer, default=60, nullable=False)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    # Work order to raise
+    work_order_type = Column(SQLEnum(WorkOrderType), default=WorkOrderType.CORRECTIVE, nullable=False)
+    priority = Column(SQLEnum(WorkOrderPriority), default=WorkOrderPriority.HIGH, nullable=False)
+    description = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    # Streaming state
+    in_alarm = Column(Boolean, default=False, nullable=False)
+    last_value = Column(Float, nullable=True)
+    last_recorded_at = Column(DateTime, nullable=True)
+    last_triggered_at = Column(DateTime, nullable=True)
+    last_work_order_id = Column(Integer, ForeignKey("work_orders.id", ondelete="SET NULL"), nullable=True)
+
+    # Relationships
+    meter = relationship("EquipmentMeter", back_populates="rules")
@@ -1,4 +1,6 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from db.base import Base
@@ -16,5 +18,24 @@ class Notification(Base, BaseModel):
     message = Column(Text, nullable=False)
     link = Column(String(500), nullable=True)
     read = Column(Boolean, default=False, nullable=False, index=True)
+    digest_count = Column(Integer, default=1, nullable=False)  # Repeats coalesced into this row
+    last_notified_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # Moved only by new events, not reads
 
     user = relationship("User", back_populates="notifications")
+
+    __table_args__ = (
+        Index("ix_notifications_digest", "user_id", "type", "link", "read"),
+        Index("ix_notifications_user_notified", "user_id", "last_notified_at"),
+    )
+
+
+class NotificationCounter(Base, BaseModel):
+    """
+    Maintained unread count per user, moved in the same transaction as every
+    notification insert, read or delete and periodically reconciled.
+    """
+
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    unread_count = Column(Integer, default=0, nullable=False)
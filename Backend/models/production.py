@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Boolean, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Boolean, Index, Enum as SQLEnum, JSON
 from sqlalchemy.orm import relationship
 from db.base import Base
 from models.base import BaseModel
@@ -123,6 +123,7 @@ class ProductionOrder(Base, BaseModel):
     # Schedule
     scheduled_start = Column(String(30), nullable=True)
     scheduled_end = Column(String(30), nullable=True)
+    due_date = Column(String(30), nullable=True)
     actual_start = Column(String(30), nullable=True)
     actual_end = Column(String(30), nullable=True)
     
@@ -141,6 +142,71 @@ class ProductionOrder(Base, BaseModel):
     quality_inspections = relationship("QualityInspection", back_populates="production_order")
     ncrs = relationship("NonConformanceReport", back_populates="production_order")
 
+    __table_args__ = (
+        Index("ix_production_orders_updated_at", "updated_at"),
+    )
+
+
+class BillOfMaterials(Base, BaseModel):
+    """
+    Components and routing for making a product.
+
+    Production orders find their BOM by ``product_code``; a BOM with an
+    ``item_id`` makes that inventory item, so the item is a sub-assembly
+    wherever it appears as a component.
+    """
+    __tablename__ = "bills_of_materials"
+
+    product_code = Column(String(100), unique=True, index=True, nullable=False)
+    name = Column(String(200), nullable=False)
+    item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=True, unique=True)
+    output_quantity = Column(Float, default=1.0, nullable=False)  # Quantity the component list yields
+    revision = Column(String(20), nullable=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    notes = Column(Text, nullable=True)
+
+    # Relationships
+    item = relationship("InventoryItem")
+    lines = relationship(
+        "BillOfMaterialsLine", back_populates="bom", cascade="all, delete-orphan",
+        order_by="BillOfMaterialsLine.sequence"
+    )
+    operations = relationship(
+        "RoutingOperation", back_populates="bom", cascade="all, delete-orphan",
+        order_by="RoutingOperation.sequence"
+    )
+
+
+class BillOfMaterialsLine(Base, BaseModel):
+    __tablename__ = "bill_of_materials_lines"
+
+    bom_id = Column(Integer, ForeignKey("bills_of_materials.id", ondelete="CASCADE"), nullable=False, index=True)
+    component_item_id = Column(Integer, ForeignKey("inventory_items.id"), nullable=False, index=True)
+    quantity = Column(Float, nullable=False)  # Per output_quantity of the parent
+    scrap_percent = Column(Float, default=0.0, nullable=False)
+    sequence = Column(Integer, default=0, nullable=False)
+    notes = Column(Text, nullable=True)
+
+    # Relationships
+    bom = relationship("BillOfMaterials", back_populates="lines")
+    component = relationship("InventoryItem")
+
+
+class RoutingOperation(Base, BaseModel):
+    """One step of making a BOM's product, on a line or one of its stations."""
+    __tablename__ = "routing_operations"
+
+    bom_id = Column(Integer, ForeignKey("bills_of_materials.id", ondelete="CASCADE"), nullable=False, index=True)
+    sequence = Column(Integer, nullable=False)
+    name = Column(String(200), nullable=False)
+    production_line_id = Column(Integer, ForeignKey("production_lines.id"), nullable=True)
+    station_id = Column(Integer, ForeignKey("production_line_equipment.id"), nullable=True)
+    setup_minutes = Column(Float, default=0.0, nullable=False)  # Once per order
+    run_minutes_per_unit = Column(Float, default=0.0, nullable=False)
+
+    # Relationships
+    bom = relationship("BillOfMaterials", back_populates="operations")
+
 
 class PackagingOrder(Base, BaseModel):
     __tablename__ = "packaging_orders"
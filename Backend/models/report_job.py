@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from db.base import Base
+from models.base import BaseModel
+import enum
+
+
+class ReportJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ReportJob(Base, BaseModel):
+    """A report computed in the background and polled by the client."""
+    __tablename__ = "report_jobs"
+
+    report_type = Column(String(100), nullable=False)
+    parameters = Column(JSON, nullable=True)
+    params_hash = Column(String(64), nullable=False, index=True)  # SHA-256 of report type + normalized parameters
+    status = Column(SQLEnum(ReportJobStatus), default=ReportJobStatus.QUEUED, nullable=False, index=True)
+    progress = Column(Integer, default=0, nullable=False)  # Percentage
+    result_hash = Column(String(64), ForeignKey("report_results.content_hash"), nullable=True)
+    error = Column(Text, nullable=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    stored_result = relationship("ReportResult")
+    requester = relationship("User")
+
+
+class ReportResult(Base, BaseModel):
+    """Report output stored once per distinct content, addressed by its SHA-256 hash."""
+    __tablename__ = "report_results"
+
+    content_hash = Column(String(64), unique=True, nullable=False)
+    content = Column(JSON, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
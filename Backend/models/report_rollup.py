@@ -0,0 +1,134 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Index, Enum as SQLEnum, UniqueConstraint
+from db.base import Base
+from models.base import BaseModel
+from models.inventory import TransactionType
+from models.work_order import WorkOrderType, WorkOrderPriority, WorkOrderStatus
+from models.production import ProductionOrderStatus
+from models.quality import InspectionResult, NCRSeverity
+
+
+class WorkOrderDailyRollup(Base, BaseModel):
+    """Work orders created per day by type, priority and status."""
+    __tablename__ = "work_order_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    work_order_type = Column(SQLEnum(WorkOrderType), nullable=False)
+    priority = Column(SQLEnum(WorkOrderPriority), nullable=False)
+    status = Column(SQLEnum(WorkOrderStatus), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    actual_hours = Column(Float, default=0.0, nullable=False)
+    actual_hours_count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "work_order_type", "priority", "status", name="uq_work_order_daily_rollups_key"),
+    )
+
+
+class InventoryTransactionDailyRollup(Base, BaseModel):
+    """Inventory ledger rows per day by transaction type."""
+    __tablename__ = "inventory_transaction_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    transaction_type = Column(SQLEnum(TransactionType), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+    quantity = Column(Float, default=0.0, nullable=False)
+    value = Column(Float, default=0.0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "transaction_type", name="uq_inventory_transaction_daily_rollups_key"),
+    )
+
+
+class ProductionDailyRollup(Base, BaseModel):
+    """Production orders created per day by line and status."""
+    __tablename__ = "production_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    production_line_id = Column(Integer, ForeignKey("production_lines.id", ondelete="CASCADE"), nullable=False)
+    status = Column(SQLEnum(ProductionOrderStatus), nullable=False)
+    order_count = Column(Integer, default=0, nullable=False)
+    produced_quantity = Column(Float, default=0.0, nullable=False)
+    efficiency_sum = Column(Float, default=0.0, nullable=False)  # Sum of per-order efficiency percentages
+
+    __table_args__ = (
+        UniqueConstraint("day", "production_line_id", "status", name="uq_production_daily_rollups_key"),
+    )
+
+
+class ProductionShiftOEE(Base, BaseModel):
+    """
+    OEE inputs of one shift window on one line.
+
+    Every measure is additive, so availability, performance and quality of
+    any line / shift / day grouping are ratios of summed rows.
+    """
+    __tablename__ = "production_shift_oee"
+
+    day = Column(Date, nullable=False)  # Day the shift window starts
+    production_line_id = Column(Integer, ForeignKey("production_lines.id", ondelete="CASCADE"), nullable=False)
+    shift_id = Column(Integer, ForeignKey("shifts.id", ondelete="SET NULL"), nullable=True)
+    window_start = Column(DateTime, nullable=False)
+    window_end = Column(DateTime, nullable=False)
+    scheduled_minutes = Column(Float, default=0.0, nullable=False)
+    planned_stop_minutes = Column(Float, default=0.0, nullable=False)  # Planned maintenance
+    downtime_minutes = Column(Float, default=0.0, nullable=False)  # Breakdowns outside planned stops
+    ideal_quantity = Column(Float, default=0.0, nullable=False)  # Run time at capacity_per_hour
+    produced_quantity = Column(Float, default=0.0, nullable=False)
+    defect_quantity = Column(Float, default=0.0, nullable=False)
+
+    __table_args__ = (
+        Index("ix_production_shift_oee_line_day", "production_line_id", "day"),
+        Index("ix_production_shift_oee_day", "day"),
+    )
+
+
+class QualityInspectionDailyRollup(Base, BaseModel):
+    """Quality inspections per inspection day by result."""
+    __tablename__ = "quality_inspection_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    result = Column(SQLEnum(InspectionResult), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "result", name="uq_quality_inspection_daily_rollups_key"),
+    )
+
+
+class NCRDailyRollup(Base, BaseModel):
+    """Non-conformance reports raised per day by severity."""
+    __tablename__ = "ncr_daily_rollups"
+
+    day = Column(Date, nullable=False)
+    severity = Column(SQLEnum(NCRSeverity), nullable=False)
+    count = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "severity", name="uq_ncr_daily_rollups_key"),
+    )
+
+
+class ReportRollupWatermark(Base, BaseModel):
+    """
+    Refresh state of one rollup table.
+
+    ``watermark`` is the ``updated_at`` position already folded in; full days
+    before ``covered_through`` can be read from the rollup.
+    """
+    __tablename__ = "report_rollup_watermarks"
+
+    rollup = Column(String(50), unique=True, nullable=False)
+    watermark = Column(DateTime, nullable=False)
+    covered_through = Column(Date, nullable=False)
+
+
+class ReportRollupDirtyDay(Base, BaseModel):
+    """A rollup day invalidated by a deletion, recomputed on the next refresh."""
+    __tablename__ = "report_rollup_dirty_days"
+
+    rollup = Column(String(50), nullable=False)
+    day = Column(Date, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("rollup", "day", name="uq_report_rollup_dirty_days_key"),
+    )
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, Table, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from db.base import Base
 from models.base import BaseModel
 import enum
 
+# Association table for skills a work order requires (many-to-many)
+work_order_skills = Table(
+    'work_order_skills',
+    Base.metadata,
+    Column('work_order_id', Integer, ForeignKey('work_orders.id', ondelete='CASCADE'), primary_key=True),
+    Column('skill_id', Integer, ForeignKey('skills.id'), primary_key=True)
+)
+
 
 class WorkOrderType(str, enum.Enum):
     PREVENTIVE = "preventive"
@@ -66,3 +74,13 @@ class WorkOrder(Base, BaseModel):
     craftsman = relationship("Craftsman", back_populates="work_orders", foreign_keys=[assigned_to])
     creator = relationship("User", back_populates="work_orders_created", foreign_keys=[created_by])
     maintenance_reports = relationship("MaintenanceReport", back_populates="work_order")
+    required_skills = relationship("Skill", secondary=work_order_skills, lazy="selectin")
+
+    @property
+    def required_skill_ids(self) -> list:
+        return [skill.id for skill in self.required_skills]
+
+    __table_args__ = (
+        Index("ix_work_orders_updated_at", "updated_at"),
+        Index("ix_work_orders_equipment_type_created", "equipment_id", "work_order_type", "created_at"),
+    )
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
-from models.equipment import EquipmentStatus
+from models.equipment import EquipmentStatus, EquipmentStateEvent
 
 
 class EquipmentBase(BaseModel):
@@ -41,3 +41,21 @@ class EquipmentResponse(EquipmentBase):
     
     class Config:
         from_attributes = True
+
+
+class EquipmentTreeNodeResponse(EquipmentResponse):
+    depth: int
+
+
+class EquipmentStateChangeResponse(BaseModel):
+    id: int
+    equipment_id: int
+    event: EquipmentStateEvent
+    occurred_at: datetime
+    work_order_id: Optional[int] = None
+    status: EquipmentStatus
+    active_work_orders: int
+    is_down: bool
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
-from models.inventory import RequisitionStatus, RequisitionLineStatus, RequisitionPriority
+from datetime import date, datetime
+from models.inventory import (
+    RequisitionStatus, RequisitionLineStatus, RequisitionPriority, ReplenishmentStatus, ReservationSource, ReservationEvent
+)
 
 
 # ==================== CATEGORY SCHEMAS ====================
@@ -34,7 +36,16 @@ class InventoryCategoryResponse(InventoryCategoryBase):
 
 
 class InventoryCategoryTree(InventoryCategoryResponse):
-    """Category with children for tree view"""
+    """Category with children for tree view, with its own and its subtree's stock totals"""
+    depth: int = 0
+    item_count: int = 0
+    stock_value: float = 0.0
+    low_stock_count: int = 0
+    out_of_stock_count: int = 0
+    subtree_item_count: int = 0
+    subtree_stock_value: float = 0.0
+    subtree_low_stock_count: int = 0
+    subtree_out_of_stock_count: int = 0
     children: List['InventoryCategoryTree'] = []
     
     class Config:
@@ -81,6 +92,7 @@ class InventoryItemUpdate(BaseModel):
 
 class InventoryItemResponse(InventoryItemBase):
     id: int
+    reserved_quantity: float = 0.0
     created_at: datetime
     updated_at: datetime
     
@@ -103,6 +115,7 @@ class InventoryTransactionBase(BaseModel):
     transaction_type: str  # TransactionType enum as string
     quantity: float
     unit_cost: Optional[float] = None
+    total_cost: Optional[float] = None
     reference_number: Optional[str] = None
     notes: Optional[str] = None
 
@@ -120,6 +133,227 @@ class InventoryTransactionResponse(InventoryTransactionBase):
         from_attributes = True
 
 
+# ==================== VALUATION SCHEMAS ====================
+
+class InventoryCostLayerResponse(BaseModel):
+    id: int
+    item_id: int
+    transaction_id: Optional[int] = None
+    received_quantity: float
+    remaining_quantity: float
+    unit_cost: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class InventoryValuationSummary(BaseModel):
+    method: str
+    layered_value: float
+    item_value: float
+
+
+class InventoryBalanceResponse(BaseModel):
+    item_id: int
+    item_code: str
+    name: str
+    unit_of_measure: str
+    quantity: float
+    value: float
+    checkpoint_as_of: Optional[datetime] = None
+
+
+class ReorderRecommendationResponse(BaseModel):
+    item_id: int
+    item_code: str
+    name: str
+    quantity: float
+    current_reorder_point: Optional[float] = None
+    current_min_quantity: Optional[float] = None
+    current_max_quantity: Optional[float] = None
+    daily_demand: float
+    demand_std: float
+    forecast_daily_demand: float
+    safety_stock: float
+    recommended_reorder_point: float
+    recommended_min_quantity: float
+    recommended_max_quantity: float
+
+
+# ==================== RESERVATION SCHEMAS ====================
+
+class AvailableToPromiseRequest(BaseModel):
+    item_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class AvailableToPromiseResponse(BaseModel):
+    item_id: int
+    item_code: str
+    name: str
+    unit_of_measure: str
+    on_hand: float
+    reserved: float
+    available: float
+
+
+class StockReservationResponse(BaseModel):
+    id: int
+    item_id: int
+    source_type: ReservationSource
+    source_id: int
+    source_line_id: int
+    event: ReservationEvent
+    quantity: float
+    reference: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# ==================== LOCATION SCHEMAS ====================
+
+class StockLocationBase(BaseModel):
+    code: str = Field(..., max_length=100)
+    warehouse: str = Field(..., max_length=100)
+    zone: Optional[str] = Field(None, max_length=50)
+    bin: Optional[str] = Field(None, max_length=50)
+    description: Optional[str] = None
+    is_active: bool = True
+
+
+class StockLocationCreate(StockLocationBase):
+    pass
+
+
+class StockLocationUpdate(BaseModel):
+    code: Optional[str] = Field(None, max_length=100)
+    warehouse: Optional[str] = Field(None, max_length=100)
+    zone: Optional[str] = Field(None, max_length=50)
+    bin: Optional[str] = Field(None, max_length=50)
+    description: Optional[str] = None
+    is_active: Optional[bool] = None
+
+
+class StockLocationResponse(StockLocationBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ItemLocationBalance(BaseModel):
+    location_id: int
+    code: str
+    warehouse: str
+    zone: Optional[str] = None
+    bin: Optional[str] = None
+    quantity: float
+
+
+class ItemLocationsResponse(BaseModel):
+    item_id: int
+    quantity: float
+    unassigned_quantity: float  # Stock not held at any location
+    locations: List[ItemLocationBalance]
+
+
+class LocationStockResponse(BaseModel):
+    item_id: int
+    item_code: str
+    name: str
+    unit_of_measure: str
+    quantity: float
+
+
+class InventoryTransferRequest(BaseModel):
+    quantity: float = Field(..., gt=0)
+    from_location_id: Optional[int] = None  # Unassigned stock when omitted
+    to_location_id: Optional[int] = None  # Back to unassigned stock when omitted
+    lot_id: Optional[int] = None  # Moves this whole lot; lotted stock only moves with its lot
+    reference: Optional[str] = Field(None, max_length=100)
+    notes: Optional[str] = None
+
+
+# ==================== LOT SCHEMAS ====================
+
+class InventoryLotResponse(BaseModel):
+    id: int
+    item_id: int
+    lot_number: str
+    expiry_date: Optional[date] = None
+    received_quantity: float
+    quantity: float
+    notes: Optional[str] = None
+    production_order_id: Optional[int] = None
+    location_id: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ExpiringLotResponse(BaseModel):
+    lot_id: int
+    item_id: int
+    item_code: str
+    name: str
+    unit_of_measure: str
+    lot_number: str
+    expiry_date: date
+    quantity: float
+    days_to_expiry: int  # Negative once expired
+
+
+class TraceLot(BaseModel):
+    lot_id: int
+    item_id: int
+    item_code: str
+    name: str
+    unit_of_measure: str
+    lot_number: str
+    expiry_date: Optional[date] = None
+    quantity: float
+    production_order_id: Optional[int] = None  # Batch that produced the lot
+    depth: int  # Production steps from the starting point
+
+
+class TraceProductionOrder(BaseModel):
+    production_order_id: int
+    order_number: str
+    product_name: str
+    product_code: Optional[str] = None
+    status: str
+
+
+class TraceEdge(BaseModel):
+    edge_type: str  # input: lot consumed by the order; output: lot produced by it
+    lot_id: int
+    production_order_id: int
+    quantity: float
+
+
+class TraceShipment(BaseModel):
+    lot_id: int
+    sales_order_id: int
+    order_number: str
+    customer_id: int
+    customer_name: str
+    quantity: float
+
+
+class LotTraceResponse(BaseModel):
+    direction: str
+    lots: List[TraceLot]
+    production_orders: List[TraceProductionOrder]
+    edges: List[TraceEdge]
+    shipments: List[TraceShipment]  # Forward traces only
+
+
 # ==================== REQUISITION SCHEMAS ====================
 
 class InventoryItemSummary(BaseModel):
@@ -256,3 +490,44 @@ class InventoryRequisitionFulfillmentLine(BaseModel):
 class InventoryRequisitionFulfillmentRequest(BaseModel):
     items: List[InventoryRequisitionFulfillmentLine] = Field(..., min_length=1)
     notes: Optional[str] = None
+
+
+# ==================== REPLENISHMENT SCHEMAS ====================
+
+class ReplenishmentProposalLineResponse(BaseModel):
+    id: int
+    proposal_id: int
+    item_id: int
+    on_hand: float
+    open_demand: float
+    on_order: float
+    reorder_point: float
+    target_quantity: float
+    proposed_quantity: float
+    unit_cost: Optional[float] = None
+    item: Optional[InventoryItemSummary] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReplenishmentProposalListResponse(BaseModel):
+    id: int
+    proposal_number: str
+    supplier: Optional[str] = None
+    status: ReplenishmentStatus
+    generated_at: datetime
+    line_count: int
+    total_value: float
+    notes: Optional[str] = None
+    approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ReplenishmentProposalResponse(ReplenishmentProposalListResponse):
+    lines: List[ReplenishmentProposalLineResponse] = []
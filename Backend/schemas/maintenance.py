@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 from models.maintenance import MaintenanceCatalogueItemType
+from models.work_order import WorkOrderPriority
 
 
 class MaintenanceReportBase(BaseModel):
@@ -107,3 +108,61 @@ class MaintenanceCatalogueItemResponse(MaintenanceCatalogueItemBase):
 
     class Config:
         from_attributes = True
+
+
+class PreventiveMaintenancePlanBase(BaseModel):
+    name: str = Field(..., max_length=200)
+    description: Optional[str] = None
+    equipment_id: Optional[int] = None
+    equipment_category: Optional[str] = Field(None, max_length=100)
+    interval_days: Optional[int] = Field(None, gt=0)
+    meter_code: Optional[str] = Field(None, max_length=100)
+    meter_interval: Optional[float] = Field(None, gt=0)
+    start_date: Optional[datetime] = None
+    lead_days: int = Field(7, ge=0)
+    priority: WorkOrderPriority = WorkOrderPriority.MEDIUM
+    estimated_hours: Optional[int] = Field(None, ge=0)
+    is_active: bool = True
+
+
+class PreventiveMaintenancePlanCreate(PreventiveMaintenancePlanBase):
+    pass
+
+
+class PreventiveMaintenancePlanUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=200)
+    description: Optional[str] = None
+    equipment_id: Optional[int] = None
+    equipment_category: Optional[str] = Field(None, max_length=100)
+    interval_days: Optional[int] = Field(None, gt=0)
+    meter_code: Optional[str] = Field(None, max_length=100)
+    meter_interval: Optional[float] = Field(None, gt=0)
+    start_date: Optional[datetime] = None
+    lead_days: Optional[int] = Field(None, ge=0)
+    priority: Optional[WorkOrderPriority] = None
+    estimated_hours: Optional[int] = Field(None, ge=0)
+    is_active: Optional[bool] = None
+
+
+class PreventiveMaintenancePlanResponse(PreventiveMaintenancePlanBase):
+    id: int
+    created_by: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PreventiveMaintenanceScheduleResponse(BaseModel):
+    id: int
+    plan_id: int
+    equipment_id: int
+    next_due_date: Optional[datetime] = None
+    next_due_meter: Optional[float] = None
+    last_generated_at: Optional[datetime] = None
+    last_work_order_id: Optional[int] = None
+    generated_count: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,107 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from models.meter import MeterType, MeterRuleType
+from models.work_order import WorkOrderType, WorkOrderPriority
+
+
+class EquipmentMeterBase(BaseModel):
+    code: str = Field(..., max_length=100)
+    name: str = Field(..., max_length=200)
+    meter_type: MeterType
+    unit: Optional[str] = Field(None, max_length=50)
+    is_active: bool = True
+
+
+class EquipmentMeterCreate(EquipmentMeterBase):
+    equipment_id: int
+
+
+class EquipmentMeterUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=200)
+    unit: Optional[str] = Field(None, max_length=50)
+    is_active: Optional[bool] = None
+
+
+class EquipmentMeterResponse(EquipmentMeterBase):
+    id: int
+    equipment_id: int
+    last_value: Optional[float] = None
+    last_recorded_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class MeterReadingResponse(BaseModel):
+    meter_id: int
+    recorded_at: datetime
+    value: float
+
+    class Config:
+        from_attributes = True
+
+
+class MeterReadingRollupResponse(BaseModel):
+    meter_id: int
+    bucket_start: datetime
+    bucket_seconds: int
+    count: int
+    min_value: float
+    max_value: float
+    sum_value: float
+    last_value: float
+
+    class Config:
+        from_attributes = True
+
+
+class MeterIngestResult(BaseModel):
+    received: int
+    accepted: int
+    rejected: int
+    work_orders: List[int] = []
+
+
+class MeterRuleBase(BaseModel):
+    name: str = Field(..., max_length=200)
+    rule_type: MeterRuleType
+    threshold: float
+    cooldown_minutes: int = Field(60, ge=0)
+    is_active: bool = True
+    work_order_type: WorkOrderType = WorkOrderType.CORRECTIVE
+    priority: WorkOrderPriority = WorkOrderPriority.HIGH
+    description: Optional[str] = None
+
+
+class MeterRuleCreate(MeterRuleBase):
+    pass
+
+
+class MeterRuleUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=200)
+    rule_type: Optional[MeterRuleType] = None
+    threshold: Optional[float] = None
+    cooldown_minutes: Optional[int] = Field(None, ge=0)
+    is_active: Optional[bool] = None
+    work_order_type: Optional[WorkOrderType] = None
+    priority: Optional[WorkOrderPriority] = None
+    description: Optional[str] = None
+
+
+class MeterRuleResponse(MeterRuleBase):
+    id: int
+    meter_id: int
+    created_by: int
+    in_alarm: bool
+    last_value: Optional[float] = None
+    last_recorded_at: Optional[datetime] = None
+    last_triggered_at: Optional[datetime] = None
+    last_work_order_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -11,7 +11,10 @@ class NotificationResponse(BaseModel):
     message: str
     link: Optional[str] = None
     read: bool
+    digest_count: int = 1
     created_at: datetime
+    updated_at: datetime
+    last_notified_at: datetime
 
     class Config:
         from_attributes = True
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from models.production import (
     ShiftType, ProductionLineStatus, ProductionOrderStatus
 )
@@ -117,6 +117,7 @@ class ProductionOrderBase(BaseModel):
     priority: int = Field(default=3, ge=1, le=5)
     scheduled_start: Optional[str] = None
     scheduled_end: Optional[str] = None
+    due_date: Optional[str] = None
     notes: Optional[str] = None
 
 
@@ -136,6 +137,7 @@ class ProductionOrderUpdate(BaseModel):
     priority: Optional[int] = None
     scheduled_start: Optional[str] = None
     scheduled_end: Optional[str] = None
+    due_date: Optional[str] = None
     shift_id: Optional[int] = None
     supervisor_id: Optional[int] = None
     notes: Optional[str] = None
@@ -161,6 +163,123 @@ class ProductionOrderResponse(ProductionOrderBase):
         from_attributes = True
 
 
+class ProductionOutputCreate(BaseModel):
+    quantity: float = Field(..., gt=0)
+    lot_number: str = Field(..., min_length=1, max_length=100)
+    expiry_date: Optional[date] = None
+    item_id: Optional[int] = None  # The item made by the order's BOM when omitted
+    location_id: Optional[int] = None
+    unit_cost: Optional[float] = Field(default=None, ge=0)
+    notes: Optional[str] = None
+
+
+class ProductionScheduleRequest(BaseModel):
+    line_ids: Optional[List[int]] = None  # All lines when omitted
+    order_ids: Optional[List[int]] = None  # All pending orders on those lines when omitted
+    start: Optional[datetime] = None  # Now when omitted
+    horizon_days: int = Field(default=14, ge=1, le=366)
+    improve: bool = True
+    dry_run: bool = True
+
+
+class ProductionSimulationStationOverride(BaseModel):
+    station_id: int
+    machines: Optional[int] = Field(None, ge=1, le=50)  # Parallel machines at the station
+    cycle_time_minutes: Optional[float] = Field(None, gt=0)
+    buffer_capacity: Optional[int] = Field(None, ge=0)  # Buffer in front of the station
+    mtbf_hours: Optional[float] = Field(None, gt=0)
+    mttr_hours: Optional[float] = Field(None, gt=0)
+
+
+class ProductionSimulationRequest(BaseModel):
+    hours: float = Field(default=168.0, gt=0, le=8760)
+    warmup_hours: float = Field(default=8.0, ge=0)
+    replications: int = Field(default=20, ge=1, le=1000)
+    buffer_capacity: int = Field(default=10, ge=0)
+    cycle_time_cv: float = Field(default=0.1, ge=0, le=2)
+    failures: bool = True
+    history_days: Optional[int] = Field(default=365, ge=1)
+    seed: Optional[int] = Field(default=None, ge=0)
+    stations: List[ProductionSimulationStationOverride] = []
+    compare_baseline: bool = True
+
+
+# Bill of Materials Schemas
+class BillOfMaterialsLineBase(BaseModel):
+    component_item_id: int
+    quantity: float = Field(..., gt=0)  # Per output_quantity of the parent
+    scrap_percent: float = Field(default=0.0, ge=0, lt=100)
+    sequence: int = 0
+    notes: Optional[str] = None
+
+
+class BillOfMaterialsLineResponse(BillOfMaterialsLineBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class RoutingOperationBase(BaseModel):
+    sequence: int
+    name: str = Field(..., max_length=200)
+    production_line_id: Optional[int] = None
+    station_id: Optional[int] = None
+    setup_minutes: float = Field(default=0.0, ge=0)
+    run_minutes_per_unit: float = Field(default=0.0, ge=0)
+
+
+class RoutingOperationResponse(RoutingOperationBase):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class BillOfMaterialsBase(BaseModel):
+    product_code: str = Field(..., max_length=100)
+    name: str = Field(..., max_length=200)
+    item_id: Optional[int] = None  # Set when the BOM makes a stocked sub-assembly
+    output_quantity: float = Field(default=1.0, gt=0)
+    revision: Optional[str] = Field(None, max_length=20)
+    is_active: bool = True
+    notes: Optional[str] = None
+
+
+class BillOfMaterialsCreate(BillOfMaterialsBase):
+    lines: List[BillOfMaterialsLineBase] = []
+    operations: List[RoutingOperationBase] = []
+
+
+class BillOfMaterialsUpdate(BaseModel):
+    product_code: Optional[str] = Field(None, max_length=100)
+    name: Optional[str] = Field(None, max_length=200)
+    item_id: Optional[int] = None
+    output_quantity: Optional[float] = Field(None, gt=0)
+    revision: Optional[str] = Field(None, max_length=20)
+    is_active: Optional[bool] = None
+    notes: Optional[str] = None
+    lines: Optional[List[BillOfMaterialsLineBase]] = None  # Replaces all lines when given
+    operations: Optional[List[RoutingOperationBase]] = None  # Replaces the routing when given
+
+
+class BillOfMaterialsResponse(BillOfMaterialsBase):
+    id: int
+    lines: List[BillOfMaterialsLineResponse] = []
+    operations: List[RoutingOperationResponse] = []
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class MrpRunRequest(BaseModel):
+    order_ids: Optional[List[int]] = None  # All open orders when omitted
+    line_ids: Optional[List[int]] = None
+    dry_run: bool = True
+
+
 # Packaging Order Schemas
 class PackagingOrderBase(BaseModel):
     product_name: str = Field(..., max_length=200)
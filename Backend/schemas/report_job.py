@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from models.report_job import ReportJobStatus
+
+
+class ReportJobCreate(BaseModel):
+    report_type: str
+    parameters: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ReportJobResponse(BaseModel):
+    id: int
+    report_type: str
+    parameters: Optional[Dict[str, Any]] = None
+    status: ReportJobStatus
+    progress: int
+    error: Optional[str] = None
+    result_hash: Optional[str] = None
+    result_url: Optional[str] = None
+    result: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from models.work_order import WorkOrderType, WorkOrderPriority, WorkOrderStatus
 
@@ -14,6 +14,7 @@ class WorkOrderBase(BaseModel):
     due_date: Optional[str] = None
     estimated_hours: Optional[float] = None
     notes: Optional[str] = None
+    required_skill_ids: List[int] = []
 
 
 class WorkOrderCreate(WorkOrderBase):
@@ -32,6 +33,7 @@ class WorkOrderUpdate(BaseModel):
     actual_hours: Optional[float] = None
     notes: Optional[str] = None
     completion_notes: Optional[str] = None
+    required_skill_ids: Optional[List[int]] = None
 
 
 class WorkOrderStatusUpdate(BaseModel):
@@ -43,6 +45,13 @@ class WorkOrderAssign(BaseModel):
     craftsman_id: int
 
 
+class WorkOrderAutoAssignRequest(BaseModel):
+    work_order_ids: Optional[List[int]] = None  # Default: every pending, unassigned work order
+    craftsman_ids: Optional[List[int]] = None  # Default: every craftsman with an active user
+    horizon_days: int = Field(7, ge=1, le=60)
+    dry_run: bool = True
+
+
 class WorkOrderResponse(WorkOrderBase):
     id: int
     work_order_number: str
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Measure meter reading ingestion throughput against the configured database.
+
+Creates a throwaway equipment with a set of meters, ingests synthetic readings
+in batches through the same decode and ingest path as the API, reports
+readings per second, then removes everything it created.
+
+Usage:
+    python scripts/benchmark_meter_ingest.py
+    python scripts/benchmark_meter_ingest.py --readings 500000 --batch 20000 --meters 200 --format msgpack
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add Backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import delete
+from db.session import SessionLocal
+from models.equipment import Equipment
+from models.meter import EquipmentMeter, MeterReading, MeterType
+from services import meter_service
+
+
+def encode(batch, fmt: str) -> tuple:
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(batch), "application/msgpack"
+    return "\n".join(json.dumps(reading) for reading in batch).encode(), "application/x-ndjson"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ICMS meter reading ingestion")
+    parser.add_argument("--readings", type=int, default=200000, help="Total readings to ingest")
+    parser.add_argument("--batch", type=int, default=10000, help="Readings per request")
+    parser.add_argument("--meters", type=int, default=100, help="Number of meters to spread readings over")
+    parser.add_argument("--format", choices=["ndjson", "msgpack"], default="ndjson")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    equipment = Equipment(name="Ingestion benchmark", equipment_id=f"BENCH-{uuid.uuid4().hex[:8]}")
+    db.add(equipment)
+    db.flush()
+    meters = [
+        EquipmentMeter(equipment_id=equipment.id, code=f"m{index}", name=f"Meter {index}", meter_type=MeterType.SENSOR)
+        for index in range(args.meters)
+    ]
+    db.add_all(meters)
+    db.commit()
+    meter_ids = [meter.id for meter in meters]
+
+    start = datetime.utcnow() - timedelta(days=1)
+    payloads = []
+    for offset in range(0, args.readings, args.batch):
+        batch = [
+            [meter_ids[index % len(meter_ids)], (start + timedelta(milliseconds=index)).isoformat(), float(index % 997)]
+            for index in range(offset, min(offset + args.batch, args.readings))
+        ]
+        payloads.append(encode(batch, args.format))
+
+    accepted = 0
+    try:
+        began = time.perf_counter()
+        for body, content_type in payloads:
+            accepted += meter_service.ingest_readings(db, meter_service.decode_readings(body, content_type))["accepted"]
+        elapsed = time.perf_counter() - began
+    finally:
+        db.execute(delete(MeterReading.__table__).where(MeterReading.meter_id.in_(meter_ids)))
+        db.execute(delete(EquipmentMeter.__table__).where(EquipmentMeter.id.in_(meter_ids)))
+        db.execute(delete(Equipment.__table__).where(Equipment.id == equipment.id))
+        db.commit()
+        db.close()
+
+    print(f"{accepted} readings in {elapsed:.2f}s ({accepted / elapsed:,.0f} readings/s, "
+          f"{args.format}, batches of {args.batch})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
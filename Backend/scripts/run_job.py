@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Run a registered background job once, e.g. from cron or a sidecar container.
+
+Usage:
+    python scripts/run_job.py --list
+    python scripts/run_job.py inventory_aggregates_reconcile
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add Backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.scheduler import scheduler
+from services.scheduled_jobs import register_jobs
+
+
+def main() -> int:
+    register_jobs(scheduler)
+    parser = argparse.ArgumentParser(description="Run an ICMS background job once")
+    parser.add_argument("job", nargs="?", help="Job name")
+    parser.add_argument("--list", action="store_true", help="List registered jobs")
+    args = parser.parse_args()
+
+    if args.list or not args.job:
+        for job in scheduler.jobs():
+            print(f"{job.name}\tevery {job.interval_seconds}s")
+        return 0
+
+    try:
+        job = next(job for job in scheduler.jobs() if job.name == args.job)
+    except StopIteration:
+        print(f"Unknown job: {args.job}", file=sys.stderr)
+        return 2
+
+    result = scheduler.run_job(job.name)
+    if job.last_error:
+        print(f"✗ {job.name} failed: {job.last_error}", file=sys.stderr)
+        return 1
+    print(f"✓ {job.name} completed: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Sidecar worker for report jobs, for deployments that run the API with
+REPORT_JOB_WORKERS=0. Polls the report_jobs table; no message broker needed.
+
+Usage:
+    python scripts/run_report_worker.py [--poll-seconds 2] [--once]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add Backend to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.session import SessionLocal
+from services.report_job_service import process_queued_jobs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run ICMS report jobs")
+    parser.add_argument("--poll-seconds", type=float, default=2.0, help="Delay between polls when idle")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+    args = parser.parse_args()
+
+    print("✓ Report worker started")
+    try:
+        while True:
+            with SessionLocal() as db:
+                processed = process_queued_jobs(db)
+            if processed:
+                print(f"✓ Processed {processed} report job(s)")
+            elif args.once:
+                return 0
+            else:
+                time.sleep(args.poll_seconds)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, func, select, update
+from models.craftsman import Craftsman, craftsman_skills, equipment_operators
+from models.production import Shift
+from models.user import User
+from models.work_order import WorkOrder, WorkOrderPriority, WorkOrderStatus, work_order_skills
+from services.shift_calendar_service import shift_hours
+
+DEFAULT_ORDER_HOURS = 2.0  # For work orders without an estimate
+DEFAULT_SHIFT_HOURS = 8.0  # Weekday availability of craftsmen not on any shift
+OPEN_STATUSES = [WorkOrderStatus.ASSIGNED, WorkOrderStatus.IN_PROGRESS]
+
+PRIORITY_URGENCY = {
+    WorkOrderPriority.LOW: 0.0,
+    WorkOrderPriority.MEDIUM: 1.0,
+    WorkOrderPriority.HIGH: 2.0,
+    WorkOrderPriority.URGENT: 4.0,
+}
+DUE_URGENCY = 2.0  # Added as the due date approaches within the horizon, more when overdue
+LOAD_WEIGHT = 1.5  # Cost of filling a craftsman's capacity
+OPERATOR_WEIGHT = 0.75  # Cost of sending someone who does not operate the equipment
+SPECIALIST_WEIGHT = 0.25  # Cost of using skills the order does not need
+INFEASIBLE = 1e9
+
+
+def _capacity_hours(db: Session, craftsman_ids: List[int], horizon_days: int) -> np.ndarray:
+    """Rostered hours per craftsman over the horizon, from active shifts; weekday days for the unrostered."""
+    weekdays = Counter((date.today() + timedelta(days=offset)).weekday() for offset in range(horizon_days))
+    position = {craftsman_id: index for index, craftsman_id in enumerate(craftsman_ids)}
+    capacity = np.zeros(len(craftsman_ids))
+    rostered = np.zeros(len(craftsman_ids), dtype=bool)
+
+    for shift in db.query(Shift).filter(Shift.is_active.is_(True)).all():
+        days = shift.active_days if shift.active_days is not None else range(7)
+        hours = shift_hours(shift) * sum(weekdays[day] for day in days)
+        members = set(shift.operators or [])
+        if shift.team_leader_id:
+            members.add(shift.team_leader_id)
+        for craftsman_id in members:
+            index = position.get(craftsman_id)
+            if index is not None:
+                capacity[index] += hours
+                rostered[index] = True
+
+    capacity[~rostered] = DEFAULT_SHIFT_HOURS * sum(weekdays[day] for day in range(5))
+    return capacity
+
+
+def _due_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def _membership(pairs, row_index: dict, column_index: dict, shape) -> np.ndarray:
+    """Boolean matrix from (row key, column key) pairs, ignoring keys outside the indexes."""
+    matrix = np.zeros(shape, dtype=bool)
+    rows = [(row_index[row], column_index[column]) for row, column in pairs if row in row_index and column in column_index]
+    if rows:
+        matrix[tuple(np.array(rows).T)] = True
+    return matrix
+
+
+def plan_assignments(
+    db: Session,
+    work_order_ids: Optional[List[int]] = None,
+    craftsman_ids: Optional[List[int]] = None,
+    horizon_days: int = 7,
+    dry_run: bool = True
+) -> dict:
+    """
+    Assign pending work orders to craftsmen as a min-cost assignment problem.
+
+    A craftsman qualifies for an order when they hold every required skill
+    and have enough rostered hours left in the horizon after their open work.
+    The cost of a pairing grows with how full the craftsman would be, whether
+    they operate the order's equipment and how many unneeded skills they
+    hold, and falls with the order's urgency (priority, due date), so when
+    capacity is short the urgent orders win.
+
+    Each round solves one order per craftsman over the full cost matrix with
+    the Hungarian method, then charges the assigned hours and re-prices the
+    load term for the next round. With ``dry_run`` the plan is returned
+    without assigning anything.
+    """
+    query = db.query(
+        WorkOrder.id, WorkOrder.work_order_number, WorkOrder.priority, WorkOrder.due_date,
+        WorkOrder.equipment_id, WorkOrder.estimated_hours
+    ).filter(WorkOrder.status == WorkOrderStatus.PENDING, WorkOrder.assigned_to.is_(None))
+    if work_order_ids is not None:
+        query = query.filter(WorkOrder.id.in_(work_order_ids))
+    orders = query.order_by(WorkOrder.id).all()
+
+    query = db.query(Craftsman.id, Craftsman.employee_id).join(User, User.id == Craftsman.user_id).filter(
+        User.is_active.is_(True)
+    )
+    if craftsman_ids is not None:
+        query = query.filter(Craftsman.id.in_(craftsman_ids))
+    craftsmen = query.order_by(Craftsman.id).all()
+
+    result = {"dry_run": dry_run, "horizon_days": horizon_days, "assignments": [], "unassigned": [], "craftsmen": []}
+    if not orders:
+        return result
+
+    order_ids = [order.id for order in orders]
+    people = [craftsman.id for craftsman in craftsmen]
+    order_index = {order_id: index for index, order_id in enumerate(order_ids)}
+    craftsman_index = {craftsman_id: index for index, craftsman_id in enumerate(people)}
+    n_orders, n_craftsmen = len(orders), len(people)
+
+    # Skills as boolean matrices: an order is infeasible for a craftsman missing any required skill
+    required_pairs = db.execute(select(work_order_skills.c.work_order_id, work_order_skills.c.skill_id).where(
+        work_order_skills.c.work_order_id.in_(order_ids)
+    )).all()
+    held_pairs = db.execute(select(craftsman_skills.c.craftsman_id, craftsman_skills.c.skill_id)).all()
+    skill_ids = sorted({skill_id for _, skill_id in required_pairs} | {skill_id for _, skill_id in held_pairs})
+    skill_index = {skill_id: index for index, skill_id in enumerate(skill_ids)}
+    required = _membership(required_pairs, order_index, skill_index, (n_orders, len(skill_ids))).astype(np.float32)
+    held = _membership(held_pairs, craftsman_index, skill_index, (n_craftsmen, len(skill_ids))).astype(np.float32)
+    missing_skills = required @ (1 - held).T > 0
+    extra_skills = held.sum(axis=1)[None, :] - required @ held.T
+    extra_skills /= max(float(extra_skills.max()), 1.0) if extra_skills.size else 1.0
+
+    # Operator qualification on the order's equipment
+    equipment_ids = sorted({order.equipment_id for order in orders if order.equipment_id is not None})
+    equipment_index = {equipment_id: index for index, equipment_id in enumerate(equipment_ids)}
+    operator_pairs = db.execute(select(equipment_operators.c.equipment_id, equipment_operators.c.craftsman_id).where(
+        equipment_operators.c.equipment_id.in_(equipment_ids)
+    )).all() if equipment_ids else []
+    operates = np.vstack([
+        _membership(operator_pairs, equipment_index, craftsman_index, (len(equipment_ids), n_craftsmen)),
+        np.zeros((1, n_craftsmen), dtype=bool)  # Orders without equipment
+    ])
+    order_equipment = np.array([equipment_index.get(order.equipment_id, len(equipment_ids)) for order in orders])
+    operator = operates[order_equipment]
+
+    # Urgency: priority plus proximity of the due date within the horizon
+    today = date.today()
+    hours = np.array([float(order.estimated_hours or DEFAULT_ORDER_HOURS) for order in orders])
+    urgency = np.array([PRIORITY_URGENCY.get(order.priority, 1.0) for order in orders])
+    days_to_due = np.array([
+        (due - today).days if (due := _due_date(order.due_date)) else np.inf for order in orders
+    ], dtype=np.float64)
+    urgency += DUE_URGENCY * np.clip(1 - days_to_due / horizon_days, 0, 2)
+
+    # Capacity and current open workload
+    capacity = _capacity_hours(db, people, horizon_days)
+    open_hours = np.zeros(n_craftsmen)
+    for craftsman_id, total in db.query(
+        WorkOrder.assigned_to, func.sum(func.coalesce(WorkOrder.estimated_hours, DEFAULT_ORDER_HOURS))
+    ).filter(WorkOrder.status.in_(OPEN_STATUSES), WorkOrder.assigned_to.in_(people)).group_by(WorkOrder.assigned_to):
+        open_hours[craftsman_index[craftsman_id]] = float(total)
+    planned_hours = np.zeros(n_craftsmen)
+
+    static_cost = OPERATOR_WEIGHT * ~operator + SPECIALIST_WEIGHT * extra_skills - urgency[:, None]
+    static_cost[missing_skills] = INFEASIBLE
+    assigned_to = np.full(n_orders, -1)
+    assigned_cost = np.zeros(n_orders)
+    pending = np.arange(n_orders)
+
+    while len(pending) and n_craftsmen:
+        load = open_hours + planned_hours
+        remaining = capacity - load
+        with np.errstate(divide="ignore", invalid="ignore"):
+            load_after = (load[None, :] + hours[pending, None]) / capacity[None, :]
+        cost = static_cost[pending] + LOAD_WEIGHT * load_after
+        cost[(hours[pending, None] > remaining[None, :]) | ~np.isfinite(cost)] = INFEASIBLE
+
+        rows, columns = linear_sum_assignment(cost)
+        feasible = cost[rows, columns] < INFEASIBLE / 2
+        rows, columns = rows[feasible], columns[feasible]
+        if not len(rows):
+            break
+        orders_assigned = pending[rows]
+        assigned_to[orders_assigned] = columns
+        assigned_cost[orders_assigned] = cost[rows, columns]
+        np.add.at(planned_hours, columns, hours[orders_assigned])
+        pending = np.delete(pending, rows)
+
+    for index, order in enumerate(orders):
+        craftsman = assigned_to[index]
+        if craftsman >= 0:
+            result["assignments"].append({
+                "work_order_id": order.id,
+                "work_order_number": order.work_order_number,
+                "craftsman_id": people[craftsman],
+                "employee_id": craftsmen[craftsman].employee_id,
+                "estimated_hours": float(hours[index]),
+                "operates_equipment": bool(operator[index, craftsman]),
+                "cost": round(float(assigned_cost[index]), 4),
+            })
+        else:
+            result["unassigned"].append({
+                "work_order_id": order.id,
+                "work_order_number": order.work_order_number,
+                "reason": "no craftsman has the required skills"
+                if not n_craftsmen or missing_skills[index].all() else "no qualified craftsman has capacity",
+            })
+    result["craftsmen"] = [
+        {
+            "craftsman_id": craftsman_id,
+            "employee_id": craftsmen[index].employee_id,
+            "capacity_hours": round(float(capacity[index]), 2),
+            "open_hours": round(float(open_hours[index]), 2),
+            "planned_hours": round(float(planned_hours[index]), 2),
+        }
+        for index, craftsman_id in enumerate(people)
+    ]
+
+    if not dry_run and result["assignments"]:
+        # Only orders still pending and unassigned are taken, in case a planner got there first
+        table = WorkOrder.__table__
+        db.execute(
+            update(table).where(and_(
+                table.c.id == bindparam("_id"),
+                table.c.status == WorkOrderStatus.PENDING,
+                table.c.assigned_to.is_(None)
+            )).values(
+                assigned_to=bindparam("_craftsman_id"),
+                status=WorkOrderStatus.ASSIGNED,
+                updated_at=datetime.utcnow()
+            ),
+            [{"_id": row["work_order_id"], "_craftsman_id": row["craftsman_id"]} for row in result["assignments"]]
+        )
+        db.commit()
+    return result
@@ -0,0 +1,275 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.orm import Session, aliased
+from models.inventory import (
+    InventoryItem, InventoryTransaction, InventoryLot, InventoryLotMovement, GenealogyEdgeType, BatchGenealogyEdge
+)
+from models.production import ProductionOrder
+from models.sales import Customer, SalesOrder
+
+TRACE_DIRECTIONS = ("forward", "backward")
+
+
+# ==================== POSTING ====================
+
+def record_lot_edges(
+    db: Session,
+    edge_type: GenealogyEdgeType,
+    transactions: Iterable[InventoryTransaction],
+    production_order_id: Optional[int] = None,
+    sales_order_id: Optional[int] = None
+) -> int:
+    """
+    Link the lots moved by stock postings to the order they were posted for.
+
+    Reads the lot movements of ``transactions``, so only lotted stock is
+    traced. Returns the number of edges written. The caller commits.
+    """
+    db.flush()
+    transaction_ids = [transaction.id for transaction in transactions if transaction.id is not None]
+    if not transaction_ids:
+        return 0
+    rows = db.execute(select(
+        InventoryLotMovement.lot_id, InventoryLotMovement.transaction_id, InventoryLotMovement.quantity
+    ).where(InventoryLotMovement.transaction_id.in_(transaction_ids))).all()
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    db.execute(insert(BatchGenealogyEdge.__table__), [
+        {
+            "edge_type": edge_type,
+            "lot_id": row.lot_id,
+            "production_order_id": production_order_id,
+            "sales_order_id": sales_order_id,
+            "quantity": abs(row.quantity),
+            "transaction_id": row.transaction_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for row in rows
+    ])
+    return len(rows)
+
+
+# ==================== TRACE ====================
+
+def _trace_lots(seed, direction: str):
+    """
+    Recursive CTE of every lot reachable from ``seed`` (a select of lot ids).
+
+    Each step is one hop through a production order: backward from a lot to
+    the inputs of the order that produced it, forward from a lot to the
+    outputs of the orders that consumed it. UNION keeps each lot once, which
+    also stops the walk on rework loops. Both hops are read from the edge
+    indexes.
+    """
+    if direction == "backward":
+        via, to = GenealogyEdgeType.OUTPUT, GenealogyEdgeType.INPUT
+    else:
+        via, to = GenealogyEdgeType.INPUT, GenealogyEdgeType.OUTPUT
+    hop_from = aliased(BatchGenealogyEdge)
+    hop_to = aliased(BatchGenealogyEdge)
+
+    trace = seed.cte("lot_trace", recursive=True)
+    return trace.union(
+        select(hop_to.lot_id).select_from(trace).join(hop_from, and_(
+            hop_from.lot_id == trace.c.lot_id,
+            hop_from.edge_type == via
+        )).join(hop_to, and_(
+            hop_to.production_order_id == hop_from.production_order_id,
+            hop_to.edge_type == to
+        ))
+    )
+
+
+def _depths(
+    seed_ids: List[int],
+    edges: List[dict],
+    direction: str,
+    root_order_ids: Iterable[int]
+) -> Dict[int, int]:
+    """Production steps between each traced lot and the nearest starting point."""
+    leaving, entering = (
+        ("output", "input") if direction == "backward" else ("input", "output")
+    )
+    lots_by_order: Dict[int, List[int]] = defaultdict(list)
+    orders_by_lot: Dict[int, List[int]] = defaultdict(list)
+    for edge in edges:
+        if edge["edge_type"] == entering:
+            lots_by_order[edge["production_order_id"]].append(edge["lot_id"])
+        elif edge["edge_type"] == leaving:
+            orders_by_lot[edge["lot_id"]].append(edge["production_order_id"])
+
+    depths = {lot_id: 0 for lot_id in seed_ids}
+    for order_id in root_order_ids:
+        for lot_id in lots_by_order.get(order_id, []):
+            depths.setdefault(lot_id, 0)
+    frontier = list(depths)
+    seen_orders = set(root_order_ids)
+    level = 0
+    while frontier:
+        level += 1
+        following = []
+        for lot_id in frontier:
+            for order_id in orders_by_lot.get(lot_id, []):
+                if order_id in seen_orders:
+                    continue
+                seen_orders.add(order_id)
+                for next_lot_id in lots_by_order.get(order_id, []):
+                    if next_lot_id not in depths:
+                        depths[next_lot_id] = level
+                        following.append(next_lot_id)
+        frontier = following
+    return depths
+
+
+def _trace(db: Session, seed, direction: str, root_order_ids: Iterable[int] = ()) -> dict:
+    """Lots, production orders and edges reached from ``seed``; forward traces add shipments."""
+    if direction not in TRACE_DIRECTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="direction must be 'forward' or 'backward'"
+        )
+    root_order_ids = list(root_order_ids)
+    trace = _trace_lots(seed, direction)
+    traced_ids = select(trace.c.lot_id)
+
+    # Orders whose far side was expanded: producers going backward, consumers going forward
+    leaving, entering = (
+        (GenealogyEdgeType.OUTPUT, GenealogyEdgeType.INPUT) if direction == "backward"
+        else (GenealogyEdgeType.INPUT, GenealogyEdgeType.OUTPUT)
+    )
+    expanded = aliased(BatchGenealogyEdge)
+    path_orders = select(expanded.production_order_id).where(
+        expanded.edge_type == leaving,
+        expanded.lot_id.in_(traced_ids)
+    )
+    order_condition = BatchGenealogyEdge.production_order_id.in_(path_orders)
+    if root_order_ids:
+        order_condition = or_(order_condition, BatchGenealogyEdge.production_order_id.in_(root_order_ids))
+    edge_rows = db.execute(select(
+        BatchGenealogyEdge.edge_type, BatchGenealogyEdge.lot_id, BatchGenealogyEdge.production_order_id,
+        func.sum(BatchGenealogyEdge.quantity).label("quantity")
+    ).where(or_(
+        and_(BatchGenealogyEdge.edge_type == leaving, BatchGenealogyEdge.lot_id.in_(traced_ids)),
+        and_(BatchGenealogyEdge.edge_type == entering, order_condition)
+    )).group_by(
+        BatchGenealogyEdge.edge_type, BatchGenealogyEdge.lot_id, BatchGenealogyEdge.production_order_id
+    ).order_by(BatchGenealogyEdge.production_order_id, BatchGenealogyEdge.lot_id)).all()
+    edges = [
+        {
+            "edge_type": row.edge_type.value,
+            "lot_id": row.lot_id,
+            "production_order_id": row.production_order_id,
+            "quantity": row.quantity,
+        }
+        for row in edge_rows
+    ]
+
+    lot_rows = db.execute(select(
+        InventoryLot.id, InventoryLot.item_id, InventoryLot.lot_number, InventoryLot.expiry_date,
+        InventoryLot.quantity, InventoryLot.production_order_id,
+        InventoryItem.item_code, InventoryItem.name, InventoryItem.unit_of_measure
+    ).join(InventoryItem, InventoryItem.id == InventoryLot.item_id).where(
+        InventoryLot.id.in_(traced_ids)
+    )).all()
+    seed_ids = [lot_id for (lot_id,) in db.execute(seed)]
+    depths = _depths(seed_ids, edges, direction, root_order_ids)
+    lots = sorted((
+        {
+            "lot_id": row.id,
+            "item_id": row.item_id,
+            "item_code": row.item_code,
+            "name": row.name,
+            "unit_of_measure": row.unit_of_measure,
+            "lot_number": row.lot_number,
+            "expiry_date": row.expiry_date,
+            "quantity": row.quantity,
+            "production_order_id": row.production_order_id,
+            "depth": depths.get(row.id, 0),
+        }
+        for row in lot_rows
+    ), key=lambda lot: (lot["depth"], lot["item_code"], lot["lot_number"]))
+
+    order_ids = {edge["production_order_id"] for edge in edges} | set(root_order_ids)
+    orders = [
+        {
+            "production_order_id": row.id,
+            "order_number": row.order_number,
+            "product_name": row.product_name,
+            "product_code": row.product_code,
+            "status": row.status.value,
+        }
+        for row in db.execute(select(
+            ProductionOrder.id, ProductionOrder.order_number, ProductionOrder.product_name,
+            ProductionOrder.product_code, ProductionOrder.status
+        ).where(ProductionOrder.id.in_(order_ids)).order_by(ProductionOrder.id))
+    ] if order_ids else []
+
+    shipments = []
+    if direction == "forward":
+        shipments = [
+            {
+                "lot_id": row.lot_id,
+                "sales_order_id": row.sales_order_id,
+                "order_number": row.order_number,
+                "customer_id": row.customer_id,
+                "customer_name": row.customer_name,
+                "quantity": row.quantity,
+            }
+            for row in db.execute(select(
+                BatchGenealogyEdge.lot_id, BatchGenealogyEdge.sales_order_id, SalesOrder.order_number,
+                SalesOrder.customer_id, Customer.name.label("customer_name"),
+                func.sum(BatchGenealogyEdge.quantity).label("quantity")
+            ).join(SalesOrder, SalesOrder.id == BatchGenealogyEdge.sales_order_id).join(
+                Customer, Customer.id == SalesOrder.customer_id
+            ).where(
+                BatchGenealogyEdge.edge_type == GenealogyEdgeType.SHIPPED,
+                BatchGenealogyEdge.lot_id.in_(traced_ids)
+            ).group_by(
+                BatchGenealogyEdge.lot_id, BatchGenealogyEdge.sales_order_id, SalesOrder.order_number,
+                SalesOrder.customer_id, Customer.name
+            ).order_by(BatchGenealogyEdge.sales_order_id, BatchGenealogyEdge.lot_id))
+        ]
+
+    return {
+        "direction": direction,
+        "lots": lots,
+        "production_orders": orders,
+        "edges": edges,
+        "shipments": shipments,
+    }
+
+
+def trace_lot(db: Session, lot_id: int, direction: str) -> Optional[dict]:
+    """Trace a lot back to the lots it was made from, or forward to what was made from it and who received it."""
+    if db.query(InventoryLot.id).filter(InventoryLot.id == lot_id).first() is None:
+        return None
+    return _trace(db, select(InventoryLot.id.label("lot_id")).where(InventoryLot.id == lot_id), direction)
+
+
+def trace_production_order(db: Session, order_id: int, direction: str) -> Optional[dict]:
+    """Trace a batch back through the lots it consumed, or forward through the lots it produced."""
+    if db.query(ProductionOrder.id).filter(ProductionOrder.id == order_id).first() is None:
+        return None
+    edge_type = GenealogyEdgeType.INPUT if direction == "backward" else GenealogyEdgeType.OUTPUT
+    seed = select(BatchGenealogyEdge.lot_id.label("lot_id")).where(
+        BatchGenealogyEdge.production_order_id == order_id,
+        BatchGenealogyEdge.edge_type == edge_type
+    )
+    return _trace(db, seed, direction, [order_id])
+
+
+def trace_sales_order(db: Session, order_id: int) -> Optional[dict]:
+    """Trace what a sales order shipped back to the lots and batches it came from."""
+    if db.query(SalesOrder.id).filter(SalesOrder.id == order_id).first() is None:
+        return None
+    seed = select(BatchGenealogyEdge.lot_id.label("lot_id")).where(
+        BatchGenealogyEdge.sales_order_id == order_id,
+        BatchGenealogyEdge.edge_type == GenealogyEdgeType.SHIPPED
+    )
+    return _trace(db, seed, "backward")
@@ -0,0 +1,284 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
+from models.inventory import InventoryItem
+from models.production import (
+    BillOfMaterials, BillOfMaterialsLine, RoutingOperation, ProductionLine, ProductionLineEquipment
+)
+from schemas.production import (
+    BillOfMaterialsCreate, BillOfMaterialsUpdate, BillOfMaterialsLineBase, RoutingOperationBase
+)
+
+
+# ==================== GRAPH ====================
+
+class BomGraph:
+    """
+    Active BOMs held in memory for planning, loaded with one query per table.
+
+    ``unit_components`` flattens a BOM into the quantity of each component per
+    unit of output (scrap included) and is memoized, so a sub-assembly used by
+    thousands of orders is expanded once per run.
+    """
+
+    def __init__(self, headers: list, lines: list, operations: list):
+        self.headers = {row.id: row for row in headers}
+        self.by_code = {row.product_code: row.id for row in headers}
+        self.by_item = {row.item_id: row.id for row in headers if row.item_id is not None}
+        self.lines: Dict[int, list] = defaultdict(list)
+        for row in lines:
+            self.lines[row.bom_id].append(row)
+        self.operations: Dict[int, list] = defaultdict(list)
+        for row in operations:
+            self.operations[row.bom_id].append(row)
+        self._unit_components: Dict[int, Dict[int, float]] = {}
+
+    def unit_components(self, bom_id: int) -> Dict[int, float]:
+        components = self._unit_components.get(bom_id)
+        if components is None:
+            output = self.headers[bom_id].output_quantity or 1.0
+            components = defaultdict(float)
+            for line in self.lines[bom_id]:
+                components[line.component_item_id] += line.quantity * (1 + (line.scrap_percent or 0) / 100) / output
+            components = self._unit_components[bom_id] = dict(components)
+        return components
+
+    def low_level_codes(self) -> Dict[int, int]:
+        """
+        Deepest level each item occurs at (1 for direct components of a product).
+
+        Longest paths over the sub-assembly graph in topological order, so an
+        item is planned only after every parent that can add to its demand.
+        """
+        levels: Dict[int, int] = {}
+        children: Dict[int, set] = defaultdict(set)
+        indegree: Dict[int, int] = defaultdict(int)
+        for bom_id, header in self.headers.items():
+            for component in self.unit_components(bom_id):
+                levels[component] = 1
+                if header.item_id is not None and component not in children[header.item_id]:
+                    children[header.item_id].add(component)
+                    indegree[component] += 1
+        for item_id in self.by_item:
+            levels.setdefault(item_id, 0)
+
+        ready = [item_id for item_id in levels if indegree[item_id] == 0]
+        visited = 0
+        while ready:
+            item_id = ready.pop()
+            visited += 1
+            for component in children[item_id]:
+                levels[component] = max(levels[component], levels[item_id] + 1)
+                indegree[component] -= 1
+                if indegree[component] == 0:
+                    ready.append(component)
+        if visited < len(levels):
+            cyclic = sorted(item_id for item_id in levels if indegree[item_id] > 0)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Bills of materials form a cycle through items {cyclic}"
+            )
+        return levels
+
+
+def load_bom_graph(db: Session) -> BomGraph:
+    active = select(BillOfMaterials.id).where(BillOfMaterials.is_active.is_(True))
+    return BomGraph(
+        db.execute(select(
+            BillOfMaterials.id, BillOfMaterials.product_code, BillOfMaterials.item_id, BillOfMaterials.output_quantity
+        ).where(BillOfMaterials.is_active.is_(True))).all(),
+        db.execute(select(
+            BillOfMaterialsLine.bom_id, BillOfMaterialsLine.component_item_id, BillOfMaterialsLine.quantity,
+            BillOfMaterialsLine.scrap_percent
+        ).where(BillOfMaterialsLine.bom_id.in_(active))).all(),
+        db.execute(select(
+            RoutingOperation.bom_id, RoutingOperation.sequence, RoutingOperation.production_line_id,
+            RoutingOperation.station_id, RoutingOperation.setup_minutes, RoutingOperation.run_minutes_per_unit
+        ).where(RoutingOperation.bom_id.in_(active)).order_by(RoutingOperation.bom_id, RoutingOperation.sequence)).all(),
+    )
+
+
+# ==================== VALIDATION ====================
+
+def _reaches(db: Session, start_items: List[int], target_item: int, exclude_bom_id: Optional[int]) -> bool:
+    """Whether ``target_item`` is a component, at any depth, of one of ``start_items``."""
+    children: Dict[int, List[int]] = defaultdict(list)
+    query = select(BillOfMaterials.item_id, BillOfMaterialsLine.component_item_id).join(
+        BillOfMaterialsLine, BillOfMaterialsLine.bom_id == BillOfMaterials.id
+    ).where(BillOfMaterials.item_id.isnot(None))
+    if exclude_bom_id is not None:
+        query = query.where(BillOfMaterials.id != exclude_bom_id)
+    for parent, component in db.execute(query):
+        children[parent].append(component)
+
+    stack, seen = list(start_items), set()
+    while stack:
+        item_id = stack.pop()
+        if item_id == target_item:
+            return True
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        stack.extend(children[item_id])
+    return False
+
+
+def _validate_bom(
+    db: Session,
+    product_code: str,
+    item_id: Optional[int],
+    lines: List[BillOfMaterialsLineBase],
+    operations: List[RoutingOperationBase],
+    bom_id: Optional[int] = None
+) -> None:
+    duplicate = db.query(BillOfMaterials.id).filter(BillOfMaterials.product_code == product_code)
+    if bom_id is not None:
+        duplicate = duplicate.filter(BillOfMaterials.id != bom_id)
+    if duplicate.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A bill of materials for this product code already exists"
+        )
+
+    if item_id is not None:
+        if not db.query(InventoryItem.id).filter(InventoryItem.id == item_id).first():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Inventory item {item_id} not found")
+        other = db.query(BillOfMaterials.id).filter(BillOfMaterials.item_id == item_id)
+        if bom_id is not None:
+            other = other.filter(BillOfMaterials.id != bom_id)
+        if other.first():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Another bill of materials already makes this item"
+            )
+
+    component_ids = [line.component_item_id for line in lines]
+    if len(set(component_ids)) != len(component_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duplicate components are not allowed in the same bill of materials"
+        )
+    if component_ids:
+        found = {row_id for (row_id,) in db.query(InventoryItem.id).filter(InventoryItem.id.in_(component_ids))}
+        missing = sorted(set(component_ids) - found)
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Inventory items not found: {missing}")
+    if item_id is not None and component_ids and _reaches(db, component_ids, item_id, bom_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A bill of materials cannot use its own product as a component, directly or through sub-assemblies"
+        )
+
+    line_ids = {operation.production_line_id for operation in operations if operation.production_line_id}
+    if line_ids:
+        found = {row_id for (row_id,) in db.query(ProductionLine.id).filter(ProductionLine.id.in_(line_ids))}
+        if line_ids - found:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Production lines not found: {sorted(line_ids - found)}"
+            )
+    station_ids = {operation.station_id for operation in operations if operation.station_id}
+    if station_ids:
+        stations = dict(db.query(ProductionLineEquipment.id, ProductionLineEquipment.production_line_id).filter(
+            ProductionLineEquipment.id.in_(station_ids)
+        ).all())
+        for operation in operations:
+            if not operation.station_id:
+                continue
+            if operation.station_id not in stations:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Equipment station {operation.station_id} not found"
+                )
+            if operation.production_line_id and stations[operation.station_id] != operation.production_line_id:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Equipment station {operation.station_id} is not on line {operation.production_line_id}"
+                )
+
+
+# ==================== BILLS OF MATERIALS ====================
+
+def _bom_query(db: Session):
+    return db.query(BillOfMaterials).options(
+        selectinload(BillOfMaterials.lines), selectinload(BillOfMaterials.operations)
+    )
+
+
+def _filtered(query, search: Optional[str], is_active: Optional[bool]):
+    if search:
+        query = query.filter(
+            (BillOfMaterials.product_code.ilike(f"%{search}%")) | (BillOfMaterials.name.ilike(f"%{search}%"))
+        )
+    if is_active is not None:
+        query = query.filter(BillOfMaterials.is_active == is_active)
+    return query
+
+
+def get_boms(
+    db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, is_active: Optional[bool] = None
+) -> List[BillOfMaterials]:
+    """Get bills of materials with their lines and routing."""
+    return _filtered(_bom_query(db), search, is_active).order_by(BillOfMaterials.product_code).offset(skip).limit(limit).all()
+
+
+def get_boms_count(db: Session, search: Optional[str] = None, is_active: Optional[bool] = None) -> int:
+    return _filtered(db.query(func.count(BillOfMaterials.id)), search, is_active).scalar()
+
+
+def get_bom(db: Session, bom_id: int) -> Optional[BillOfMaterials]:
+    """Get bill of materials by ID."""
+    return _bom_query(db).filter(BillOfMaterials.id == bom_id).first()
+
+
+def create_bom(db: Session, bom: BillOfMaterialsCreate) -> BillOfMaterials:
+    """Create a bill of materials with its component lines and routing."""
+    _validate_bom(db, bom.product_code, bom.item_id, bom.lines, bom.operations)
+    db_bom = BillOfMaterials(**bom.model_dump(exclude={"lines", "operations"}))
+    db_bom.lines = [BillOfMaterialsLine(**line.model_dump()) for line in bom.lines]
+    db_bom.operations = [RoutingOperation(**operation.model_dump()) for operation in bom.operations]
+    db.add(db_bom)
+    db.commit()
+    return get_bom(db, db_bom.id)
+
+
+def update_bom(db: Session, bom_id: int, bom: BillOfMaterialsUpdate) -> Optional[BillOfMaterials]:
+    """Update a bill of materials; ``lines`` and ``operations`` replace the existing ones when given."""
+    db_bom = get_bom(db, bom_id)
+    if not db_bom:
+        return None
+
+    update_data = bom.model_dump(exclude_unset=True, exclude={"lines", "operations"})
+    lines = bom.lines if bom.lines is not None else [
+        BillOfMaterialsLineBase.model_validate(line, from_attributes=True) for line in db_bom.lines
+    ]
+    operations = bom.operations if bom.operations is not None else [
+        RoutingOperationBase.model_validate(operation, from_attributes=True) for operation in db_bom.operations
+    ]
+    _validate_bom(
+        db, update_data.get("product_code", db_bom.product_code), update_data.get("item_id", db_bom.item_id),
+        lines, operations, bom_id
+    )
+
+    for field, value in update_data.items():
+        setattr(db_bom, field, value)
+    if bom.lines is not None:
+        db_bom.lines = [BillOfMaterialsLine(**line.model_dump()) for line in bom.lines]
+    if bom.operations is not None:
+        db_bom.operations = [RoutingOperation(**operation.model_dump()) for operation in bom.operations]
+    db.commit()
+    db.expire_all()
+    return get_bom(db, bom_id)
+
+
+def delete_bom(db: Session, bom_id: int) -> bool:
+    """Delete bill of materials."""
+    db_bom = get_bom(db, bom_id)
+    if not db_bom:
+        return False
+
+    db.delete(db_bom)
+    db.commit()
+    return True
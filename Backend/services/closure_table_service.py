@@ -0,0 +1,100 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import Table, delete, func, insert, literal, select
+
+ROWS_PER_STATEMENT = 1000
+
+# Shared maintenance of closure tables: ``closure`` has (ancestor_id,
+# descendant_id, depth) with a depth-0 row per node, ``nodes`` is the tree
+# table with ``id`` and ``parent_id``. Nothing here commits.
+
+
+def recursive_subtree(nodes: Table, root_id: int, name: str):
+    """Recursive CTE over ``parent_id``: (node_id, depth) for the root and everything below it."""
+    tree = select(nodes.c.id.label("node_id"), literal(0).label("depth")).where(
+        nodes.c.id == root_id
+    ).cte(name, recursive=True)
+    return tree.union_all(
+        select(nodes.c.id, tree.c.depth + 1).where(nodes.c.parent_id == tree.c.node_id)
+    )
+
+
+def is_indexed(db: Session, closure: Table, node_id: int) -> bool:
+    return db.execute(select(closure.c.depth).where(
+        closure.c.ancestor_id == node_id, closure.c.descendant_id == node_id
+    )).first() is not None
+
+
+def subtree_members(db: Session, closure: Table, nodes: Table, root_id: int, name: str) -> List[Tuple[int, int]]:
+    """(node_id, depth) for the root's subtree, from the closure when indexed."""
+    if is_indexed(db, closure, root_id):
+        return db.execute(select(closure.c.descendant_id, closure.c.depth).where(
+            closure.c.ancestor_id == root_id
+        )).all()
+    tree = recursive_subtree(nodes, root_id, name)
+    return db.execute(select(tree.c.node_id, tree.c.depth)).all()
+
+
+def insert_leaf(db: Session, closure: Table, node_id: int, parent_id: Optional[int]) -> None:
+    """Index a new node: its depth-0 row plus one row per ancestor of its parent."""
+    db.execute(insert(closure).values(ancestor_id=node_id, descendant_id=node_id, depth=0))
+    if parent_id is not None:
+        db.execute(insert(closure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(closure.c.ancestor_id, literal(node_id), closure.c.depth + 1).where(
+                closure.c.descendant_id == parent_id
+            )
+        ))
+
+
+def relink_subtree(
+    db: Session, closure: Table, node_id: int, members: List[Tuple[int, int]], new_parent_id: Optional[int]
+) -> None:
+    """
+    Move an indexed subtree (``members`` as (node_id, depth) under ``node_id``)
+    below ``new_parent_id``. Only the links between the subtree and its old
+    ancestors are removed and links to the new ancestors added, so the work
+    is proportional to the subtree size times the depth.
+    """
+    old_ancestors = [ancestor for (ancestor,) in db.execute(select(closure.c.ancestor_id).where(
+        closure.c.descendant_id == node_id, closure.c.depth > 0
+    ))]
+    member_ids = [member for member, _ in members]
+    if old_ancestors:
+        for offset in range(0, len(member_ids), ROWS_PER_STATEMENT):
+            db.execute(delete(closure).where(
+                closure.c.descendant_id.in_(member_ids[offset:offset + ROWS_PER_STATEMENT]),
+                closure.c.ancestor_id.in_(old_ancestors)
+            ))
+
+    if new_parent_id is not None:
+        new_ancestors = db.execute(select(closure.c.ancestor_id, closure.c.depth).where(
+            closure.c.descendant_id == new_parent_id
+        )).all()
+        rows = [
+            {"ancestor_id": ancestor, "descendant_id": member, "depth": ancestor_depth + member_depth + 1}
+            for ancestor, ancestor_depth in new_ancestors
+            for member, member_depth in members
+        ]
+        for offset in range(0, len(rows), ROWS_PER_STATEMENT):
+            db.execute(insert(closure), rows[offset:offset + ROWS_PER_STATEMENT])
+
+
+def delete_node(db: Session, closure: Table, node_id: int) -> None:
+    """Drop a leaf's closure rows."""
+    db.execute(delete(closure).where(closure.c.descendant_id == node_id))
+
+
+def rebuild(db: Session, closure: Table, nodes: Table, name: str) -> int:
+    """Recompute the whole closure from ``parent_id`` with a recursive CTE; returns the row count."""
+    tree = select(
+        nodes.c.id.label("ancestor_id"), nodes.c.id.label("descendant_id"), literal(0).label("depth")
+    ).cte(name, recursive=True)
+    tree = tree.union_all(
+        select(tree.c.ancestor_id, nodes.c.id, tree.c.depth + 1).where(nodes.c.parent_id == tree.c.descendant_id)
+    )
+    db.execute(delete(closure))
+    db.execute(insert(closure).from_select(
+        ["ancestor_id", "descendant_id", "depth"], select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth)
+    ))
+    return db.execute(select(func.count()).select_from(closure)).scalar()
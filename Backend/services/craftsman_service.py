@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
 from fastapi import HTTPException, status
+from db.loaders import get_loaders
 from models.craftsman import Craftsman, Skill
 from models.user import User
 from schemas.craftsman import CraftsmanCreate, CraftsmanUpdate
@@ -208,8 +209,11 @@ def get_craftsman_equipment(db: Session, craftsman_id: int) -> List:
     if not craftsman:
         return []
     
+    loaders = get_loaders(db)
     equipment_list = []
-    for equipment in craftsman.operated_equipment:
+    for equipment in loaders.equipment.load_many(loaders.operated_equipment_ids.load(craftsman_id)):
+        if equipment is None:
+            continue
         status_val = equipment.status.value if hasattr(equipment.status, 'value') else str(equipment.status)
         equipment_list.append({
             "id": equipment.id,
@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from models.craftsman import Craftsman
+from models.equipment import Equipment, EquipmentClosure, EquipmentStatus
+from models.inventory import InventoryItem, InventoryRequisition, InventoryRequisitionItem
+from models.work_order import WorkOrder, WorkOrderStatus
+from services import closure_table_service
+from services.equipment_timeline_service import compute_equipment_intervals
+
+OPEN_WORK_ORDER_STATUSES = [
+    WorkOrderStatus.PENDING, WorkOrderStatus.ASSIGNED, WorkOrderStatus.IN_PROGRESS, WorkOrderStatus.ON_HOLD
+]
+
+
+# ==================== SUBTREE QUERIES ====================
+
+def _in_closure(db: Session, equipment_id: int) -> bool:
+    return closure_table_service.is_indexed(db, EquipmentClosure.__table__, equipment_id)
+
+
+def subtree(db: Session, root_id: int, max_depth: Optional[int] = None):
+    """
+    Selectable of (equipment_id, depth) under ``root_id``, root included.
+
+    Served from the closure table. A root written around this service (bulk
+    loads, seed scripts) is walked with a recursive CTE instead; such rows
+    under an indexed root only show up after the closure is rebuilt.
+    """
+    if _in_closure(db, root_id):
+        query = select(
+            EquipmentClosure.descendant_id.label("equipment_id"), EquipmentClosure.depth
+        ).where(EquipmentClosure.ancestor_id == root_id)
+        if max_depth is not None:
+            query = query.where(EquipmentClosure.depth <= max_depth)
+        return query.subquery("equipment_subtree")
+
+    tree = closure_table_service.recursive_subtree(Equipment.__table__, root_id, "equipment_subtree_paths")
+    query = select(tree.c.node_id.label("equipment_id"), tree.c.depth)
+    if max_depth is not None:
+        query = query.where(tree.c.depth <= max_depth)
+    return query.subquery("equipment_subtree")
+
+
+def get_subtree(db: Session, root_id: int, max_depth: Optional[int] = None) -> List[Tuple[Equipment, int]]:
+    """The whole subtree in one query, as (equipment, depth) ordered by depth."""
+    tree = subtree(db, root_id, max_depth)
+    return db.query(Equipment, tree.c.depth).join(tree, tree.c.equipment_id == Equipment.id).order_by(
+        tree.c.depth, Equipment.parent_id, Equipment.name
+    ).all()
+
+
+def get_ancestors(db: Session, equipment_id: int) -> List[Equipment]:
+    """Path from the root down to the equipment's parent."""
+    if _in_closure(db, equipment_id):
+        return db.query(Equipment).join(EquipmentClosure, EquipmentClosure.ancestor_id == Equipment.id).filter(
+            EquipmentClosure.descendant_id == equipment_id, EquipmentClosure.depth > 0
+        ).order_by(EquipmentClosure.depth.desc()).all()
+
+    path = []
+    current = db.query(Equipment).filter(Equipment.id == equipment_id).first()
+    while current is not None and current.parent_id is not None:
+        current = db.query(Equipment).filter(Equipment.id == current.parent_id).first()
+        if current is not None:
+            path.append(current)
+    return list(reversed(path))
+
+
+# ==================== MAINTENANCE ====================
+
+def add_to_hierarchy(db: Session, equipment: Equipment) -> None:
+    """Add a new (flushed) leaf under its parent. The caller commits."""
+    if equipment.parent_id is not None and not _in_closure(db, equipment.parent_id):
+        rebuild_equipment_closure(db, commit=False)
+        return
+    closure_table_service.insert_leaf(db, EquipmentClosure.__table__, equipment.id, equipment.parent_id)
+
+
+def move_subtree(db: Session, equipment: Equipment, new_parent_id: Optional[int]) -> None:
+    """Reparent ``equipment`` with its whole subtree, refusing cycles. The caller commits."""
+    members = closure_table_service.subtree_members(
+        db, EquipmentClosure.__table__, Equipment.__table__, equipment.id, "equipment_subtree_paths"
+    )
+    if new_parent_id is not None and new_parent_id in {member for member, _ in members}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Equipment cannot be moved under itself or its own descendant"
+        )
+
+    if not _in_closure(db, equipment.id) or (new_parent_id is not None and not _in_closure(db, new_parent_id)):
+        equipment.parent_id = new_parent_id
+        db.flush()
+        rebuild_equipment_closure(db, commit=False)
+        return
+    closure_table_service.relink_subtree(db, EquipmentClosure.__table__, equipment.id, members, new_parent_id)
+    equipment.parent_id = new_parent_id
+
+
+def remove_from_hierarchy(db: Session, equipment_id: int) -> None:
+    """Drop a leaf's closure rows. The caller commits."""
+    closure_table_service.delete_node(db, EquipmentClosure.__table__, equipment_id)
+
+
+def rebuild_equipment_closure(db: Session, commit: bool = True) -> dict:
+    """Recompute the whole closure table from ``parent_id`` with a recursive CTE."""
+    rows = closure_table_service.rebuild(db, EquipmentClosure.__table__, Equipment.__table__, "equipment_paths")
+    if commit:
+        db.commit()
+    return {"closure_rows": rows}
+
+
+# ==================== ROLLUPS ====================
+
+def get_subtree_rollup(db: Session, root_id: int, days: int = 30) -> dict:
+    """
+    Aggregate the subtree: equipment by status (and what is broken down),
+    open and recent work orders, maintenance cost and downtime over the
+    last ``days``. Each figure is one grouped query joined to the subtree.
+    """
+    end = datetime.utcnow()
+    start = end - timedelta(days=days)
+    tree = subtree(db, root_id)
+    members = select(tree.c.equipment_id)
+
+    by_status = dict(db.query(Equipment.status, func.count(Equipment.id)).filter(
+        Equipment.id.in_(members)
+    ).group_by(Equipment.status).all())
+    broken_down = db.query(Equipment.id, Equipment.equipment_id, Equipment.name).filter(
+        Equipment.id.in_(members), Equipment.status == EquipmentStatus.BREAKDOWN
+    ).order_by(Equipment.name).limit(100).all()
+
+    open_work_orders = db.query(func.count(WorkOrder.id)).filter(
+        WorkOrder.equipment_id.in_(members), WorkOrder.status.in_(OPEN_WORK_ORDER_STATUSES)
+    ).scalar()
+    recent = db.query(
+        WorkOrder.status, func.count(WorkOrder.id), func.coalesce(func.sum(WorkOrder.actual_hours), 0)
+    ).filter(
+        WorkOrder.equipment_id.in_(members), WorkOrder.created_at >= start
+    ).group_by(WorkOrder.status).all()
+
+    labor_cost = db.query(
+        func.coalesce(func.sum(WorkOrder.actual_hours * func.coalesce(Craftsman.hourly_rate, 0)), 0)
+    ).join(Craftsman, Craftsman.id == WorkOrder.assigned_to).filter(
+        WorkOrder.equipment_id.in_(members), WorkOrder.created_at >= start
+    ).scalar()
+    parts_cost = db.query(
+        func.coalesce(func.sum(InventoryRequisitionItem.fulfilled_quantity * func.coalesce(InventoryItem.unit_cost, 0)), 0)
+    ).join(
+        InventoryRequisition, InventoryRequisition.id == InventoryRequisitionItem.requisition_id
+    ).join(
+        WorkOrder, WorkOrder.id == InventoryRequisition.work_order_id
+    ).join(
+        InventoryItem, InventoryItem.id == InventoryRequisitionItem.item_id
+    ).filter(
+        WorkOrder.equipment_id.in_(members), InventoryRequisition.created_at >= start
+    ).scalar()
+
+    member_ids = [equipment_id for (equipment_id,) in db.execute(members)]
+    intervals = compute_equipment_intervals(db, start, end, equipment_ids=member_ids)
+    downtime_hours = sum(row["downtime_hours"] for row in intervals["equipment"])
+    scheduled_hours = sum(row["tracked_hours"] - row["retired_hours"] for row in intervals["equipment"])
+
+    return {
+        "equipment_id": root_id,
+        "period_days": days,
+        "equipment_count": sum(by_status.values()),
+        "by_status": {equipment_status.value: count for equipment_status, count in by_status.items()},
+        "has_breakdown": bool(broken_down),
+        "broken_down": [
+            {"id": row.id, "equipment_id": row.equipment_id, "name": row.name} for row in broken_down
+        ],
+        "open_work_orders": open_work_orders,
+        "work_orders": {
+            work_order_status.value: {"count": count, "actual_hours": float(hours)}
+            for work_order_status, count, hours in recent
+        },
+        "labor_cost": round(float(labor_cost), 2),
+        "parts_cost": round(float(parts_cost), 2),
+        "maintenance_cost": round(float(labor_cost) + float(parts_cost), 2),
+        "downtime_hours": round(downtime_hours, 2),
+        "availability": round((1 - downtime_hours / scheduled_hours) * 100, 2) if scheduled_hours > 0 else None,
+    }
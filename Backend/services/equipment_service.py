@@ -2,9 +2,12 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from fastapi import HTTPException, status
-from models.equipment import Equipment, EquipmentStatus
+from db.loaders import get_loaders
+from models.equipment import Equipment, EquipmentStatus, EquipmentStateEvent
 from models.craftsman import Craftsman
 from schemas.equipment import EquipmentCreate, EquipmentUpdate
+from services.equipment_hierarchy_service import add_to_hierarchy, move_subtree, remove_from_hierarchy
+from services.equipment_timeline_service import record_state_change
 
 
 def get_equipment_list(db: Session, skip: int = 0, limit: int = 100, 
@@ -89,6 +92,9 @@ def create_equipment(db: Session, equipment: EquipmentCreate) -> Equipment:
     
     db_equipment = Equipment(**equipment.model_dump())
     db.add(db_equipment)
+    db.flush()
+    add_to_hierarchy(db, db_equipment)
+    record_state_change(db, db_equipment, EquipmentStateEvent.STATUS)
     db.commit()
     db.refresh(db_equipment)
     return db_equipment
@@ -117,9 +123,18 @@ def update_equipment(db: Session, equipment_id: int, equipment: EquipmentUpdate)
                 detail="Equipment cannot be its own parent"
             )
     
+    # Reparenting moves the whole subtree and rejects moves under a descendant
+    if 'parent_id' in update_data:
+        new_parent_id = update_data.pop('parent_id')
+        if new_parent_id != db_equipment.parent_id:
+            move_subtree(db, db_equipment, new_parent_id)
+    
+    previous_status = db_equipment.status
     for field, value in update_data.items():
         setattr(db_equipment, field, value)
     
+    if db_equipment.status != previous_status:
+        record_state_change(db, db_equipment, EquipmentStateEvent.STATUS)
     db.commit()
     db.refresh(db_equipment)
     return db_equipment
@@ -139,6 +154,7 @@ def delete_equipment(db: Session, equipment_id: int) -> bool:
             detail="Cannot delete equipment with child equipment"
         )
     
+    remove_from_hierarchy(db, equipment_id)
     db.delete(db_equipment)
     db.commit()
     return True
@@ -187,12 +203,20 @@ def get_equipment_operators(db: Session, equipment_id: int) -> List[dict]:
             detail="Equipment not found"
         )
     
+    loaders = get_loaders(db)
+    craftsmen = [
+        craftsman for craftsman in loaders.craftsmen.load_many(loaders.equipment_operator_ids.load(equipment_id))
+        if craftsman
+    ]
+    loaders.users.prime(craftsman.user_id for craftsman in craftsmen)
+    
     operators = []
-    for craftsman in equipment.operators:
+    for craftsman in craftsmen:
+        user = loaders.users.load(craftsman.user_id)
         operators.append({
             "craftsman_id": craftsman.id,
             "employee_id": craftsman.employee_id,
-            "craftsman_name": craftsman.user.full_name if craftsman.user else "Unknown",
+            "craftsman_name": user.full_name if user else "Unknown",
             "position": craftsman.position,
             "department": craftsman.department
         })
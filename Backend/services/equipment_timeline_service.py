@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from models.equipment import Equipment, EquipmentStatus, EquipmentStateChange, EquipmentStateEvent
+from models.work_order import WorkOrder, WorkOrderStatus
+
+DOWN_STATUSES = [EquipmentStatus.MAINTENANCE, EquipmentStatus.BREAKDOWN]
+HOURS_PER_MICROSECOND = 1.0 / 3600e6
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def is_down(equipment_status: EquipmentStatus, active_work_orders: int) -> bool:
+    """Equipment is down while under maintenance, broken down, or being worked on."""
+    return equipment_status in DOWN_STATUSES or active_work_orders > 0
+
+
+# ==================== RECORDING ====================
+
+def record_state_change(
+    db: Session,
+    equipment: Equipment,
+    event: EquipmentStateEvent,
+    work_order_id: Optional[int] = None,
+    occurred_at: Optional[datetime] = None
+) -> EquipmentStateChange:
+    """
+    Append the equipment's state after ``event`` to its timeline.
+
+    The latest row supplies the running count of in-progress work orders; the
+    status always comes from the equipment itself. The caller commits.
+    """
+    latest = db.query(EquipmentStateChange.active_work_orders).filter(
+        EquipmentStateChange.equipment_id == equipment.id
+    ).order_by(EquipmentStateChange.occurred_at.desc(), EquipmentStateChange.id.desc()).first()
+    active = latest.active_work_orders if latest else 0
+    if event == EquipmentStateEvent.WORK_STARTED:
+        active += 1
+    elif event == EquipmentStateEvent.WORK_ENDED:
+        active = max(active - 1, 0)
+
+    change = EquipmentStateChange(
+        equipment_id=equipment.id,
+        event=event,
+        occurred_at=occurred_at or datetime.utcnow(),
+        work_order_id=work_order_id,
+        status=equipment.status,
+        active_work_orders=active,
+        is_down=is_down(equipment.status, active)
+    )
+    db.add(change)
+    return change
+
+
+def record_work_order_transition(
+    db: Session,
+    work_order: WorkOrder,
+    previous_status: Optional[WorkOrderStatus]
+) -> None:
+    """Log work starting or stopping on the work order's equipment. The caller commits."""
+    if work_order.equipment_id is None or previous_status == work_order.status:
+        return
+    if work_order.status == WorkOrderStatus.IN_PROGRESS:
+        event = EquipmentStateEvent.WORK_STARTED
+    elif previous_status == WorkOrderStatus.IN_PROGRESS:
+        event = EquipmentStateEvent.WORK_ENDED
+    else:
+        return
+
+    equipment = db.query(Equipment).filter(Equipment.id == work_order.equipment_id).with_for_update().first()
+    if equipment:
+        record_state_change(db, equipment, event, work_order_id=work_order.id)
+
+
+# ==================== INTERVALS ====================
+
+def _micros(values) -> np.ndarray:
+    # Integer timedelta division is several times faster than numpy's datetime conversion
+    return np.fromiter(((value - EPOCH) // MICROSECOND for value in values), dtype=np.int64, count=len(values))
+
+
+def _load_timeline(db: Session, start: datetime, end: datetime, equipment: Dict[int, object], filtered: bool):
+    """
+    Rows covering ``[start, end)``: each equipment's last row before the window
+    (its opening state) plus every row inside it, ordered by equipment and time.
+    Equipment without any history is assumed to have held its current status
+    since it was created.
+    """
+    table = EquipmentStateChange.__table__
+    columns = (
+        table.c.equipment_id, table.c.occurred_at, table.c.is_down,
+        (table.c.status == EquipmentStatus.RETIRED).label("retired")
+    )
+    opening_ids = select(func.max(table.c.id)).where(table.c.occurred_at < start).group_by(table.c.equipment_id)
+    inside = select(*columns).where(table.c.occurred_at >= start, table.c.occurred_at < end)
+    if filtered:
+        opening_ids = opening_ids.where(table.c.equipment_id.in_(list(equipment)))
+        inside = inside.where(table.c.equipment_id.in_(list(equipment)))
+
+    opening = db.execute(select(*columns).where(table.c.id.in_(opening_ids))).all()
+    inside = db.execute(inside.order_by(table.c.equipment_id, table.c.occurred_at, table.c.id)).all()
+
+    seen = {row.equipment_id for row in opening} | {row.equipment_id for row in inside}
+    assumed = [
+        (row.id, max(row.created_at, start), is_down(row.status, 0), row.status == EquipmentStatus.RETIRED)
+        for row in equipment.values()
+        if row.id not in seen and row.created_at < end
+    ]
+    opening = [(equipment_id, max(at, start), down, retired) for equipment_id, at, down, retired in opening]
+    return opening + assumed + list(inside)
+
+
+def compute_equipment_intervals(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    equipment_category: Optional[str] = None,
+    equipment_ids: Optional[Iterable[int]] = None
+) -> dict:
+    """
+    Per-equipment and per-category uptime and downtime over ``[start, end)``.
+
+    Consecutive timeline rows form state segments; an equipment's own overlaps
+    (a breakdown while work orders are open) are already merged into ``is_down``
+    when rows are written. Across a category, downtime intervals are combined
+    with a sweep line: +1 at each interval start, -1 at each end, so the running
+    level is the number of assets down at once.
+    """
+    query = db.query(Equipment.id, Equipment.equipment_id, Equipment.name, Equipment.category,
+                     Equipment.status, Equipment.created_at)
+    if equipment_category:
+        query = query.filter(Equipment.category == equipment_category)
+    if equipment_ids is not None:
+        query = query.filter(Equipment.id.in_(list(equipment_ids)))
+    equipment = {row.id: row for row in query.order_by(Equipment.id).all()}
+    window_hours = (end - start).total_seconds() / 3600
+    if not equipment or end <= start:
+        return {"window_hours": window_hours, "equipment": [], "categories": []}
+
+    rows = _load_timeline(db, start, end, equipment, bool(equipment_category) or equipment_ids is not None)
+    equipment_keys = np.fromiter(equipment, dtype=np.int64, count=len(equipment))
+    count = len(equipment_keys)
+
+    if rows:
+        raw_ids, times, down, retired = zip(*rows)
+        positions = np.searchsorted(equipment_keys, np.array(raw_ids, dtype=np.int64))
+        times = _micros(times)
+        down = np.array(down, dtype=bool)
+        retired = np.array(retired, dtype=bool) & ~down
+        order = np.lexsort((np.arange(len(rows)), times, positions))
+        positions, times, down, retired = positions[order], times[order], down[order], retired[order]
+    else:
+        positions = times = np.array([], dtype=np.int64)
+        down = retired = np.array([], dtype=bool)
+
+    # Each row's state lasts until the equipment's next row, or the window end
+    same_next = np.append(positions[1:] == positions[:-1], False)
+    ends = np.where(same_next, np.append(times[1:], 0), (end - EPOCH) // MICROSECOND)
+    durations = np.maximum(ends - times, 0) * HOURS_PER_MICROSECOND
+
+    tracked = np.bincount(positions, weights=durations, minlength=count)
+    downtime = np.bincount(positions, weights=durations * down, minlength=count)
+    retired_hours = np.bincount(positions, weights=durations * retired, minlength=count)
+    previous_down = np.insert(down[:-1] & (positions[1:] == positions[:-1]), 0, False)
+    downtime_events = np.bincount(positions, weights=down & ~previous_down & (durations > 0), minlength=count)
+
+    categories = sorted({row.category or "Unknown" for row in equipment.values()})
+    category_index = {name: index for index, name in enumerate(categories)}
+    equipment_category_index = np.array(
+        [category_index[row.category or "Unknown"] for row in equipment.values()], dtype=np.int64
+    )
+
+    # Sweep line over downtime intervals, grouped by category
+    down_rows = down & (durations > 0)
+    event_category = np.concatenate([equipment_category_index[positions[down_rows]]] * 2)
+    event_time = np.concatenate([times[down_rows], ends[down_rows]])
+    event_delta = np.concatenate([np.ones(down_rows.sum(), dtype=np.int64), -np.ones(down_rows.sum(), dtype=np.int64)])
+    order = np.lexsort((event_delta, event_time, event_category))
+    event_category, event_time, event_delta = event_category[order], event_time[order], event_delta[order]
+    level = np.cumsum(event_delta)  # Every category's deltas sum to zero, so levels reset between groups
+    same_category = np.append(event_category[1:] == event_category[:-1], False)
+    spans = np.where(same_category, np.append(event_time[1:], 0) - event_time, 0) * HOURS_PER_MICROSECOND
+    any_down = np.bincount(event_category, weights=spans * (level > 0), minlength=len(categories))
+    peak = np.zeros(len(categories), dtype=np.int64)
+    np.maximum.at(peak, event_category, level)
+
+    results = []
+    for index, row in enumerate(equipment.values()):
+        scheduled = tracked[index] - retired_hours[index]
+        uptime = scheduled - downtime[index]
+        results.append({
+            "equipment_id": row.id,
+            "code": row.equipment_id,
+            "name": row.name,
+            "category": row.category or "Unknown",
+            "status": row.status,
+            "tracked_hours": round(float(tracked[index]), 2),
+            "downtime_hours": round(float(downtime[index]), 2),
+            "downtime_events": int(downtime_events[index]),
+            "retired_hours": round(float(retired_hours[index]), 2),
+            "availability": round(float(uptime / scheduled * 100), 2) if scheduled > 0 else None,
+            "utilization": round(float(uptime / window_hours * 100), 2) if window_hours > 0 else 0.0,
+        })
+
+    category_downtime = np.bincount(equipment_category_index, weights=downtime, minlength=len(categories))
+    category_scheduled = np.bincount(
+        equipment_category_index, weights=tracked - retired_hours, minlength=len(categories)
+    )
+    category_counts = np.bincount(equipment_category_index, minlength=len(categories))
+    category_results = [
+        {
+            "category": name,
+            "equipment_count": int(category_counts[index]),
+            "downtime_hours": round(float(category_downtime[index]), 2),
+            "any_down_hours": round(float(any_down[index]), 2),
+            "overlapping_downtime_hours": round(float(category_downtime[index] - any_down[index]), 2),
+            "peak_concurrent_down": int(peak[index]),
+            "availability": (
+                round(float((1 - category_downtime[index] / category_scheduled[index]) * 100), 2)
+                if category_scheduled[index] > 0 else None
+            ),
+        }
+        for name, index in category_index.items()
+    ]
+
+    return {"window_hours": round(window_hours, 2), "equipment": results, "categories": category_results}
+
+
+def get_equipment_timeline(
+    db: Session,
+    equipment_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500
+) -> List[EquipmentStateChange]:
+    """Get an equipment's state changes, newest first."""
+    query = db.query(EquipmentStateChange).filter(EquipmentStateChange.equipment_id == equipment_id)
+    if start:
+        query = query.filter(EquipmentStateChange.occurred_at >= start)
+    if end:
+        query = query.filter(EquipmentStateChange.occurred_at < end)
+    return query.order_by(
+        EquipmentStateChange.occurred_at.desc(), EquipmentStateChange.id.desc()
+    ).limit(limit).all()
@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func
+from models.inventory import InventoryAggregate, InventoryCategory, InventoryItem
+
+# (category_id, stock value, low-stock flag, out-of-stock flag)
+ItemState = Tuple[int, float, int, int]
+
+
+def item_state(item: Optional[InventoryItem]) -> Optional[ItemState]:
+    """Capture the counter contribution of an item so a later change can be applied as a delta."""
+    if item is None:
+        return None
+    quantity = item.quantity or 0.0
+    value = quantity * item.unit_cost if item.unit_cost is not None else 0.0
+    low_stock = 1 if item.reorder_point is not None and quantity <= item.reorder_point else 0
+    out_of_stock = 1 if quantity <= 0 else 0
+    return (item.category_id, value, low_stock, out_of_stock)
+
+
+def _scope_filter(category_id: Optional[int]):
+    if category_id is None:
+        return InventoryAggregate.category_id.is_(None)
+    return InventoryAggregate.category_id == category_id
+
+
+def _is_initialized(db: Session) -> bool:
+    return db.query(InventoryAggregate.id).filter(_scope_filter(None)).first() is not None
+
+
+def apply_item_change(db: Session, before: Optional[ItemState], after: Optional[ItemState]) -> None:
+    """
+    Apply the difference between two item states to the category and global counters.
+
+    Counters are incremented in SQL so concurrent stock movements do not overwrite
+    each other. Nothing is written until the first reconciliation has built the table.
+    The caller commits.
+    """
+    deltas: Dict[Optional[int], List[float]] = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        category_id, value, low_stock, out_of_stock = state
+        for scope in (category_id, None):
+            delta = deltas.setdefault(scope, [0, 0.0, 0, 0])
+            delta[0] += sign
+            delta[1] += sign * value
+            delta[2] += sign * low_stock
+            delta[3] += sign * out_of_stock
+
+    changed = {
+        scope: delta for scope, delta in deltas.items()
+        if delta[0] or delta[2] or delta[3] or abs(delta[1]) > 1e-9
+    }
+    if not changed or not _is_initialized(db):
+        return
+
+    for scope, (count, value, low_stock, out_of_stock) in changed.items():
+        updated = db.query(InventoryAggregate).filter(_scope_filter(scope)).update({
+            InventoryAggregate.item_count: InventoryAggregate.item_count + count,
+            InventoryAggregate.total_value: InventoryAggregate.total_value + value,
+            InventoryAggregate.low_stock_count: InventoryAggregate.low_stock_count + low_stock,
+            InventoryAggregate.out_of_stock_count: InventoryAggregate.out_of_stock_count + out_of_stock,
+        }, synchronize_session=False)
+        if not updated:
+            # Categories created after the last reconciliation start from zero.
+            db.add(InventoryAggregate(
+                category_id=scope,
+                item_count=count,
+                total_value=value,
+                low_stock_count=low_stock,
+                out_of_stock_count=out_of_stock,
+            ))
+            db.flush()
+
+
+def ensure_category_row(db: Session, category_id: int) -> None:
+    """Create an empty counter row for a new category. The caller commits."""
+    if not _is_initialized(db):
+        return
+    exists = db.query(InventoryAggregate.id).filter(_scope_filter(category_id)).first()
+    if not exists:
+        db.add(InventoryAggregate(category_id=category_id))
+
+
+def delete_category_row(db: Session, category_id: int) -> None:
+    """Drop the counter row of a category being hard-deleted. The caller commits."""
+    db.query(InventoryAggregate).filter(_scope_filter(category_id)).delete(synchronize_session=False)
+
+
+def reconcile_inventory_aggregates(db: Session) -> dict:
+    """Rebuild every counter row from inventory_items in one grouped scan."""
+    # Lock existing counters first so in-flight movements either land before the
+    # scan (and are counted) or wait and apply their delta on top of it.
+    existing = {
+        row.category_id: row
+        for row in db.query(InventoryAggregate).with_for_update().all()
+    }
+
+    value_expr = func.coalesce(InventoryItem.quantity * InventoryItem.unit_cost, 0)
+    low_stock_expr = case(
+        (and_(InventoryItem.reorder_point.isnot(None), InventoryItem.quantity <= InventoryItem.reorder_point), 1),
+        else_=0
+    )
+    out_of_stock_expr = case((InventoryItem.quantity <= 0, 1), else_=0)
+    grouped = db.query(
+        InventoryItem.category_id,
+        func.count(InventoryItem.id),
+        func.sum(value_expr),
+        func.sum(low_stock_expr),
+        func.sum(out_of_stock_expr),
+    ).group_by(InventoryItem.category_id).all()
+
+    totals: Dict[Optional[int], Tuple[int, float, int, int]] = {
+        category_id: (0, 0.0, 0, 0)
+        for (category_id,) in db.query(InventoryCategory.id).all()
+    }
+    global_totals = [0, 0.0, 0, 0]
+    for category_id, count, value, low_stock, out_of_stock in grouped:
+        row = (int(count or 0), float(value or 0), int(low_stock or 0), int(out_of_stock or 0))
+        totals[category_id] = row
+        for index, amount in enumerate(row):
+            global_totals[index] += amount
+    totals[None] = tuple(global_totals)
+
+    now = datetime.utcnow()
+    for scope, (count, value, low_stock, out_of_stock) in totals.items():
+        row = existing.pop(scope, None)
+        if row is None:
+            row = InventoryAggregate(category_id=scope)
+            db.add(row)
+        row.item_count = count
+        row.total_value = value
+        row.low_stock_count = low_stock
+        row.out_of_stock_count = out_of_stock
+        row.reconciled_at = now
+
+    for stale in existing.values():
+        db.delete(stale)
+
+    db.commit()
+    return {
+        "categories": len(totals) - 1,
+        "total_items": global_totals[0],
+        "total_value": round(global_totals[1], 2),
+        "reconciled_at": now.isoformat(),
+    }
+
+
+def get_inventory_totals(db: Session) -> InventoryAggregate:
+    """Return the global counter row, building the table on first use."""
+    row = db.query(InventoryAggregate).filter(_scope_filter(None)).first()
+    if row is None:
+        reconcile_inventory_aggregates(db)
+        row = db.query(InventoryAggregate).filter(_scope_filter(None)).first()
+    return row
+
+
+def get_category_totals(db: Session, active_only: bool = False) -> List[tuple]:
+    """Return (category name, counter row) pairs for every category in one query."""
+    get_inventory_totals(db)
+    query = db.query(InventoryCategory.name, InventoryAggregate).outerjoin(
+        InventoryAggregate, InventoryAggregate.category_id == InventoryCategory.id
+    )
+    if active_only:
+        query = query.filter(InventoryCategory.is_active == True)
+    return query.order_by(InventoryCategory.name).all()
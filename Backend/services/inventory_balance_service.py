@@ -0,0 +1,280 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, literal, or_, select
+from core.config import settings
+from models.inventory import InventoryItem, InventoryTransaction, InventoryBalanceCheckpoint
+from services.inventory_valuation_service import signed_quantity_expr, signed_value_expr
+
+CHECKPOINT_PERIODS = ("daily", "monthly")
+
+
+# ==================== PERIOD HELPERS ====================
+
+def _validate_period(period: str) -> str:
+    if period not in CHECKPOINT_PERIODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Checkpoint period must be one of: {', '.join(CHECKPOINT_PERIODS)}"
+        )
+    return period
+
+
+def period_start(moment: datetime, period: str) -> datetime:
+    """Return the checkpoint boundary at or before ``moment``."""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "monthly":
+        return day.replace(day=1)
+    return day
+
+
+def previous_period_start(boundary: datetime, period: str) -> datetime:
+    """Return the checkpoint boundary immediately before ``boundary``."""
+    return period_start(boundary - timedelta(days=1), period)
+
+
+def parse_as_of(value: str) -> datetime:
+    """
+    Parse an ``as_of`` query value into a naive UTC instant.
+
+    A bare date means the close of that day; datetimes are used as given.
+    """
+    try:
+        if len(value) == 10:
+            return datetime.fromisoformat(value) + timedelta(days=1)
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="as_of must be an ISO date (YYYY-MM-DD) or datetime"
+        )
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _ledger_totals(*conditions):
+    """Per-item signed quantity and value of the ledger rows matching ``conditions``."""
+    tx = InventoryTransaction.__table__
+    return select(
+        tx.c.item_id,
+        func.sum(signed_quantity_expr(tx)).label("quantity"),
+        func.sum(signed_value_expr(tx)).label("value")
+    ).where(*conditions).group_by(tx.c.item_id)
+
+
+# ==================== CHECKPOINT WRITING ====================
+
+def write_balance_checkpoints(
+    db: Session,
+    as_of: Optional[datetime] = None,
+    period: Optional[str] = None
+) -> dict:
+    """
+    Write one checkpoint per item for the latest period boundary.
+
+    The balance is derived backwards from the live item quantity minus every
+    ledger row posted since the boundary, in a single INSERT ... SELECT so both
+    sides come from the same snapshot. Boundaries already checkpointed are skipped,
+    which keeps the job idempotent when it runs more often than the period.
+    """
+    period = _validate_period(period or settings.INVENTORY_CHECKPOINT_PERIOD)
+    as_of = as_of or period_start(datetime.utcnow(), period)
+
+    if db.query(InventoryBalanceCheckpoint.id).filter(InventoryBalanceCheckpoint.as_of == as_of).first():
+        return {"as_of": as_of, "written": 0}
+
+    tx = InventoryTransaction.__table__
+    items = InventoryItem.__table__
+    checkpoints = InventoryBalanceCheckpoint.__table__
+    later = _ledger_totals(tx.c.created_at >= as_of).subquery()
+    now = datetime.utcnow()
+
+    source = select(
+        items.c.id,
+        literal(as_of),
+        items.c.quantity - func.coalesce(later.c.quantity, 0),
+        items.c.quantity * func.coalesce(items.c.unit_cost, 0) - func.coalesce(later.c.value, 0),
+        literal(now),
+        literal(now)
+    ).select_from(
+        items.outerjoin(later, later.c.item_id == items.c.id)
+    ).where(items.c.created_at < as_of)
+
+    result = db.execute(insert(checkpoints).from_select(
+        ["item_id", "as_of", "quantity", "value", "created_at", "updated_at"], source
+    ))
+    db.commit()
+    return {"as_of": as_of, "written": result.rowcount}
+
+
+def backfill_balance_checkpoints(db: Session, since: datetime, period: Optional[str] = None) -> dict:
+    """
+    Write checkpoints for every boundary from the current period back to ``since``.
+
+    Each earlier checkpoint is derived from the one after it minus the ledger rows
+    of the period in between, so the ledger is scanned once in total.
+    """
+    period = _validate_period(period or settings.INVENTORY_CHECKPOINT_PERIOD)
+    boundary = period_start(datetime.utcnow(), period)
+    write_balance_checkpoints(db, as_of=boundary, period=period)
+
+    tx = InventoryTransaction.__table__
+    items = InventoryItem.__table__
+    checkpoints = InventoryBalanceCheckpoint.__table__
+    written = 0
+    earliest = period_start(since, period)
+
+    while boundary > earliest:
+        previous = previous_period_start(boundary, period)
+        exists = db.query(InventoryBalanceCheckpoint.id).filter(
+            InventoryBalanceCheckpoint.as_of == previous
+        ).first()
+        if not exists:
+            between = _ledger_totals(tx.c.created_at >= previous, tx.c.created_at < boundary).subquery()
+            now = datetime.utcnow()
+            source = select(
+                checkpoints.c.item_id,
+                literal(previous),
+                checkpoints.c.quantity - func.coalesce(between.c.quantity, 0),
+                checkpoints.c.value - func.coalesce(between.c.value, 0),
+                literal(now),
+                literal(now)
+            ).select_from(
+                checkpoints
+                .join(items, items.c.id == checkpoints.c.item_id)
+                .outerjoin(between, between.c.item_id == checkpoints.c.item_id)
+            ).where(
+                checkpoints.c.as_of == boundary,
+                items.c.created_at < previous
+            )
+            result = db.execute(insert(checkpoints).from_select(
+                ["item_id", "as_of", "quantity", "value", "created_at", "updated_at"], source
+            ))
+            db.commit()
+            written += result.rowcount
+        boundary = previous
+
+    return {"since": earliest, "written": written}
+
+
+def run_checkpoint_job(db: Session) -> dict:
+    """Scheduled entry point: checkpoint the current period boundary."""
+    return write_balance_checkpoints(db)
+
+
+# ==================== AS-OF QUERIES ====================
+
+def _anchor_checkpoints(db: Session, item_ids: List[int], as_of: datetime, before: bool):
+    """
+    Return the nearest checkpoint per item on one side of ``as_of``.
+
+    ``before`` picks the latest checkpoint at or before the instant; otherwise the
+    earliest one after it.
+    """
+    checkpoints = InventoryBalanceCheckpoint.__table__
+    if before:
+        nearest = select(
+            checkpoints.c.item_id, func.max(checkpoints.c.as_of).label("as_of")
+        ).where(checkpoints.c.item_id.in_(item_ids), checkpoints.c.as_of <= as_of)
+    else:
+        nearest = select(
+            checkpoints.c.item_id, func.min(checkpoints.c.as_of).label("as_of")
+        ).where(checkpoints.c.item_id.in_(item_ids), checkpoints.c.as_of > as_of)
+    nearest = nearest.group_by(checkpoints.c.item_id).subquery()
+
+    rows = db.execute(
+        select(checkpoints.c.item_id, checkpoints.c.as_of, checkpoints.c.quantity, checkpoints.c.value)
+        .join(nearest, and_(
+            nearest.c.item_id == checkpoints.c.item_id,
+            nearest.c.as_of == checkpoints.c.as_of
+        ))
+    ).all()
+    return nearest, {row.item_id: row for row in rows}
+
+
+def get_stock_balances(
+    db: Session,
+    as_of: datetime,
+    item_ids: Optional[List[int]] = None,
+    category_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> Tuple[List[dict], int]:
+    """
+    Get item quantities and values as they stood at ``as_of``.
+
+    Each item starts from its nearest checkpoint and applies only the ledger rows
+    between the checkpoint and the requested instant: forwards from the latest
+    checkpoint before it, else backwards from the next checkpoint, else backwards
+    from the live item. All lookups are grouped per page of items.
+    """
+    query = db.query(InventoryItem)
+    if item_ids:
+        query = query.filter(InventoryItem.id.in_(item_ids))
+    if category_id:
+        query = query.filter(InventoryItem.category_id == category_id)
+
+    total = query.count()
+    items = query.order_by(InventoryItem.id).offset(skip).limit(limit).all()
+    if not items:
+        return [], total
+
+    page_ids = [item.id for item in items]
+    tx = InventoryTransaction.__table__
+
+    before, before_rows = _anchor_checkpoints(db, page_ids, as_of, before=True)
+    forward = {
+        row.item_id: row for row in db.execute(
+            _ledger_totals(tx.c.created_at < as_of)
+            .join(before, and_(before.c.item_id == tx.c.item_id, tx.c.created_at >= before.c.as_of))
+        ).all()
+    }
+
+    remaining = [item_id for item_id in page_ids if item_id not in before_rows]
+    after_rows: Dict[int, object] = {}
+    backward: Dict[int, object] = {}
+    if remaining:
+        after, after_rows = _anchor_checkpoints(db, remaining, as_of, before=False)
+        backward = {
+            row.item_id: row for row in db.execute(
+                _ledger_totals(
+                    tx.c.item_id.in_(remaining),
+                    tx.c.created_at >= as_of,
+                    or_(after.c.as_of.is_(None), tx.c.created_at < after.c.as_of)
+                ).select_from(tx.outerjoin(after, after.c.item_id == tx.c.item_id))
+            ).all()
+        }
+
+    balances = []
+    for item in items:
+        if item.created_at >= as_of:
+            quantity, value, anchor = 0.0, 0.0, None
+        elif item.id in before_rows:
+            checkpoint = before_rows[item.id]
+            delta = forward.get(item.id)
+            quantity = checkpoint.quantity + ((delta.quantity or 0.0) if delta else 0.0)
+            value = checkpoint.value + ((delta.value or 0.0) if delta else 0.0)
+            anchor = checkpoint.as_of
+        else:
+            delta = backward.get(item.id)
+            if item.id in after_rows:
+                checkpoint = after_rows[item.id]
+                quantity, value, anchor = checkpoint.quantity, checkpoint.value, checkpoint.as_of
+            else:
+                quantity, value, anchor = item.quantity, item.quantity * (item.unit_cost or 0.0), None
+            quantity -= (delta.quantity or 0.0) if delta else 0.0
+            value -= (delta.value or 0.0) if delta else 0.0
+
+        balances.append({
+            "item_id": item.id,
+            "item_code": item.item_code,
+            "name": item.name,
+            "unit_of_measure": item.unit_of_measure,
+            "quantity": round(quantity, 6),
+            "value": round(value, 2),
+            "checkpoint_as_of": anchor,
+        })
+
+    return balances, total
@@ -0,0 +1,301 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, bindparam, func, select, update
+from core.config import settings
+from models.inventory import InventoryItem, InventoryTransaction, TransactionType
+from services.inventory_aggregate_service import reconcile_inventory_aggregates
+
+
+@dataclass
+class ForecastParameters:
+    service_level: float
+    lead_time_days: float
+    review_period_days: float
+    lookback_days: int
+    alpha: float
+
+    @classmethod
+    def resolve(
+        cls,
+        service_level: Optional[float] = None,
+        lead_time_days: Optional[float] = None,
+        review_period_days: Optional[float] = None,
+        lookback_days: Optional[int] = None,
+        alpha: Optional[float] = None
+    ) -> "ForecastParameters":
+        """Fill unset parameters from settings and validate the result."""
+        parameters = cls(
+            service_level=service_level if service_level is not None else settings.INVENTORY_SERVICE_LEVEL,
+            lead_time_days=lead_time_days if lead_time_days is not None else settings.INVENTORY_LEAD_TIME_DAYS,
+            review_period_days=(
+                review_period_days if review_period_days is not None else settings.INVENTORY_REVIEW_PERIOD_DAYS
+            ),
+            lookback_days=lookback_days if lookback_days is not None else settings.INVENTORY_FORECAST_LOOKBACK_DAYS,
+            alpha=alpha if alpha is not None else settings.INVENTORY_FORECAST_SMOOTHING_ALPHA,
+        )
+        if not 0.5 <= parameters.service_level < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Service level must be between 0.5 and 1 (exclusive)"
+            )
+        if not 0 < parameters.alpha <= 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Smoothing factor must be in (0, 1]"
+            )
+        if parameters.lookback_days < 2 or parameters.lead_time_days < 0 or parameters.review_period_days < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Lookback must cover at least 2 days; lead time and review period cannot be negative"
+            )
+        return parameters
+
+
+@dataclass
+class DemandHistory:
+    """Sparse daily issue totals: one entry per (item, day) with demand."""
+    item_ids: np.ndarray    # Distinct item ids, ascending
+    positions: np.ndarray   # Row -> index into item_ids
+    day_index: np.ndarray   # Row -> day offset from the window start
+    quantity: np.ndarray    # Row -> quantity issued that day
+    days: int
+
+
+# ==================== DEMAND HISTORY ====================
+
+def load_demand_history(db: Session, lookback_days: int, today: Optional[date] = None) -> DemandHistory:
+    """
+    Load daily issue totals for every item in one grouped query.
+
+    Only completed days are used, so the current partial day does not drag the
+    averages down. Rows come back ordered by item, which lets the parallel path
+    slice contiguous item ranges.
+    """
+    today = today or datetime.utcnow().date()
+    window_start = today - timedelta(days=lookback_days)
+    transactions = InventoryTransaction.__table__
+    day = func.date(transactions.c.created_at, type_=Date)
+
+    rows = db.execute(
+        select(transactions.c.item_id, day, func.sum(func.abs(transactions.c.quantity)))
+        .where(
+            transactions.c.transaction_type == TransactionType.ISSUE,
+            transactions.c.created_at >= datetime.combine(window_start, datetime.min.time()),
+            transactions.c.created_at < datetime.combine(today, datetime.min.time())
+        )
+        .group_by(transactions.c.item_id, day)
+        .order_by(transactions.c.item_id, day)
+    ).all()
+
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return DemandHistory(empty, empty, empty, np.array([], dtype=np.float64), lookback_days)
+
+    item_column, day_column, quantity_column = zip(*rows)
+    raw_item_ids = np.fromiter(item_column, dtype=np.int64, count=len(rows))
+    days = np.array(day_column, dtype="datetime64[D]")
+    item_ids, positions = np.unique(raw_item_ids, return_inverse=True)
+
+    return DemandHistory(
+        item_ids=item_ids,
+        positions=positions,
+        day_index=(days - np.datetime64(window_start, "D")).astype(np.int64),
+        quantity=np.fromiter(quantity_column, dtype=np.float64, count=len(rows)),
+        days=lookback_days,
+    )
+
+
+# ==================== STATISTICS ====================
+
+def demand_statistics(
+    positions: np.ndarray,
+    day_index: np.ndarray,
+    quantity: np.ndarray,
+    item_count: int,
+    days: int,
+    alpha: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-item mean daily demand, its standard deviation and a smoothed forecast.
+
+    Days without issues count as zero demand, so sums over the sparse rows are
+    enough: the variance uses sum and sum of squares, and simple exponential
+    smoothing (seeded with the mean) reduces to a weighted sum where day t has
+    weight alpha * (1 - alpha) ** (days - 1 - t).
+    """
+    if not len(positions):
+        # bincount of no rows is integer-typed; nothing was issued, so all zeros
+        zeros = np.zeros(item_count)
+        return zeros, zeros.copy(), zeros.copy()
+
+    total = np.bincount(positions, weights=quantity, minlength=item_count)
+    total_squares = np.bincount(positions, weights=quantity * quantity, minlength=item_count)
+    mean = total / days
+    variance = np.maximum(total_squares - days * mean * mean, 0.0) / (days - 1)
+
+    decay = alpha * np.power(1.0 - alpha, days - 1 - day_index)
+    smoothed = np.bincount(positions, weights=quantity * decay, minlength=item_count)
+    smoothed += (1.0 - alpha) ** days * mean
+
+    return mean, np.sqrt(variance), smoothed
+
+
+def _statistics_chunk(args):
+    positions, day_index, quantity, offset, item_count, days, alpha = args
+    return demand_statistics(positions - offset, day_index, quantity, item_count, days, alpha)
+
+
+def compute_demand_statistics(history: DemandHistory, alpha: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute demand statistics for every item in the history.
+
+    Large histories are split into contiguous item ranges and computed in a
+    process pool; small ones stay in-process where pool start-up would dominate.
+    """
+    item_count = len(history.item_ids)
+    workers = min(settings.INVENTORY_FORECAST_WORKERS, os.cpu_count() or 1)
+    if workers <= 1 or len(history.quantity) < settings.INVENTORY_FORECAST_PARALLEL_MIN_ROWS:
+        return demand_statistics(
+            history.positions, history.day_index, history.quantity, item_count, history.days, alpha
+        )
+
+    boundaries = np.linspace(0, item_count, workers + 1).astype(np.int64)
+    row_bounds = np.searchsorted(history.positions, boundaries)
+    chunks = [
+        (
+            history.positions[row_bounds[i]:row_bounds[i + 1]],
+            history.day_index[row_bounds[i]:row_bounds[i + 1]],
+            history.quantity[row_bounds[i]:row_bounds[i + 1]],
+            boundaries[i],
+            boundaries[i + 1] - boundaries[i],
+            history.days,
+            alpha,
+        )
+        for i in range(workers)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_statistics_chunk, chunks))
+
+    return tuple(np.concatenate([result[k] for result in results]) for k in range(3))
+
+
+# ==================== RECOMMENDATIONS ====================
+
+def compute_reorder_recommendations(db: Session, parameters: ForecastParameters) -> dict:
+    """
+    Recommend stock levels for every item with issue history in the window.
+
+    Safety stock = z * sigma_daily * sqrt(lead time); reorder point = forecast
+    daily demand * lead time + safety stock; max quantity adds one review
+    period of forecast demand. Returns column arrays aligned on item id.
+    """
+    history = load_demand_history(db, parameters.lookback_days)
+    mean, std, forecast = compute_demand_statistics(history, parameters.alpha)
+
+    z = NormalDist().inv_cdf(parameters.service_level)
+    safety_stock = z * std * np.sqrt(parameters.lead_time_days)
+    reorder_point = forecast * parameters.lead_time_days + safety_stock
+    max_quantity = reorder_point + forecast * parameters.review_period_days
+
+    return {
+        "item_ids": history.item_ids,
+        "daily_demand": mean,
+        "demand_std": std,
+        "forecast_daily_demand": forecast,
+        "safety_stock": np.round(safety_stock, 2),
+        "reorder_point": np.round(reorder_point, 2),
+        "max_quantity": np.round(max_quantity, 2),
+    }
+
+
+def get_reorder_recommendations(
+    db: Session,
+    parameters: ForecastParameters,
+    skip: int = 0,
+    limit: int = 100
+) -> Tuple[List[dict], int]:
+    """Get one page of reorder recommendations alongside the items' current settings."""
+    recommendations = compute_reorder_recommendations(db, parameters)
+    total = len(recommendations["item_ids"])
+    page = slice(skip, skip + limit)
+    page_ids = recommendations["item_ids"][page].tolist()
+    if not page_ids:
+        return [], total
+
+    items = {
+        item.id: item for item in db.query(InventoryItem).filter(InventoryItem.id.in_(page_ids)).all()
+    }
+    columns = {name: values[page].tolist() for name, values in recommendations.items()}
+
+    results = []
+    for index, item_id in enumerate(page_ids):
+        item = items.get(item_id)
+        if item is None:
+            continue
+        results.append({
+            "item_id": item_id,
+            "item_code": item.item_code,
+            "name": item.name,
+            "quantity": item.quantity,
+            "current_reorder_point": item.reorder_point,
+            "current_min_quantity": item.min_quantity,
+            "current_max_quantity": item.max_quantity,
+            "daily_demand": round(columns["daily_demand"][index], 4),
+            "demand_std": round(columns["demand_std"][index], 4),
+            "forecast_daily_demand": round(columns["forecast_daily_demand"][index], 4),
+            "safety_stock": columns["safety_stock"][index],
+            "recommended_reorder_point": columns["reorder_point"][index],
+            "recommended_min_quantity": columns["safety_stock"][index],
+            "recommended_max_quantity": columns["max_quantity"][index],
+        })
+    return results, total
+
+
+def apply_reorder_recommendations(
+    db: Session,
+    service_level: Optional[float] = None,
+    lead_time_days: Optional[float] = None,
+    review_period_days: Optional[float] = None,
+    lookback_days: Optional[int] = None,
+    alpha: Optional[float] = None
+) -> dict:
+    """
+    Write recommended reorder point, min and max quantity to every forecast item.
+
+    Updates go out as executemany batches; low-stock counters depend on reorder
+    points, so the inventory aggregates are reconciled afterwards.
+    """
+    parameters = ForecastParameters.resolve(service_level, lead_time_days, review_period_days, lookback_days, alpha)
+    recommendations = compute_reorder_recommendations(db, parameters)
+    items_table = InventoryItem.__table__
+    statement = update(items_table).where(items_table.c.id == bindparam("_id")).values(
+        reorder_point=bindparam("reorder_point"),
+        min_quantity=bindparam("min_quantity"),
+        max_quantity=bindparam("max_quantity"),
+        updated_at=bindparam("updated_at"),
+    )
+
+    now = datetime.utcnow()
+    rows = [
+        {"_id": item_id, "reorder_point": reorder, "min_quantity": minimum, "max_quantity": maximum, "updated_at": now}
+        for item_id, reorder, minimum, maximum in zip(
+            recommendations["item_ids"].tolist(),
+            recommendations["reorder_point"].tolist(),
+            recommendations["safety_stock"].tolist(),
+            recommendations["max_quantity"].tolist(),
+        )
+    ]
+    batch_size = settings.INVENTORY_REVALUE_ITEMS_PER_BATCH
+    for offset in range(0, len(rows), batch_size):
+        db.execute(statement, rows[offset:offset + batch_size])
+        db.commit()
+
+    reconcile_inventory_aggregates(db)
+    return {"items": len(rows), "service_level": parameters.service_level, "lead_time_days": parameters.lead_time_days}
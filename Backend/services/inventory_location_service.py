@@ -0,0 +1,394 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from models.inventory import (
+    InventoryItem, InventoryTransaction, StockLocation, InventoryLocationBalance, LocationMovementType,
+    StockLocationMovement, InventoryLot
+)
+from schemas.inventory import StockLocationCreate, StockLocationUpdate, InventoryTransferRequest
+
+QUANTITY_EPSILON = 1e-9
+
+
+# ==================== LOCATIONS ====================
+
+def _filtered(query, search: Optional[str], warehouse: Optional[str], is_active: Optional[bool]):
+    if search:
+        query = query.filter(or_(
+            StockLocation.code.ilike(f"%{search}%"),
+            StockLocation.description.ilike(f"%{search}%")
+        ))
+    if warehouse:
+        query = query.filter(StockLocation.warehouse == warehouse)
+    if is_active is not None:
+        query = query.filter(StockLocation.is_active == is_active)
+    return query
+
+
+def get_locations(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    warehouse: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> List[StockLocation]:
+    """Get stock locations ordered by code."""
+    return _filtered(db.query(StockLocation), search, warehouse, is_active).order_by(
+        StockLocation.code
+    ).offset(skip).limit(limit).all()
+
+
+def get_locations_count(
+    db: Session, search: Optional[str] = None, warehouse: Optional[str] = None, is_active: Optional[bool] = None
+) -> int:
+    return _filtered(db.query(func.count(StockLocation.id)), search, warehouse, is_active).scalar()
+
+
+def get_location(db: Session, location_id: int) -> Optional[StockLocation]:
+    """Get stock location by ID."""
+    return db.query(StockLocation).filter(StockLocation.id == location_id).first()
+
+
+def _ensure_unique_code(db: Session, code: str, location_id: Optional[int] = None) -> None:
+    query = db.query(StockLocation.id).filter(StockLocation.code == code)
+    if location_id is not None:
+        query = query.filter(StockLocation.id != location_id)
+    if query.first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A stock location with this code already exists"
+        )
+
+
+def create_location(db: Session, location: StockLocationCreate) -> StockLocation:
+    """Create a stock location."""
+    _ensure_unique_code(db, location.code)
+    db_location = StockLocation(**location.model_dump())
+    db.add(db_location)
+    db.commit()
+    db.refresh(db_location)
+    return db_location
+
+
+def update_location(db: Session, location_id: int, location: StockLocationUpdate) -> Optional[StockLocation]:
+    """Update a stock location."""
+    db_location = get_location(db, location_id)
+    if not db_location:
+        return None
+
+    update_data = location.model_dump(exclude_unset=True)
+    if update_data.get("code"):
+        _ensure_unique_code(db, update_data["code"], location_id)
+    for field, value in update_data.items():
+        setattr(db_location, field, value)
+
+    db.commit()
+    db.refresh(db_location)
+    return db_location
+
+
+def delete_location(db: Session, location_id: int) -> bool:
+    """Delete a stock location that holds no stock."""
+    db_location = get_location(db, location_id)
+    if not db_location:
+        return False
+    holding = db.query(InventoryLocationBalance.id).filter(
+        InventoryLocationBalance.location_id == location_id,
+        InventoryLocationBalance.quantity > QUANTITY_EPSILON
+    ).first()
+    if holding:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot delete a location that still holds stock"
+        )
+
+    db.query(InventoryLocationBalance).filter(
+        InventoryLocationBalance.location_id == location_id
+    ).delete(synchronize_session=False)
+    db.delete(db_location)
+    db.commit()
+    return True
+
+
+def _active_location(db: Session, location_id: int) -> StockLocation:
+    location = get_location(db, location_id)
+    if not location:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Stock location {location_id} not found")
+    if not location.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stock location {location.code} is inactive"
+        )
+    return location
+
+
+# ==================== BALANCES ====================
+
+def _lots_at(item_id, location_id: Optional[int]):
+    """Condition selecting an item's lots held at a location, or unassigned lots for ``None``."""
+    held = InventoryLot.location_id.is_(None) if location_id is None else InventoryLot.location_id == location_id
+    return (InventoryLot.item_id == item_id, held)
+
+
+def _lotted_quantity(db: Session, item_id: int, location_id: Optional[int]) -> float:
+    return db.query(func.coalesce(func.sum(InventoryLot.quantity), 0.0)).filter(
+        *_lots_at(item_id, location_id)
+    ).scalar()
+
+
+def _change_balance(db: Session, item_id: int, location_id: int, delta: float) -> None:
+    """
+    Move an item's balance at a location in SQL. Decreases are conditional on
+    the balance still covering the lots held there, so concurrent issues cannot
+    take a bin negative or below its lotted stock. The caller commits, after
+    moving the lot balances.
+    """
+    statement = update(InventoryLocationBalance).where(
+        InventoryLocationBalance.item_id == item_id,
+        InventoryLocationBalance.location_id == location_id
+    ).values(quantity=InventoryLocationBalance.quantity + delta)
+    if delta < 0:
+        lotted = select(func.coalesce(func.sum(InventoryLot.quantity), 0.0)).where(
+            InventoryLot.item_id == InventoryLocationBalance.item_id,
+            InventoryLot.location_id == InventoryLocationBalance.location_id
+        ).scalar_subquery()
+        statement = statement.where(InventoryLocationBalance.quantity + delta >= lotted - QUANTITY_EPSILON)
+    if db.execute(statement.execution_options(synchronize_session=False)).rowcount:
+        return
+    if delta < 0:
+        code = db.query(StockLocation.code).filter(StockLocation.id == location_id).scalar()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient stock at location {code or location_id}"
+        )
+    db.add(InventoryLocationBalance(item_id=item_id, location_id=location_id, quantity=delta))
+    db.flush()
+
+
+def located_quantity(db: Session, item_id: int) -> float:
+    """Quantity of an item held at locations, summed over its few balance rows."""
+    return db.query(func.coalesce(func.sum(InventoryLocationBalance.quantity), 0.0)).filter(
+        InventoryLocationBalance.item_id == item_id
+    ).scalar()
+
+
+def _movement_rows(
+    item_id: int,
+    moves: List[Tuple[int, float, LocationMovementType]],
+    transaction_id: Optional[int],
+    reference: Optional[str],
+    notes: Optional[str],
+    performed_by: Optional[int]
+) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "item_id": item_id,
+            "location_id": location_id,
+            "movement_type": movement_type,
+            "quantity": quantity,
+            "transaction_id": transaction_id,
+            "reference_number": reference,
+            "notes": notes,
+            "performed_by": performed_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for location_id, quantity, movement_type in moves
+    ]
+
+
+def apply_stock_movement(
+    db: Session,
+    item: InventoryItem,
+    delta: float,
+    location_id: Optional[int],
+    transaction: InventoryTransaction,
+    lot_moves: Optional[Dict[Optional[int], float]] = None
+) -> None:
+    """
+    Carry a costed stock movement into location balances. Called after the
+    lot balances have moved (``lot_moves`` is what ``apply_lot_movement``
+    returned) and before the item total changes.
+
+    Lotted stock is booked where its lot is held, so a location's balance
+    always covers the lots held there. With a location the whole movement is
+    booked there. Without one, receipts stay unassigned apart from lots held
+    at a location; issues book their lot draws at the lots' locations and take
+    the unlotted rest from unassigned stock first, then from the unlotted
+    stock at locations in code order, so balances never exceed the item
+    total. The caller commits.
+    """
+    if abs(delta) <= QUANTITY_EPSILON:
+        return
+    lot_moves = lot_moves or {}
+    booked: Dict[int, float] = {}
+    if location_id is not None:
+        _active_location(db, location_id)
+        booked[location_id] = delta
+    else:
+        for lot_location_id, quantity in lot_moves.items():
+            if lot_location_id is not None:
+                booked[lot_location_id] = quantity
+        unlotted = -delta - sum(-quantity for quantity in lot_moves.values())
+        if delta < 0 and unlotted > QUANTITY_EPSILON:
+            unassigned = (item.quantity or 0.0) - located_quantity(db, item.id) + lot_moves.get(None, 0.0)
+            shortfall = unlotted - max(unassigned - _lotted_quantity(db, item.id, None), 0.0)
+            if shortfall > QUANTITY_EPSILON:
+                lotted = func.coalesce(select(func.sum(InventoryLot.quantity)).where(
+                    InventoryLot.item_id == InventoryLocationBalance.item_id,
+                    InventoryLot.location_id == InventoryLocationBalance.location_id
+                ).scalar_subquery(), 0.0)
+                held = db.query(
+                    InventoryLocationBalance.location_id, InventoryLocationBalance.quantity, lotted
+                ).join(StockLocation, StockLocation.id == InventoryLocationBalance.location_id).filter(
+                    InventoryLocationBalance.item_id == item.id,
+                    InventoryLocationBalance.quantity > QUANTITY_EPSILON
+                ).order_by(StockLocation.code).all()
+                for held_location_id, quantity, lotted_there in held:
+                    free = quantity + booked.get(held_location_id, 0.0) - lotted_there
+                    taken = min(free, shortfall)
+                    if taken <= QUANTITY_EPSILON:
+                        continue
+                    booked[held_location_id] = booked.get(held_location_id, 0.0) - taken
+                    shortfall -= taken
+                    if shortfall <= QUANTITY_EPSILON:
+                        break
+    moves = [
+        (move_location_id, quantity, LocationMovementType.MOVEMENT)
+        for move_location_id, quantity in booked.items()
+        if abs(quantity) > QUANTITY_EPSILON
+    ]
+    if not moves:
+        return
+
+    for move_location_id, quantity, _ in moves:
+        _change_balance(db, item.id, move_location_id, quantity)
+    db.flush()
+    db.execute(insert(StockLocationMovement.__table__), _movement_rows(
+        item.id, moves, transaction.id, transaction.reference_number, None, transaction.performed_by
+    ))
+
+
+def transfer_stock(
+    db: Session,
+    item_id: int,
+    transfer: InventoryTransferRequest,
+    performed_by: int
+) -> dict:
+    """
+    Move stock between locations, or between a location and unassigned stock.
+
+    Lotted stock moves with its lot: naming ``lot_id`` relocates the whole lot
+    and its quantity, and a transfer without one may only move the unlotted
+    stock at the source. Both ledger rows and both balance changes commit
+    together; the item total and its valuation are unchanged.
+    """
+    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    if transfer.from_location_id == transfer.to_location_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Source and destination locations must differ"
+        )
+
+    if transfer.lot_id is not None:
+        lot = db.query(InventoryLot).filter(
+            InventoryLot.id == transfer.lot_id, InventoryLot.item_id == item_id
+        ).with_for_update().first()
+        if not lot:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lot not found")
+        if lot.location_id != transfer.from_location_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lot {lot.lot_number} is not held at the source location"
+            )
+        if abs(lot.quantity - transfer.quantity) > QUANTITY_EPSILON:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lot {lot.lot_number} holds {lot.quantity:g}; a lot moves as a whole"
+            )
+        lot.location_id = transfer.to_location_id
+        db.flush()
+
+    moves: List[Tuple[int, float, LocationMovementType]] = []
+    if transfer.from_location_id is not None:
+        _active_location(db, transfer.from_location_id)
+        moves.append((transfer.from_location_id, -transfer.quantity, LocationMovementType.TRANSFER_OUT))
+    elif (
+        item.quantity - located_quantity(db, item_id) - _lotted_quantity(db, item_id, None)
+        < transfer.quantity - QUANTITY_EPSILON
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient unassigned stock")
+    if transfer.to_location_id is not None:
+        _active_location(db, transfer.to_location_id)
+        moves.append((transfer.to_location_id, transfer.quantity, LocationMovementType.TRANSFER_IN))
+
+    for location_id, quantity, _ in moves:
+        _change_balance(db, item_id, location_id, quantity)
+    db.execute(insert(StockLocationMovement.__table__), _movement_rows(
+        item_id, moves, None, transfer.reference, transfer.notes, performed_by
+    ))
+    db.commit()
+    return get_item_locations(db, item_id)
+
+
+# ==================== QUERIES ====================
+
+def get_item_locations(db: Session, item_id: int) -> Optional[dict]:
+    """Where an item is held: balances per location plus the unassigned remainder."""
+    quantity = db.query(InventoryItem.quantity).filter(InventoryItem.id == item_id).scalar()
+    if quantity is None:
+        return None
+    rows = db.execute(select(
+        InventoryLocationBalance.location_id, InventoryLocationBalance.quantity,
+        StockLocation.code, StockLocation.warehouse, StockLocation.zone, StockLocation.bin
+    ).join(StockLocation, StockLocation.id == InventoryLocationBalance.location_id).where(
+        InventoryLocationBalance.item_id == item_id,
+        InventoryLocationBalance.quantity > QUANTITY_EPSILON
+    ).order_by(StockLocation.code)).all()
+    return {
+        "item_id": item_id,
+        "quantity": quantity,
+        "unassigned_quantity": quantity - sum(row.quantity for row in rows),
+        "locations": [
+            {
+                "location_id": row.location_id,
+                "code": row.code,
+                "warehouse": row.warehouse,
+                "zone": row.zone,
+                "bin": row.bin,
+                "quantity": row.quantity,
+            }
+            for row in rows
+        ],
+    }
+
+
+def get_location_stock(db: Session, location_id: int, skip: int = 0, limit: int = 100) -> Tuple[List[dict], int]:
+    """Items held at a location, by item code."""
+    held = (
+        InventoryLocationBalance.location_id == location_id,
+        InventoryLocationBalance.quantity > QUANTITY_EPSILON
+    )
+    total = db.query(func.count()).select_from(InventoryLocationBalance).filter(*held).scalar()
+    rows = db.execute(select(
+        InventoryLocationBalance.item_id, InventoryLocationBalance.quantity,
+        InventoryItem.item_code, InventoryItem.name, InventoryItem.unit_of_measure
+    ).join(InventoryItem, InventoryItem.id == InventoryLocationBalance.item_id).where(*held).order_by(
+        InventoryItem.item_code
+    ).offset(skip).limit(limit)).all()
+    return [
+        {
+            "item_id": row.item_id,
+            "item_code": row.item_code,
+            "name": row.name,
+            "unit_of_measure": row.unit_of_measure,
+            "quantity": row.quantity,
+        }
+        for row in rows
+    ], total
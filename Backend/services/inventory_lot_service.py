@@ -0,0 +1,248 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from models.inventory import InventoryItem, InventoryTransaction, InventoryLot, InventoryLotMovement, StockLocation
+
+QUANTITY_EPSILON = 1e-9
+ANY_LOCATION = object()  # FEFO over every location rather than one
+
+
+# ==================== ALLOCATION ====================
+
+def _fefo_allocation(
+    db: Session, item_id: int, quantity: float, today: date, location_id=ANY_LOCATION
+) -> List[Tuple[int, Optional[int], float]]:
+    """
+    (lot id, lot location, quantity taken) for an issue, first-expired-first-out,
+    over the lots at ``location_id`` (``None`` for unassigned lots).
+
+    A running total over the item's unexpired lots in expiry order (lots
+    without expiry last) selects exactly the lots the issue reaches, so only
+    those rows come back however many lots the item has.
+    """
+    running = func.sum(InventoryLot.quantity).over(
+        order_by=(InventoryLot.expiry_date.is_(None), InventoryLot.expiry_date, InventoryLot.id),
+        rows=(None, 0)
+    )
+    conditions = [
+        InventoryLot.item_id == item_id,
+        InventoryLot.quantity > QUANTITY_EPSILON,
+        or_(InventoryLot.expiry_date.is_(None), InventoryLot.expiry_date >= today)
+    ]
+    if location_id is not ANY_LOCATION:
+        conditions.append(InventoryLot.location_id.is_(None) if location_id is None else InventoryLot.location_id == location_id)
+    ranked = select(
+        InventoryLot.id, InventoryLot.location_id, InventoryLot.quantity, running.label("running")
+    ).where(*conditions).subquery()
+    rows = db.execute(select(ranked.c.id, ranked.c.location_id, ranked.c.quantity, ranked.c.running).where(
+        ranked.c.running - ranked.c.quantity < quantity - QUANTITY_EPSILON
+    ).order_by(ranked.c.running)).all()
+    return [
+        (row.id, row.location_id, min(row.quantity, quantity - (row.running - row.quantity))) for row in rows
+    ]
+
+
+def _location_label(db: Session, location_id: Optional[int]) -> str:
+    if location_id is None:
+        return "unassigned stock"
+    code = db.query(StockLocation.code).filter(StockLocation.id == location_id).scalar()
+    return f"location {code or location_id}"
+
+
+def _resolve_lot(
+    db: Session,
+    item_id: int,
+    lot_id: Optional[int],
+    lot_number: Optional[str],
+    expiry_date: Optional[date],
+    inbound: bool,
+    location_id: Optional[int]
+) -> Optional[InventoryLot]:
+    query = db.query(InventoryLot).filter(InventoryLot.item_id == item_id)
+    if lot_id is not None:
+        lot = query.filter(InventoryLot.id == lot_id).first()
+    elif lot_number:
+        lot = query.filter(InventoryLot.lot_number == lot_number).first()
+    else:
+        return None
+
+    if lot is None:
+        if not inbound or lot_id is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lot not found for this item")
+        lot = InventoryLot(item_id=item_id, lot_number=lot_number, expiry_date=expiry_date, location_id=location_id)
+        db.add(lot)
+        db.flush()
+        return lot
+
+    if location_id is not None and lot.location_id != location_id:
+        if not inbound or lot.quantity > QUANTITY_EPSILON:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Lot {lot.lot_number} is held at {_location_label(db, lot.location_id)}"
+            )
+        lot.location_id = location_id  # An empty lot is received wherever it arrives
+    if expiry_date is not None and lot.expiry_date is not None and lot.expiry_date != expiry_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Lot {lot.lot_number} already exists with expiry {lot.expiry_date.isoformat()}"
+        )
+    elif expiry_date is not None and lot.expiry_date is None:
+        lot.expiry_date = expiry_date
+    return lot
+
+
+def apply_lot_movement(
+    db: Session,
+    item: InventoryItem,
+    delta: float,
+    transaction: InventoryTransaction,
+    lot_id: Optional[int] = None,
+    lot_number: Optional[str] = None,
+    expiry_date: Optional[date] = None,
+    location_id: Optional[int] = None
+) -> Dict[Optional[int], float]:
+    """
+    Carry a costed stock movement into lot balances and return the quantity
+    moved per lot location, for the location balances to book the same draw.
+    Called before the item total changes.
+
+    A lot is held at one location (or unassigned), set by its first receipt,
+    and lotted stock leaves from where its lot is held. Receipts with a lot go
+    to it (created on first receipt of a lot number) and must arrive at its
+    location; receipts without one stay unlotted. Issues from a named lot take
+    from it and must be made at its location. Other issues are allocated FEFO
+    over unexpired lots at the issuing location, or at any location when none
+    is given, then from unlotted stock, and fail rather than issue expired
+    stock. The caller commits.
+    """
+    if abs(delta) <= QUANTITY_EPSILON:
+        return {}
+    lot = _resolve_lot(db, item.id, lot_id, lot_number, expiry_date, delta > 0, location_id)
+    lots = db.query(InventoryLot.id).filter(InventoryLot.item_id == item.id)
+    if lot is None and (delta > 0 or not lots.first()):
+        return {}
+
+    # Serialize allocations per item; window queries cannot lock the lot rows themselves
+    db.query(InventoryItem.id).filter(InventoryItem.id == item.id).with_for_update().first()
+    if lot is not None:
+        allocation = [(lot.id, lot.location_id, abs(delta))]
+        if delta < 0 and lot.quantity < -delta - QUANTITY_EPSILON:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient quantity in lot {lot.lot_number}"
+            )
+    else:
+        allocation = _fefo_allocation(
+            db, item.id, -delta, date.today(), ANY_LOCATION if location_id is None else location_id
+        )
+        from_lots = sum(taken for _, _, taken in allocation)
+        lotted = db.query(func.coalesce(func.sum(InventoryLot.quantity), 0.0)).filter(
+            InventoryLot.item_id == item.id
+        ).scalar()
+        unlotted = max((item.quantity or 0.0) - lotted, 0.0)
+        if -delta - from_lots > unlotted + QUANTITY_EPSILON:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient unexpired stock for {item.name}"
+            )
+    if not allocation:
+        return {}
+
+    sign = 1 if delta > 0 else -1
+    lots_table = InventoryLot.__table__
+    db.flush()
+    db.execute(
+        update(lots_table).where(lots_table.c.id == bindparam("_id")).values(
+            quantity=lots_table.c.quantity + bindparam("change"),
+            received_quantity=lots_table.c.received_quantity + bindparam("received"),
+            updated_at=bindparam("now")
+        ),
+        [
+            {"_id": allocated_id, "change": sign * taken, "received": taken if sign > 0 else 0.0, "now": datetime.utcnow()}
+            for allocated_id, _, taken in allocation
+        ]
+    )
+    if lot is not None:
+        db.expire(lot)
+
+    now = datetime.utcnow()
+    db.execute(insert(InventoryLotMovement.__table__), [
+        {
+            "lot_id": allocated_id,
+            "item_id": item.id,
+            "quantity": sign * taken,
+            "transaction_id": transaction.id,
+            "reference_number": transaction.reference_number,
+            "performed_by": transaction.performed_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for allocated_id, _, taken in allocation
+    ])
+
+    moved: Dict[Optional[int], float] = defaultdict(float)
+    for _, allocated_location_id, taken in allocation:
+        moved[allocated_location_id] += sign * taken
+    return dict(moved)
+
+
+# ==================== QUERIES ====================
+
+def get_item_lots(db: Session, item_id: int, include_empty: bool = False) -> List[InventoryLot]:
+    """Lots of an item in FEFO order."""
+    query = db.query(InventoryLot).filter(InventoryLot.item_id == item_id)
+    if not include_empty:
+        query = query.filter(InventoryLot.quantity > QUANTITY_EPSILON)
+    return query.order_by(InventoryLot.expiry_date.is_(None), InventoryLot.expiry_date, InventoryLot.id).all()
+
+
+def find_lots(db: Session, lot_number: str, limit: int = 100) -> List[InventoryLot]:
+    """Lots with this lot number across items, e.g. a batch number quoted on an inspection or complaint."""
+    return db.query(InventoryLot).filter(InventoryLot.lot_number == lot_number).order_by(
+        InventoryLot.item_id
+    ).limit(limit).all()
+
+
+def get_expiring_lots(
+    db: Session,
+    days: int,
+    include_expired: bool = True,
+    item_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> Tuple[List[dict], int]:
+    """Lots with stock expiring within ``days``, soonest first, read from the expiry index."""
+    today = date.today()
+    conditions = [
+        InventoryLot.expiry_date <= today + timedelta(days=days),
+        InventoryLot.quantity > QUANTITY_EPSILON,
+    ]
+    if not include_expired:
+        conditions.append(InventoryLot.expiry_date >= today)
+    if item_id is not None:
+        conditions.append(InventoryLot.item_id == item_id)
+
+    total = db.query(func.count()).select_from(InventoryLot).filter(*conditions).scalar()
+    rows = db.execute(select(
+        InventoryLot.id, InventoryLot.item_id, InventoryLot.lot_number, InventoryLot.expiry_date, InventoryLot.quantity,
+        InventoryItem.item_code, InventoryItem.name, InventoryItem.unit_of_measure
+    ).join(InventoryItem, InventoryItem.id == InventoryLot.item_id).where(*conditions).order_by(
+        InventoryLot.expiry_date, InventoryLot.item_id, InventoryLot.id
+    ).offset(skip).limit(limit)).all()
+    return [
+        {
+            "lot_id": row.id,
+            "item_id": row.item_id,
+            "item_code": row.item_code,
+            "name": row.name,
+            "unit_of_measure": row.unit_of_measure,
+            "lot_number": row.lot_number,
+            "expiry_date": row.expiry_date,
+            "quantity": row.quantity,
+            "days_to_expiry": (row.expiry_date - today).days,
+        }
+        for row in rows
+    ], total
@@ -1,16 +1,22 @@
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select
 from fastapi import HTTPException, status
 from models.inventory import (
-    InventoryItem, InventoryTransaction, InventoryCategory, TransactionType,
+    InventoryItem, InventoryTransaction, InventoryCategory, InventoryCategoryClosure, InventoryAggregate, TransactionType,
     InventoryRequisition, InventoryRequisitionItem, RequisitionStatus,
-    RequisitionLineStatus, RequisitionPriority
+    RequisitionLineStatus, RequisitionPriority, ReservationSource, GenealogyEdgeType
 )
 from models.user import User
+from services import batch_genealogy_service, closure_table_service, stock_reservation_service
 from services.company_service import get_user_permissions
-from services.notification_service import create_notification
+from services.notification_service import notify_users
+from services.inventory_aggregate_service import (
+    item_state, apply_item_change, ensure_category_row, delete_category_row,
+    get_inventory_totals, get_category_totals
+)
+from services.inventory_valuation_service import post_stock_movement
 from schemas.inventory import (
     InventoryItemCreate, InventoryItemUpdate, InventoryTransactionCreate,
     InventoryCategoryCreate, InventoryCategoryUpdate,
@@ -30,16 +36,93 @@ def get_categories(db: Session, include_inactive: bool = False) -> List[Inventor
     return query.order_by(InventoryCategory.name).all()
 
 
-def get_category_tree(db: Session) -> List[InventoryCategory]:
-    """Get categories in tree structure (root categories with children)."""
-    # Get all active categories
-    categories = db.query(InventoryCategory).filter(
-        InventoryCategory.is_active == True
-    ).all()
-    
-    # Build tree structure (only root level, children will be included via relationship)
-    root_categories = [cat for cat in categories if cat.parent_id is None]
-    return root_categories
+def _category_indexed(db: Session, category_id: int) -> bool:
+    return closure_table_service.is_indexed(db, InventoryCategoryClosure.__table__, category_id)
+
+
+def rebuild_category_closure(db: Session, commit: bool = True) -> dict:
+    """Recompute the category closure table from ``parent_id`` with a recursive CTE."""
+    rows = closure_table_service.rebuild(
+        db, InventoryCategoryClosure.__table__, InventoryCategory.__table__, "inventory_category_paths"
+    )
+    if commit:
+        db.commit()
+    return {"closure_rows": rows}
+
+
+def _category_tree_rows(db: Session, include_inactive: bool) -> list:
+    """Every category with its own counters and the counters summed over its subtree, in one query."""
+    closure = InventoryCategoryClosure.__table__
+    aggregates = InventoryAggregate.__table__
+    rollup = select(
+        closure.c.ancestor_id.label("category_id"),
+        func.count(closure.c.descendant_id).label("subtree_size"),
+        func.coalesce(func.sum(aggregates.c.item_count), 0).label("item_count"),
+        func.coalesce(func.sum(aggregates.c.total_value), 0).label("total_value"),
+        func.coalesce(func.sum(aggregates.c.low_stock_count), 0).label("low_stock_count"),
+        func.coalesce(func.sum(aggregates.c.out_of_stock_count), 0).label("out_of_stock_count"),
+    ).select_from(closure).outerjoin(
+        aggregates, aggregates.c.category_id == closure.c.descendant_id
+    ).group_by(closure.c.ancestor_id).subquery("category_rollup")
+
+    query = db.query(InventoryCategory, InventoryAggregate, rollup).outerjoin(
+        InventoryAggregate, InventoryAggregate.category_id == InventoryCategory.id
+    ).outerjoin(rollup, rollup.c.category_id == InventoryCategory.id)
+    if not include_inactive:
+        query = query.filter(InventoryCategory.is_active == True)
+    return query.order_by(InventoryCategory.name).all()
+
+
+def get_category_tree(db: Session, include_inactive: bool = False) -> List[dict]:
+    """
+    Get categories in tree structure with stock totals, own and over all descendants.
+
+    The tree is assembled from one query over the categories, their aggregate
+    counters and the closure table, so no ``children`` lazy loads happen while
+    serializing. Categories below an excluded (inactive) one are left out.
+    """
+    get_inventory_totals(db)
+    rows = _category_tree_rows(db, include_inactive)
+    if any(row.subtree_size is None for row in rows):
+        # Categories written around this service: index them and read again
+        rebuild_category_closure(db)
+        rows = _category_tree_rows(db, include_inactive)
+
+    nodes = {}
+    for row in rows:
+        category, own = row.InventoryCategory, row.InventoryAggregate
+        nodes[category.id] = {
+            "id": category.id,
+            "name": category.name,
+            "description": category.description,
+            "parent_id": category.parent_id,
+            "is_active": category.is_active,
+            "created_at": category.created_at,
+            "updated_at": category.updated_at,
+            "item_count": own.item_count if own else 0,
+            "stock_value": round(own.total_value, 2) if own else 0.0,
+            "low_stock_count": own.low_stock_count if own else 0,
+            "out_of_stock_count": own.out_of_stock_count if own else 0,
+            "subtree_item_count": int(row.item_count),
+            "subtree_stock_value": round(float(row.total_value), 2),
+            "subtree_low_stock_count": int(row.low_stock_count),
+            "subtree_out_of_stock_count": int(row.out_of_stock_count),
+            "children": [],
+        }
+
+    roots = []
+    for node in nodes.values():
+        if node["parent_id"] is None:
+            roots.append(node)
+        elif node["parent_id"] in nodes:
+            nodes[node["parent_id"]]["children"].append(node)
+
+    stack = [(node, 0) for node in roots]
+    while stack:
+        node, depth = stack.pop()
+        node["depth"] = depth
+        stack.extend((child, depth + 1) for child in node["children"])
+    return roots
 
 
 def get_category(db: Session, category_id: int) -> Optional[InventoryCategory]:
@@ -62,6 +145,14 @@ def create_category(db: Session, category: InventoryCategoryCreate) -> Inventory
     
     db_category = InventoryCategory(**category.model_dump())
     db.add(db_category)
+    db.flush()
+    ensure_category_row(db, db_category.id)
+    if db_category.parent_id is not None and not _category_indexed(db, db_category.parent_id):
+        rebuild_category_closure(db, commit=False)
+    else:
+        closure_table_service.insert_leaf(
+            db, InventoryCategoryClosure.__table__, db_category.id, db_category.parent_id
+        )
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -88,6 +179,9 @@ def update_category(db: Session, category_id: int, category: InventoryCategoryUp
                 detail="Parent category not found"
             )
     
+    if 'parent_id' in update_data and update_data['parent_id'] != db_category.parent_id:
+        _move_category(db, db_category, update_data.pop('parent_id'))
+    
     for field, value in update_data.items():
         setattr(db_category, field, value)
     
@@ -96,6 +190,31 @@ def update_category(db: Session, category_id: int, category: InventoryCategoryUp
     return db_category
 
 
+def _move_category(db: Session, db_category: InventoryCategory, new_parent_id: Optional[int]) -> None:
+    """Reparent a category with its subtree, refusing cycles. The caller commits."""
+    members = closure_table_service.subtree_members(
+        db, InventoryCategoryClosure.__table__, InventoryCategory.__table__, db_category.id,
+        "inventory_category_subtree"
+    )
+    if new_parent_id is not None and new_parent_id in {member for member, _ in members}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Category cannot be moved under its own subcategory"
+        )
+    
+    if not _category_indexed(db, db_category.id) or (
+        new_parent_id is not None and not _category_indexed(db, new_parent_id)
+    ):
+        db_category.parent_id = new_parent_id
+        db.flush()
+        rebuild_category_closure(db, commit=False)
+        return
+    closure_table_service.relink_subtree(
+        db, InventoryCategoryClosure.__table__, db_category.id, members, new_parent_id
+    )
+    db_category.parent_id = new_parent_id
+
+
 def delete_category(db: Session, category_id: int) -> bool:
     """Delete category (soft delete by setting is_active=False if has items)."""
     db_category = get_category(db, category_id)
@@ -118,6 +237,8 @@ def delete_category(db: Session, category_id: int) -> bool:
         db.commit()
     else:
         # Hard delete if no dependencies
+        delete_category_row(db, category_id)
+        closure_table_service.delete_node(db, InventoryCategoryClosure.__table__, category_id)
         db.delete(db_category)
         db.commit()
     
@@ -127,35 +248,19 @@ def delete_category(db: Session, category_id: int) -> bool:
 # ==================== INVENTORY SERVICES ====================
 
 def get_inventory_statistics(db: Session) -> dict:
-    """Get inventory statistics."""
-    total_items = db.query(func.count(InventoryItem.id)).scalar()
-    
-    low_stock_count = db.query(func.count(InventoryItem.id)).filter(
-        InventoryItem.quantity <= InventoryItem.reorder_point
-    ).scalar()
-    
-    out_of_stock_count = db.query(func.count(InventoryItem.id)).filter(
-        InventoryItem.quantity <= 0
-    ).scalar()
-    
-    total_value = db.query(
-        func.sum(InventoryItem.quantity * InventoryItem.unit_cost)
-    ).scalar() or 0
+    """Get inventory statistics from the maintained aggregate counters."""
+    totals = get_inventory_totals(db)
     
     # Get category counts (using actual category names)
     category_counts = {}
-    categories = db.query(InventoryCategory).filter(InventoryCategory.is_active == True).all()
-    for category in categories:
-        count = db.query(func.count(InventoryItem.id)).filter(
-            InventoryItem.category_id == category.id
-        ).scalar()
-        category_counts[category.name] = count
+    for name, aggregate in get_category_totals(db, active_only=True):
+        category_counts[name] = aggregate.item_count if aggregate else 0
     
     return {
-        "total_items": total_items,
-        "low_stock_count": low_stock_count,
-        "out_of_stock_count": out_of_stock_count,
-        "total_value": round(total_value, 2),
+        "total_items": totals.item_count,
+        "low_stock_count": totals.low_stock_count,
+        "out_of_stock_count": totals.out_of_stock_count,
+        "total_value": round(totals.total_value, 2),
         "category_counts": category_counts
     }
 
@@ -233,6 +338,7 @@ def create_inventory_item(db: Session, item: InventoryItemCreate) -> InventoryIt
     
     db_item = InventoryItem(**item.model_dump())
     db.add(db_item)
+    apply_item_change(db, None, item_state(db_item))
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -244,9 +350,11 @@ def update_inventory_item(db: Session, item_id: int, item: InventoryItemUpdate)
     if not db_item:
         return None
     
+    before = item_state(db_item)
     update_data = item.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_item, field, value)
+    apply_item_change(db, before, item_state(db_item))
     
     db.commit()
     db.refresh(db_item)
@@ -259,6 +367,7 @@ def delete_inventory_item(db: Session, item_id: int) -> bool:
     if not db_item:
         return False
     
+    apply_item_change(db, item_state(db_item), None)
     db.delete(db_item)
     db.commit()
     return True
@@ -266,8 +375,11 @@ def delete_inventory_item(db: Session, item_id: int) -> bool:
 
 def adjust_inventory_quantity(db: Session, item_id: int, quantity_change: float, 
                               transaction_type: TransactionType, user_id: int,
-                              notes: Optional[str] = None, reference: Optional[str] = None) -> InventoryItem:
-    """Adjust inventory quantity and create transaction."""
+                              notes: Optional[str] = None, reference: Optional[str] = None,
+                              unit_cost: Optional[float] = None, location_id: Optional[int] = None,
+                              lot_id: Optional[int] = None, lot_number: Optional[str] = None,
+                              expiry_date: Optional[date] = None) -> InventoryItem:
+    """Adjust inventory quantity and create a costed transaction."""
     db_item = get_inventory_item(db, item_id)
     if not db_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
@@ -285,21 +397,18 @@ def adjust_inventory_quantity(db: Session, item_id: int, quantity_change: float,
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient quantity"
         )
+
+    # Manual outbound moves may not take stock reserved for confirmed demand
+    if new_quantity < db_item.quantity:
+        stock_reservation_service.claim_available(db, item_id, db_item.quantity - new_quantity)
+        db.refresh(db_item)
     
-    # Update quantity
-    db_item.quantity = new_quantity
-    
-    # Create transaction record
-    transaction = InventoryTransaction(
-        item_id=item_id,
-        transaction_type=transaction_type,
-        quantity=quantity_change,
-        unit_cost=db_item.unit_cost,
-        reference_number=reference,
-        notes=notes,
-        performed_by=user_id
+    # Update quantity, cost the movement and create the transaction record
+    post_stock_movement(
+        db, db_item, transaction_type, quantity_change,
+        performed_by=user_id, reference=reference, notes=notes, unit_cost=unit_cost, location_id=location_id,
+        lot_id=lot_id, lot_number=lot_number, expiry_date=expiry_date
     )
-    db.add(transaction)
     
     db.commit()
     db.refresh(db_item)
@@ -592,9 +701,9 @@ def submit_requisition(
     approver = _validate_approver(db, db_requisition, db_requisition.approver_id)
 
     db_requisition.status = RequisitionStatus.SUBMITTED
-    create_notification(
+    notify_users(
         db,
-        approver.id,
+        [approver.id],
         "inventory",
         "Inventory requisition awaiting approval",
         f"{db_requisition.requisition_number} — {db_requisition.title} is waiting for your approval.",
@@ -624,10 +733,9 @@ def assign_requisition_approver(
     previous_approver_id = db_requisition.approver_id
     db_requisition.approver_id = approver_id
     if db_requisition.status == RequisitionStatus.SUBMITTED and previous_approver_id != approver_id:
-        approver = db.query(User).filter(User.id == approver_id).first()
-        create_notification(
+        notify_users(
             db,
-            approver.id,
+            [approver_id],
             "inventory",
             "Inventory requisition assigned to you",
             f"{db_requisition.requisition_number} — {db_requisition.title} is waiting for your approval.",
@@ -696,14 +804,25 @@ def approve_requisition(
             detail="At least one line must have an approved quantity"
         )
 
+    # Approved internal demand is reserved even when stock is short: the shortage
+    # shows as negative available-to-promise and is left to replenishment.
+    stock_reservation_service.reserve(
+        db,
+        ReservationSource.REQUISITION,
+        db_requisition.id,
+        [(line.id, line.item_id, line.approved_quantity) for line in db_requisition.items],
+        reference=db_requisition.requisition_number,
+        created_by=approved_by,
+        enforce=False,
+    )
     db_requisition.status = RequisitionStatus.APPROVED
     db_requisition.approved_by = approved_by
     db_requisition.approved_at = datetime.utcnow()
     if approval.notes:
         db_requisition.notes = approval.notes
-    create_notification(
+    notify_users(
         db,
-        db_requisition.requested_by,
+        [db_requisition.requested_by],
         "inventory",
         "Inventory requisition approved",
         f"{db_requisition.requisition_number} — {db_requisition.title} was approved.",
@@ -753,9 +872,9 @@ def reject_requisition(
     for line in db_requisition.items:
         line.status = RequisitionLineStatus.REJECTED
         line.approved_quantity = 0
-    create_notification(
+    notify_users(
         db,
-        db_requisition.requested_by,
+        [db_requisition.requested_by],
         "inventory",
         "Inventory requisition rejected",
         f"{db_requisition.requisition_number} — {db_requisition.title} was rejected.",
@@ -803,10 +922,21 @@ def fulfill_requisition(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock for {line.item.name}"
             )
+    stock_reservation_service.consume(
+        db,
+        ReservationSource.REQUISITION,
+        db_requisition.id,
+        [
+            (line.line_id, lines_by_id[line.line_id].item_id, line.quantity)
+            for line in fulfillment.items
+        ],
+        reference=db_requisition.requisition_number,
+        created_by=fulfilled_by,
+    )
 
+    transactions = []
     for fulfillment_line in fulfillment.items:
         line = lines_by_id[fulfillment_line.line_id]
-        line.item.quantity -= fulfillment_line.quantity
         line.fulfilled_quantity += fulfillment_line.quantity
         approved_quantity = line.approved_quantity if line.approved_quantity is not None else line.requested_quantity
 
@@ -815,15 +945,19 @@ def fulfill_requisition(
         else:
             line.status = RequisitionLineStatus.PARTIALLY_FULFILLED
 
-        db.add(InventoryTransaction(
-            item_id=line.item_id,
-            transaction_type=TransactionType.ISSUE,
-            quantity=-abs(fulfillment_line.quantity),
-            unit_cost=line.item.unit_cost,
-            reference_number=db_requisition.requisition_number,
-            notes=fulfillment.notes or f"Issued for requisition {db_requisition.requisition_number}",
-            performed_by=fulfilled_by
+        transactions.append(post_stock_movement(
+            db,
+            line.item,
+            TransactionType.ISSUE,
+            -abs(fulfillment_line.quantity),
+            performed_by=fulfilled_by,
+            reference=db_requisition.requisition_number,
+            notes=fulfillment.notes or f"Issued for requisition {db_requisition.requisition_number}"
         ))
+    if db_requisition.production_order_id:
+        batch_genealogy_service.record_lot_edges(
+            db, GenealogyEdgeType.INPUT, transactions, production_order_id=db_requisition.production_order_id
+        )
 
     active_lines = [line for line in db_requisition.items if (line.approved_quantity or 0) > 0]
     if active_lines and all(line.status == RequisitionLineStatus.FULFILLED for line in active_lines):
@@ -861,6 +995,9 @@ def cancel_requisition(
             detail="Cannot cancel a requisition after fulfillment has started"
         )
 
+    stock_reservation_service.release(
+        db, ReservationSource.REQUISITION, db_requisition.id, reference=db_requisition.requisition_number
+    )
     db_requisition.status = RequisitionStatus.CANCELLED
     for line in db_requisition.items:
         line.status = RequisitionLineStatus.CANCELLED
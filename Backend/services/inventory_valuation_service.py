@@ -0,0 +1,404 @@
+from collections import deque
+from datetime import date
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, delete, func, insert, select, update
+from core.config import settings
+from models.inventory import (
+    InventoryItem, InventoryTransaction, InventoryCostLayer, TransactionType, CostingMethod
+)
+from services.inventory_aggregate_service import (
+    item_state, apply_item_change, reconcile_inventory_aggregates, get_inventory_totals
+)
+from services.inventory_location_service import apply_stock_movement
+from services.inventory_lot_service import apply_lot_movement
+
+QUANTITY_EPSILON = 1e-9
+
+INBOUND_TYPES = {TransactionType.RECEIPT, TransactionType.RETURN}
+OUTBOUND_TYPES = {TransactionType.ISSUE, TransactionType.SCRAP, TransactionType.ADJUSTMENT}
+
+
+def get_costing_method() -> CostingMethod:
+    """Return the configured inventory costing method."""
+    return CostingMethod(settings.INVENTORY_COSTING_METHOD)
+
+
+def signed_quantity(transaction_type: TransactionType, quantity: float) -> float:
+    """
+    Return the stock delta of a ledger row.
+
+    Receipts and returns always add stock; issues, scrap and adjustments always
+    remove it; transfers carry their own sign.
+    """
+    transaction_type = TransactionType(transaction_type)
+    if transaction_type in INBOUND_TYPES:
+        return abs(quantity)
+    if transaction_type in OUTBOUND_TYPES:
+        return -abs(quantity)
+    return quantity
+
+
+def signed_quantity_expr(transactions=None):
+    """SQL counterpart of ``signed_quantity`` for set-based ledger queries."""
+    transactions = transactions if transactions is not None else InventoryTransaction.__table__
+    return case(
+        (transactions.c.transaction_type.in_(list(INBOUND_TYPES)), func.abs(transactions.c.quantity)),
+        (transactions.c.transaction_type.in_(list(OUTBOUND_TYPES)), -func.abs(transactions.c.quantity)),
+        else_=transactions.c.quantity
+    )
+
+
+def signed_value_expr(transactions=None):
+    """Signed stock value moved by a ledger row, falling back to quantity x unit cost."""
+    transactions = transactions if transactions is not None else InventoryTransaction.__table__
+    extended = func.coalesce(
+        transactions.c.total_cost,
+        func.abs(transactions.c.quantity) * func.coalesce(transactions.c.unit_cost, 0)
+    )
+    return case(
+        (transactions.c.transaction_type.in_(list(INBOUND_TYPES)), extended),
+        (transactions.c.transaction_type.in_(list(OUTBOUND_TYPES)), -extended),
+        (transactions.c.quantity < 0, -extended),
+        else_=extended
+    )
+
+
+def _open_layers(db: Session, item_id: int) -> List[InventoryCostLayer]:
+    return db.query(InventoryCostLayer).filter(
+        InventoryCostLayer.item_id == item_id,
+        InventoryCostLayer.remaining_quantity > QUANTITY_EPSILON
+    ).order_by(InventoryCostLayer.id).with_for_update().all()
+
+
+def _fifo_movement(
+    db: Session,
+    item: InventoryItem,
+    delta: float,
+    cost: Optional[float],
+    transaction: InventoryTransaction
+) -> float:
+    """Post a movement against the item's cost layers and return its unit cost."""
+    layers = _open_layers(db, item.id)
+    on_hand = max(item.quantity or 0.0, 0.0)
+    layered = sum(layer.remaining_quantity for layer in layers)
+    if on_hand - layered > QUANTITY_EPSILON:
+        # Stock that predates cost layering becomes an opening layer at the current cost.
+        opening = InventoryCostLayer(
+            item_id=item.id,
+            received_quantity=on_hand - layered,
+            remaining_quantity=on_hand - layered,
+            unit_cost=item.unit_cost or 0.0,
+        )
+        db.add(opening)
+        layers.insert(0, opening)
+
+    if delta > 0:
+        unit_cost = cost if cost is not None else (item.unit_cost or 0.0)
+        db.flush()
+        layers.append(InventoryCostLayer(
+            item_id=item.id,
+            transaction_id=transaction.id,
+            received_quantity=delta,
+            remaining_quantity=delta,
+            unit_cost=unit_cost,
+        ))
+        db.add(layers[-1])
+    else:
+        to_consume = -delta
+        consumed_cost = 0.0
+        for layer in layers:
+            if to_consume <= QUANTITY_EPSILON:
+                break
+            taken = min(layer.remaining_quantity, to_consume)
+            layer.remaining_quantity -= taken
+            consumed_cost += taken * layer.unit_cost
+            to_consume -= taken
+        if to_consume > QUANTITY_EPSILON:
+            consumed_cost += to_consume * (item.unit_cost or 0.0)
+        unit_cost = consumed_cost / -delta
+
+    remaining = sum(layer.remaining_quantity for layer in layers)
+    if remaining > QUANTITY_EPSILON and (item.unit_cost is not None or cost is not None):
+        item.unit_cost = sum(layer.remaining_quantity * layer.unit_cost for layer in layers) / remaining
+    return unit_cost
+
+
+def _weighted_average_movement(item: InventoryItem, delta: float, cost: Optional[float]) -> Optional[float]:
+    """Post a movement against the item's moving average cost and return its unit cost."""
+    if delta > 0:
+        unit_cost = cost if cost is not None else item.unit_cost
+        if unit_cost is None:
+            return None
+        on_hand = max(item.quantity or 0.0, 0.0)
+        previous_cost = item.unit_cost if item.unit_cost is not None else unit_cost
+        item.unit_cost = (on_hand * previous_cost + delta * unit_cost) / (on_hand + delta)
+        return unit_cost
+    return item.unit_cost
+
+
+def post_stock_movement(
+    db: Session,
+    item: InventoryItem,
+    transaction_type: TransactionType,
+    quantity: float,
+    performed_by: Optional[int] = None,
+    reference: Optional[str] = None,
+    notes: Optional[str] = None,
+    unit_cost: Optional[float] = None,
+    location_id: Optional[int] = None,
+    lot_id: Optional[int] = None,
+    lot_number: Optional[str] = None,
+    expiry_date: Optional[date] = None
+) -> InventoryTransaction:
+    """
+    Move stock for one item and record the costed ledger row.
+
+    ``quantity`` is stored on the transaction as given and its direction is taken
+    from the transaction type (see ``signed_quantity``). ``unit_cost`` is the
+    receipt cost for inbound movements; outbound movements are costed from the
+    item's layers or moving average. ``location_id`` books the movement at a
+    stock location (see ``apply_stock_movement``) and the lot arguments at a
+    lot, issues defaulting to FEFO (see ``apply_lot_movement``). The caller
+    validates availability and commits.
+    """
+    delta = signed_quantity(transaction_type, quantity)
+    before = item_state(item)
+
+    transaction = InventoryTransaction(
+        item_id=item.id,
+        transaction_type=transaction_type,
+        quantity=quantity,
+        reference_number=reference,
+        notes=notes,
+        performed_by=performed_by
+    )
+    db.add(transaction)
+
+    movement_cost = item.unit_cost
+    if abs(delta) > QUANTITY_EPSILON:
+        if get_costing_method() == CostingMethod.FIFO:
+            movement_cost = _fifo_movement(db, item, delta, unit_cost, transaction)
+        else:
+            movement_cost = _weighted_average_movement(item, delta, unit_cost)
+
+    lot_moves = apply_lot_movement(db, item, delta, transaction, lot_id, lot_number, expiry_date, location_id)
+    apply_stock_movement(db, item, delta, location_id, transaction, lot_moves)
+    item.quantity = (item.quantity or 0.0) + delta
+    transaction.unit_cost = movement_cost
+    transaction.total_cost = abs(delta) * movement_cost if movement_cost is not None else None
+
+    apply_item_change(db, before, item_state(item))
+    return transaction
+
+
+def get_cost_layers(db: Session, item_id: int, include_consumed: bool = False) -> List[InventoryCostLayer]:
+    """Get the cost layers of an item, oldest first."""
+    query = db.query(InventoryCostLayer).filter(InventoryCostLayer.item_id == item_id)
+    if not include_consumed:
+        query = query.filter(InventoryCostLayer.remaining_quantity > QUANTITY_EPSILON)
+    return query.order_by(InventoryCostLayer.id).all()
+
+
+# ==================== BULK REVALUATION ====================
+
+def _replay_item(
+    item_id: int,
+    on_hand: float,
+    current_cost: Optional[float],
+    opening_cost: Optional[float],
+    rows: List[tuple],
+    method: CostingMethod
+) -> Tuple[List[dict], List[dict], Optional[float]]:
+    """
+    Replay one item's ledger in memory.
+
+    Stock not explained by the ledger becomes an opening layer, costed from the
+    previously recorded opening layer, else the first ledger row, else the
+    current item cost. Returns the transaction cost updates, the layers to keep
+    and the resulting item unit cost.
+    """
+    net = sum(signed_quantity(row.transaction_type, row.quantity) for row in rows)
+    opening_quantity = on_hand - net
+    if opening_cost is None and rows and rows[0].unit_cost is not None:
+        opening_cost = rows[0].unit_cost
+    if opening_cost is None:
+        opening_cost = current_cost or 0.0
+    fallback_cost = opening_cost
+
+    layers: Deque[List] = deque()
+    opening_layer = None
+    average_quantity = 0.0
+    average_cost = fallback_cost
+    if opening_quantity > QUANTITY_EPSILON:
+        opening_layer = [None, opening_quantity, opening_quantity, opening_cost]
+        layers.append(opening_layer)
+        average_quantity = opening_quantity
+
+    updates = []
+    for row in rows:
+        delta = signed_quantity(row.transaction_type, row.quantity)
+        if abs(delta) <= QUANTITY_EPSILON:
+            continue
+        if delta > 0:
+            unit_cost = row.unit_cost if row.unit_cost is not None else fallback_cost
+            if method == CostingMethod.FIFO:
+                layers.append([row.id, delta, delta, unit_cost])
+            else:
+                held = max(average_quantity, 0.0)
+                average_cost = (held * average_cost + delta * unit_cost) / (held + delta)
+                average_quantity += delta
+            fallback_cost = unit_cost
+        elif method == CostingMethod.FIFO:
+            to_consume = -delta
+            consumed_cost = 0.0
+            while to_consume > QUANTITY_EPSILON and layers:
+                layer = layers[0]
+                taken = min(layer[2], to_consume)
+                layer[2] -= taken
+                consumed_cost += taken * layer[3]
+                to_consume -= taken
+                if layer[2] <= QUANTITY_EPSILON:
+                    layers.popleft()
+            consumed_cost += max(to_consume, 0.0) * fallback_cost
+            unit_cost = consumed_cost / -delta
+        else:
+            unit_cost = average_cost
+            average_quantity += delta
+        updates.append({"_id": row.id, "unit_cost": unit_cost, "total_cost": abs(delta) * unit_cost})
+
+    # The opening layer is kept even when consumed so its cost survives later revaluations.
+    kept = [opening_layer] if opening_layer is not None else []
+    if method == CostingMethod.FIFO:
+        kept += [layer for layer in layers if layer is not opening_layer and layer[2] > QUANTITY_EPSILON]
+    elif opening_layer is not None:
+        opening_layer[2] = 0.0
+    layer_rows = [
+        {
+            "item_id": item_id,
+            "transaction_id": transaction_id,
+            "received_quantity": received,
+            "remaining_quantity": max(remaining, 0.0),
+            "unit_cost": unit_cost,
+        }
+        for transaction_id, received, remaining, unit_cost in kept
+    ]
+
+    if method == CostingMethod.FIFO:
+        remaining_total = sum(layer["remaining_quantity"] for layer in layer_rows)
+        if remaining_total > QUANTITY_EPSILON:
+            item_cost = sum(
+                layer["remaining_quantity"] * layer["unit_cost"] for layer in layer_rows
+            ) / remaining_total
+        else:
+            item_cost = fallback_cost if rows else current_cost
+        return updates, layer_rows, item_cost
+
+    return updates, layer_rows, average_cost if (rows or current_cost is not None) else current_cost
+
+
+def revalue_inventory(
+    db: Session,
+    method: Optional[CostingMethod] = None,
+    items_per_batch: Optional[int] = None
+) -> dict:
+    """
+    Recost the whole transaction history and rebuild cost layers.
+
+    Items are processed in id-ordered batches: one query loads a batch's ledger
+    rows (served by the (item_id, created_at) index), the replay runs in memory,
+    and results are written back with executemany statements and committed per
+    batch, so memory stays bounded regardless of history length.
+    """
+    method = method or get_costing_method()
+    items_per_batch = items_per_batch or settings.INVENTORY_REVALUE_ITEMS_PER_BATCH
+    transactions = InventoryTransaction.__table__
+    layers_table = InventoryCostLayer.__table__
+    items_table = InventoryItem.__table__
+
+    update_transaction = update(transactions).where(
+        transactions.c.id == bindparam("_id")
+    ).values(unit_cost=bindparam("unit_cost"), total_cost=bindparam("total_cost"))
+    update_item = update(items_table).where(
+        items_table.c.id == bindparam("_id")
+    ).values(unit_cost=bindparam("unit_cost"))
+
+    last_item_id = 0
+    item_count = 0
+    transaction_count = 0
+    while True:
+        items = db.execute(
+            select(items_table.c.id, items_table.c.quantity, items_table.c.unit_cost)
+            .where(items_table.c.id > last_item_id)
+            .order_by(items_table.c.id)
+            .limit(items_per_batch)
+        ).all()
+        if not items:
+            break
+        item_ids = [item.id for item in items]
+        last_item_id = item_ids[-1]
+
+        ledger: Dict[int, List[tuple]] = {item_id: [] for item_id in item_ids}
+        for row in db.execute(
+            select(
+                transactions.c.id, transactions.c.item_id, transactions.c.transaction_type,
+                transactions.c.quantity, transactions.c.unit_cost
+            )
+            .where(transactions.c.item_id.in_(item_ids))
+            .order_by(transactions.c.item_id, transactions.c.created_at, transactions.c.id)
+        ):
+            ledger[row.item_id].append(row)
+
+        opening_costs: Dict[int, float] = {}
+        for layer in db.execute(
+            select(layers_table.c.item_id, layers_table.c.unit_cost)
+            .where(layers_table.c.item_id.in_(item_ids), layers_table.c.transaction_id.is_(None))
+            .order_by(layers_table.c.id)
+        ):
+            opening_costs.setdefault(layer.item_id, layer.unit_cost)
+
+        transaction_updates: List[dict] = []
+        layer_rows: List[dict] = []
+        item_updates: List[dict] = []
+        for item in items:
+            updates, open_layers, item_cost = _replay_item(
+                item.id, item.quantity or 0.0, item.unit_cost, opening_costs.get(item.id),
+                ledger[item.id], method
+            )
+            transaction_updates.extend(updates)
+            layer_rows.extend(open_layers)
+            if item_cost is not None:
+                item_updates.append({"_id": item.id, "unit_cost": item_cost})
+
+        db.execute(delete(layers_table).where(layers_table.c.item_id.in_(item_ids)))
+        if layer_rows:
+            db.execute(insert(layers_table), layer_rows)
+        if transaction_updates:
+            db.execute(update_transaction, transaction_updates)
+        if item_updates:
+            db.execute(update_item, item_updates)
+        db.commit()
+
+        item_count += len(items)
+        transaction_count += sum(len(rows) for rows in ledger.values())
+
+    aggregates = reconcile_inventory_aggregates(db)
+    return {
+        "method": method.value,
+        "items": item_count,
+        "transactions": transaction_count,
+        "total_value": aggregates["total_value"],
+    }
+
+
+def get_inventory_valuation(db: Session) -> dict:
+    """Summarize stock value by cost layers against the item-level valuation."""
+    layered_value = db.query(
+        func.sum(InventoryCostLayer.remaining_quantity * InventoryCostLayer.unit_cost)
+    ).filter(InventoryCostLayer.remaining_quantity > QUANTITY_EPSILON).scalar() or 0
+    item_value = get_inventory_totals(db).total_value
+    return {
+        "method": get_costing_method().value,
+        "layered_value": round(float(layered_value), 2),
+        "item_value": round(float(item_value), 2),
+    }
@@ -0,0 +1,506 @@
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from core.config import settings
+from models.equipment import Equipment
+from models.meter import EquipmentMeter, MeterReading, MeterReadingRollup, MeterRule, MeterRuleType
+from schemas.meter import EquipmentMeterCreate, EquipmentMeterUpdate, MeterRuleCreate, MeterRuleUpdate
+from schemas.work_order import WorkOrderCreate
+from services import work_order_service
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+MICROSECONDS_PER_HOUR = 3600 * 10 ** 6
+ROWS_PER_INSERT = 5000
+MAX_METER_ID = 2 ** 63 - 1
+METERS_PER_COMPACTION_BATCH = 500
+
+JSON_LINES_TYPES = {"application/x-ndjson", "application/jsonl", "application/x-jsonlines", "application/json"}
+MSGPACK_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+
+Reading = Tuple[int, datetime, float]
+
+
+# ==================== METERS ====================
+
+def get_meters(db: Session, equipment_id: Optional[int] = None) -> List[EquipmentMeter]:
+    """Get meters, optionally for one equipment."""
+    query = db.query(EquipmentMeter)
+    if equipment_id:
+        query = query.filter(EquipmentMeter.equipment_id == equipment_id)
+    return query.order_by(EquipmentMeter.equipment_id, EquipmentMeter.code).all()
+
+
+def get_meter(db: Session, meter_id: int) -> Optional[EquipmentMeter]:
+    return db.query(EquipmentMeter).filter(EquipmentMeter.id == meter_id).first()
+
+
+def create_meter(db: Session, meter: EquipmentMeterCreate) -> EquipmentMeter:
+    """Create a meter on an equipment."""
+    if not db.query(Equipment.id).filter(Equipment.id == meter.equipment_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+    existing = db.query(EquipmentMeter.id).filter(
+        EquipmentMeter.equipment_id == meter.equipment_id,
+        EquipmentMeter.code == meter.code
+    ).first()
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A meter with this code already exists on the equipment"
+        )
+
+    db_meter = EquipmentMeter(**meter.model_dump())
+    db.add(db_meter)
+    db.commit()
+    db.refresh(db_meter)
+    return db_meter
+
+
+def update_meter(db: Session, meter_id: int, meter: EquipmentMeterUpdate) -> Optional[EquipmentMeter]:
+    db_meter = get_meter(db, meter_id)
+    if not db_meter:
+        return None
+    for field, value in meter.model_dump(exclude_unset=True).items():
+        setattr(db_meter, field, value)
+    db.commit()
+    db.refresh(db_meter)
+    return db_meter
+
+
+def get_meter_readings(
+    db: Session,
+    meter_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000
+) -> List[MeterReading]:
+    """Get raw readings, newest first."""
+    query = db.query(MeterReading).filter(MeterReading.meter_id == meter_id)
+    if start:
+        query = query.filter(MeterReading.recorded_at >= start)
+    if end:
+        query = query.filter(MeterReading.recorded_at < end)
+    return query.order_by(MeterReading.recorded_at.desc()).limit(limit).all()
+
+
+def get_meter_rollups(
+    db: Session,
+    meter_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 1000
+) -> List[MeterReadingRollup]:
+    """Get downsampled readings, newest first."""
+    query = db.query(MeterReadingRollup).filter(MeterReadingRollup.meter_id == meter_id)
+    if start:
+        query = query.filter(MeterReadingRollup.bucket_start >= start)
+    if end:
+        query = query.filter(MeterReadingRollup.bucket_start < end)
+    return query.order_by(MeterReadingRollup.bucket_start.desc()).limit(limit).all()
+
+
+# ==================== RULES ====================
+
+def get_meter_rules(db: Session, meter_id: int) -> List[MeterRule]:
+    return db.query(MeterRule).filter(MeterRule.meter_id == meter_id).order_by(MeterRule.id).all()
+
+
+def get_meter_rule(db: Session, rule_id: int) -> Optional[MeterRule]:
+    return db.query(MeterRule).filter(MeterRule.id == rule_id).first()
+
+
+def create_meter_rule(db: Session, meter_id: int, rule: MeterRuleCreate, created_by: int) -> MeterRule:
+    """Create a trigger rule; it starts armed from the meter's latest reading."""
+    meter = get_meter(db, meter_id)
+    if not meter:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meter not found")
+
+    db_rule = MeterRule(
+        meter_id=meter_id,
+        created_by=created_by,
+        last_value=meter.last_value,
+        last_recorded_at=meter.last_recorded_at,
+        **rule.model_dump()
+    )
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+
+def update_meter_rule(db: Session, rule_id: int, rule: MeterRuleUpdate) -> Optional[MeterRule]:
+    db_rule = get_meter_rule(db, rule_id)
+    if not db_rule:
+        return None
+    update_data = rule.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_rule, field, value)
+    if {"threshold", "rule_type"} & update_data.keys():
+        db_rule.in_alarm = False  # Re-evaluate from the next reading under the new condition
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+
+def delete_meter_rule(db: Session, rule_id: int) -> bool:
+    db_rule = get_meter_rule(db, rule_id)
+    if not db_rule:
+        return False
+    db.delete(db_rule)
+    db.commit()
+    return True
+
+
+# ==================== DECODING ====================
+
+def _parse_timestamp(value) -> datetime:
+    """ISO-8601 string, epoch seconds or datetime -> naive UTC datetime."""
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return EPOCH + timedelta(seconds=value)
+    elif isinstance(value, str):
+        parsed = datetime.fromisoformat(value)
+    else:
+        raise ValueError("timestamp must be an ISO-8601 string or epoch seconds")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _reading(record) -> Reading:
+    if isinstance(record, dict):
+        meter_id, recorded_at, value = record["meter_id"], record["recorded_at"], record["value"]
+    else:
+        meter_id, recorded_at, value = record
+    return int(meter_id), _parse_timestamp(recorded_at), float(value)
+
+
+def decode_readings(body: bytes, content_type: str) -> List[Reading]:
+    """
+    Decode a batch of readings.
+
+    JSON lines carry one reading per line; MessagePack and plain JSON carry an array. Each
+    reading is ``{"meter_id", "recorded_at", "value"}`` or the positional
+    ``[meter_id, recorded_at, value]``; timestamps are ISO-8601 or epoch seconds.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        if media_type in MSGPACK_TYPES:
+            try:
+                import msgpack
+            except ImportError:
+                raise HTTPException(
+                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                    detail="MessagePack ingestion requires the msgpack package"
+                )
+            records = msgpack.unpackb(body, raw=False, timestamp=3)
+        elif media_type in JSON_LINES_TYPES:
+            text = body.decode("utf-8")
+            if media_type == "application/json":
+                records = json.loads(text)
+            else:
+                # One parse of the joined lines is much faster than a parse per line
+                records = json.loads("[" + ",".join(line for line in text.splitlines() if line.strip()) + "]")
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send readings as application/x-ndjson or application/msgpack"
+            )
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed readings payload: {exc}")
+
+    if not isinstance(records, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Readings payload must be a list")
+    if len(records) > settings.METER_INGEST_MAX_READINGS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.METER_INGEST_MAX_READINGS} readings per request"
+        )
+
+    readings = []
+    for index, record in enumerate(records):
+        try:
+            readings.append(_reading(record))
+        except (KeyError, ValueError, TypeError, OverflowError) as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid reading at position {index}: {exc}"
+            )
+        if not 0 < readings[-1][0] <= MAX_METER_ID:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid reading at position {index}: meter_id out of range"
+            )
+    return readings
+
+
+# ==================== INGESTION ====================
+
+def _insert_ignoring_duplicates(db: Session, table):
+    """INSERT that skips rows whose key already exists, for the dialects we run on."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(table).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with("IGNORE")
+
+
+def ingest_readings(db: Session, readings: Sequence[Reading]) -> dict:
+    """
+    Store a batch of readings and evaluate trigger rules against it.
+
+    Readings for unknown or inactive meters, non-finite values and timestamps
+    older than the raw retention window are rejected; repeated (meter, time)
+    pairs keep the last value, and readings already stored are left as they
+    are and not counted as accepted. Rows are bulk inserted, each meter's
+    latest reading is updated, and rules that fire raise work orders after the
+    batch is committed.
+    """
+    received = len(readings)
+    meter_ids = {reading[0] for reading in readings}
+    active_meters = {
+        meter_id for (meter_id,) in db.query(EquipmentMeter.id).filter(
+            EquipmentMeter.id.in_(meter_ids), EquipmentMeter.is_active.is_(True)
+        ).all()
+    } if meter_ids else set()
+    oldest = datetime.utcnow() - timedelta(days=settings.METER_RAW_RETENTION_DAYS)
+    readings = [
+        reading for reading in readings
+        if reading[0] in active_meters and reading[1] >= oldest and math.isfinite(reading[2])
+    ]
+    if not readings:
+        return {"received": received, "accepted": 0, "rejected": received, "work_orders": []}
+
+    meters = np.fromiter((reading[0] for reading in readings), dtype=np.int64, count=len(readings))
+    times = np.fromiter(((reading[1] - EPOCH) // MICROSECOND for reading in readings), dtype=np.int64, count=len(readings))
+    values = np.fromiter((reading[2] for reading in readings), dtype=np.float64, count=len(readings))
+
+    # Sort by meter then time (stable, so later duplicates stay last) and drop superseded duplicates
+    order = np.lexsort((times, meters))
+    meters, times, values = meters[order], times[order], values[order]
+    keep = np.append((meters[1:] != meters[:-1]) | (times[1:] != times[:-1]), True)
+    order, meters, times, values = order[keep], meters[keep], times[keep], values[keep]
+
+    rows = [
+        {"meter_id": meter_id, "recorded_at": readings[index][1], "value": value}
+        for index, meter_id, value in zip(order.tolist(), meters.tolist(), values.tolist())
+    ]
+    # Count what was written: rows already stored are skipped by the insert
+    statement = _insert_ignoring_duplicates(db, MeterReading.__table__)
+    returning = db.get_bind().dialect.insert_executemany_returning
+    if returning:
+        statement = statement.returning(MeterReading.__table__.c.meter_id)
+    accepted = 0
+    for offset in range(0, len(rows), ROWS_PER_INSERT):
+        result = db.execute(statement, rows[offset:offset + ROWS_PER_INSERT])
+        accepted += len(result.all()) if returning else result.rowcount
+
+    # Latest reading per meter
+    boundaries = np.flatnonzero(np.append(meters[1:] != meters[:-1], True))
+    meters_table = EquipmentMeter.__table__
+    db.execute(
+        update(meters_table).where(
+            meters_table.c.id == bindparam("_id"),
+            or_(meters_table.c.last_recorded_at.is_(None), meters_table.c.last_recorded_at < bindparam("_at"))
+        ).values(last_value=bindparam("_value"), last_recorded_at=bindparam("_at"), updated_at=datetime.utcnow()),
+        [{"_id": rows[i]["meter_id"], "_value": rows[i]["value"], "_at": rows[i]["recorded_at"]} for i in boundaries]
+    )
+
+    firings = evaluate_rules(db, meters, times, values)
+    db.commit()
+
+    work_orders = [_raise_work_order(db, rule_id, value, recorded_at) for rule_id, value, recorded_at in firings]
+    return {
+        "received": received,
+        "accepted": accepted,
+        "rejected": received - accepted,
+        "work_orders": [work_order_id for work_order_id in work_orders if work_order_id],
+    }
+
+
+def _conditions(rule: MeterRule, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Whether the rule's condition holds at each reading."""
+    if rule.rule_type == MeterRuleType.ABOVE:
+        return values > rule.threshold
+    if rule.rule_type == MeterRuleType.BELOW:
+        return values < rule.threshold
+
+    # Rate of change against the previous reading, carried across batches in the rule's state
+    if rule.last_recorded_at is not None and rule.last_value is not None:
+        previous_times = np.insert(times[:-1], 0, (rule.last_recorded_at - EPOCH) // MICROSECOND)
+        previous_values = np.insert(values[:-1], 0, rule.last_value)
+        has_previous = np.ones(len(values), dtype=bool)
+    else:
+        previous_times = np.insert(times[:-1], 0, 0)
+        previous_values = np.insert(values[:-1], 0, 0.0)
+        has_previous = np.arange(len(values)) > 0
+    elapsed = (times - previous_times) / MICROSECONDS_PER_HOUR
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.abs(values - previous_values) / elapsed
+    return has_previous & (elapsed > 0) & (rate > rule.threshold)
+
+
+def evaluate_rules(
+    db: Session,
+    meters: np.ndarray,
+    times: np.ndarray,
+    values: np.ndarray
+) -> List[Tuple[int, float, datetime]]:
+    """
+    Advance every active rule over its meter's new readings (sorted by meter, time).
+
+    A rule fires at the first reading where its condition becomes true, outside
+    the cooldown since its last firing; at most once per batch. Returns the
+    firings as ``(rule_id, value, recorded_at)``; the caller commits.
+    """
+    rules = db.query(MeterRule).filter(
+        MeterRule.meter_id.in_(np.unique(meters).tolist()),
+        MeterRule.is_active.is_(True)
+    ).with_for_update().all()
+
+    firings = []
+    for rule in rules:
+        start, end = np.searchsorted(meters, [rule.meter_id, rule.meter_id + 1])
+        segment_times, segment_values = times[start:end], values[start:end]
+        if rule.last_recorded_at is not None:
+            fresh = segment_times > (rule.last_recorded_at - EPOCH) // MICROSECOND
+            segment_times, segment_values = segment_times[fresh], segment_values[fresh]
+        if not len(segment_times):
+            continue
+
+        holds = _conditions(rule, segment_times, segment_values)
+        rising = holds & ~np.insert(holds[:-1], 0, rule.in_alarm)
+        if rule.last_triggered_at is not None:
+            ready_at = (rule.last_triggered_at - EPOCH) // MICROSECOND + rule.cooldown_minutes * 60 * 10 ** 6
+            rising &= segment_times >= ready_at
+        candidates = np.flatnonzero(rising)
+        if len(candidates):
+            index = candidates[0]
+            recorded_at = EPOCH + timedelta(microseconds=int(segment_times[index]))
+            rule.last_triggered_at = recorded_at
+            firings.append((rule.id, float(segment_values[index]), recorded_at))
+
+        rule.in_alarm = bool(holds[-1])
+        rule.last_value = float(segment_values[-1])
+        rule.last_recorded_at = EPOCH + timedelta(microseconds=int(segment_times[-1]))
+    return firings
+
+
+def _raise_work_order(db: Session, rule_id: int, value: float, recorded_at: datetime) -> Optional[int]:
+    rule = get_meter_rule(db, rule_id)
+    meter = rule.meter if rule else None
+    if meter is None:
+        return None
+
+    condition = {
+        MeterRuleType.ABOVE: f"above {rule.threshold:g}",
+        MeterRuleType.BELOW: f"below {rule.threshold:g}",
+        MeterRuleType.RATE_OF_CHANGE: f"changing faster than {rule.threshold:g}/h",
+    }[rule.rule_type]
+    unit = f" {meter.unit}" if meter.unit else ""
+    work_order = work_order_service.create_work_order(db, WorkOrderCreate(
+        title=f"{rule.name}: {meter.name} {condition}"[:200],
+        description=(
+            f"{rule.description}\n\n" if rule.description else ""
+        ) + f"Triggered by meter reading {value:g}{unit} at {recorded_at.isoformat()}.",
+        work_order_type=rule.work_order_type,
+        priority=rule.priority,
+        equipment_id=meter.equipment_id
+    ), rule.created_by)
+
+    rule.last_work_order_id = work_order.id
+    db.commit()
+    return work_order.id
+
+
+# ==================== DOWNSAMPLING AND RETENTION ====================
+
+def _downsample(meters: np.ndarray, times: np.ndarray, values: np.ndarray, bucket_seconds: int) -> dict:
+    """Per (meter, bucket) count/min/max/sum/last for readings sorted by meter, time."""
+    buckets = times // (bucket_seconds * 10 ** 6)
+    starts = np.flatnonzero(np.insert((meters[1:] != meters[:-1]) | (buckets[1:] != buckets[:-1]), 0, True))
+    ends = np.append(starts[1:], len(values))
+    return {
+        "meter_id": meters[starts],
+        "bucket": buckets[starts],
+        "count": ends - starts,
+        "min_value": np.minimum.reduceat(values, starts),
+        "max_value": np.maximum.reduceat(values, starts),
+        "sum_value": np.add.reduceat(values, starts),
+        "last_value": values[ends - 1],
+    }
+
+
+def compact_meter_readings(db: Session) -> dict:
+    """
+    Downsample raw readings past the retention window into rollups, then expire old rollups.
+
+    Ingestion rejects readings older than the raw window, so a bucket is only
+    ever compacted once. Meters are processed in batches, each its own
+    transaction.
+    """
+    bucket_seconds = settings.METER_ROLLUP_BUCKET_SECONDS
+    bucket_micros = bucket_seconds * 10 ** 6
+    now = datetime.utcnow()
+    raw_cutoff = now - timedelta(days=settings.METER_RAW_RETENTION_DAYS)
+    cutoff = EPOCH + timedelta(microseconds=((raw_cutoff - EPOCH) // MICROSECOND) // bucket_micros * bucket_micros)
+
+    readings_table = MeterReading.__table__
+    rollups_table = MeterReadingRollup.__table__
+    meter_ids = [meter_id for (meter_id,) in db.query(EquipmentMeter.id).order_by(EquipmentMeter.id).all()]
+    compacted = 0
+    written = 0
+
+    for offset in range(0, len(meter_ids), METERS_PER_COMPACTION_BATCH):
+        chunk = meter_ids[offset:offset + METERS_PER_COMPACTION_BATCH]
+        condition = (readings_table.c.meter_id.in_(chunk), readings_table.c.recorded_at < cutoff)
+        rows = db.execute(
+            select(readings_table.c.meter_id, readings_table.c.recorded_at, readings_table.c.value)
+            .where(*condition)
+            .order_by(readings_table.c.meter_id, readings_table.c.recorded_at)
+        ).all()
+        if not rows:
+            continue
+
+        meter_column, time_column, value_column = zip(*rows)
+        rollups = _downsample(
+            np.array(meter_column, dtype=np.int64),
+            np.fromiter(((moment - EPOCH) // MICROSECOND for moment in time_column), dtype=np.int64, count=len(rows)),
+            np.array(value_column, dtype=np.float64),
+            bucket_seconds
+        )
+        rollup_rows = [
+            {
+                "meter_id": meter_id,
+                "bucket_start": EPOCH + timedelta(seconds=bucket * bucket_seconds),
+                "bucket_seconds": bucket_seconds,
+                "count": count,
+                "min_value": minimum,
+                "max_value": maximum,
+                "sum_value": total,
+                "last_value": last,
+            }
+            for meter_id, bucket, count, minimum, maximum, total, last in zip(*(column.tolist() for column in rollups.values()))
+        ]
+        for start in range(0, len(rollup_rows), ROWS_PER_INSERT):
+            db.execute(insert(rollups_table), rollup_rows[start:start + ROWS_PER_INSERT])
+        db.execute(delete(readings_table).where(*condition))
+        db.commit()
+
+        compacted += len(rows)
+        written += len(rollup_rows)
+
+    expired = db.execute(delete(rollups_table).where(
+        rollups_table.c.bucket_start < now - timedelta(days=settings.METER_ROLLUP_RETENTION_DAYS)
+    )).rowcount
+    db.commit()
+    return {"readings_compacted": compacted, "rollups_written": written, "rollups_expired": expired}
@@ -0,0 +1,322 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from models.inventory import (
+    InventoryItem, InventoryRequisition, InventoryRequisitionItem, RequisitionStatus, RequisitionLineStatus,
+    RequisitionPriority
+)
+from models.production import ProductionOrder, ProductionOrderStatus
+from services.bom_service import load_bom_graph
+
+QUANTITY_EPSILON = 1e-9
+ROWS_PER_INSERT = 1000
+PLANNED_PREFIX = "MRP"
+
+OPEN_ORDER_STATUSES = [ProductionOrderStatus.PENDING, ProductionOrderStatus.IN_PROGRESS, ProductionOrderStatus.PAUSED]
+CLOSED_REQUISITION_STATUSES = [RequisitionStatus.REJECTED, RequisitionStatus.CANCELLED]
+CLOSED_LINE_STATUSES = [RequisitionLineStatus.REJECTED, RequisitionLineStatus.CANCELLED]
+UNRESERVED_REQUISITION_STATUSES = [RequisitionStatus.DRAFT, RequisitionStatus.SUBMITTED]
+
+# Production order priority (1=Urgent .. 5=Low) to requisition priority
+PRIORITIES = {
+    1: RequisitionPriority.URGENT,
+    2: RequisitionPriority.HIGH,
+    3: RequisitionPriority.MEDIUM,
+}
+
+
+def _planned_draft_ids():
+    return select(InventoryRequisition.id).where(
+        InventoryRequisition.status == RequisitionStatus.DRAFT,
+        InventoryRequisition.requisition_number.like(f"{PLANNED_PREFIX}-%")
+    )
+
+
+def _allocated_quantities(db: Session) -> Dict[int, float]:
+    """
+    Stock promised and not yet issued, per item: the reserved counter (confirmed
+    sales orders and approved requisitions) plus draft and submitted
+    requisitions, which are reserved only on approval but count as covering
+    their orders. Earlier planned drafts are replaced by this run and do not.
+    """
+    allocated = dict(db.execute(select(InventoryItem.id, InventoryItem.reserved_quantity).where(
+        InventoryItem.reserved_quantity != 0
+    )).all())
+    pending = db.execute(select(
+        InventoryRequisitionItem.item_id,
+        func.sum(
+            func.coalesce(InventoryRequisitionItem.approved_quantity, InventoryRequisitionItem.requested_quantity)
+            - InventoryRequisitionItem.fulfilled_quantity
+        )
+    ).join(
+        InventoryRequisition, InventoryRequisition.id == InventoryRequisitionItem.requisition_id
+    ).where(
+        InventoryRequisition.status.in_(UNRESERVED_REQUISITION_STATUSES),
+        InventoryRequisitionItem.status.notin_(CLOSED_LINE_STATUSES + [RequisitionLineStatus.FULFILLED]),
+        InventoryRequisition.id.notin_(_planned_draft_ids())
+    ).group_by(InventoryRequisitionItem.item_id))
+    for item_id, quantity in pending:
+        allocated[item_id] = allocated.get(item_id, 0.0) + quantity
+    return allocated
+
+
+def _requisitioned_quantities(db: Session, order_ids: List[int]) -> Dict[tuple, float]:
+    """
+    Quantity already requisitioned per (order, item) on live requisitions,
+    excluding earlier planned drafts that this run replaces.
+    """
+    covered: Dict[tuple, float] = {}
+    for offset in range(0, len(order_ids), ROWS_PER_INSERT):
+        covered.update({
+            (order_id, item_id): quantity
+            for order_id, item_id, quantity in db.execute(select(
+                InventoryRequisition.production_order_id,
+                InventoryRequisitionItem.item_id,
+                func.sum(func.coalesce(
+                    InventoryRequisitionItem.approved_quantity, InventoryRequisitionItem.requested_quantity
+                ))
+            ).join(
+                InventoryRequisition, InventoryRequisition.id == InventoryRequisitionItem.requisition_id
+            ).where(
+                InventoryRequisition.production_order_id.in_(order_ids[offset:offset + ROWS_PER_INSERT]),
+                InventoryRequisition.status.notin_(CLOSED_REQUISITION_STATUSES),
+                InventoryRequisitionItem.status.notin_(CLOSED_LINE_STATUSES),
+                InventoryRequisition.id.notin_(_planned_draft_ids())
+            ).group_by(InventoryRequisition.production_order_id, InventoryRequisitionItem.item_id))
+        })
+    return covered
+
+
+def _next_sequence(db: Session, prefix: str) -> int:
+    last = db.query(func.max(InventoryRequisition.requisition_number)).filter(
+        InventoryRequisition.requisition_number.like(f"{prefix}-%")
+    ).scalar()
+    return int(last.rsplit("-", 1)[1]) + 1 if last else 1
+
+
+def run_mrp(
+    db: Session,
+    requested_by: int,
+    order_ids: Optional[List[int]] = None,
+    line_ids: Optional[List[int]] = None,
+    dry_run: bool = True
+) -> dict:
+    """
+    Explode open production orders through their bills of materials and plan requisitions.
+
+    Each order needs its remaining quantity (target minus produced) of its
+    product. Items are planned level by level in low-level-code order, so an
+    item's demand from every parent is known before it is netted. Per order,
+    quantity already on its live requisitions is deducted; the rest is served
+    from free stock (on hand minus unissued quantity on live requisitions) in
+    priority / due-date order. A sub-assembly's uncovered quantity is made,
+    which adds its components to the next levels; any other item is
+    requisitioned in full and the part beyond free stock is reported as a
+    shortage for replenishment. Routing operations turn made quantities into
+    load per line and station.
+
+    Unless ``dry_run``, one draft requisition per order replaces the drafts
+    of earlier runs, written with bulk inserts.
+    """
+    graph = load_bom_graph(db)
+    levels = graph.low_level_codes()
+
+    query = select(
+        ProductionOrder.id, ProductionOrder.order_number, ProductionOrder.product_code, ProductionOrder.target_quantity,
+        ProductionOrder.produced_quantity, ProductionOrder.priority, ProductionOrder.due_date,
+        ProductionOrder.scheduled_start, ProductionOrder.production_line_id
+    ).where(ProductionOrder.status.in_(OPEN_ORDER_STATUSES))
+    if order_ids is not None:
+        query = query.where(ProductionOrder.id.in_(order_ids))
+    if line_ids is not None:
+        query = query.where(ProductionOrder.production_line_id.in_(line_ids))
+    orders = sorted(
+        db.execute(query).all(),
+        key=lambda order: (order.priority, order.due_date is None, order.due_date or "", order.id)
+    )
+
+    # Demand is held per item as (order ranks, quantities) chunks, ranks being
+    # positions in priority order, and summed per order with one bincount
+    planned_orders = []
+    unplanned = []
+    top_level: Dict[int, list] = defaultdict(list)
+    for order in orders:
+        remaining = order.target_quantity - (order.produced_quantity or 0.0)
+        bom_id = graph.by_code.get(order.product_code) if order.product_code else None
+        if bom_id is None:
+            unplanned.append({"order_id": order.id, "order_number": order.order_number, "reason": "no active bill of materials"})
+            continue
+        if remaining <= QUANTITY_EPSILON:
+            continue
+        top_level[bom_id].append((len(planned_orders), remaining))
+        planned_orders.append(order)
+
+    demand: Dict[int, list] = defaultdict(list)
+    made: Dict[int, list] = defaultdict(list)
+
+    def explode(bom_id: int, ranks: np.ndarray, quantities: np.ndarray) -> None:
+        made[bom_id].append((ranks, quantities))
+        for component, per_unit in graph.unit_components(bom_id).items():
+            demand[component].append((ranks, quantities * per_unit))
+
+    for bom_id, entries in top_level.items():
+        ranks, quantities = zip(*entries)
+        explode(bom_id, np.array(ranks, dtype=np.int64), np.array(quantities, dtype=float))
+
+    count = len(planned_orders)
+    rank = {order.id: index for index, order in enumerate(planned_orders)}
+    covered: Dict[int, list] = defaultdict(list)
+    for (order_id, item_id), quantity in _requisitioned_quantities(db, list(rank)).items():
+        covered[item_id].append((rank[order_id], quantity))
+    allocated = _allocated_quantities(db)
+    on_hand = dict(db.execute(select(InventoryItem.id, InventoryItem.quantity)).all())
+
+    requisitioned: Dict[int, tuple] = {}  # item -> (order ranks, quantities)
+    requirements = []
+    for level in sorted(set(levels.values())):
+        for item_id in sorted(item for item, item_level in levels.items() if item_level == level and item in demand):
+            chunks = demand.pop(item_id)
+            per_order = np.bincount(
+                np.concatenate([ranks for ranks, _ in chunks]),
+                weights=np.concatenate([quantities for _, quantities in chunks]),
+                minlength=count
+            )
+            ranks = np.flatnonzero(per_order > QUANTITY_EPSILON)
+            need = per_order[ranks]
+            gross = need.sum()
+            already = 0.0
+            if item_id in covered:
+                on_requisition = np.zeros(count)
+                for order_rank, quantity in covered[item_id]:
+                    on_requisition[order_rank] += quantity
+                on_requisition = np.minimum(on_requisition[ranks], need)
+                need = need - on_requisition
+                already = on_requisition.sum()
+
+            # Free stock goes to orders in priority order
+            pool = max(on_hand.get(item_id, 0.0) - allocated.get(item_id, 0.0), 0.0)
+            from_stock = np.clip(pool - (np.cumsum(need) - need), 0.0, need)
+            uncovered = need - from_stock
+            bom_id = graph.by_item.get(item_id)
+            if bom_id is not None:
+                picked = from_stock > QUANTITY_EPSILON
+                requisitioned[item_id] = (ranks[picked], from_stock[picked])
+                making = uncovered > QUANTITY_EPSILON
+                if making.any():
+                    explode(bom_id, ranks[making], uncovered[making])
+                to_make, shortage = uncovered[making].sum(), 0.0
+            else:
+                wanted = need > QUANTITY_EPSILON
+                requisitioned[item_id] = (ranks[wanted], need[wanted])
+                to_make, shortage = 0.0, uncovered.sum()
+            requirements.append({
+                "item_id": item_id,
+                "low_level_code": level,
+                "gross_requirement": round(float(gross), 6),
+                "already_requisitioned": round(float(already), 6),
+                "on_hand": on_hand.get(item_id, 0.0),
+                "allocated": round(allocated.get(item_id, 0.0), 6),
+                "from_stock": round(float(from_stock.sum()), 6),
+                "to_make": round(float(to_make), 6),
+                "shortage": round(float(shortage), 6),
+            })
+
+    # Capacity requirements from routings of everything made, one setup per order
+    load: Dict[tuple, float] = defaultdict(float)
+    for bom_id, chunks in made.items():
+        if not graph.operations[bom_id]:
+            continue
+        setups = np.unique(np.concatenate([ranks for ranks, _ in chunks])).size
+        quantity = float(sum(quantities.sum() for _, quantities in chunks))
+        for operation in graph.operations[bom_id]:
+            key = (operation.production_line_id, operation.station_id)
+            load[key] += (operation.setup_minutes or 0.0) * setups + (operation.run_minutes_per_unit or 0.0) * quantity
+
+    requisition_lines: Dict[int, Dict[int, float]] = defaultdict(dict)  # order -> item -> quantity
+    for item_id, (ranks, quantities) in requisitioned.items():
+        for order_rank, quantity in zip(ranks.tolist(), quantities.tolist()):
+            requisition_lines[planned_orders[order_rank].id][item_id] = quantity
+
+    items = {
+        row.id: row for row in db.query(
+            InventoryItem.id, InventoryItem.item_code, InventoryItem.name, InventoryItem.unit_of_measure
+        ).filter(InventoryItem.id.in_([requirement["item_id"] for requirement in requirements]))
+    } if requirements else {}
+    for requirement in requirements:
+        item = items.get(requirement["item_id"])
+        requirement["item_code"] = item.item_code if item else None
+        requirement["item_name"] = item.name if item else None
+
+    result = {
+        "dry_run": dry_run,
+        "orders_planned": len(planned_orders),
+        "unplanned_orders": unplanned,
+        "requirements": requirements,
+        "capacity": [
+            {"production_line_id": line_id, "station_id": station_id, "load_hours": round(minutes / 60, 3)}
+            for (line_id, station_id), minutes in sorted(load.items(), key=lambda entry: (entry[0][0] or 0, entry[0][1] or 0))
+        ],
+        "requisitions": len(requisition_lines),
+        "requisition_lines": sum(len(lines) for lines in requisition_lines.values()),
+    }
+    if dry_run:
+        return result
+
+    # Replace earlier planned drafts, then write headers and lines in bulk
+    db.execute(delete(InventoryRequisitionItem.__table__).where(
+        InventoryRequisitionItem.requisition_id.in_(_planned_draft_ids())
+    ))
+    db.execute(delete(InventoryRequisition.__table__).where(InventoryRequisition.id.in_(_planned_draft_ids())))
+
+    now = datetime.utcnow()
+    prefix = f"{PLANNED_PREFIX}-{now.strftime('%Y%m%d')}"
+    sequence = _next_sequence(db, prefix)
+    by_id = {order.id: order for order in planned_orders}
+    order_sequence = [order.id for order in planned_orders if order.id in requisition_lines]
+    headers = [
+        {
+            "requisition_number": f"{prefix}-{sequence + index:04d}",
+            "title": f"Materials for {by_id[order_id].order_number}",
+            "description": "Planned by MRP",
+            "status": RequisitionStatus.DRAFT,
+            "priority": PRIORITIES.get(by_id[order_id].priority, RequisitionPriority.LOW),
+            "needed_by": (by_id[order_id].scheduled_start or by_id[order_id].due_date or "")[:10] or None,
+            "department": "Production",
+            "production_order_id": order_id,
+            "requested_by": requested_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index, order_id in enumerate(order_sequence)
+    ]
+    requisition_ids = []
+    for offset in range(0, len(headers), ROWS_PER_INSERT):
+        requisition_ids.extend(db.scalars(
+            insert(InventoryRequisition).returning(InventoryRequisition.id, sort_by_parameter_order=True),
+            headers[offset:offset + ROWS_PER_INSERT]
+        ).all())
+
+    units = dict(db.execute(select(InventoryItem.id, InventoryItem.unit_of_measure).where(
+        InventoryItem.id.in_({item_id for lines in requisition_lines.values() for item_id in lines})
+    )).all()) if requisition_lines else {}
+    rows = [
+        {
+            "requisition_id": requisition_id,
+            "item_id": item_id,
+            "requested_quantity": round(quantity, 6),
+            "fulfilled_quantity": 0.0,
+            "unit_of_measure": units.get(item_id, ""),
+            "status": RequisitionLineStatus.PENDING,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for requisition_id, order_id in zip(requisition_ids, order_sequence)
+        for item_id, quantity in sorted(requisition_lines[order_id].items())
+    ]
+    for offset in range(0, len(rows), ROWS_PER_INSERT):
+        db.execute(insert(InventoryRequisitionItem.__table__), rows[offset:offset + ROWS_PER_INSERT])
+    db.commit()
+    return result
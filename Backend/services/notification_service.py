@@ -1,9 +1,157 @@
-from typing import Optional
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
 
+from sqlalchemy import case, delete, event, func, insert, select, update
 from sqlalchemy.orm import Session
 
-from models.notification import Notification
+from core.config import settings
+from core.notification_bus import notification_bus
+from models.craftsman import Craftsman
+from models.notification import Notification, NotificationCounter
+from models.user import User
 
+OUTBOX_KEY = "notification_outbox"
+
+
+# ==================== PUSH ====================
+
+def _queue_event(db: Session, user_id: int, event_name: str, data: dict) -> None:
+    """Hold an event on the session until it commits, so clients never see rolled-back rows."""
+    db.info.setdefault(OUTBOX_KEY, []).append((user_id, event_name, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_outbox(session: Session) -> None:
+    for user_id, event_name, data in session.info.pop(OUTBOX_KEY, []):
+        notification_bus.publish(user_id, event_name, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_outbox(session: Session) -> None:
+    session.info.pop(OUTBOX_KEY, None)
+
+
+def _payload(notification: Notification) -> dict:
+    return {
+        "id": notification.id,
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "link": notification.link,
+        "read": notification.read,
+        "digest_count": notification.digest_count,
+        "created_at": notification.created_at.isoformat(),
+        "updated_at": notification.updated_at.isoformat(),
+        "last_notified_at": notification.last_notified_at.isoformat(),
+    }
+
+
+# ==================== UNREAD COUNTERS ====================
+
+def _insert_ignoring_duplicates(db: Session, table):
+    """INSERT that skips rows whose key already exists, for the dialects we run on."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(table).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with("IGNORE")
+
+
+def _change_unread_many(db: Session, deltas: Dict[int, int]) -> Dict[int, int]:
+    """
+    Move unread counters in SQL, one UPDATE per distinct change, and return
+    the new values. The caller commits.
+
+    Missing counters are first seeded from the users' other unread rows with
+    an insert that skips counters created concurrently, so every change is
+    then applied by the same UPDATE whichever transaction created the row.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return {}
+    db.flush()
+    now = datetime.utcnow()
+    existing = set(db.execute(select(NotificationCounter.user_id).where(
+        NotificationCounter.user_id.in_(list(deltas))
+    )).scalars())
+    missing = [user_id for user_id in deltas if user_id not in existing]
+    if missing:
+        # Flushed rows already include this change, which the UPDATE below applies
+        unread = dict(db.execute(select(Notification.user_id, func.count(Notification.id)).where(
+            Notification.user_id.in_(missing),
+            Notification.read.is_(False)
+        ).group_by(Notification.user_id)).all())
+        db.execute(_insert_ignoring_duplicates(db, NotificationCounter.__table__), [
+            {
+                "user_id": user_id,
+                "unread_count": unread.get(user_id, 0) - deltas[user_id],
+                "created_at": now,
+                "updated_at": now,
+            }
+            for user_id in missing
+        ])
+
+    by_delta: Dict[int, List[int]] = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        changed = NotificationCounter.unread_count + delta
+        db.execute(update(NotificationCounter).where(NotificationCounter.user_id.in_(user_ids)).values(
+            unread_count=case((changed < 0, 0), else_=changed),
+            updated_at=now
+        ).execution_options(synchronize_session=False))
+
+    return dict(db.execute(select(NotificationCounter.user_id, NotificationCounter.unread_count).where(
+        NotificationCounter.user_id.in_(list(deltas))
+    )).all())
+
+
+def _change_unread(db: Session, user_id: int, delta: int) -> int:
+    counts = _change_unread_many(db, {user_id: delta})
+    return counts[user_id] if user_id in counts else get_unread_count(db, user_id)
+
+
+def _count_unread(db: Session, user_id: int) -> int:
+    return db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.read.is_(False),
+    ).scalar()
+
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """A user's unread count from the maintained counter."""
+    count = db.query(NotificationCounter.unread_count).filter(NotificationCounter.user_id == user_id).scalar()
+    return count if count is not None else _count_unread(db, user_id)
+
+
+def reconcile_notification_counters(db: Session) -> dict:
+    """Rebuild every unread counter from the notifications table."""
+    counts = dict(db.execute(select(Notification.user_id, func.count(Notification.id)).where(
+        Notification.read.is_(False)
+    ).group_by(Notification.user_id)).all())
+    existing = dict(db.execute(select(NotificationCounter.user_id, NotificationCounter.unread_count)).all())
+
+    now = datetime.utcnow()
+    changed = [user_id for user_id in set(counts) | set(existing) if counts.get(user_id, 0) != existing.get(user_id)]
+    for user_id in changed:
+        if user_id in existing:
+            db.execute(update(NotificationCounter).where(NotificationCounter.user_id == user_id).values(
+                unread_count=counts.get(user_id, 0), updated_at=now
+            ))
+        else:
+            db.execute(insert(NotificationCounter.__table__).values(
+                user_id=user_id, unread_count=counts[user_id], created_at=now, updated_at=now
+            ))
+        _queue_event(db, user_id, "unread", {"unread_count": counts.get(user_id, 0)})
+    db.commit()
+    return {"users": len(counts), "corrected": len(changed), "reconciled_at": now.isoformat()}
+
+
+# ==================== NOTIFICATIONS ====================
 
 def create_notification(
     db: Session,
@@ -13,6 +161,11 @@ def create_notification(
     message: str,
     link: Optional[str] = None,
 ) -> Notification:
+    """
+    Add one notification row; it is pushed to the user's open streams when the
+    caller commits. Use ``notify_users`` for several recipients or events that
+    should coalesce into digests.
+    """
     notification = Notification(
         user_id=user_id,
         type=notification_type,
@@ -22,9 +175,127 @@ def create_notification(
         read=False,
     )
     db.add(notification)
+    unread_count = _change_unread(db, user_id, 1)
+    _queue_event(db, user_id, "notification", {**_payload(notification), "unread_count": unread_count})
     return notification
 
 
+def notify_users(
+    db: Session,
+    user_ids: Iterable[int],
+    notification_type: str,
+    title: str,
+    message: str,
+    link: Optional[str] = None,
+    digest_window_seconds: Optional[int] = None,
+) -> dict:
+    """
+    Notify a set of users with one statement per step instead of one row per call.
+
+    Recipients who were notified within the digest window and still have that
+    notification (same type and link) unread get the row updated (latest title
+    and message, ``digest_count`` incremented, ``last_notified_at`` moved)
+    rather than a new row; everyone
+    else gets a row from a single bulk insert. Pushed to open streams when the
+    caller commits.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {"created": 0, "coalesced": 0}
+    window = settings.NOTIFICATION_DIGEST_WINDOW_SECONDS if digest_window_seconds is None else digest_window_seconds
+    now = datetime.utcnow()
+    db.flush()
+
+    digests: Dict[int, int] = {}
+    if window > 0:
+        digests = dict(db.execute(select(Notification.user_id, func.max(Notification.id)).where(
+            Notification.user_id.in_(user_ids),
+            Notification.type == notification_type,
+            Notification.link.is_(None) if link is None else Notification.link == link,
+            Notification.read.is_(False),
+            Notification.last_notified_at >= now - timedelta(seconds=window)
+        ).group_by(Notification.user_id)).all())
+        if digests:
+            db.execute(update(Notification).where(Notification.id.in_(list(digests.values()))).values(
+                title=title,
+                message=message,
+                digest_count=Notification.digest_count + 1,
+                last_notified_at=now,
+                updated_at=now
+            ).execution_options(synchronize_session=False))
+
+    created = [user_id for user_id in user_ids if user_id not in digests]
+    rows = [
+        {
+            "user_id": user_id,
+            "type": notification_type,
+            "title": title,
+            "message": message,
+            "link": link,
+            "read": False,
+            "digest_count": 1,
+            "created_at": now,
+            "updated_at": now,
+            "last_notified_at": now,
+        }
+        for user_id in created
+    ]
+    ids: Dict[int, Optional[int]] = dict.fromkeys(created)
+    if rows:
+        statement = insert(Notification.__table__)
+        if db.get_bind().dialect.insert_executemany_returning:
+            ids.update(db.execute(statement.returning(
+                Notification.__table__.c.user_id, Notification.__table__.c.id
+            ), rows).all())
+        else:
+            db.execute(statement, rows)
+
+    counts = _change_unread_many(db, dict.fromkeys(created, 1))
+    digest_rows = {}
+    if digests:
+        digest_rows = {row.id: row for row in db.execute(select(
+            Notification.id, Notification.digest_count, Notification.created_at
+        ).where(Notification.id.in_(list(digests.values()))))}
+        # Coalesced rows leave the unread count as it was
+        counts.update(db.execute(select(NotificationCounter.user_id, NotificationCounter.unread_count).where(
+            NotificationCounter.user_id.in_(list(digests))
+        )).all())
+    for user_id in user_ids:
+        notification_id = digests.get(user_id, ids.get(user_id))
+        digest = digest_rows.get(notification_id) if user_id in digests else None
+        _queue_event(db, user_id, "notification", {
+            "id": notification_id,
+            "type": notification_type,
+            "title": title,
+            "message": message,
+            "link": link,
+            "read": False,
+            "digest_count": digest.digest_count if digest else 1,
+            "created_at": (digest.created_at if digest else now).isoformat(),
+            "updated_at": now.isoformat(),
+            "last_notified_at": now.isoformat(),
+            "unread_count": counts.get(user_id),
+        })
+    return {"created": len(created), "coalesced": len(digests)}
+
+
+def notify_department(
+    db: Session,
+    department: str,
+    notification_type: str,
+    title: str,
+    message: str,
+    link: Optional[str] = None,
+    digest_window_seconds: Optional[int] = None,
+) -> dict:
+    """Notify the active users whose craftsman record is in a department."""
+    user_ids = db.execute(select(User.id).join(Craftsman, Craftsman.user_id == User.id).where(
+        Craftsman.department == department,
+        User.is_active.is_(True)
+    )).scalars().all()
+    return notify_users(db, user_ids, notification_type, title, message, link, digest_window_seconds)
+
+
 def get_notifications(
     db: Session,
     user_id: int,
@@ -33,16 +304,61 @@ def get_notifications(
     unread_only: bool = False,
     notification_type: Optional[str] = None,
 ):
+    """A user's notifications, most recently notified first; reading one does not reorder it."""
     query = db.query(Notification).filter(Notification.user_id == user_id)
     if unread_only:
         query = query.filter(Notification.read.is_(False))
     if notification_type:
         query = query.filter(Notification.type == notification_type)
 
-    total = query.count()
-    unread_count = db.query(Notification).filter(
+    unread_count = get_unread_count(db, user_id)
+    total = unread_count if unread_only and not notification_type else query.count()
+    data = query.order_by(Notification.last_notified_at.desc(), Notification.id.desc()).offset(skip).limit(limit).all()
+    return data, total, unread_count
+
+
+def mark_notification_read(db: Session, user_id: int, notification_id: int) -> Optional[Notification]:
+    """
+    Mark one of a user's notifications read. The flip is conditional on the
+    row being unread, so of two concurrent requests only one decrements.
+    """
+    changed = db.execute(update(Notification).where(
+        Notification.id == notification_id,
         Notification.user_id == user_id,
         Notification.read.is_(False),
-    ).count()
-    data = query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
-    return data, total, unread_count
+    ).values(read=True).execution_options(synchronize_session=False)).rowcount
+    if changed:
+        _queue_event(db, user_id, "unread", {"unread_count": _change_unread(db, user_id, -changed)})
+    db.commit()
+    return db.query(Notification).filter(
+        Notification.id == notification_id,
+        Notification.user_id == user_id,
+    ).populate_existing().first()
+
+
+def mark_all_notifications_read(db: Session, user_id: int) -> None:
+    """Mark all of a user's notifications read."""
+    changed = db.query(Notification).filter(
+        Notification.user_id == user_id,
+        Notification.read.is_(False),
+    ).update({Notification.read: True}, synchronize_session=False)
+    if changed:
+        _queue_event(db, user_id, "unread", {"unread_count": _change_unread(db, user_id, -changed)})
+    db.commit()
+
+
+def delete_notification(db: Session, user_id: int, notification_id: int) -> bool:
+    """
+    Delete one of a user's notifications. The row's read state is taken from
+    the DELETE itself, so a concurrent read or delete cannot decrement twice.
+    """
+    owned = (Notification.id == notification_id, Notification.user_id == user_id)
+    unread = db.execute(delete(Notification).where(*owned, Notification.read.is_(False)).execution_options(
+        synchronize_session=False
+    )).rowcount
+    if unread:
+        _queue_event(db, user_id, "unread", {"unread_count": _change_unread(db, user_id, -unread)})
+    elif not db.execute(delete(Notification).where(*owned).execution_options(synchronize_session=False)).rowcount:
+        return False
+    db.commit()
+    return True
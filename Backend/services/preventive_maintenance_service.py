@@ -0,0 +1,596 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
+from models.equipment import Equipment, EquipmentStatus
+from models.maintenance import PreventiveMaintenancePlan, PreventiveMaintenanceSchedule
+from models.meter import EquipmentMeter
+from models.work_order import WorkOrder, WorkOrderStatus, WorkOrderType
+from schemas.maintenance import PreventiveMaintenancePlanCreate, PreventiveMaintenancePlanUpdate
+from services.work_order_service import allocate_work_order_numbers
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+MICROSECONDS_PER_DAY = 86400 * 10 ** 6
+ROWS_PER_INSERT = 1000
+# Plan fields that determine when its schedules fall due
+INTERVAL_FIELDS = ("interval_days", "meter_code", "meter_interval", "start_date")
+
+
+# ==================== PLANS ====================
+
+def _plan_filters(query, equipment_id: Optional[int], equipment_category: Optional[str], is_active: Optional[bool]):
+    if equipment_id:
+        query = query.filter(PreventiveMaintenancePlan.equipment_id == equipment_id)
+    if equipment_category:
+        query = query.filter(PreventiveMaintenancePlan.equipment_category == equipment_category)
+    if is_active is not None:
+        query = query.filter(PreventiveMaintenancePlan.is_active == is_active)
+    return query
+
+
+def get_pm_plans(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    equipment_id: Optional[int] = None,
+    equipment_category: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> List[PreventiveMaintenancePlan]:
+    """Get preventive maintenance plans with optional filters."""
+    query = _plan_filters(db.query(PreventiveMaintenancePlan), equipment_id, equipment_category, is_active)
+    return query.order_by(PreventiveMaintenancePlan.name).offset(skip).limit(limit).all()
+
+
+def get_pm_plans_count(
+    db: Session,
+    equipment_id: Optional[int] = None,
+    equipment_category: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> int:
+    return _plan_filters(db.query(PreventiveMaintenancePlan), equipment_id, equipment_category, is_active).count()
+
+
+def get_pm_plan(db: Session, plan_id: int) -> Optional[PreventiveMaintenancePlan]:
+    return db.query(PreventiveMaintenancePlan).filter(PreventiveMaintenancePlan.id == plan_id).first()
+
+
+def get_pm_schedules(db: Session, plan_id: int) -> List[PreventiveMaintenanceSchedule]:
+    """Get a plan's per-equipment schedules, soonest due first."""
+    return db.query(PreventiveMaintenanceSchedule).filter(
+        PreventiveMaintenanceSchedule.plan_id == plan_id
+    ).order_by(PreventiveMaintenanceSchedule.next_due_date, PreventiveMaintenanceSchedule.equipment_id).all()
+
+
+def _validate_plan(db: Session, plan: PreventiveMaintenancePlan) -> None:
+    if (plan.equipment_id is None) == (not plan.equipment_category):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A plan targets either one equipment or an equipment category"
+        )
+    if bool(plan.meter_code) != (plan.meter_interval is not None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Meter-based plans need both a meter code and a meter interval"
+        )
+    if not plan.interval_days and not plan.meter_code:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A plan needs a calendar interval, a meter interval, or both"
+        )
+    if plan.equipment_id is not None and not db.query(Equipment.id).filter(Equipment.id == plan.equipment_id).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+
+
+def create_pm_plan(db: Session, plan: PreventiveMaintenancePlanCreate, created_by: int) -> PreventiveMaintenancePlan:
+    """Create a plan and schedule it on every equipment it targets."""
+    db_plan = PreventiveMaintenancePlan(created_by=created_by, **plan.model_dump())
+    _validate_plan(db, db_plan)
+    if db_plan.interval_days and db_plan.start_date is None:
+        db_plan.start_date = datetime.utcnow() + timedelta(days=db_plan.interval_days)
+    db.add(db_plan)
+    db.flush()
+    sync_pm_schedules(db, plan_ids=[db_plan.id])
+    db.commit()
+    db.refresh(db_plan)
+    return db_plan
+
+
+def update_pm_plan(
+    db: Session,
+    plan_id: int,
+    plan: PreventiveMaintenancePlanUpdate
+) -> Optional[PreventiveMaintenancePlan]:
+    """
+    Update a plan; retargeting adds and removes equipment schedules to match,
+    and changed intervals recompute when the existing schedules fall due.
+    """
+    db_plan = get_pm_plan(db, plan_id)
+    if not db_plan:
+        return None
+    before = {field: getattr(db_plan, field) for field in INTERVAL_FIELDS}
+    for field, value in plan.model_dump(exclude_unset=True).items():
+        setattr(db_plan, field, value)
+    _validate_plan(db, db_plan)
+    if db_plan.interval_days and db_plan.start_date is None:
+        db_plan.start_date = datetime.utcnow() + timedelta(days=db_plan.interval_days)
+    db.flush()
+    changed = {field for field in INTERVAL_FIELDS if getattr(db_plan, field) != before[field]}
+    if changed:
+        _reschedule_plan(db, db_plan, meter_changed="meter_code" in changed)
+    sync_pm_schedules(db, plan_ids=[db_plan.id])
+    db.commit()
+    db.refresh(db_plan)
+    return db_plan
+
+
+def delete_pm_plan(db: Session, plan_id: int) -> bool:
+    """Deactivate a plan; its schedules stay for history but stop generating."""
+    db_plan = get_pm_plan(db, plan_id)
+    if not db_plan:
+        return False
+    db_plan.is_active = False
+    db.commit()
+    return True
+
+
+# ==================== SCHEDULING ====================
+
+def sync_pm_schedules(db: Session, plan_ids: Optional[List[int]] = None) -> dict:
+    """
+    Create schedules for targeted equipment that has none yet and drop those
+    no longer targeted. Only the missing pairs are read, so routine runs are
+    cheap. The first calendar due date is the plan's start date, or one
+    interval after the equipment was added if that is later. The caller commits.
+    """
+    plans = PreventiveMaintenancePlan.__table__
+    schedules = PreventiveMaintenanceSchedule.__table__
+    equipment = Equipment.__table__
+    meters = EquipmentMeter.__table__
+
+    targets = or_(
+        plans.c.equipment_id == equipment.c.id,
+        and_(plans.c.equipment_id.is_(None), plans.c.equipment_category == equipment.c.category)
+    )
+    missing = select(
+        plans.c.id.label("plan_id"), equipment.c.id.label("equipment_id"), equipment.c.created_at,
+        plans.c.start_date, plans.c.interval_days, plans.c.meter_interval,
+        meters.c.last_value, meters.c.last_recorded_at
+    ).select_from(plans).join(equipment, targets).outerjoin(
+        meters, and_(meters.c.equipment_id == equipment.c.id, meters.c.code == plans.c.meter_code)
+    ).outerjoin(
+        schedules, and_(schedules.c.plan_id == plans.c.id, schedules.c.equipment_id == equipment.c.id)
+    ).where(
+        plans.c.is_active.is_(True),
+        equipment.c.status != EquipmentStatus.RETIRED,
+        schedules.c.id.is_(None)
+    )
+    stale = select(schedules.c.id).select_from(schedules).join(
+        plans, plans.c.id == schedules.c.plan_id
+    ).join(equipment, equipment.c.id == schedules.c.equipment_id).where(or_(
+        and_(plans.c.equipment_id.isnot(None), plans.c.equipment_id != schedules.c.equipment_id),
+        and_(
+            plans.c.equipment_id.is_(None),
+            or_(equipment.c.category.is_(None), equipment.c.category != plans.c.equipment_category)
+        )
+    ))
+    if plan_ids is not None:
+        missing = missing.where(plans.c.id.in_(plan_ids))
+        stale = stale.where(plans.c.id.in_(plan_ids))
+
+    now = datetime.utcnow()
+    rows = []
+    for row in db.execute(missing):
+        next_due_date = None
+        if row.interval_days:
+            next_due_date = max(row.start_date or now, row.created_at + timedelta(days=row.interval_days))
+        rows.append({
+            "plan_id": row.plan_id,
+            "equipment_id": row.equipment_id,
+            "next_due_date": next_due_date,
+            "next_due_meter": (row.last_value or 0.0) + row.meter_interval if row.meter_interval is not None else None,
+            "last_meter_value": row.last_value,
+            "last_meter_at": row.last_recorded_at,
+            "generated_count": 0,
+        })
+    for offset in range(0, len(rows), ROWS_PER_INSERT):
+        db.execute(insert(schedules), rows[offset:offset + ROWS_PER_INSERT])
+
+    stale_ids = [schedule_id for (schedule_id,) in db.execute(stale)]
+    for offset in range(0, len(stale_ids), ROWS_PER_INSERT):
+        db.execute(delete(schedules).where(schedules.c.id.in_(stale_ids[offset:offset + ROWS_PER_INSERT])))
+    return {"schedules_created": len(rows), "schedules_removed": len(stale_ids)}
+
+
+def _reschedule_plan(db: Session, plan: PreventiveMaintenancePlan, meter_changed: bool) -> int:
+    """
+    Recompute next due date and reading for all of a plan's schedules after its
+    intervals change, in one executemany UPDATE. A schedule that has generated
+    counts the new calendar interval from its last work order, otherwise from
+    the same first due date as a new schedule. The meter interval counts from
+    the reading at the last reset, or from the current reading when the plan
+    moved to a different meter. The caller commits.
+    """
+    schedules = PreventiveMaintenanceSchedule.__table__
+    equipment = Equipment.__table__
+    meters = EquipmentMeter.__table__
+
+    rows = db.execute(select(
+        schedules.c.id, schedules.c.last_generated_at, schedules.c.last_meter_value, schedules.c.last_meter_at,
+        schedules.c.meter_usage_per_day, equipment.c.created_at, meters.c.last_value, meters.c.last_recorded_at
+    ).select_from(schedules).join(equipment, equipment.c.id == schedules.c.equipment_id).outerjoin(
+        meters, and_(meters.c.equipment_id == schedules.c.equipment_id, meters.c.code == plan.meter_code)
+    ).where(schedules.c.plan_id == plan.id)).all()
+    if not rows:
+        return 0
+
+    now = datetime.utcnow()
+    updates = []
+    for row in rows:
+        next_due_date = None
+        if plan.interval_days:
+            interval = timedelta(days=plan.interval_days)
+            if row.last_generated_at is not None:
+                next_due_date = row.last_generated_at + interval
+            else:
+                next_due_date = max(plan.start_date or now, row.created_at + interval)
+        if meter_changed:
+            last_meter_value, last_meter_at, usage_per_day = row.last_value, row.last_recorded_at, None
+        else:
+            last_meter_value, last_meter_at, usage_per_day = (
+                row.last_meter_value, row.last_meter_at, row.meter_usage_per_day
+            )
+        updates.append({
+            "_id": row.id,
+            "_next_due_date": next_due_date,
+            "_next_due_meter": (
+                (last_meter_value or 0.0) + plan.meter_interval if plan.meter_interval is not None else None
+            ),
+            "_last_meter_value": last_meter_value,
+            "_last_meter_at": last_meter_at,
+            "_usage_per_day": usage_per_day,
+        })
+
+    db.execute(
+        update(schedules).where(schedules.c.id == bindparam("_id")).values(
+            next_due_date=bindparam("_next_due_date"),
+            next_due_meter=bindparam("_next_due_meter"),
+            last_meter_value=bindparam("_last_meter_value"),
+            last_meter_at=bindparam("_last_meter_at"),
+            meter_usage_per_day=bindparam("_usage_per_day"),
+            updated_at=now
+        ),
+        updates
+    )
+    return len(updates)
+
+
+def _due_schedules(db: Session, as_of: datetime):
+    """
+    Schedules due for a work order: calendar occurrences within their plan's
+    lead time (a range scan on the next-due index) and meters past their next
+    due reading.
+    """
+    plans = PreventiveMaintenancePlan.__table__
+    schedules = PreventiveMaintenanceSchedule.__table__
+    equipment = Equipment.__table__
+    meters = EquipmentMeter.__table__
+
+    max_lead = db.execute(select(plans.c.lead_days).where(plans.c.is_active.is_(True)).order_by(
+        plans.c.lead_days.desc()
+    ).limit(1)).scalar()
+    if max_lead is None:
+        return []
+
+    base = select(
+        schedules.c.id, schedules.c.plan_id, schedules.c.equipment_id, schedules.c.next_due_date,
+        schedules.c.next_due_meter, schedules.c.generated_count,
+        schedules.c.last_meter_value, schedules.c.last_meter_at, schedules.c.meter_usage_per_day,
+        plans.c.name, plans.c.description, plans.c.interval_days, plans.c.meter_interval, plans.c.lead_days,
+        plans.c.priority, plans.c.estimated_hours, plans.c.created_by,
+        meters.c.last_value, meters.c.last_recorded_at
+    ).select_from(schedules).join(plans, plans.c.id == schedules.c.plan_id).join(
+        equipment, equipment.c.id == schedules.c.equipment_id
+    ).outerjoin(
+        meters, and_(meters.c.equipment_id == schedules.c.equipment_id, meters.c.code == plans.c.meter_code)
+    ).where(
+        plans.c.is_active.is_(True),
+        equipment.c.status != EquipmentStatus.RETIRED
+    ).with_for_update(of=schedules, skip_locked=True)
+
+    calendar = db.execute(base.where(schedules.c.next_due_date <= as_of + timedelta(days=max_lead))).all()
+    metered = db.execute(base.where(
+        schedules.c.next_due_meter.isnot(None), meters.c.last_value >= schedules.c.next_due_meter
+    )).all()
+
+    due = {}
+    for row in calendar:
+        if row.next_due_date - timedelta(days=row.lead_days) <= as_of:
+            due[row.id] = (row, True)
+    for row in metered:
+        if row.id not in due:
+            due[row.id] = (row, False)
+    return list(due.values())
+
+
+def _usage_per_day(row) -> Optional[float]:
+    """Meter usage per day since the schedule last reset, if it can be measured."""
+    if None in (row.last_value, row.last_recorded_at, row.last_meter_value, row.last_meter_at):
+        return None
+    elapsed_days = (row.last_recorded_at - row.last_meter_at).total_seconds() / 86400
+    if elapsed_days <= 0 or row.last_value <= row.last_meter_value:
+        return None
+    return (row.last_value - row.last_meter_value) / elapsed_days
+
+
+def generate_pm_work_orders(db: Session, as_of: Optional[datetime] = None) -> dict:
+    """
+    Raise preventive work orders for every due schedule and advance it.
+
+    Work orders are bulk inserted with pre-allocated numbers. Calendar
+    schedules keep their cadence, skipping occurrences missed while the
+    scheduler was not running; a meter trigger restarts the calendar interval.
+    Either trigger resets the meter interval from the current reading.
+    """
+    as_of = as_of or datetime.utcnow()
+    synced = sync_pm_schedules(db)
+    due = _due_schedules(db, as_of)
+    if not due:
+        db.commit()
+        return {**synced, "work_orders_created": 0, "calendar_due": 0, "meter_due": 0}
+
+    numbers = allocate_work_order_numbers(db, len(due))
+    work_orders = []
+    updates = []
+    for number, (row, calendar_due) in zip(numbers, due):
+        due_date = row.next_due_date if calendar_due else as_of
+        next_due_date = None
+        if row.interval_days:
+            interval = timedelta(days=row.interval_days)
+            next_due_date = due_date + interval
+            lead = timedelta(days=row.lead_days)
+            if next_due_date - lead <= as_of:
+                missed = (as_of - (next_due_date - lead)) // interval + 1
+                next_due_date += missed * interval
+        next_due_meter = None
+        usage_per_day = row.meter_usage_per_day
+        if row.meter_interval is not None:
+            next_due_meter = (row.last_value or 0.0) + row.meter_interval
+            usage_per_day = _usage_per_day(row) or usage_per_day
+
+        work_orders.append({
+            "work_order_number": number,
+            "title": row.name,
+            "description": row.description,
+            "work_order_type": WorkOrderType.PREVENTIVE,
+            "priority": row.priority,
+            "status": WorkOrderStatus.PENDING,
+            "equipment_id": row.equipment_id,
+            "created_by": row.created_by,
+            "scheduled_date": due_date.date().isoformat(),
+            "due_date": due_date.date().isoformat(),
+            "estimated_hours": row.estimated_hours,
+            "notes": f"Generated from preventive maintenance plan #{row.plan_id}",
+        })
+        updates.append({
+            "_id": row.id,
+            "_number": number,
+            "_next_due_date": next_due_date,
+            "_next_due_meter": next_due_meter,
+            "_last_meter_value": row.last_value,
+            "_last_meter_at": row.last_recorded_at,
+            "_usage_per_day": usage_per_day,
+            "_generated_count": row.generated_count + 1,
+        })
+
+    for offset in range(0, len(work_orders), ROWS_PER_INSERT):
+        db.execute(insert(WorkOrder.__table__), work_orders[offset:offset + ROWS_PER_INSERT])
+    work_order_ids = {}
+    for offset in range(0, len(numbers), ROWS_PER_INSERT):
+        work_order_ids.update(db.execute(select(WorkOrder.work_order_number, WorkOrder.id).where(
+            WorkOrder.work_order_number.in_(numbers[offset:offset + ROWS_PER_INSERT])
+        )).all())
+    for values in updates:
+        values["_work_order_id"] = work_order_ids[values.pop("_number")]
+
+    schedules = PreventiveMaintenanceSchedule.__table__
+    db.execute(
+        update(schedules).where(schedules.c.id == bindparam("_id")).values(
+            next_due_date=bindparam("_next_due_date"),
+            next_due_meter=bindparam("_next_due_meter"),
+            last_meter_value=bindparam("_last_meter_value"),
+            last_meter_at=bindparam("_last_meter_at"),
+            meter_usage_per_day=bindparam("_usage_per_day"),
+            last_generated_at=as_of,
+            last_work_order_id=bindparam("_work_order_id"),
+            generated_count=bindparam("_generated_count"),
+            updated_at=datetime.utcnow()
+        ),
+        updates
+    )
+    db.commit()
+
+    calendar_count = sum(1 for _, calendar_due in due if calendar_due)
+    return {
+        **synced,
+        "work_orders_created": len(work_orders),
+        "calendar_due": calendar_count,
+        "meter_due": len(due) - calendar_count,
+    }
+
+
+# ==================== FORECAST ====================
+
+def _micros(values, count: int) -> np.ndarray:
+    # Integer timedelta division is several times faster than numpy's datetime conversion; None -> -1
+    return np.fromiter(
+        ((value - EPOCH) // MICROSECOND if value is not None else -1 for value in values), dtype=np.int64, count=count
+    )
+
+
+def _as_float(values, count: int) -> np.ndarray:
+    return np.fromiter((np.nan if value is None else value for value in values), dtype=np.float64, count=count)
+
+
+def forecast_pm_workload(
+    db: Session,
+    days: int = 90,
+    equipment_category: Optional[str] = None,
+    as_of: Optional[datetime] = None,
+    limit: int = 100
+) -> dict:
+    """
+    Project preventive maintenance occurrences over the next ``days``.
+
+    Every schedule is expanded in one vectorised pass. Calendar occurrences
+    follow the interval from the next due date; meter occurrences are projected
+    from the usage rate since the schedule last reset (or over the previous
+    cycle, right after a reset). A plan with both recurs
+    at whichever comes first. Meter-only schedules with no usage history
+    cannot be projected and are counted separately.
+    """
+    as_of = as_of or datetime.utcnow()
+    start_us = (as_of - EPOCH) // MICROSECOND
+    end_us = start_us + days * MICROSECONDS_PER_DAY
+
+    plans = PreventiveMaintenancePlan.__table__
+    schedules = PreventiveMaintenanceSchedule.__table__
+    equipment = Equipment.__table__
+    meters = EquipmentMeter.__table__
+    query = select(
+        schedules.c.plan_id, schedules.c.equipment_id, schedules.c.next_due_date, schedules.c.next_due_meter,
+        schedules.c.last_meter_value, schedules.c.last_meter_at, schedules.c.meter_usage_per_day,
+        plans.c.interval_days, plans.c.meter_interval, plans.c.estimated_hours,
+        equipment.c.category, meters.c.last_value, meters.c.last_recorded_at
+    ).select_from(schedules).join(plans, plans.c.id == schedules.c.plan_id).join(
+        equipment, equipment.c.id == schedules.c.equipment_id
+    ).outerjoin(
+        meters, and_(meters.c.equipment_id == schedules.c.equipment_id, meters.c.code == plans.c.meter_code)
+    ).where(plans.c.is_active.is_(True), equipment.c.status != EquipmentStatus.RETIRED)
+    if equipment_category:
+        query = query.where(equipment.c.category == equipment_category)
+    rows = db.execute(query).all()
+
+    result = {
+        "as_of": as_of,
+        "horizon_days": days,
+        "schedules": len(rows),
+        "occurrences": 0,
+        "estimated_hours": 0.0,
+        "unforecastable_schedules": 0,
+        "by_week": [],
+        "by_category": [],
+        "by_plan": [],
+        "upcoming": [],
+    }
+    if not rows:
+        return result
+
+    n = len(rows)
+    (plan_ids, equipment_ids, next_due_dates, next_due_meters, reset_values, reset_times, usage_per_day,
+     interval_days, meter_intervals, estimated_hours, categories, meter_values, meter_times) = zip(*rows)
+    plan_ids = np.array(plan_ids, dtype=np.int64)
+    equipment_ids = np.array(equipment_ids, dtype=np.int64)
+    hours = _as_float(estimated_hours, n)
+    hours = np.where(np.isnan(hours), 0.0, hours)
+
+    # Calendar: first occurrence and step
+    calendar_step = _as_float(interval_days, n) * MICROSECONDS_PER_DAY
+    calendar_first = _micros(next_due_dates, n).astype(np.float64)
+    calendar_first = np.where(calendar_first >= 0, calendar_first, np.inf)
+    calendar_step = np.where(np.isnan(calendar_step) | (calendar_step <= 0), np.inf, calendar_step)
+
+    # Meter: usage rate since the last reset, per microsecond, else the rate measured over the previous cycle
+    current = _as_float(meter_values, n)
+    elapsed = (_micros(meter_times, n) - _micros(reset_times, n)).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = (current - _as_float(reset_values, n)) / elapsed
+        measured = np.isfinite(rate) & (rate > 0) & (elapsed > 0)
+        rate = np.where(measured, rate, _as_float(usage_per_day, n) / MICROSECONDS_PER_DAY)
+        valid_rate = np.isfinite(rate) & (rate > 0)
+        remaining = np.maximum(_as_float(next_due_meters, n) - current, 0.0)
+        meter_first = np.where(valid_rate, start_us + remaining / rate, np.inf)
+        meter_step = np.where(valid_rate, _as_float(meter_intervals, n) / rate, np.inf)
+    meter_first = np.where(np.isnan(meter_first), np.inf, meter_first)
+    meter_step = np.where(np.isnan(meter_step) | (meter_step <= 0), np.inf, meter_step)
+
+    first = np.maximum(np.minimum(calendar_first, meter_first), start_us)  # Overdue counts as due now
+    step = np.minimum(calendar_step, meter_step)
+    forecastable = np.isfinite(first)
+    result["unforecastable_schedules"] = int((~forecastable).sum())
+
+    in_horizon = forecastable & (first < end_us)
+    counts = np.zeros(n, dtype=np.int64)
+    finite_step = in_horizon & np.isfinite(step)
+    counts[in_horizon] = 1
+    counts[finite_step] = np.ceil((end_us - first[finite_step]) / step[finite_step]).astype(np.int64)
+
+    total = int(counts.sum())
+    result["occurrences"] = total
+    if not total:
+        return result
+
+    # Expand schedules into occurrences: schedule index and its k-th repetition
+    owner = np.repeat(np.arange(n), counts)
+    repetition = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    step_offsets = np.where(repetition > 0, repetition * np.where(np.isfinite(step), step, 0)[owner], 0)
+    due_at = first[owner] + step_offsets
+    occurrence_hours = hours[owner]
+    result["estimated_hours"] = round(float(occurrence_hours.sum()), 2)
+
+    week = ((due_at - start_us) // (7 * MICROSECONDS_PER_DAY)).astype(np.int64)
+    weeks = int(week.max()) + 1
+    week_counts = np.bincount(week, minlength=weeks)
+    week_hours = np.bincount(week, weights=occurrence_hours, minlength=weeks)
+    result["by_week"] = [
+        {
+            "week_start": (as_of + timedelta(days=7 * index)).date().isoformat(),
+            "occurrences": int(week_counts[index]),
+            "estimated_hours": round(float(week_hours[index]), 2),
+        }
+        for index in range(weeks)
+    ]
+
+    category_names = sorted({category or "Unknown" for category in categories})
+    category_index = {name: index for index, name in enumerate(category_names)}
+    schedule_category = np.array([category_index[category or "Unknown"] for category in categories], dtype=np.int64)
+    category_counts = np.bincount(schedule_category[owner], minlength=len(category_names))
+    category_hours = np.bincount(schedule_category[owner], weights=occurrence_hours, minlength=len(category_names))
+    result["by_category"] = [
+        {
+            "category": name,
+            "occurrences": int(category_counts[index]),
+            "estimated_hours": round(float(category_hours[index]), 2),
+        }
+        for name, index in category_index.items() if category_counts[index]
+    ]
+
+    unique_plans, plan_index = np.unique(plan_ids, return_inverse=True)
+    plan_counts = np.bincount(plan_index[owner], minlength=len(unique_plans))
+    plan_hours = np.bincount(plan_index[owner], weights=occurrence_hours, minlength=len(unique_plans))
+    plan_names: Dict[int, str] = dict(db.execute(
+        select(plans.c.id, plans.c.name).where(plans.c.id.in_(unique_plans.tolist()))
+    ).all())
+    result["by_plan"] = [
+        {
+            "plan_id": int(plan_id),
+            "name": plan_names.get(int(plan_id)),
+            "occurrences": int(plan_counts[index]),
+            "estimated_hours": round(float(plan_hours[index]), 2),
+        }
+        for index, plan_id in enumerate(unique_plans) if plan_counts[index]
+    ]
+
+    soonest = np.argsort(due_at, kind="stable")[:limit]
+    result["upcoming"] = [
+        {
+            "plan_id": int(plan_ids[owner[index]]),
+            "equipment_id": int(equipment_ids[owner[index]]),
+            "due_at": EPOCH + timedelta(microseconds=int(due_at[index])),
+            "estimated_hours": float(occurrence_hours[index]),
+        }
+        for index in soonest.tolist()
+    ]
+    return result
@@ -0,0 +1,467 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.production import ProductionLine, ProductionLineEquipment, ProductionOrder, Shift
+from models.report_rollup import ProductionShiftOEE, ReportRollupWatermark, ReportRollupDirtyDay
+from models.work_order import WorkOrder, WorkOrderStatus
+from services.reliability_service import FAILURE_TYPES
+from services.report_rollup_service import mark_rollup_day_dirty
+from services.shift_calendar_service import shift_windows
+
+OEE_ROLLUP = "production_oee"
+ROWS_PER_INSERT = 1000
+MINUTES_PER_HOUR = 60.0
+EPOCH = datetime(1970, 1, 1)
+
+MEASURES = (
+    "scheduled_minutes", "planned_stop_minutes", "downtime_minutes",
+    "ideal_quantity", "produced_quantity", "defect_quantity",
+)
+GROUPINGS = {
+    "line": ("production_line_id",),
+    "shift": ("production_line_id", "shift_id"),
+    "day": ("day",),
+}
+
+# Timestamps of orders and work orders are ISO strings in local wall-clock
+# time, like shift windows; interval arithmetic is done in float minutes.
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def _minutes(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds() / 60
+
+
+def _days_between(first: date, last: date) -> Iterable[date]:
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def _affected_days(start: datetime, end: datetime) -> Iterable[date]:
+    """Days whose shift windows can overlap ``[start, end)``, including overnight windows of the day before."""
+    return _days_between(start.date() - timedelta(days=1), end.date())
+
+
+# ==================== ENGINE ====================
+
+def _union(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge overlapping intervals so simultaneous stops are counted once."""
+    if not len(starts):
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    first = np.concatenate([[True], starts[1:] > reach[:-1]])
+    return starts[first], np.maximum.reduceat(ends, np.flatnonzero(first))
+
+
+def _integral(starts: np.ndarray, ends: np.ndarray, rates: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """
+    Running integral, up to each ``at``, of the step function summing ``rates``
+    over their intervals. The amount of any quantity spread evenly over its
+    interval that falls into a window is the integral's difference across it,
+    so every window of a line is allocated with one sort and one searchsorted.
+    """
+    if not len(starts):
+        return np.zeros(len(at))
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([rates, -rates])
+    order = np.argsort(times, kind="stable")
+    times, deltas = times[order], deltas[order]
+    level = np.cumsum(deltas)  # Rate from times[k] to times[k + 1]
+    area = np.concatenate([[0.0], np.cumsum(level[:-1] * np.diff(times))])
+    position = np.searchsorted(times, at, side="right") - 1
+    clamped = np.maximum(position, 0)
+    return np.where(position >= 0, area[clamped] + level[clamped] * (at - times[clamped]), 0.0)
+
+
+def _window_amounts(starts, ends, rates, window_starts, window_ends) -> np.ndarray:
+    return _integral(starts, ends, rates, window_ends) - _integral(starts, ends, rates, window_starts)
+
+
+def _load_inputs(db: Session, line_ids: List[int], start: datetime, end: datetime, now: datetime):
+    """
+    Orders that ran and work orders on line equipment overlapping ``[start, end)``,
+    as (start, end, ...) minute arrays per line. Open intervals run until ``now``.
+    """
+    orders: Dict[int, list] = defaultdict(list)
+    for line_id, started, finished, produced, defects in db.execute(
+        select(
+            ProductionOrder.production_line_id, ProductionOrder.actual_start, ProductionOrder.actual_end,
+            ProductionOrder.produced_quantity, ProductionOrder.defect_quantity
+        ).where(
+            ProductionOrder.production_line_id.in_(line_ids),
+            ProductionOrder.actual_start.isnot(None),
+            ProductionOrder.actual_start < end.isoformat(),
+            or_(ProductionOrder.actual_end.is_(None), ProductionOrder.actual_end >= start.isoformat())
+        )
+    ):
+        began = _parse_timestamp(started)
+        if began is None:
+            continue
+        ended = _parse_timestamp(finished) or now
+        orders[line_id].append((_minutes(began), _minutes(max(ended, began)), produced or 0.0, defects or 0.0))
+
+    stops: Dict[int, list] = defaultdict(list)
+    for line_id, started, finished, work_order_type in db.execute(
+        select(
+            ProductionLineEquipment.production_line_id, WorkOrder.started_at, WorkOrder.completed_at,
+            WorkOrder.work_order_type
+        ).join(
+            WorkOrder, WorkOrder.equipment_id == ProductionLineEquipment.equipment_id
+        ).where(
+            ProductionLineEquipment.production_line_id.in_(line_ids),
+            WorkOrder.status != WorkOrderStatus.CANCELLED,
+            WorkOrder.started_at.isnot(None),
+            WorkOrder.started_at < end.isoformat(),
+            or_(WorkOrder.completed_at.is_(None), WorkOrder.completed_at >= start.isoformat())
+        )
+    ):
+        began = _parse_timestamp(started)
+        if began is None:
+            continue
+        ended = _parse_timestamp(finished) or now
+        if ended > began:
+            stops[line_id].append((_minutes(began), _minutes(ended), work_order_type in FAILURE_TYPES))
+
+    return orders, stops
+
+
+def _line_rows(
+    line: ProductionLine, shifts: List[Shift], days: Set[date], orders: list, stops: list,
+    now: datetime, stamp: datetime
+) -> List[dict]:
+    """OEE measures of the line's shift windows starting on ``days``, all windows at once; windows end at ``now``."""
+    first, last = min(days), max(days)
+    windows = [
+        (window_start, min(window_end, now), shift) for window_start, window_end, shift in shift_windows(
+            shifts, datetime.combine(first - timedelta(days=1), time()), datetime.combine(last + timedelta(days=2), time())
+        )
+        if window_start.date() in days and window_start < now
+    ]
+    if not windows:
+        return []
+    window_starts = np.array([_minutes(window_start) for window_start, _, _ in windows])
+    window_ends = np.array([_minutes(window_end) for _, window_end, _ in windows])
+    scheduled = window_ends - window_starts
+
+    stop_rows = np.array(stops, dtype=np.float64).reshape(-1, 3)
+    planned = stop_rows[stop_rows[:, 2] == 0]
+    planned_starts, planned_ends = _union(planned[:, 0], planned[:, 1])
+    all_starts, all_ends = _union(stop_rows[:, 0], stop_rows[:, 1])
+    planned_stop = _window_amounts(
+        planned_starts, planned_ends, np.ones(len(planned_starts)), window_starts, window_ends
+    )
+    # Breakdowns during planned maintenance are not availability losses
+    downtime = _window_amounts(
+        all_starts, all_ends, np.ones(len(all_starts)), window_starts, window_ends
+    ) - planned_stop
+    run = np.maximum(scheduled - planned_stop - downtime, 0.0)
+
+    order_rows = np.array(orders, dtype=np.float64).reshape(-1, 4)
+    order_starts = order_rows[:, 0]
+    order_ends = np.maximum(order_rows[:, 1], order_starts + 1.0)  # Instant orders spread over a minute
+    durations = order_ends - order_starts
+    produced = _window_amounts(order_starts, order_ends, order_rows[:, 2] / durations, window_starts, window_ends)
+    defects = _window_amounts(order_starts, order_ends, order_rows[:, 3] / durations, window_starts, window_ends)
+    ideal = run / MINUTES_PER_HOUR * (line.capacity_per_hour or 0.0)
+
+    return [
+        {
+            "day": window_start.date(),
+            "production_line_id": line.id,
+            "shift_id": shift.id,
+            "window_start": window_start,
+            "window_end": window_end,
+            "scheduled_minutes": float(scheduled[index]),
+            "planned_stop_minutes": float(planned_stop[index]),
+            "downtime_minutes": float(max(downtime[index], 0.0)),
+            "ideal_quantity": float(ideal[index]),
+            "produced_quantity": float(produced[index]),
+            "defect_quantity": float(defects[index]),
+            "created_at": stamp,
+            "updated_at": stamp,
+        }
+        for index, (window_start, window_end, shift) in enumerate(windows)
+    ]
+
+
+def compute_shift_oee(db: Session, targets: Dict[int, Set[date]], now: Optional[datetime] = None) -> List[dict]:
+    """
+    Per-shift OEE rows for the given days of each line, from raw orders and work orders.
+
+    Orders count towards the windows their ``actual_start``..``actual_end``
+    overlaps, spread evenly over that time; work orders on any station of
+    the line stop the whole line while in progress. Lines without active
+    shifts have no planned time and produce no rows.
+    """
+    now = now or datetime.now()
+    targets = {line_id: days for line_id, days in targets.items() if days}
+    if not targets:
+        return []
+    lines = {line.id: line for line in db.query(ProductionLine).filter(ProductionLine.id.in_(list(targets)))}
+    shifts: Dict[int, List[Shift]] = defaultdict(list)
+    for shift in db.query(Shift).filter(Shift.production_line_id.in_(list(lines)), Shift.is_active.is_(True)):
+        shifts[shift.production_line_id].append(shift)
+    line_ids = [line_id for line_id in lines if shifts[line_id]]
+    if not line_ids:
+        return []
+
+    first = min(min(targets[line_id]) for line_id in line_ids)
+    last = max(max(targets[line_id]) for line_id in line_ids)
+    orders, stops = _load_inputs(
+        db, line_ids, datetime.combine(first, time()), datetime.combine(last + timedelta(days=2), time()), now
+    )
+    stamp = datetime.utcnow()
+    rows = []
+    for line_id in line_ids:
+        rows.extend(_line_rows(
+            lines[line_id], shifts[line_id], targets[line_id], orders[line_id], stops[line_id], now, stamp
+        ))
+    return rows
+
+
+# ==================== REFRESH ====================
+
+def mark_oee_dirty(db: Session, started: Optional[str], finished: Optional[str]) -> None:
+    """Queue the days a deleted order ran on for recomputation. The caller commits."""
+    began = _parse_timestamp(started)
+    if began is None:
+        return
+    for day in _affected_days(began, _parse_timestamp(finished) or began):
+        mark_rollup_day_dirty(db, OEE_ROLLUP, day)
+
+
+def _store(db: Session, targets: Dict[int, Set[date]], now: datetime) -> int:
+    table = ProductionShiftOEE.__table__
+    for line_id, days in targets.items():
+        ordered = sorted(days)
+        for offset in range(0, len(ordered), ROWS_PER_INSERT):
+            db.execute(delete(table).where(
+                table.c.production_line_id == line_id, table.c.day.in_(ordered[offset:offset + ROWS_PER_INSERT])
+            ))
+    rows = compute_shift_oee(db, targets, now)
+    for offset in range(0, len(rows), ROWS_PER_INSERT):
+        db.execute(insert(table), rows[offset:offset + ROWS_PER_INSERT])
+    return len(rows)
+
+
+def refresh_production_oee(db: Session, rebuild: bool = False) -> dict:
+    """
+    Bring the stored per-shift OEE up to date.
+
+    Days are stored once all of their shift windows have ended (up to the day
+    before yesterday, an overnight window of yesterday may still be running).
+    Later refreshes recompute only days that became complete, days touched
+    by orders or work orders changed since the watermark, and days queued by
+    deletions. Edits to shifts or line capacity apply to recomputed days only;
+    ``rebuild`` recomputes the whole history.
+    """
+    now = datetime.now()
+    lag = timedelta(seconds=settings.REPORT_ROLLUP_WATERMARK_LAG_SECONDS)
+    watermark = datetime.utcnow() - lag
+    covered_through = (now - lag).date() - timedelta(days=1)  # Days before this are stored
+
+    state = db.query(ReportRollupWatermark).filter(
+        ReportRollupWatermark.rollup == OEE_ROLLUP
+    ).with_for_update().first()
+    line_ids = [line_id for (line_id,) in db.query(Shift.production_line_id).filter(Shift.is_active.is_(True)).distinct()]
+    targets: Dict[int, Set[date]] = defaultdict(set)
+
+    if rebuild or state is None:
+        db.execute(delete(ProductionShiftOEE.__table__))
+        first = _parse_timestamp(db.query(func.min(ProductionOrder.actual_start)).scalar())
+        if first is not None:
+            for line_id in line_ids:
+                targets[line_id].update(_days_between(first.date() - timedelta(days=1), covered_through))
+    else:
+        for line_id in line_ids:
+            targets[line_id].update(_days_between(state.covered_through, covered_through))
+        changed = db.execute(select(
+            ProductionOrder.production_line_id, ProductionOrder.actual_start, ProductionOrder.actual_end
+        ).where(ProductionOrder.updated_at >= state.watermark, ProductionOrder.actual_start.isnot(None))).all()
+        changed += db.execute(select(
+            ProductionLineEquipment.production_line_id, WorkOrder.started_at, WorkOrder.completed_at
+        ).join(
+            WorkOrder, WorkOrder.equipment_id == ProductionLineEquipment.equipment_id
+        ).where(WorkOrder.updated_at >= state.watermark, WorkOrder.started_at.isnot(None))).all()
+        for line_id, started, finished in changed:
+            began = _parse_timestamp(started)
+            if began is not None:
+                targets[line_id].update(_affected_days(began, _parse_timestamp(finished) or now))
+        for (day,) in db.query(ReportRollupDirtyDay.day).filter(ReportRollupDirtyDay.rollup == OEE_ROLLUP):
+            for line_id in line_ids:
+                targets[line_id].add(day)
+
+    targets = {
+        line_id: {day for day in days if day < covered_through}
+        for line_id, days in targets.items() if line_id in line_ids
+    }
+    written = _store(db, targets, now)
+    db.query(ReportRollupDirtyDay).filter(ReportRollupDirtyDay.rollup == OEE_ROLLUP).delete(synchronize_session=False)
+
+    if state is None:
+        db.add(ReportRollupWatermark(rollup=OEE_ROLLUP, watermark=watermark, covered_through=covered_through))
+    else:
+        state.watermark = watermark
+        state.covered_through = covered_through
+    db.commit()
+    return {"line_days": sum(len(days) for days in targets.values()), "rows": written}
+
+
+def rebuild_production_oee(db: Session) -> dict:
+    """Recompute the stored per-shift OEE from scratch."""
+    return refresh_production_oee(db, rebuild=True)
+
+
+# ==================== REPORT ====================
+
+def _ratios(totals: np.ndarray) -> Dict[str, np.ndarray]:
+    """Availability, performance, quality and OEE of each row of summed measures; NaN where undefined."""
+    scheduled, planned_stop, downtime, ideal, produced, defects = totals.T
+    planned = scheduled - planned_stop
+    run = planned - downtime
+    good = produced - defects
+
+    def ratio(numerator, denominator):
+        return np.divide(numerator, denominator, out=np.full(len(numerator), np.nan), where=denominator > 0)
+
+    availability = ratio(run, planned)
+    performance = ratio(produced, ideal)
+    quality = ratio(good, produced)
+    # Nothing produced is a performance loss, not a quality one
+    oee = availability * performance * np.where(produced > 0, quality, 1.0)
+    return {
+        "planned_hours": planned / MINUTES_PER_HOUR,
+        "run_hours": run / MINUTES_PER_HOUR,
+        "availability": availability,
+        "performance": performance,
+        "quality": quality,
+        "oee": oee,
+        "good_quantity": good,
+    }
+
+
+def _entries(totals: np.ndarray) -> List[dict]:
+    ratios = _ratios(totals)
+
+    def percent(values, index):
+        value = values[index]
+        return None if np.isnan(value) else round(float(value) * 100, 2)
+
+    return [
+        {
+            "planned_hours": round(float(ratios["planned_hours"][index]), 2),
+            "run_hours": round(float(ratios["run_hours"][index]), 2),
+            "planned_stop_hours": round(float(totals[index, 1]) / MINUTES_PER_HOUR, 2),
+            "downtime_hours": round(float(totals[index, 2]) / MINUTES_PER_HOUR, 2),
+            "produced_quantity": round(float(totals[index, 4]), 3),
+            "good_quantity": round(float(ratios["good_quantity"][index]), 3),
+            "defect_quantity": round(float(totals[index, 5]), 3),
+            "availability": percent(ratios["availability"], index),
+            "performance": percent(ratios["performance"], index),
+            "quality": percent(ratios["quality"], index),
+            "oee": percent(ratios["oee"], index),
+        }
+        for index in range(len(totals))
+    ]
+
+
+def get_oee_report(
+    db: Session,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    line_id: Optional[int] = None,
+    group_by: str = "line"
+) -> dict:
+    """
+    OEE per line, per shift or per day over ``[start_date, end_date]`` (days, inclusive).
+
+    Stored per-shift rows are summed in the database; only days the last
+    refresh has not covered yet (normally today and yesterday) are computed
+    from raw orders. Ratios are taken of the summed measures, so a long
+    shift weighs more than a short one.
+    """
+    if group_by not in GROUPINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"group_by must be one of: {', '.join(GROUPINGS)}"
+        )
+    end_day = date.fromisoformat(end_date[:10]) if end_date else date.today()
+    start_day = date.fromisoformat(start_date[:10]) if start_date else end_day - timedelta(days=29)
+    if start_day > end_day:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date must not be after end_date")
+
+    keys = GROUPINGS[group_by]
+    covered_through = db.query(ReportRollupWatermark.covered_through).filter(
+        ReportRollupWatermark.rollup == OEE_ROLLUP
+    ).scalar()
+    live_from = max(start_day, covered_through) if covered_through else start_day
+    sums: Dict[tuple, np.ndarray] = defaultdict(lambda: np.zeros(len(MEASURES)))
+
+    if covered_through and start_day < covered_through:
+        key_columns = [getattr(ProductionShiftOEE, key) for key in keys]
+        query = db.query(
+            *key_columns, *[func.sum(getattr(ProductionShiftOEE, name)) for name in MEASURES]
+        ).filter(ProductionShiftOEE.day >= start_day, ProductionShiftOEE.day < min(covered_through, end_day + timedelta(days=1)))
+        if line_id is not None:
+            query = query.filter(ProductionShiftOEE.production_line_id == line_id)
+        for row in query.group_by(*key_columns):
+            sums[tuple(row[:len(keys)])] += np.array(row[len(keys):], dtype=np.float64)
+
+    if live_from <= end_day:
+        live_lines = [line_id] if line_id is not None else [
+            line for (line,) in db.query(Shift.production_line_id).filter(Shift.is_active.is_(True)).distinct()
+        ]
+        live_days = set(_days_between(live_from, end_day))
+        for row in compute_shift_oee(db, {line: live_days for line in live_lines}):
+            sums[tuple(row[key] for key in keys)] += np.array([row[name] for name in MEASURES])
+
+    groups = sorted(sums, key=lambda key: tuple((value is None, value) for value in key))
+    totals = np.array([sums[key] for key in groups]).reshape(-1, len(MEASURES))
+    line_ids = {key[0] for key in groups} if group_by != "day" else set()
+    lines = {line.id: line for line in db.query(ProductionLine).filter(ProductionLine.id.in_(line_ids))} if line_ids else {}
+    shift_ids = {key[1] for key in groups if key[1] is not None} if group_by == "shift" else set()
+    shifts = {shift.id: shift for shift in db.query(Shift).filter(Shift.id.in_(shift_ids))} if shift_ids else {}
+
+    results = []
+    for key, entry in zip(groups, _entries(totals)):
+        if group_by == "day":
+            label = {"day": key[0].isoformat()}
+        else:
+            line = lines.get(key[0])
+            label = {
+                "production_line_id": key[0],
+                "line_code": line.line_code if line else None,
+                "line_name": line.name if line else None,
+            }
+            if group_by == "shift":
+                shift = shifts.get(key[1])
+                label["shift_id"] = key[1]
+                label["shift_type"] = shift.shift_type.value if shift else None
+        results.append({**label, **entry})
+
+    return {
+        "start_date": start_day.isoformat(),
+        "end_date": end_day.isoformat(),
+        "group_by": group_by,
+        "stored_through": (covered_through - timedelta(days=1)).isoformat() if covered_through else None,
+        "total": _entries(totals.sum(axis=0, keepdims=True))[0],
+        "groups": results,
+    }
@@ -0,0 +1,354 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, bindparam, update
+from models.production import ProductionLine, ProductionOrder, ProductionOrderStatus
+from services.shift_calendar_service import line_shift_windows
+
+MAX_IMPROVEMENT_PASSES = 500  # Adjacent-swap passes per round
+MAX_INSERTION_ROUNDS = 10
+EPSILON = 1e-9
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def _weight(priority: Optional[int]) -> float:
+    """Tardiness weight: priority 1 (urgent) counts five times priority 5 (low)."""
+    return float(6 - min(max(priority or 3, 1), 5))
+
+
+class _Calendar:
+    """
+    A line's working windows as capacity buckets, in minutes from the schedule
+    origin. Work content maps to wall-clock time through the cumulative
+    working minutes, so a whole sequence is timed with one ``searchsorted``.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+        self.cumulative = np.cumsum(ends - starts)
+        self.total = float(self.cumulative[-1]) if len(self.cumulative) else 0.0
+
+    def finish(self, work: np.ndarray) -> np.ndarray:
+        """Wall-clock minute at which ``work`` minutes of line time are done."""
+        bucket = np.minimum(np.searchsorted(self.cumulative, work, side="left"), len(self.cumulative) - 1)
+        return self.ends[bucket] - (self.cumulative[bucket] - work)
+
+    def begin(self, work: np.ndarray) -> np.ndarray:
+        """Wall-clock minute at which work resumes after ``work`` minutes are done."""
+        bucket = np.minimum(np.searchsorted(self.cumulative, work, side="right"), len(self.cumulative) - 1)
+        return self.ends[bucket] - (self.cumulative[bucket] - work)
+
+    def segments(self, work_start: float, work_end: float) -> List[tuple]:
+        """(bucket, wall start, wall end) pieces of a job split over shift breaks."""
+        if work_end <= work_start:
+            # No work left: one empty piece where the job would begin
+            wall = float(self.begin(np.array([work_start]))[0])
+            bucket = min(int(np.searchsorted(self.cumulative, work_start, side="right")), len(self.cumulative) - 1)
+            return [(bucket, wall, wall)]
+        first = int(np.searchsorted(self.cumulative, work_start, side="right"))
+        last = int(np.searchsorted(self.cumulative, work_end, side="left"))
+        wall_start = float(self.begin(np.array([work_start]))[0])
+        wall_end = float(self.finish(np.array([work_end]))[0])
+        return [
+            (bucket, max(float(self.starts[bucket]), wall_start), min(float(self.ends[bucket]), wall_end))
+            for bucket in range(first, min(last, len(self.cumulative) - 1) + 1)
+        ]
+
+
+def _weighted_tardiness(calendar: _Calendar, offset: float, durations, dues, weights) -> float:
+    completion = calendar.finish(offset + np.cumsum(durations))
+    return float(np.sum(weights * np.maximum(completion - dues, 0.0)))
+
+
+def _interchange(calendar: _Calendar, offset: float, sequence: np.ndarray, durations, dues, weights) -> int:
+    """
+    Adjacent pairwise interchange on a sequence, in place.
+
+    Swapping neighbours only moves their two completion times, so every swap's
+    change in weighted tardiness is evaluated at once. Each pass applies the
+    improving swaps that are the best among their neighbours (never two that
+    share a job) and repeats until no swap helps. Returns the passes run.
+    """
+    for passes in range(1, MAX_IMPROVEMENT_PASSES + 1):
+        if len(sequence) < 2:
+            return passes - 1
+        p, due, weight = durations[sequence], dues[sequence], weights[sequence]
+        work_end = offset + np.cumsum(p)
+        end = calendar.finish(work_end)
+        work_start = work_end - p
+
+        first, second = slice(None, -1), slice(1, None)
+        current = weight[first] * np.maximum(end[first] - due[first], 0) \
+            + weight[second] * np.maximum(end[second] - due[second], 0)
+        second_first_end = calendar.finish(work_start[first] + p[second])
+        swapped = weight[second] * np.maximum(second_first_end - due[second], 0) \
+            + weight[first] * np.maximum(end[second] - due[first], 0)
+        delta = swapped - current
+
+        padded = np.concatenate(([np.inf], delta, [np.inf]))
+        chosen = np.flatnonzero(
+            (delta < -EPSILON) & (delta < padded[:-2]) & (delta <= padded[2:])
+        )
+        if not len(chosen):
+            return passes - 1
+        sequence[chosen], sequence[chosen + 1] = sequence[chosen + 1], sequence[chosen].copy()
+    return MAX_IMPROVEMENT_PASSES
+
+
+def _insertion(calendar: _Calendar, offset: float, sequence: np.ndarray, durations, dues, weights) -> np.ndarray:
+    """
+    One sweep of single-job moves: each job is tried at every other position.
+
+    Moving job j from position i to k shifts only the jobs in between by j's
+    duration, so all targets are priced with one vectorized pass: j's new
+    completion plus a running sum of the shifted jobs' tardiness changes.
+    The best improving move per job is applied before the next job is tried.
+    """
+    position = 0
+    while position < len(sequence):
+        p, due, weight = durations[sequence], dues[sequence], weights[sequence]
+        work_end = offset + np.cumsum(p)
+        end = calendar.finish(work_end)
+        tardiness = weight * np.maximum(end - due, 0)
+        job_p, job_due, job_weight = p[position], due[position], weight[position]
+
+        best_delta, best_target = -EPSILON, None
+        if position > 0:
+            # Earlier: jobs [k, position) finish job_p later
+            before = slice(0, position)
+            shifted = weight[before] * np.maximum(calendar.finish(work_end[before] + job_p) - due[before], 0) \
+                - tardiness[before]
+            moved = job_weight * np.maximum(
+                calendar.finish(work_end[before] - p[before] + job_p) - job_due, 0
+            )
+            delta = moved - tardiness[position] + np.cumsum(shifted[::-1])[::-1]
+            target = int(np.argmin(delta))
+            if delta[target] < best_delta:
+                best_delta, best_target = float(delta[target]), target
+        if position < len(sequence) - 1:
+            # Later: jobs (position, k] finish job_p sooner
+            after = slice(position + 1, None)
+            shifted = weight[after] * np.maximum(calendar.finish(work_end[after] - job_p) - due[after], 0) \
+                - tardiness[after]
+            moved = job_weight * np.maximum(end[after] - job_due, 0)
+            delta = moved - tardiness[position] + np.cumsum(shifted)
+            target = int(np.argmin(delta))
+            if delta[target] < best_delta:
+                best_delta, best_target = float(delta[target]), position + 1 + target
+
+        if best_target is not None:
+            job = sequence[position]
+            sequence = np.insert(np.delete(sequence, position), best_target, job)
+            if best_target > position:
+                continue  # Another job now sits at this position
+        position += 1
+    return sequence
+
+
+def _improve(calendar: _Calendar, offset: float, sequence: np.ndarray, durations, dues, weights) -> tuple:
+    """Alternate interchange and insertion until neither improves; returns (sequence, rounds)."""
+    best = _weighted_tardiness(calendar, offset, durations[sequence], dues[sequence], weights[sequence])
+    for rounds in range(1, MAX_INSERTION_ROUNDS + 1):
+        _interchange(calendar, offset, sequence, durations, dues, weights)
+        sequence = _insertion(calendar, offset, sequence, durations, dues, weights)
+        current = _weighted_tardiness(calendar, offset, durations[sequence], dues[sequence], weights[sequence])
+        if current > best - EPSILON:
+            return sequence, rounds
+        best = current
+    return sequence, MAX_INSERTION_ROUNDS
+
+
+def schedule_production(
+    db: Session,
+    line_ids: Optional[List[int]] = None,
+    order_ids: Optional[List[int]] = None,
+    start: Optional[datetime] = None,
+    horizon_days: int = 14,
+    improve: bool = True,
+    dry_run: bool = True
+) -> dict:
+    """
+    Build a finite-capacity schedule of pending production orders per line.
+
+    Each line works only inside its shift windows at ``capacity_per_hour``;
+    orders in progress keep the line busy first. Pending orders are sequenced
+    earliest-due-date first (priority breaks ties), then improved by local
+    search on priority-weighted tardiness. An order may pause over shift
+    breaks; the Gantt output lists its pieces. Orders that do not fit in the
+    horizon, or whose line has no capacity or shifts, are reported
+    unscheduled. Unless ``dry_run``, the schedule is written back to the
+    orders' ``scheduled_start``, ``scheduled_end`` and ``shift_id`` in bulk.
+    """
+    origin = (start or datetime.utcnow()).replace(second=0, microsecond=0, tzinfo=None)
+    horizon_end = origin + timedelta(days=horizon_days)
+
+    query = db.query(ProductionLine)
+    if line_ids is not None:
+        query = query.filter(ProductionLine.id.in_(line_ids))
+    lines = query.order_by(ProductionLine.id).all()
+    windows = line_shift_windows(db, [line.id for line in lines], origin, horizon_end)
+
+    query = db.query(
+        ProductionOrder.id, ProductionOrder.order_number, ProductionOrder.production_line_id,
+        ProductionOrder.product_name, ProductionOrder.status, ProductionOrder.priority, ProductionOrder.due_date,
+        ProductionOrder.target_quantity, ProductionOrder.produced_quantity
+    ).filter(
+        ProductionOrder.production_line_id.in_([line.id for line in lines]),
+        ProductionOrder.status.in_([ProductionOrderStatus.PENDING, ProductionOrderStatus.IN_PROGRESS])
+    )
+    selected = set(order_ids) if order_ids is not None else None
+    orders_by_line = {line.id: [] for line in lines}
+    for order in query.order_by(ProductionOrder.id):
+        if order.status == ProductionOrderStatus.IN_PROGRESS or selected is None or order.id in selected:
+            orders_by_line[order.production_line_id].append(order)
+
+    def stamp(minutes: float) -> str:
+        return (origin + timedelta(minutes=round(minutes))).isoformat(timespec="minutes")
+
+    result = {
+        "dry_run": dry_run, "start": stamp(0), "end": stamp(horizon_days * 24 * 60),
+        "lines": [], "unscheduled": [],
+    }
+    summary = {"scheduled": 0, "unscheduled": 0, "tardy": 0, "weighted_tardiness_hours": 0.0,
+               "initial_weighted_tardiness_hours": 0.0, "improvement_rounds": 0}
+    write_back = []
+
+    for line in lines:
+        orders = orders_by_line[line.id]
+        pending = [order for order in orders if order.status == ProductionOrderStatus.PENDING]
+        line_windows = windows[line.id]
+        reason = None
+        if not line.capacity_per_hour or line.capacity_per_hour <= 0:
+            reason = "line has no capacity_per_hour"
+        elif not line_windows:
+            reason = "line has no active shifts in the horizon"
+        if reason:
+            result["unscheduled"].extend(
+                {"order_id": order.id, "order_number": order.order_number, "line_id": line.id, "reason": reason}
+                for order in pending
+            )
+            continue
+
+        calendar = _Calendar(
+            np.array([(window_start - origin).total_seconds() / 60 for window_start, _, _ in line_windows]),
+            np.array([(window_end - origin).total_seconds() / 60 for _, window_end, _ in line_windows]),
+        )
+        minutes_per_unit = 60.0 / line.capacity_per_hour
+        committed = sum(
+            max(order.target_quantity - (order.produced_quantity or 0), 0) * minutes_per_unit
+            for order in orders if order.status == ProductionOrderStatus.IN_PROGRESS
+        )
+        offset = min(committed, calendar.total)
+
+        durations = np.array([
+            max(order.target_quantity - (order.produced_quantity or 0), 0) * minutes_per_unit for order in pending
+        ])
+        dues = np.array([
+            (due - origin).total_seconds() / 60 if (due := _parse_timestamp(order.due_date)) else np.inf
+            for order in pending
+        ])
+        weights = np.array([_weight(order.priority) for order in pending])
+        sequence = np.lexsort((np.array([order.id for order in pending]), -weights, dues)) if pending \
+            else np.array([], dtype=int)
+
+        initial = _weighted_tardiness(calendar, offset, durations[sequence], dues[sequence], weights[sequence]) \
+            if len(sequence) else 0.0
+        rounds = 0
+        if improve and len(sequence) > 1:
+            sequence, rounds = _improve(calendar, offset, sequence, durations, dues, weights)
+
+        work_end = offset + np.cumsum(durations[sequence])
+        work_start = work_end - durations[sequence]
+        fits = work_end <= calendar.total + EPSILON
+        ends = calendar.finish(np.minimum(work_end, calendar.total))
+        tasks = []
+        line_tardiness = 0.0
+        for position, index in enumerate(sequence):
+            order = pending[index]
+            if not fits[position]:
+                result["unscheduled"].append({
+                    "order_id": order.id, "order_number": order.order_number, "line_id": line.id,
+                    "reason": "does not fit in the horizon",
+                })
+                continue
+            pieces = calendar.segments(float(work_start[position]), float(work_end[position]))
+            tardiness = max(float(ends[position] - dues[index]), 0.0) / 60
+            line_tardiness += float(weights[index]) * tardiness
+            shift_id = line_windows[pieces[0][0]][2].id
+            tasks.append({
+                "order_id": order.id,
+                "order_number": order.order_number,
+                "product_name": order.product_name,
+                "priority": order.priority,
+                "quantity": round(float(order.target_quantity - (order.produced_quantity or 0)), 4),
+                "due_date": order.due_date,
+                "start": stamp(pieces[0][1]),
+                "end": stamp(pieces[-1][2]),
+                "shift_id": shift_id,
+                "tardiness_hours": round(tardiness, 2),
+                "segments": [
+                    {"start": stamp(piece_start), "end": stamp(piece_end), "shift_id": line_windows[bucket][2].id}
+                    for bucket, piece_start, piece_end in pieces
+                ],
+            })
+            write_back.append({
+                "_id": order.id, "_start": stamp(pieces[0][1]), "_end": stamp(pieces[-1][2]), "_shift_id": shift_id
+            })
+
+        planned = float(np.sum(durations[sequence][fits])) if len(sequence) else 0.0
+        result["lines"].append({
+            "line_id": line.id,
+            "line_code": line.line_code,
+            "name": line.name,
+            "capacity_per_hour": line.capacity_per_hour,
+            "available_hours": round(calendar.total / 60, 2),
+            "committed_hours": round(offset / 60, 2),
+            "planned_hours": round(planned / 60, 2),
+            "utilization": round((offset + planned) / calendar.total * 100, 2),
+            "tardy_orders": sum(1 for task in tasks if task["tardiness_hours"] > 0),
+            "weighted_tardiness_hours": round(line_tardiness, 2),
+            "windows": [
+                {"start": window_start.isoformat(timespec="minutes"), "end": window_end.isoformat(timespec="minutes"),
+                 "shift_id": shift.id}
+                for window_start, window_end, shift in line_windows
+            ],
+            "tasks": tasks,
+        })
+        summary["scheduled"] += len(tasks)
+        summary["tardy"] += result["lines"][-1]["tardy_orders"]
+        summary["weighted_tardiness_hours"] += line_tardiness
+        summary["initial_weighted_tardiness_hours"] += initial / 60
+        summary["improvement_rounds"] = max(summary["improvement_rounds"], rounds)
+
+    summary["unscheduled"] = len(result["unscheduled"])
+    summary["weighted_tardiness_hours"] = round(summary["weighted_tardiness_hours"], 2)
+    summary["initial_weighted_tardiness_hours"] = round(summary["initial_weighted_tardiness_hours"], 2)
+    result["summary"] = summary
+
+    if not dry_run and write_back:
+        # Orders started or cancelled meanwhile keep what they have
+        table = ProductionOrder.__table__
+        db.execute(
+            update(table).where(and_(
+                table.c.id == bindparam("_id"), table.c.status == ProductionOrderStatus.PENDING
+            )).values(
+                scheduled_start=bindparam("_start"),
+                scheduled_end=bindparam("_end"),
+                shift_id=bindparam("_shift_id"),
+                updated_at=datetime.utcnow()
+            ),
+            write_back
+        )
+        db.commit()
+    return result
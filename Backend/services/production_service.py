@@ -5,15 +5,20 @@ from sqlalchemy import or_, func
 from fastapi import HTTPException, status
 from models.production import (
     ProductionLine, ProductionLineEquipment, Shift, ProductionOrder, PackagingOrder,
-    ProductionLineStatus, ProductionOrderStatus
+    ProductionLineStatus, ProductionOrderStatus, BillOfMaterials
 )
+from models.inventory import InventoryItem, InventoryLot, TransactionType, GenealogyEdgeType
 from schemas.production import (
     ProductionLineCreate, ProductionLineUpdate,
     ProductionLineEquipmentCreate, ProductionLineEquipmentUpdate,
     ShiftCreate, ShiftUpdate,
-    ProductionOrderCreate, ProductionOrderUpdate,
+    ProductionOrderCreate, ProductionOrderUpdate, ProductionOutputCreate,
     PackagingOrderCreate, PackagingOrderUpdate
 )
+from services.report_rollup_service import mark_rollup_day_dirty
+from services.production_oee_service import mark_oee_dirty
+from services.inventory_valuation_service import post_stock_movement
+from services import batch_genealogy_service
 
 
 # Production Line Services
@@ -313,11 +318,87 @@ def delete_production_order(db: Session, order_id: int) -> bool:
     if not db_order:
         return False
     
+    mark_rollup_day_dirty(db, "production", db_order.created_at)
+    mark_oee_dirty(db, db_order.actual_start, db_order.actual_end)
     db.delete(db_order)
     db.commit()
     return True
 
 
+def record_production_output(
+    db: Session,
+    order_id: int,
+    output: ProductionOutputCreate,
+    performed_by: int
+) -> Optional[InventoryLot]:
+    """
+    Receive finished goods from a production order into stock as a lot.
+
+    The lot records the order that made it and an OUTPUT genealogy edge links
+    the two, so traces can follow the batch to the lots it consumed and on to
+    where it was shipped. The produced quantity on the order is not changed.
+    """
+    db_order = get_production_order(db, order_id)
+    if not db_order:
+        return None
+    if db_order.status not in [
+        ProductionOrderStatus.IN_PROGRESS, ProductionOrderStatus.PAUSED, ProductionOrderStatus.COMPLETED
+    ]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Output can only be posted for started production orders"
+        )
+
+    item_id = output.item_id
+    if item_id is None and db_order.product_code:
+        item_id = db.query(BillOfMaterials.item_id).filter(
+            BillOfMaterials.product_code == db_order.product_code
+        ).scalar()
+    if item_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No inventory item for this product; pass item_id or link the BOM to an item"
+        )
+    item = db.query(InventoryItem).filter(InventoryItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+    existing = db.query(InventoryLot.production_order_id).filter(
+        InventoryLot.item_id == item.id,
+        InventoryLot.lot_number == output.lot_number
+    ).first()
+    if existing and existing.production_order_id not in (None, db_order.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Lot {output.lot_number} was produced by another production order"
+        )
+
+    transaction = post_stock_movement(
+        db,
+        item,
+        TransactionType.RECEIPT,
+        output.quantity,
+        performed_by=performed_by,
+        reference=db_order.order_number,
+        notes=output.notes or f"Output of production order {db_order.order_number}",
+        unit_cost=output.unit_cost,
+        location_id=output.location_id,
+        lot_number=output.lot_number,
+        expiry_date=output.expiry_date
+    )
+    lot = db.query(InventoryLot).filter(
+        InventoryLot.item_id == item.id,
+        InventoryLot.lot_number == output.lot_number
+    ).first()
+    lot.production_order_id = db_order.id
+    batch_genealogy_service.record_lot_edges(
+        db, GenealogyEdgeType.OUTPUT, [transaction], production_order_id=db_order.id
+    )
+    db.commit()
+    db.refresh(lot)
+    return lot
+
+
 # Packaging Order Services
 def generate_packaging_order_number(db: Session) -> str:
     """Generate unique packaging order number."""
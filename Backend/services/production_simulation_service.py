@@ -0,0 +1,436 @@
+import heapq
+import math
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from core.config import settings
+from models.equipment import Equipment, EquipmentStatus
+from models.production import ProductionLine, ProductionLineEquipment
+from services.reliability_service import load_failure_history
+
+MINUTES_PER_HOUR = 60.0
+MIN_EMPIRICAL_SAMPLES = 5  # Fewer observed failures fall back to an exponential fit
+
+# Machine states; time in each is accumulated per station
+BUSY, BLOCKED, STARVED, DOWN = range(4)
+STATE_NAMES = ("busy", "blocked", "starved", "down")
+
+# Event kinds, ordered so a finish at the same instant is handled before a failure
+FINISH, FAIL, REPAIR = range(3)
+
+# Shared by all requests; started on first use and shut down with the app
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+# ==================== FAILURE MODELS ====================
+
+def _failure_models(db: Session, equipment_ids: List[int], history_days: Optional[int]) -> dict:
+    """
+    Time-to-failure and repair-time samples per equipment from completed
+    corrective and emergency work orders, in minutes. Equipment with enough
+    history is resampled empirically, otherwise fitted as exponential on
+    MTBF / MTTR; equipment that never failed gets no failures.
+    """
+    since = datetime.utcnow() - timedelta(days=history_days) if history_days else None
+    history = load_failure_history(db, since=since, equipment_ids=equipment_ids)
+    hours = history.failed_at.astype(np.int64) / 3.6e9
+    models = {}
+    for index, equipment_id in enumerate(history.equipment_ids):
+        rows = np.flatnonzero(history.positions == index)
+        repairs = history.repair_hours[rows]
+        known = repairs[~np.isnan(repairs)] * MINUTES_PER_HOUR
+        uptimes = np.maximum(np.diff(hours[rows]) - np.nan_to_num(repairs[:-1]), 0.0) * MINUTES_PER_HOUR
+        uptimes = uptimes[uptimes > 0]
+        models[int(equipment_id)] = {
+            "ttf": _distribution(uptimes),
+            "repair": _distribution(known),
+        }
+    return models
+
+
+def _distribution(samples: np.ndarray):
+    if len(samples) >= MIN_EMPIRICAL_SAMPLES:
+        return ("empirical", [float(value) for value in samples])
+    if len(samples):
+        return ("exponential", float(np.mean(samples)))
+    return None
+
+
+def _draw(rng: random.Random, distribution) -> float:
+    kind, parameter = distribution
+    if kind == "empirical":
+        return rng.choice(parameter)
+    return rng.expovariate(1.0 / parameter) if parameter > 0 else 0.0
+
+
+# ==================== ENGINE ====================
+
+def _lognormal(mean: float, cv: float):
+    """(mu, sigma) of a lognormal with the given mean and coefficient of variation."""
+    if cv <= 0:
+        return None
+    sigma = math.sqrt(math.log(1 + cv * cv))
+    return math.log(mean) - sigma * sigma / 2, sigma
+
+
+def simulate_line(config: dict, seed: int) -> dict:
+    """
+    One replication of a serial line with finite buffers.
+
+    Station 0 is never starved and finished parts leave the last station
+    freely. A machine that finishes while the buffer after it is full holds
+    the part (blocking after service). Failures run on calendar time; a
+    machine failing mid-cycle resumes the cycle after repair. Statistics are
+    collected after the warm-up only.
+    """
+    rng = random.Random(seed)
+    stations = config["stations"]
+    horizon = config["minutes"]
+    warmup = config["warmup_minutes"]
+    count = len(stations)
+
+    cycle = [_lognormal(station["cycle"], config["cv"]) for station in stations]
+    buffers = [0] * count  # Parts waiting in front of each station (unused for station 0)
+    capacity = [station["buffer"] for station in stations]
+    state = [[STARVED] * station["machines"] for station in stations]
+    since = [[0.0] * station["machines"] for station in stations]
+    held_state = [[STARVED] * station["machines"] for station in stations]  # State to resume after repair
+    remaining = [[0.0] * station["machines"] for station in stations]
+    finish_at = [[0.0] * station["machines"] for station in stations]
+    version = [[0] * station["machines"] for station in stations]
+    totals = [[0.0] * 4 for _ in stations]
+    completed = 0
+    events = []
+    sequence = 0
+
+    def push(time: float, kind: int, station: int, machine: int, stamp: int = 0) -> None:
+        nonlocal sequence
+        sequence += 1
+        heapq.heappush(events, (time, kind, sequence, station, machine, stamp))
+
+    def set_state(station: int, machine: int, new_state: int, now: float) -> None:
+        start = since[station][machine]
+        if now > warmup:
+            totals[station][state[station][machine]] += now - max(start, warmup)
+        state[station][machine] = new_state
+        since[station][machine] = now
+
+    def process_time(station: int) -> float:
+        shape = cycle[station]
+        if shape is None:
+            return stations[station]["cycle"]
+        return rng.lognormvariate(*shape)
+
+    def start_work(station: int, now: float) -> None:
+        """Start every idle machine at the station that has a part to take."""
+        for machine, machine_state in enumerate(state[station]):
+            if machine_state != STARVED:
+                continue
+            if station > 0:
+                if buffers[station] == 0:
+                    # A blocked upstream machine hands its part straight to this one
+                    release_blocked(station - 1, now)
+                    return
+                buffers[station] -= 1
+            set_state(station, machine, BUSY, now)
+            version[station][machine] += 1
+            finish_at[station][machine] = now + process_time(station)
+            push(finish_at[station][machine], FINISH, station, machine, version[station][machine])
+            if station > 0:
+                release_blocked(station - 1, now)
+
+    def has_room(station: int) -> bool:
+        """Space in the station's buffer, or an idle machine to hand the part to directly."""
+        return buffers[station] < capacity[station] or STARVED in state[station]
+
+    def release_blocked(station: int, now: float) -> None:
+        """Move parts held by blocked machines into the freed buffer space downstream."""
+        for machine, machine_state in enumerate(state[station]):
+            if machine_state != BLOCKED or not has_room(station + 1):
+                continue
+            buffers[station + 1] += 1
+            set_state(station, machine, STARVED, now)
+            start_work(station + 1, now)
+            start_work(station, now)
+
+    def finish(station: int, machine: int, now: float) -> None:
+        nonlocal completed
+        if station == count - 1:
+            if now > warmup:
+                completed += 1
+            set_state(station, machine, STARVED, now)
+        elif has_room(station + 1):
+            buffers[station + 1] += 1
+            set_state(station, machine, STARVED, now)
+            start_work(station + 1, now)
+        else:
+            set_state(station, machine, BLOCKED, now)
+            return
+        start_work(station, now)
+
+    for index, station in enumerate(stations):
+        for machine in range(station["machines"]):
+            if station["ttf"] is not None:
+                if station["down_at_start"] and machine == 0 and station["repair"] is not None:
+                    set_state(index, machine, DOWN, 0.0)
+                    push(_draw(rng, station["repair"]), REPAIR, index, machine)
+                else:
+                    push(_draw(rng, station["ttf"]), FAIL, index, machine)
+    start_work(0, 0.0)
+
+    while events:
+        now, kind, _, station, machine, stamp = heapq.heappop(events)
+        if now > horizon:
+            break
+        if kind == FINISH:
+            if stamp == version[station][machine] and state[station][machine] == BUSY:
+                finish(station, machine, now)
+        elif kind == FAIL:
+            current = state[station][machine]
+            if current == BUSY:
+                # Cancel the pending finish and keep the rest of the cycle for after the repair
+                remaining[station][machine] = max(finish_at[station][machine] - now, 0.0)
+                version[station][machine] += 1
+            held_state[station][machine] = current
+            set_state(station, machine, DOWN, now)
+            repair = stations[station]["repair"]
+            push(now + (_draw(rng, repair) if repair is not None else 0.0), REPAIR, station, machine)
+        else:
+            resumed = held_state[station][machine]
+            set_state(station, machine, resumed, now)
+            if resumed == BUSY:
+                version[station][machine] += 1
+                finish_at[station][machine] = now + remaining[station][machine]
+                push(finish_at[station][machine], FINISH, station, machine, version[station][machine])
+            elif resumed == BLOCKED:
+                release_blocked(station, now)
+            else:
+                start_work(station, now)
+            push(now + _draw(rng, stations[station]["ttf"]), FAIL, station, machine)
+
+    for station_index, station in enumerate(stations):
+        for machine in range(station["machines"]):
+            set_state(station_index, machine, state[station_index][machine], horizon)
+
+    measured = max(horizon - warmup, 1e-9)
+    return {
+        "throughput_per_hour": completed / measured * MINUTES_PER_HOUR,
+        "shares": [
+            [totals[index][state_index] / (measured * station["machines"]) for state_index in range(4)]
+            for index, station in enumerate(stations)
+        ],
+    }
+
+
+def _replicate(arguments) -> dict:
+    config, seed = arguments
+    return simulate_line(config, seed)
+
+
+def _simulation_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers())
+        return _pool
+
+
+def _pool_workers() -> int:
+    return min(settings.PRODUCTION_SIMULATION_WORKERS, os.cpu_count() or 1)
+
+
+def shutdown_simulation_pool() -> None:
+    """Stop the shared replication pool; it restarts on the next parallel run."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_replications(config: dict, replications: int, seed: Optional[int] = None) -> List[dict]:
+    """Independent replications, spread over the shared process pool when there are enough of them."""
+    seeds = np.random.SeedSequence(seed).generate_state(replications).tolist()
+    work = [(config, int(replication_seed)) for replication_seed in seeds]
+    workers = min(_pool_workers(), replications)
+    if workers <= 1 or replications < settings.PRODUCTION_SIMULATION_PARALLEL_MIN_REPLICATIONS:
+        return [_replicate(arguments) for arguments in work]
+    return list(_simulation_pool().map(_replicate, work, chunksize=max(1, replications // (workers * 4))))
+
+
+def estimated_events(config: dict, replications: int) -> float:
+    """Cycle completions the replications will simulate, which dominate the event count."""
+    return replications * sum(
+        station["machines"] * config["minutes"] / station["cycle"] for station in config["stations"]
+    )
+
+
+def _summarize(config: dict, runs: List[dict]) -> dict:
+    throughput = np.array([run["throughput_per_hour"] for run in runs])
+    shares = np.array([run["shares"] for run in runs])  # replication x station x state
+    active = shares[:, :, BUSY] + shares[:, :, DOWN]
+    bottlenecks = np.bincount(np.argmax(active, axis=1), minlength=len(config["stations"]))
+    mean_shares = shares.mean(axis=0)
+    bottleneck = int(np.argmax(active.mean(axis=0)))
+    half_width = 1.96 * throughput.std(ddof=1) / math.sqrt(len(runs)) if len(runs) > 1 else 0.0
+
+    return {
+        "replications": len(runs),
+        "throughput_per_hour": round(float(throughput.mean()), 3),
+        "throughput_ci95": [round(float(throughput.mean() - half_width), 3), round(float(throughput.mean() + half_width), 3)],
+        "bottleneck_station_id": config["stations"][bottleneck]["station_id"],
+        "stations": [
+            {
+                "station_id": station["station_id"],
+                "station_name": station["name"],
+                "equipment_id": station["equipment_id"],
+                "machines": station["machines"],
+                "cycle_time_minutes": station["cycle"],
+                "buffer_capacity": station["buffer"] if index > 0 else None,
+                **{
+                    name: round(float(mean_shares[index, state_index]) * 100, 2)
+                    for state_index, name in enumerate(STATE_NAMES)
+                },
+                "bottleneck_share": round(float(bottlenecks[index]) / len(runs) * 100, 2),
+            }
+            for index, station in enumerate(config["stations"])
+        ],
+    }
+
+
+# ==================== LINE SIMULATION ====================
+
+def simulate_production_line(
+    db: Session,
+    line_id: int,
+    hours: float = 168.0,
+    warmup_hours: float = 8.0,
+    replications: int = 20,
+    buffer_capacity: int = 10,
+    cycle_time_cv: float = 0.1,
+    failures: bool = True,
+    history_days: Optional[int] = 365,
+    seed: Optional[int] = None,
+    stations: Optional[List[dict]] = None,
+    compare_baseline: bool = True
+) -> dict:
+    """
+    Simulate a production line's station sequence to find its throughput and bottleneck.
+
+    Stations run in ``sequence_order`` with their ``cycle_time_minutes`` (the
+    line's capacity_per_hour when unset), lognormal cycle-time variability and
+    failures drawn from the equipment's work-order history. ``stations``
+    overrides per station answer what-if questions: extra parallel machines,
+    another cycle time or buffer, or assumed MTBF / MTTR. With overrides and
+    ``compare_baseline``, the unchanged line is run on the same random
+    streams so the difference is the change's effect.
+    """
+    line = db.query(ProductionLine).filter(ProductionLine.id == line_id).first()
+    if not line:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Production line not found")
+    rows = db.query(ProductionLineEquipment, Equipment.status).join(
+        Equipment, Equipment.id == ProductionLineEquipment.equipment_id
+    ).filter(ProductionLineEquipment.production_line_id == line_id).order_by(
+        ProductionLineEquipment.sequence_order
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Production line has no equipment stations")
+    if warmup_hours >= hours:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="warmup_hours must be shorter than hours")
+
+    overrides = {override["station_id"]: override for override in stations or []}
+    unknown = set(overrides) - {station.id for station, _ in rows}
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stations not on this line: {sorted(unknown)}"
+        )
+
+    models = _failure_models(db, [station.equipment_id for station, _ in rows], history_days) if failures else {}
+    baseline_stations = []
+    for station, equipment_status in rows:
+        cycle = station.cycle_time_minutes
+        if not cycle and line.capacity_per_hour:
+            cycle = MINUTES_PER_HOUR / line.capacity_per_hour
+        model = models.get(station.equipment_id, {})
+        baseline_stations.append({
+            "station_id": station.id,
+            "name": station.station_name,
+            "equipment_id": station.equipment_id,
+            "machines": 1,
+            "cycle": cycle,
+            "buffer": buffer_capacity,
+            "ttf": model.get("ttf"),
+            "repair": model.get("repair"),
+            "down_at_start": failures and equipment_status == EquipmentStatus.BREAKDOWN,
+        })
+    missing = [station["station_id"] for station in baseline_stations if not station["cycle"]]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stations without cycle_time_minutes (and no line capacity_per_hour): {missing}"
+        )
+
+    scenario_stations = []
+    for station in baseline_stations:
+        override = overrides.get(station["station_id"], {})
+        changed = dict(station)
+        if override.get("machines"):
+            changed["machines"] = override["machines"]
+        if override.get("cycle_time_minutes"):
+            changed["cycle"] = override["cycle_time_minutes"]
+        if override.get("buffer_capacity") is not None:
+            changed["buffer"] = override["buffer_capacity"]
+        if override.get("mtbf_hours"):
+            changed["ttf"] = ("exponential", override["mtbf_hours"] * MINUTES_PER_HOUR)
+        if override.get("mttr_hours"):
+            changed["repair"] = ("exponential", override["mttr_hours"] * MINUTES_PER_HOUR)
+        if changed["ttf"] is not None and changed["repair"] is None:
+            changed["ttf"] = None  # A failure with no repair model would never end
+        scenario_stations.append(changed)
+    for station in baseline_stations:
+        if station["repair"] is None:
+            station["ttf"] = None
+
+    def configure(line_stations: List[dict]) -> dict:
+        return {
+            "stations": line_stations,
+            "minutes": hours * MINUTES_PER_HOUR,
+            "warmup_minutes": warmup_hours * MINUTES_PER_HOUR,
+            "cv": cycle_time_cv,
+        }
+
+    scenario = configure(scenario_stations)
+    events = estimated_events(scenario, replications)
+    if overrides and compare_baseline:
+        events += estimated_events(configure(baseline_stations), replications)
+    if events > settings.PRODUCTION_SIMULATION_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Simulation too large: about {events:,.0f} events, limit {settings.PRODUCTION_SIMULATION_MAX_EVENTS:,}; "
+                "reduce hours or replications"
+            )
+        )
+
+    result = {
+        "line_id": line.id,
+        "line_code": line.line_code,
+        "hours": hours,
+        "warmup_hours": warmup_hours,
+        **_summarize(scenario, run_replications(scenario, replications, seed)),
+    }
+    if overrides and compare_baseline:
+        baseline = configure(baseline_stations)
+        result["baseline"] = _summarize(baseline, run_replications(baseline, replications, seed))
+        result["throughput_change_per_hour"] = round(
+            result["throughput_per_hour"] - result["baseline"]["throughput_per_hour"], 3
+        )
+    return result
@@ -10,6 +10,7 @@ from schemas.quality import (
     QualityInspectionCreate, QualityInspectionUpdate,
     NonConformanceReportCreate, NonConformanceReportUpdate
 )
+from services.report_rollup_service import mark_rollup_day_dirty
 
 
 # ==================== QUALITY INSPECTION SERVICES ====================
@@ -125,6 +126,10 @@ def update_quality_inspection(
     if 'status' in update_data and update_data['status'] == InspectionStatus.COMPLETED:
         update_data['completed_at'] = datetime.utcnow()
     
+    # Moving an inspection to another day leaves the old day's rollup stale
+    if 'inspection_date' in update_data and update_data['inspection_date'] != db_inspection.inspection_date:
+        mark_rollup_day_dirty(db, "quality_inspections", db_inspection.inspection_date)
+    
     for field, value in update_data.items():
         setattr(db_inspection, field, value)
     
@@ -139,6 +144,7 @@ def delete_quality_inspection(db: Session, inspection_id: int) -> bool:
     if not db_inspection:
         return False
     
+    mark_rollup_day_dirty(db, "quality_inspections", db_inspection.inspection_date)
     db.delete(db_inspection)
     db.commit()
     return True
@@ -262,6 +268,7 @@ def delete_ncr(db: Session, ncr_id: int) -> bool:
     if not db_ncr:
         return False
     
+    mark_rollup_day_dirty(db, "ncrs", db_ncr.created_at)
     db.delete(db_ncr)
     db.commit()
     return True
@@ -0,0 +1,388 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select
+from models.equipment import Equipment, EquipmentReliability
+from models.work_order import WorkOrder, WorkOrderStatus, WorkOrderType
+
+FAILURE_TYPES = [WorkOrderType.CORRECTIVE, WorkOrderType.EMERGENCY]
+HOURS_PER_SECOND = 1.0 / 3600.0
+HOURS_PER_MICROSECOND = HOURS_PER_SECOND / 1e6
+ROWS_PER_INSERT = 1000
+
+FailureKey = Tuple[int, datetime, Optional[float]]
+
+
+@dataclass
+class FailureHistory:
+    """Completed failures ordered by equipment, then failure time."""
+    equipment_ids: np.ndarray   # Distinct equipment ids, ascending
+    positions: np.ndarray       # Row -> index into equipment_ids
+    failed_at: np.ndarray       # Row -> failure time (datetime64[us])
+    repair_hours: np.ndarray    # Row -> repair duration, NaN when unknown
+
+
+@dataclass
+class ReliabilityStats:
+    """Per-equipment sums aligned on ``equipment_ids``; MTBF and MTTR derive from these."""
+    equipment_ids: np.ndarray
+    failure_count: np.ndarray
+    repair_count: np.ndarray
+    total_repair_hours: np.ndarray
+    total_uptime_hours: np.ndarray
+    first_failure_at: np.ndarray
+    last_failure_at: np.ndarray
+    last_repair_hours: np.ndarray
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def repair_hours(work_order: WorkOrder) -> Optional[float]:
+    """Recorded hours, else the elapsed time between start and completion."""
+    if work_order.actual_hours is not None:
+        return float(work_order.actual_hours)
+    started = _parse_timestamp(work_order.started_at)
+    completed = _parse_timestamp(work_order.completed_at)
+    if started and completed and completed >= started:
+        return (completed - started).total_seconds() * HOURS_PER_SECOND
+    return None
+
+
+def failure_key(work_order: WorkOrder) -> Optional[FailureKey]:
+    """What a work order contributes to reliability, or None when it is not a completed failure."""
+    if (
+        work_order.equipment_id is None
+        or work_order.work_order_type not in FAILURE_TYPES
+        or work_order.status != WorkOrderStatus.COMPLETED
+    ):
+        return None
+    return work_order.equipment_id, work_order.created_at, repair_hours(work_order)
+
+
+# ==================== HISTORY ====================
+
+def load_failure_history(
+    db: Session,
+    since: Optional[datetime] = None,
+    equipment_ids: Optional[Iterable[int]] = None
+) -> FailureHistory:
+    """Load completed corrective and emergency work orders in one ordered scan."""
+    query = select(
+        WorkOrder.equipment_id, WorkOrder.created_at, WorkOrder.actual_hours,
+        WorkOrder.started_at, WorkOrder.completed_at
+    ).where(
+        WorkOrder.equipment_id.isnot(None),
+        WorkOrder.work_order_type.in_(FAILURE_TYPES),
+        WorkOrder.status == WorkOrderStatus.COMPLETED
+    ).order_by(WorkOrder.equipment_id, WorkOrder.created_at, WorkOrder.id)
+    if since is not None:
+        query = query.where(WorkOrder.created_at >= since)
+    if equipment_ids is not None:
+        query = query.where(WorkOrder.equipment_id.in_(list(equipment_ids)))
+
+    rows = db.execute(query).all()
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return FailureHistory(empty, empty, np.array([], dtype="datetime64[us]"), np.array([], dtype=np.float64))
+
+    repairs = np.full(len(rows), np.nan)
+    for index, row in enumerate(rows):
+        if row.actual_hours is not None:
+            repairs[index] = row.actual_hours
+            continue
+        started = _parse_timestamp(row.started_at)
+        completed = _parse_timestamp(row.completed_at)
+        if started and completed and completed >= started:
+            repairs[index] = (completed - started).total_seconds() * HOURS_PER_SECOND
+
+    raw_ids = np.fromiter((row.equipment_id for row in rows), dtype=np.int64, count=len(rows))
+    equipment, positions = np.unique(raw_ids, return_inverse=True)
+    return FailureHistory(
+        equipment_ids=equipment,
+        positions=positions,
+        failed_at=np.array([row.created_at for row in rows], dtype="datetime64[us]"),
+        repair_hours=repairs,
+    )
+
+
+def compute_reliability(history: FailureHistory) -> ReliabilityStats:
+    """
+    Fleet-wide failure sums in a handful of vector operations.
+
+    Uptime is the time from the end of one repair to the next failure on the
+    same equipment (never negative); failures without a repair duration count
+    towards MTBF but not MTTR.
+    """
+    count = len(history.equipment_ids)
+    positions = history.positions
+    hours = history.failed_at.astype(np.int64) * HOURS_PER_MICROSECOND
+    known = ~np.isnan(history.repair_hours)
+    repairs = np.where(known, history.repair_hours, 0.0)
+
+    same_equipment = positions[1:] == positions[:-1]
+    gaps = np.maximum(hours[1:] - hours[:-1] - repairs[:-1], 0.0)
+    uptime = np.bincount(positions[1:][same_equipment], weights=gaps[same_equipment], minlength=count)
+
+    failures = np.bincount(positions, minlength=count)
+    last_rows = np.cumsum(failures) - 1
+    first_rows = last_rows - failures + 1
+
+    return ReliabilityStats(
+        equipment_ids=history.equipment_ids,
+        failure_count=failures,
+        repair_count=np.bincount(positions, weights=known, minlength=count).astype(np.int64),
+        total_repair_hours=np.bincount(positions, weights=repairs, minlength=count),
+        total_uptime_hours=uptime,
+        first_failure_at=history.failed_at[first_rows],
+        last_failure_at=history.failed_at[last_rows],
+        last_repair_hours=history.repair_hours[last_rows],
+    )
+
+
+def monthly_failure_trend(history: FailureHistory, since: datetime, until: datetime) -> dict:
+    """
+    Failures per calendar month for the fleet, plus each equipment's trend.
+
+    The trend is the least-squares slope of its monthly failure counts: positive
+    means failures are becoming more frequent.
+    """
+    months = np.arange(
+        np.datetime64(since, "M"), np.datetime64(until, "M") + np.timedelta64(1, "M"), dtype="datetime64[M]"
+    )
+    month_index = (history.failed_at.astype("datetime64[M]") - months[0]).astype(np.int64)
+    in_range = (month_index >= 0) & (month_index < len(months))
+
+    counts = np.zeros((len(history.equipment_ids), len(months)))
+    np.add.at(counts, (history.positions[in_range], month_index[in_range]), 1)
+    repairs = np.bincount(
+        month_index[in_range],
+        weights=np.nan_to_num(history.repair_hours[in_range]),
+        minlength=len(months)
+    )
+
+    x = np.arange(len(months), dtype=np.float64) - (len(months) - 1) / 2
+    denominator = float(np.dot(x, x))
+    slopes = counts @ x / denominator if denominator else np.zeros(len(history.equipment_ids))
+
+    return {
+        "months": [str(month) for month in months],
+        "failures": counts.sum(axis=0),
+        "repair_hours": repairs,
+        "slopes": slopes,
+    }
+
+
+# ==================== CACHE ====================
+
+def _cache_rows(stats: ReliabilityStats, now: datetime) -> List[dict]:
+    return [
+        {
+            "equipment_id": equipment_id,
+            "failure_count": failures,
+            "repair_count": repairs,
+            "total_repair_hours": repair_total,
+            "total_uptime_hours": uptime,
+            "first_failure_at": first,
+            "last_failure_at": last,
+            "last_repair_hours": None if np.isnan(last_repair) else last_repair,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for equipment_id, failures, repairs, repair_total, uptime, first, last, last_repair in zip(
+            stats.equipment_ids.tolist(),
+            stats.failure_count.tolist(),
+            stats.repair_count.tolist(),
+            stats.total_repair_hours.tolist(),
+            stats.total_uptime_hours.tolist(),
+            stats.first_failure_at.tolist(),
+            stats.last_failure_at.tolist(),
+            stats.last_repair_hours.tolist(),
+        )
+    ]
+
+
+def refresh_reliability_cache(db: Session, equipment_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute cached statistics from history, for all equipment or only those given.
+
+    The caller commits when equipment ids are passed; a full rebuild commits itself.
+    """
+    equipment_ids = None if equipment_ids is None else sorted(set(equipment_ids))
+    table = EquipmentReliability.__table__
+    stats = compute_reliability(load_failure_history(db, equipment_ids=equipment_ids))
+
+    clear = delete(table)
+    if equipment_ids is not None:
+        clear = clear.where(table.c.equipment_id.in_(equipment_ids))
+    db.execute(clear)
+
+    rows = _cache_rows(stats, datetime.utcnow())
+    for offset in range(0, len(rows), ROWS_PER_INSERT):
+        db.execute(insert(table), rows[offset:offset + ROWS_PER_INSERT])
+    return len(rows)
+
+
+def rebuild_reliability_cache(db: Session) -> dict:
+    """Recompute every equipment's statistics (nightly safety net for out-of-band edits)."""
+    written = refresh_reliability_cache(db)
+    db.commit()
+    return {"equipment": written}
+
+
+def _append_failure(db: Session, key: FailureKey) -> bool:
+    """Fold one failure into the cache; False when it is not the latest for its equipment."""
+    equipment_id, failed_at, hours = key
+    cached = db.query(EquipmentReliability).filter(
+        EquipmentReliability.equipment_id == equipment_id
+    ).with_for_update().first()
+
+    if cached is None:
+        db.add(EquipmentReliability(
+            equipment_id=equipment_id,
+            failure_count=1,
+            repair_count=0 if hours is None else 1,
+            total_repair_hours=hours or 0.0,
+            total_uptime_hours=0.0,
+            first_failure_at=failed_at,
+            last_failure_at=failed_at,
+            last_repair_hours=hours
+        ))
+        return True
+    if cached.last_failure_at is not None and failed_at < cached.last_failure_at:
+        return False
+
+    if cached.last_failure_at is not None:
+        gap = (failed_at - cached.last_failure_at).total_seconds() * HOURS_PER_SECOND
+        cached.total_uptime_hours += max(gap - (cached.last_repair_hours or 0.0), 0.0)
+    else:
+        cached.first_failure_at = failed_at
+    cached.failure_count += 1
+    if hours is not None:
+        cached.repair_count += 1
+        cached.total_repair_hours += hours
+    cached.last_failure_at = failed_at
+    cached.last_repair_hours = hours
+    return True
+
+
+def record_work_order_change(db: Session, work_order: WorkOrder, previous: Optional[FailureKey]) -> None:
+    """
+    Keep the reliability cache in step with a work order update.
+
+    ``previous`` is ``failure_key`` taken before the change. A newly completed
+    failure that is the latest for its equipment is folded in directly; anything
+    else (reopened, re-timed or back-dated failures) recomputes the affected
+    equipment from its history. The caller commits.
+    """
+    current = failure_key(work_order)
+    if current == previous:
+        return
+    if previous is None and _append_failure(db, current):
+        return
+
+    db.flush()
+    refresh_reliability_cache(db, {key[0] for key in (previous, current) if key is not None})
+
+
+# ==================== REPORT ====================
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator, 2) if denominator else None
+
+
+def _summary(failures: int, intervals: int, repairs: int, repair_hours_total: float, uptime: float) -> dict:
+    mtbf = _ratio(uptime, intervals)
+    mttr = _ratio(repair_hours_total, repairs)
+    availability = None
+    if mtbf is not None and mttr is not None and mtbf + mttr > 0:
+        availability = round(mtbf / (mtbf + mttr) * 100, 2)
+    return {
+        "failure_count": failures,
+        "mtbf_hours": mtbf,
+        "mttr_hours": mttr,
+        "failure_rate_per_1000_hours": round(1000 / mtbf, 4) if mtbf else None,
+        "availability": availability,
+    }
+
+
+def get_reliability_report(
+    db: Session,
+    days: Optional[int] = None,
+    equipment_category: Optional[str] = None,
+    trend_days: int = 365
+) -> dict:
+    """
+    MTBF, MTTR and failure-rate trend per equipment and for the fleet.
+
+    Without ``days`` the per-equipment figures come from the cache (all
+    history); with ``days`` they are computed from failures in that window. The
+    monthly trend always covers the trailing window.
+    """
+    now = datetime.utcnow()
+    since = now - timedelta(days=days or trend_days)
+
+    equipment_query = db.query(Equipment.id, Equipment.equipment_id, Equipment.name, Equipment.category)
+    if equipment_category:
+        equipment_query = equipment_query.filter(Equipment.category == equipment_category)
+    equipment = {row.id: row for row in equipment_query.all()}
+
+    history = load_failure_history(db, since=since, equipment_ids=equipment if equipment_category else None)
+    trend = monthly_failure_trend(history, since, now)
+    slopes = dict(zip(history.equipment_ids.tolist(), trend["slopes"].tolist()))
+
+    if days is None:
+        cached = db.query(EquipmentReliability)
+        if equipment_category:
+            cached = cached.filter(EquipmentReliability.equipment_id.in_(list(equipment)))
+        sums = [
+            (row.equipment_id, row.failure_count, row.repair_count, row.total_repair_hours, row.total_uptime_hours)
+            for row in cached.all()
+        ]
+    else:
+        stats = compute_reliability(history)
+        sums = list(zip(
+            stats.equipment_ids.tolist(),
+            stats.failure_count.tolist(),
+            stats.repair_count.tolist(),
+            stats.total_repair_hours.tolist(),
+            stats.total_uptime_hours.tolist(),
+        ))
+
+    results = []
+    fleet = [0, 0, 0, 0.0, 0.0]
+    for equipment_id, failures, repairs, repair_total, uptime in sums:
+        info = equipment.get(equipment_id)
+        if info is None:
+            continue
+        # n failures on one asset bound n - 1 uptime intervals
+        totals = (failures, max(failures - 1, 0), repairs, repair_total, uptime)
+        fleet = [a + b for a, b in zip(fleet, totals)]
+        results.append({
+            "equipment_id": equipment_id,
+            "equipment_code": info.equipment_id,
+            "equipment_name": info.name,
+            "category": info.category,
+            **_summary(*totals),
+            "failure_trend_per_month": round(slopes.get(equipment_id, 0.0), 4),
+        })
+    results.sort(key=lambda row: (row["mtbf_hours"] is None, row["mtbf_hours"] or 0))
+
+    return {
+        "period_days": days,
+        "fleet": _summary(*fleet),
+        "equipment": results,
+        "trend": [
+            {"month": month, "failures": int(count), "repair_hours": round(float(hours), 2)}
+            for month, count, hours in zip(trend["months"], trend["failures"], trend["repair_hours"])
+        ],
+    }
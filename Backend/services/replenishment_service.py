@@ -0,0 +1,209 @@
+from datetime import datetime
+from itertools import groupby
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, func, insert, select
+from models.inventory import InventoryItem, ReplenishmentProposal, ReplenishmentProposalLine, ReplenishmentStatus
+
+QUANTITY_EPSILON = 1e-9
+LINES_PER_INSERT = 1000
+
+
+# ==================== PLANNING ====================
+
+def _on_order_quantity():
+    """Quantity on approved (ordered, not yet closed) replenishment proposals, per item."""
+    return select(
+        ReplenishmentProposalLine.item_id,
+        func.sum(ReplenishmentProposalLine.proposed_quantity).label("quantity")
+    ).join(
+        ReplenishmentProposal, ReplenishmentProposal.id == ReplenishmentProposalLine.proposal_id
+    ).where(
+        ReplenishmentProposal.status == ReplenishmentStatus.APPROVED
+    ).group_by(ReplenishmentProposalLine.item_id).subquery()
+
+
+def _next_proposal_sequence(db: Session, prefix: str) -> int:
+    """Next sequence number for ``prefix``, one past the highest existing proposal number."""
+    last = db.query(func.max(ReplenishmentProposal.proposal_number)).filter(
+        ReplenishmentProposal.proposal_number.like(f"{prefix}-%")
+    ).scalar()
+    return int(last.rsplit("-", 1)[1]) + 1 if last else 1
+
+
+def generate_replenishment_proposals(db: Session) -> dict:
+    """
+    Plan replenishment for every item in one set-based pass.
+
+    Available stock is on-hand minus stock reserved for confirmed sales orders
+    and approved requisitions, plus quantity already on order; items at or below their reorder point are topped up to
+    ``max_quantity`` (or back to the reorder point when no maximum is set). Lines
+    are grouped into one draft document per supplier. Earlier drafts are replaced,
+    so the planner can run nightly without piling up duplicates.
+    """
+    generated_at = datetime.utcnow()
+    proposals_table = ReplenishmentProposal.__table__
+    lines_table = ReplenishmentProposalLine.__table__
+
+    draft_ids = select(proposals_table.c.id).where(proposals_table.c.status == ReplenishmentStatus.DRAFT)
+    db.execute(delete(lines_table).where(lines_table.c.proposal_id.in_(draft_ids)))
+    db.execute(delete(proposals_table).where(proposals_table.c.status == ReplenishmentStatus.DRAFT))
+
+    on_order = _on_order_quantity()
+    ordered = func.coalesce(on_order.c.quantity, 0)
+
+    candidates = db.execute(
+        select(
+            InventoryItem.id,
+            InventoryItem.supplier,
+            InventoryItem.quantity,
+            InventoryItem.reorder_point,
+            InventoryItem.max_quantity,
+            InventoryItem.unit_cost,
+            InventoryItem.reserved_quantity,
+            ordered.label("on_order")
+        )
+        .outerjoin(on_order, on_order.c.item_id == InventoryItem.id)
+        .where(
+            InventoryItem.reorder_point.isnot(None),
+            InventoryItem.quantity - InventoryItem.reserved_quantity + ordered <= InventoryItem.reorder_point
+        )
+        .order_by(InventoryItem.supplier, InventoryItem.id)
+    ).all()
+
+    prefix = f"RP-{generated_at.strftime('%Y%m%d')}"
+    sequence = _next_proposal_sequence(db, prefix)
+    proposal_count = 0
+    line_count = 0
+    total_value = 0.0
+    for supplier, rows in groupby(candidates, key=lambda row: row.supplier):
+        lines = []
+        for row in rows:
+            available = row.quantity - row.reserved_quantity + row.on_order
+            target = max(row.max_quantity, row.reorder_point) if row.max_quantity else row.reorder_point
+            proposed = target - available
+            if proposed <= QUANTITY_EPSILON:
+                continue
+            lines.append({
+                "item_id": row.id,
+                "on_hand": row.quantity,
+                "open_demand": row.reserved_quantity,
+                "on_order": row.on_order,
+                "reorder_point": row.reorder_point,
+                "target_quantity": target,
+                "proposed_quantity": round(proposed, 6),
+                "unit_cost": row.unit_cost,
+                "created_at": generated_at,
+                "updated_at": generated_at,
+            })
+        if not lines:
+            continue
+
+        value = sum(line["proposed_quantity"] * (line["unit_cost"] or 0.0) for line in lines)
+        proposal = ReplenishmentProposal(
+            proposal_number=f"{prefix}-{sequence + proposal_count:04d}",
+            supplier=supplier,
+            status=ReplenishmentStatus.DRAFT,
+            generated_at=generated_at,
+            line_count=len(lines),
+            total_value=round(value, 2)
+        )
+        db.add(proposal)
+        db.flush()
+
+        for line in lines:
+            line["proposal_id"] = proposal.id
+        for offset in range(0, len(lines), LINES_PER_INSERT):
+            db.execute(insert(lines_table), lines[offset:offset + LINES_PER_INSERT])
+
+        proposal_count += 1
+        line_count += len(lines)
+        total_value += value
+
+    db.commit()
+    return {
+        "generated_at": generated_at,
+        "proposals": proposal_count,
+        "lines": line_count,
+        "total_value": round(total_value, 2),
+    }
+
+
+# ==================== PROPOSALS ====================
+
+def get_replenishment_proposals(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status_filter: Optional[ReplenishmentStatus] = None,
+    supplier: Optional[str] = None
+) -> List[ReplenishmentProposal]:
+    """Get replenishment proposals (headers only) with optional filters."""
+    query = db.query(ReplenishmentProposal)
+    if status_filter:
+        query = query.filter(ReplenishmentProposal.status == status_filter)
+    if supplier:
+        query = query.filter(ReplenishmentProposal.supplier.ilike(f"%{supplier}%"))
+    return query.order_by(ReplenishmentProposal.id.desc()).offset(skip).limit(limit).all()
+
+
+def get_replenishment_proposal_count(
+    db: Session,
+    status_filter: Optional[ReplenishmentStatus] = None,
+    supplier: Optional[str] = None
+) -> int:
+    query = db.query(func.count(ReplenishmentProposal.id))
+    if status_filter:
+        query = query.filter(ReplenishmentProposal.status == status_filter)
+    if supplier:
+        query = query.filter(ReplenishmentProposal.supplier.ilike(f"%{supplier}%"))
+    return query.scalar()
+
+
+def get_replenishment_proposal(db: Session, proposal_id: int) -> Optional[ReplenishmentProposal]:
+    """Get a replenishment proposal with its lines and items."""
+    return db.query(ReplenishmentProposal).options(
+        joinedload(ReplenishmentProposal.lines).joinedload(ReplenishmentProposalLine.item)
+    ).filter(ReplenishmentProposal.id == proposal_id).first()
+
+
+def _transition(
+    db: Session,
+    proposal_id: int,
+    allowed: List[ReplenishmentStatus],
+    new_status: ReplenishmentStatus,
+    user_id: Optional[int] = None
+) -> Optional[ReplenishmentProposal]:
+    proposal = get_replenishment_proposal(db, proposal_id)
+    if not proposal:
+        return None
+    if proposal.status not in allowed:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot mark a {proposal.status.value} proposal as {new_status.value}"
+        )
+
+    proposal.status = new_status
+    if new_status == ReplenishmentStatus.APPROVED:
+        proposal.approved_by = user_id
+        proposal.approved_at = datetime.utcnow()
+    db.commit()
+    db.refresh(proposal)
+    return proposal
+
+
+def approve_replenishment_proposal(db: Session, proposal_id: int, user_id: int) -> Optional[ReplenishmentProposal]:
+    """Approve a draft; its quantities then count as on order in later planning runs."""
+    return _transition(db, proposal_id, [ReplenishmentStatus.DRAFT], ReplenishmentStatus.APPROVED, user_id)
+
+
+def close_replenishment_proposal(db: Session, proposal_id: int) -> Optional[ReplenishmentProposal]:
+    """Close an approved proposal once its stock has been received."""
+    return _transition(db, proposal_id, [ReplenishmentStatus.APPROVED], ReplenishmentStatus.CLOSED)
+
+
+def cancel_replenishment_proposal(db: Session, proposal_id: int) -> Optional[ReplenishmentProposal]:
+    return _transition(
+        db, proposal_id, [ReplenishmentStatus.DRAFT, ReplenishmentStatus.APPROVED], ReplenishmentStatus.CANCELLED
+    )
@@ -0,0 +1,217 @@
+import hashlib
+import inspect
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel as ParametersModel, ConfigDict, ValidationError, create_model
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from core.config import settings
+from core.workers import report_workers
+from models.report_job import ReportJob, ReportJobStatus, ReportResult
+from services.report_service import REPORTS
+
+# Coarse progress checkpoints; report functions run as a single unit of work
+PROGRESS_CLAIMED = 5
+PROGRESS_COMPUTED = 80
+PROGRESS_DONE = 100
+
+
+# ==================== PARAMETERS ====================
+
+@lru_cache(maxsize=None)
+def _parameters_model(report_type: str) -> Type[ParametersModel]:
+    """Build a validation model from the report function's keyword parameters."""
+    signature = inspect.signature(REPORTS[report_type])
+    fields = {
+        name: (parameter.annotation, parameter.default)
+        for name, parameter in signature.parameters.items()
+        if name != "db"
+    }
+    return create_model(
+        f"{report_type.title().replace('_', '')}Parameters",
+        __config__=ConfigDict(extra="forbid"),
+        **fields
+    )
+
+
+def _validate_parameters(report_type: str, parameters: Optional[dict]) -> ParametersModel:
+    if report_type not in REPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown report type. Available: {', '.join(sorted(REPORTS))}"
+        )
+    try:
+        return _parameters_model(report_type)(**(parameters or {}))
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(exc.errors(include_url=False, include_context=False))
+        )
+
+
+def _content_hash(payload: str) -> str:
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def parameters_hash(report_type: str, parameters: dict) -> str:
+    """Hash of a report request; identical requests share one job."""
+    return _content_hash(_canonical_json({"report": report_type, "parameters": parameters}))
+
+
+# ==================== JOBS ====================
+
+def get_report_types() -> List[str]:
+    return sorted(REPORTS)
+
+
+def get_report_job(db: Session, job_id: int) -> Optional[ReportJob]:
+    return db.query(ReportJob).filter(ReportJob.id == job_id).first()
+
+
+def enqueue_report_job(
+    db: Session,
+    report_type: str,
+    parameters: Optional[dict],
+    requested_by: Optional[int] = None
+) -> Tuple[ReportJob, bool]:
+    """
+    Queue a report, or return an existing job for the same parameters.
+
+    A job is reused while it is queued or running, or if it completed within the
+    result TTL. Returns the job and whether it was newly created.
+    """
+    normalized = _validate_parameters(report_type, parameters).model_dump(mode="json")
+    params_hash = parameters_hash(report_type, normalized)
+    fresh_after = datetime.utcnow() - timedelta(seconds=settings.REPORT_JOB_RESULT_TTL_SECONDS)
+
+    existing = db.query(ReportJob).filter(
+        ReportJob.params_hash == params_hash,
+        or_(
+            ReportJob.status.in_([ReportJobStatus.QUEUED, ReportJobStatus.RUNNING]),
+            and_(ReportJob.status == ReportJobStatus.COMPLETED, ReportJob.completed_at >= fresh_after)
+        )
+    ).order_by(ReportJob.id.desc()).first()
+    if existing:
+        return existing, False
+
+    job = ReportJob(
+        report_type=report_type,
+        parameters=normalized,
+        params_hash=params_hash,
+        status=ReportJobStatus.QUEUED,
+        progress=0,
+        requested_by=requested_by
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    report_workers.submit(run_report_job, job.id)
+    return job, True
+
+
+def _store_result(db: Session, content) -> str:
+    """Persist report output once per distinct content and return its hash."""
+    payload = _canonical_json(content)
+    content_hash = _content_hash(payload)
+    if db.query(ReportResult.id).filter(ReportResult.content_hash == content_hash).first():
+        return content_hash
+
+    try:
+        with db.begin_nested():
+            db.add(ReportResult(content_hash=content_hash, content=content, size_bytes=len(payload)))
+    except IntegrityError:
+        pass  # Stored concurrently by another worker
+    return content_hash
+
+
+def run_report_job(db: Session, job_id: int) -> Optional[ReportJob]:
+    """
+    Claim a queued job and compute its report.
+
+    The claim is a conditional UPDATE, so an in-process worker and a sidecar can
+    poll the same queue without running a job twice.
+    """
+    claimed = db.query(ReportJob).filter(
+        ReportJob.id == job_id,
+        ReportJob.status == ReportJobStatus.QUEUED
+    ).update({
+        ReportJob.status: ReportJobStatus.RUNNING,
+        ReportJob.started_at: datetime.utcnow(),
+        ReportJob.progress: PROGRESS_CLAIMED,
+    }, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        return None
+
+    job = get_report_job(db, job_id)
+    try:
+        parameters = _validate_parameters(job.report_type, job.parameters)
+        content = jsonable_encoder(REPORTS[job.report_type](db, **dict(parameters)))
+        job.progress = PROGRESS_COMPUTED
+        db.commit()
+        job.result_hash = _store_result(db, content)
+        job.status = ReportJobStatus.COMPLETED
+        job.progress = PROGRESS_DONE
+        job.completed_at = datetime.utcnow()
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        job = get_report_job(db, job_id)
+        job.status = ReportJobStatus.FAILED
+        job.error = str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+        job.completed_at = datetime.utcnow()
+        db.commit()
+
+    db.refresh(job)
+    return job
+
+
+def recover_report_jobs(db: Session) -> List[int]:
+    """
+    Requeue jobs abandoned by a stopped worker and return every queued job id.
+
+    A running job older than the timeout is assumed lost with its process.
+    """
+    stalled_before = datetime.utcnow() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT_SECONDS)
+    db.query(ReportJob).filter(
+        ReportJob.status == ReportJobStatus.RUNNING,
+        ReportJob.started_at < stalled_before
+    ).update({
+        ReportJob.status: ReportJobStatus.QUEUED,
+        ReportJob.progress: 0,
+        ReportJob.started_at: None,
+    }, synchronize_session=False)
+    db.commit()
+
+    return [
+        job_id for (job_id,) in db.query(ReportJob.id).filter(
+            ReportJob.status == ReportJobStatus.QUEUED
+        ).order_by(ReportJob.id).all()
+    ]
+
+
+def resume_report_jobs(db: Session) -> int:
+    """Hand queued and stalled jobs to the in-process workers (called at startup)."""
+    job_ids = recover_report_jobs(db)
+    for job_id in job_ids:
+        report_workers.submit(run_report_job, job_id)
+    return len(job_ids)
+
+
+def process_queued_jobs(db: Session, limit: int = 10) -> int:
+    """Run up to ``limit`` queued jobs in this process; used by the sidecar worker."""
+    processed = 0
+    for job_id in recover_report_jobs(db)[:limit]:
+        if run_report_job(db, job_id):
+            processed += 1
+    return processed
@@ -0,0 +1,308 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, case, func, insert, literal, select
+from core.config import settings
+from models.inventory import InventoryTransaction
+from models.work_order import WorkOrder
+from models.production import ProductionOrder
+from models.quality import QualityInspection, NonConformanceReport
+from models.report_rollup import (
+    WorkOrderDailyRollup, InventoryTransactionDailyRollup, ProductionDailyRollup,
+    QualityInspectionDailyRollup, NCRDailyRollup, ReportRollupWatermark, ReportRollupDirtyDay
+)
+
+DAYS_PER_REFRESH_BATCH = 200
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    """
+    How one rollup table is derived from its fact table.
+
+    ``dimensions`` maps rollup column names to fact columns; ``measures`` maps
+    rollup column names to the raw aggregate that produces them. Every measure
+    is additive, so rollup rows can be summed across days.
+    """
+    name: str
+    model: type
+    fact: type
+    day_column: object
+    dimensions: Dict[str, object]
+    measures: Dict[str, object]
+
+
+ROLLUPS: Dict[str, RollupSpec] = {spec.name: spec for spec in (
+    RollupSpec(
+        name="work_orders",
+        model=WorkOrderDailyRollup,
+        fact=WorkOrder,
+        day_column=WorkOrder.created_at,
+        dimensions={
+            "work_order_type": WorkOrder.work_order_type,
+            "priority": WorkOrder.priority,
+            "status": WorkOrder.status,
+        },
+        measures={
+            "count": func.count(WorkOrder.id),
+            "actual_hours": func.coalesce(func.sum(WorkOrder.actual_hours), 0),
+            "actual_hours_count": func.count(WorkOrder.actual_hours),
+        },
+    ),
+    RollupSpec(
+        name="inventory_transactions",
+        model=InventoryTransactionDailyRollup,
+        fact=InventoryTransaction,
+        day_column=InventoryTransaction.created_at,
+        dimensions={"transaction_type": InventoryTransaction.transaction_type},
+        measures={
+            "count": func.count(InventoryTransaction.id),
+            "quantity": func.coalesce(func.sum(InventoryTransaction.quantity), 0),
+            "value": func.coalesce(func.sum(func.coalesce(
+                InventoryTransaction.total_cost,
+                InventoryTransaction.quantity * InventoryTransaction.unit_cost
+            )), 0),
+        },
+    ),
+    RollupSpec(
+        name="production",
+        model=ProductionDailyRollup,
+        fact=ProductionOrder,
+        day_column=ProductionOrder.created_at,
+        dimensions={
+            "production_line_id": ProductionOrder.production_line_id,
+            "status": ProductionOrder.status,
+        },
+        measures={
+            "order_count": func.count(ProductionOrder.id),
+            "produced_quantity": func.coalesce(func.sum(ProductionOrder.produced_quantity), 0),
+            "efficiency_sum": func.coalesce(func.sum(case(
+                (ProductionOrder.target_quantity > 0,
+                 (ProductionOrder.produced_quantity / ProductionOrder.target_quantity) * 100),
+                else_=0
+            )), 0),
+        },
+    ),
+    RollupSpec(
+        name="quality_inspections",
+        model=QualityInspectionDailyRollup,
+        fact=QualityInspection,
+        day_column=QualityInspection.inspection_date,
+        dimensions={"result": QualityInspection.result},
+        measures={"count": func.count(QualityInspection.id)},
+    ),
+    RollupSpec(
+        name="ncrs",
+        model=NCRDailyRollup,
+        fact=NonConformanceReport,
+        day_column=NonConformanceReport.created_at,
+        dimensions={"severity": NonConformanceReport.severity},
+        measures={"count": func.count(NonConformanceReport.id)},
+    ),
+)}
+
+
+def _day_of(column):
+    return func.date(column, type_=Date)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+# ==================== REFRESH ====================
+
+def mark_rollup_day_dirty(db: Session, rollup: str, moment: Optional[datetime]) -> None:
+    """
+    Queue a rollup day for recomputation.
+
+    Deleted rows leave no ``updated_at`` trace, so delete paths call this in the
+    same transaction. The caller commits.
+    """
+    if moment is None:
+        return
+    day = _as_date(moment)
+    exists = db.query(ReportRollupDirtyDay.id).filter(
+        ReportRollupDirtyDay.rollup == rollup,
+        ReportRollupDirtyDay.day == day
+    ).first()
+    if not exists:
+        db.add(ReportRollupDirtyDay(rollup=rollup, day=day))
+
+
+def _rebuild_days(db: Session, spec: RollupSpec, days: List[date]) -> int:
+    """Replace the rollup rows of ``days`` with a fresh grouped scan of the fact table."""
+    day_expr = _day_of(spec.day_column)
+    dimension_columns = list(spec.dimensions.values())
+    now = datetime.utcnow()
+    written = 0
+
+    for offset in range(0, len(days), DAYS_PER_REFRESH_BATCH):
+        chunk = days[offset:offset + DAYS_PER_REFRESH_BATCH]
+        db.query(spec.model).filter(spec.model.day.in_(chunk)).delete(synchronize_session=False)
+
+        source = select(
+            day_expr,
+            *dimension_columns,
+            *spec.measures.values(),
+            literal(now),
+            literal(now)
+        ).where(
+            spec.day_column >= _day_start(chunk[0]),
+            spec.day_column < _day_start(chunk[-1] + timedelta(days=1)),
+            day_expr.in_(chunk)
+        ).group_by(day_expr, *dimension_columns)
+
+        result = db.execute(insert(spec.model.__table__).from_select(
+            ["day", *spec.dimensions.keys(), *spec.measures.keys(), "created_at", "updated_at"], source
+        ))
+        written += result.rowcount
+
+    return written
+
+
+def _refresh_rollup(db: Session, spec: RollupSpec, watermark: datetime, rebuild: bool) -> dict:
+    state = db.query(ReportRollupWatermark).filter(
+        ReportRollupWatermark.rollup == spec.name
+    ).with_for_update().first()
+
+    day_expr = _day_of(spec.day_column)
+    changed = db.query(day_expr).distinct().filter(spec.day_column.isnot(None))
+    if state and not rebuild:
+        changed = changed.filter(spec.fact.updated_at >= state.watermark)
+    days = {_as_date(day) for (day,) in changed.all() if day is not None}
+
+    dirty = db.query(ReportRollupDirtyDay).filter(ReportRollupDirtyDay.rollup == spec.name)
+    days |= {row.day for row in dirty.all()}
+
+    if rebuild:
+        db.query(spec.model).delete(synchronize_session=False)
+
+    written = _rebuild_days(db, spec, sorted(days))
+    dirty.delete(synchronize_session=False)
+
+    if state is None:
+        state = ReportRollupWatermark(rollup=spec.name, watermark=watermark, covered_through=watermark.date())
+        db.add(state)
+    else:
+        state.watermark = watermark
+        state.covered_through = watermark.date()
+
+    db.commit()
+    return {"days": len(days), "rows": written}
+
+
+def refresh_report_rollups(db: Session, rebuild: bool = False) -> dict:
+    """
+    Fold fact rows changed since the last refresh into the daily rollups.
+
+    Each rollup recomputes only the days touched by rows whose ``updated_at`` is
+    past its watermark (plus days queued by deletions). The new watermark lags
+    the refresh start slightly so rows committed by slower transactions are
+    picked up on the next pass rather than missed.
+    """
+    watermark = datetime.utcnow() - timedelta(seconds=settings.REPORT_ROLLUP_WATERMARK_LAG_SECONDS)
+    return {
+        name: _refresh_rollup(db, spec, watermark, rebuild)
+        for name, spec in ROLLUPS.items()
+    }
+
+
+def rebuild_report_rollups(db: Session) -> dict:
+    """Recompute every rollup from scratch."""
+    return refresh_report_rollups(db, rebuild=True)
+
+
+# ==================== READS ====================
+
+def split_range(
+    start: datetime,
+    end: datetime,
+    covered_through: Optional[date]
+) -> Tuple[Optional[Tuple[date, date]], List[Tuple[datetime, datetime, bool]]]:
+    """
+    Split ``[start, end]`` into whole days served by a rollup and raw edges.
+
+    Returns the half-open day range readable from the rollup (or None) and the
+    raw ranges as ``(from, to, to_inclusive)`` tuples.
+    """
+    if covered_through is None:
+        return None, [(start, end, True)]
+
+    first_full = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_full = min(end.date(), covered_through)
+    if first_full >= last_full:
+        return None, [(start, end, True)]
+
+    raw_ranges = []
+    if start < _day_start(first_full):
+        raw_ranges.append((start, _day_start(first_full), False))
+    if _day_start(last_full) <= end:
+        raw_ranges.append((_day_start(last_full), end, True))
+    return (first_full, last_full), raw_ranges
+
+
+def summarize(
+    db: Session,
+    rollup: str,
+    start: datetime,
+    end: datetime,
+    group_by: Sequence[str] = (),
+    filters: Optional[Dict[str, object]] = None
+) -> Dict[tuple, Dict[str, float]]:
+    """
+    Sum a rollup's measures over ``[start, end]``, grouped by the given dimensions.
+
+    Whole days up to the rollup's coverage come from the rollup table; only the
+    partial edges (typically the current day) are aggregated from raw rows.
+    """
+    spec = ROLLUPS[rollup]
+    filters = filters or {}
+    state = db.query(ReportRollupWatermark.covered_through).filter(
+        ReportRollupWatermark.rollup == rollup
+    ).scalar()
+    full_days, raw_ranges = split_range(start, end, state)
+    totals: Dict[tuple, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(spec.measures, 0))
+
+    def accumulate(rows):
+        for row in rows:
+            key = tuple(row[:len(group_by)])
+            for name, value in zip(spec.measures, row[len(group_by):]):
+                totals[key][name] += value or 0
+
+    if full_days:
+        model = spec.model
+        dimension_columns = [getattr(model, name) for name in group_by]
+        query = db.query(
+            *dimension_columns,
+            *[func.sum(getattr(model, name)) for name in spec.measures]
+        ).filter(model.day >= full_days[0], model.day < full_days[1])
+        for name, value in filters.items():
+            query = query.filter(getattr(model, name) == value)
+        if dimension_columns:
+            query = query.group_by(*dimension_columns)
+        accumulate(query.all())
+
+    for range_start, range_end, inclusive in raw_ranges:
+        dimension_columns = [spec.dimensions[name] for name in group_by]
+        query = db.query(*dimension_columns, *spec.measures.values()).filter(
+            spec.day_column >= range_start,
+            spec.day_column <= range_end if inclusive else spec.day_column < range_end
+        )
+        for name, value in filters.items():
+            query = query.filter(spec.dimensions[name] == value)
+        if dimension_columns:
+            query = query.group_by(*dimension_columns)
+        accumulate(query.all())
+
+    return {key: values for key, values in totals.items() if any(values.values())}
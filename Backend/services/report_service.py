@@ -0,0 +1,511 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from db.loaders import get_loaders
+from models.equipment import Equipment
+from models.inventory import InventoryItem, TransactionType
+from models.work_order import WorkOrder
+from models.production import ProductionLine
+from models.quality import InspectionResult
+from models.craftsman import Craftsman
+from services.inventory_aggregate_service import get_inventory_totals, get_category_totals
+from services.report_rollup_service import summarize
+from services.reliability_service import get_reliability_report
+from services.equipment_timeline_service import compute_equipment_intervals
+from services.production_oee_service import get_oee_report
+
+
+# ============= Equipment Reports =============
+
+def get_equipment_summary(db: Session) -> dict:
+    """Get equipment summary statistics."""
+    
+    total_equipment = db.query(func.count(Equipment.id)).scalar()
+    
+    by_status = db.query(
+        Equipment.status,
+        func.count(Equipment.id).label('count')
+    ).group_by(Equipment.status).all()
+    
+    by_type = db.query(
+        Equipment.category,
+        func.count(Equipment.id).label('count')
+    ).group_by(Equipment.category).all()
+    
+    end = datetime.utcnow()
+    intervals = compute_equipment_intervals(db, end - timedelta(days=30), end)
+    utilizations = [e["utilization"] for e in intervals["equipment"] if e["tracked_hours"] > 0]
+    avg_utilization = sum(utilizations) / len(utilizations) if utilizations else 0
+    
+    critical_equipment = db.query(func.count(Equipment.id)).filter(
+        Equipment.status == 'operational'
+    ).scalar()
+    
+    return {
+        "total_equipment": total_equipment,
+        "by_status": [{"status": str(s), "count": c} for s, c in by_status],
+        "by_type": [{"type": t or "Unknown", "count": c} for t, c in by_type],
+        "average_utilization": round(float(avg_utilization), 2),
+        "critical_equipment": critical_equipment
+    }
+
+
+def get_equipment_utilization(db: Session, days: int = 30, equipment_category: Optional[str] = None) -> dict:
+    """Get equipment utilization and availability from the equipment state timeline."""
+    
+    end = datetime.utcnow()
+    intervals = compute_equipment_intervals(db, end - timedelta(days=days), end, equipment_category=equipment_category)
+    
+    return {
+        "period_days": days,
+        "equipment": [
+            {
+                "code": e["code"],
+                "name": e["name"],
+                "type": e["category"],
+                "utilization": e["utilization"],
+                "availability": e["availability"],
+                "downtime_hours": e["downtime_hours"],
+                "status": e["status"]
+            }
+            for e in intervals["equipment"]
+        ]
+    }
+
+
+def get_equipment_downtime(
+    db: Session,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    equipment_category: Optional[str] = None
+) -> dict:
+    """Get per-asset and per-category downtime, including overlapping downtime, over any window."""
+    
+    end_date_obj = datetime.fromisoformat(end_date) if end_date else datetime.utcnow()
+    start_date_obj = datetime.fromisoformat(start_date) if start_date else end_date_obj - timedelta(days=30)
+    intervals = compute_equipment_intervals(db, start_date_obj, end_date_obj, equipment_category=equipment_category)
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        **intervals
+    }
+
+
+# ============= Maintenance Reports =============
+
+def get_maintenance_summary(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """Get maintenance summary statistics from work orders."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    # Use work orders for maintenance statistics (daily rollups + raw partial days)
+    by_type = summarize(db, "work_orders", start_date_obj, end_date_obj, ["work_order_type"])
+    by_priority = summarize(db, "work_orders", start_date_obj, end_date_obj, ["priority"])
+    
+    total_maintenance = sum(m["count"] for m in by_type.values())
+    hours = sum(m["actual_hours"] for m in by_type.values())
+    hours_count = sum(m["actual_hours_count"] for m in by_type.values())
+    avg_hours = hours / hours_count if hours_count else 0
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "total_maintenance": total_maintenance,
+        "by_type": [{"type": str(t), "count": m["count"]} for (t,), m in by_type.items()],
+        "by_priority": [{"priority": str(p), "count": m["count"]} for (p,), m in by_priority.items()],
+        "average_cost": round(float(avg_hours) * 50, 2)  # Estimate: $50/hour
+    }
+
+
+def get_maintenance_downtime(db: Session, days: int = 30) -> dict:
+    """Get equipment downtime report from work orders and the equipment state timeline."""
+    
+    start_date_obj = datetime.now() - timedelta(days=days)
+    
+    maintenance_records = db.query(
+        Equipment.id,
+        Equipment.equipment_id,
+        Equipment.name,
+        func.count(WorkOrder.id).label('maintenance_count')
+    ).join(
+        WorkOrder, Equipment.id == WorkOrder.equipment_id
+    ).filter(
+        WorkOrder.created_at >= start_date_obj.isoformat()
+    ).group_by(
+        Equipment.id, Equipment.equipment_id, Equipment.name
+    ).all()
+    
+    end = datetime.utcnow()
+    intervals = compute_equipment_intervals(
+        db, end - timedelta(days=days), end, equipment_ids=[r.id for r in maintenance_records]
+    )
+    downtime = {e["equipment_id"]: e["downtime_hours"] for e in intervals["equipment"]}
+    
+    return {
+        "period_days": days,
+        "equipment_downtime": [
+            {
+                "equipment_code": r.equipment_id,
+                "equipment_name": r.name,
+                "maintenance_count": r.maintenance_count,
+                "total_downtime_hours": downtime.get(r.id, 0.0)
+            }
+            for r in maintenance_records
+        ]
+    }
+
+
+def get_maintenance_reliability(db: Session, days: Optional[int] = None, equipment_category: Optional[str] = None) -> dict:
+    """Get MTBF/MTTR and failure-rate trends from corrective and emergency work orders."""
+    return get_reliability_report(db, days=days, equipment_category=equipment_category)
+
+
+# ============= Inventory Reports =============
+
+def get_inventory_summary(db: Session) -> dict:
+    """Get inventory summary statistics from the maintained aggregate counters."""
+    
+    totals = get_inventory_totals(db)
+    
+    # Merge by category name, matching the previous GROUP BY name
+    by_category: Dict[str, List[float]] = {}
+    for name, aggregate in get_category_totals(db):
+        if not aggregate or aggregate.item_count <= 0:
+            continue
+        entry = by_category.setdefault(name, [0, 0.0])
+        entry[0] += aggregate.item_count
+        entry[1] += aggregate.total_value
+    
+    return {
+        "total_items": totals.item_count,
+        "total_value": round(float(totals.total_value), 2),
+        "low_stock_items": totals.low_stock_count,
+        "out_of_stock": totals.out_of_stock_count,
+        "by_category": [
+            {
+                "category": c,
+                "count": count,
+                "value": round(float(value or 0), 2)
+            }
+            for c, (count, value) in by_category.items()
+        ]
+    }
+
+
+def get_inventory_movements(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None,
+    transaction_type: Optional[TransactionType] = None) -> dict:
+    """Get inventory movements/transactions report."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    filters = {"transaction_type": transaction_type} if transaction_type else None
+    transactions = summarize(
+        db, "inventory_transactions", start_date_obj, end_date_obj, ["transaction_type"], filters
+    )
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "transactions": [
+            {
+                "type": t,
+                "count": m["count"],
+                "total_quantity": float(m["quantity"])
+            }
+            for (t,), m in transactions.items()
+        ]
+    }
+
+
+def get_low_stock(db: Session) -> dict:
+    """Get low stock items report."""
+    
+    low_stock_items = db.query(InventoryItem).filter(
+        InventoryItem.reorder_point.isnot(None),
+        InventoryItem.quantity <= InventoryItem.reorder_point
+    ).all()
+    
+    # Get category names, one query for all items
+    categories = get_loaders(db).inventory_categories.prime(item.category_id for item in low_stock_items)
+    result_items = []
+    for item in low_stock_items:
+        category = categories.load(item.category_id)
+        category_name = category.name if category else "Unknown"
+        
+        result_items.append({
+            "id": item.id,
+            "item_code": item.item_code,
+            "name": item.name,
+            "category": category_name,
+            "quantity": item.quantity,
+            "unit": item.unit_of_measure,
+            "reorder_level": item.reorder_point,
+            "reorder_quantity": item.max_quantity or 0,
+            "shortage": item.reorder_point - item.quantity if item.reorder_point else 0
+        })
+    
+    return {
+        "low_stock_items": result_items
+    }
+
+
+# ============= Production Reports =============
+
+def get_production_summary(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """Get production summary statistics."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    by_status = summarize(db, "production", start_date_obj, end_date_obj, ["status"])
+    total_orders = sum(m["order_count"] for m in by_status.values())
+    total_quantity = sum(m["produced_quantity"] for m in by_status.values())
+    
+    active_lines = db.query(func.count(ProductionLine.id)).filter(
+        ProductionLine.status == 'active'
+    ).scalar()
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "total_orders": total_orders,
+        "by_status": [{"status": str(s), "count": m["order_count"]} for (s,), m in by_status.items()],
+        "total_quantity_produced": float(total_quantity),
+        "active_lines": active_lines
+    }
+
+
+def get_production_efficiency(db: Session, days: int = 30) -> dict:
+    """Get production efficiency report."""
+    
+    end_date_obj = datetime.now()
+    start_date_obj = end_date_obj - timedelta(days=days)
+    
+    by_line = summarize(db, "production", start_date_obj, end_date_obj, ["production_line_id"])
+    lines = {
+        line.id: line for line in db.query(ProductionLine).filter(
+            ProductionLine.id.in_([line_id for (line_id,) in by_line])
+        ).all()
+    } if by_line else {}
+    
+    return {
+        "period_days": days,
+        "production_lines": [
+            {
+                "line_code": lines[line_id].line_code,
+                "line_name": lines[line_id].name,
+                "orders_count": m["order_count"],
+                "total_produced": float(m["produced_quantity"]),
+                "average_efficiency": round(m["efficiency_sum"] / m["order_count"], 2) if m["order_count"] else 0
+            }
+            for (line_id,), m in by_line.items()
+            if line_id in lines
+        ]
+    }
+
+
+def get_production_oee(
+    db: Session,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    line_id: Optional[int] = None,
+    group_by: str = "line"
+) -> dict:
+    """Get availability, performance, quality and OEE per line, shift or day from the per-shift store."""
+    return get_oee_report(db, start_date=start_date, end_date=end_date, line_id=line_id, group_by=group_by)
+
+
+# ============= Quality Reports =============
+
+def get_quality_summary(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """Get quality summary statistics."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    by_result = summarize(db, "quality_inspections", start_date_obj, end_date_obj, ["result"])
+    ncrs_by_severity = summarize(db, "ncrs", start_date_obj, end_date_obj, ["severity"])
+    
+    total_inspections = sum(m["count"] for m in by_result.values())
+    total_ncrs = sum(m["count"] for m in ncrs_by_severity.values())
+    
+    pass_rate = 0
+    if total_inspections > 0:
+        passed = by_result.get((InspectionResult.PASS,), {}).get("count", 0)
+        pass_rate = (passed / total_inspections) * 100
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "total_inspections": total_inspections,
+        "by_result": [{"result": str(r), "count": m["count"]} for (r,), m in by_result.items()],
+        "total_ncrs": total_ncrs,
+        "ncrs_by_severity": [{"severity": str(s), "count": m["count"]} for (s,), m in ncrs_by_severity.items()],
+        "pass_rate": round(pass_rate, 2)
+    }
+
+
+# ============= Work Order Reports =============
+
+def get_work_orders_summary(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """Get work orders summary statistics."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    by_status = summarize(db, "work_orders", start_date_obj, end_date_obj, ["status"])
+    by_priority = summarize(db, "work_orders", start_date_obj, end_date_obj, ["priority"])
+    total_work_orders = sum(m["count"] for m in by_status.values())
+    
+    # WorkOrder.due_date is stored as an ISO date string (not a timestamp).
+    # Compare like-for-like to avoid PostgreSQL's varchar/timestamp type error.
+    today_string = datetime.now().strftime("%Y-%m-%d")
+    overdue = db.query(func.count(WorkOrder.id)).filter(
+        WorkOrder.created_at >= start_date_obj,
+        WorkOrder.created_at <= end_date_obj,
+        WorkOrder.due_date < today_string,
+        WorkOrder.status.in_(['pending', 'in_progress'])
+    ).scalar()
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "total_work_orders": total_work_orders,
+        "by_status": [{"status": s, "count": m["count"]} for (s,), m in by_status.items()],
+        "by_priority": [{"priority": p, "count": m["count"]} for (p,), m in by_priority.items()],
+        "overdue": overdue
+    }
+
+
+# ============= Personnel Reports =============
+
+def get_personnel_summary(db: Session) -> dict:
+    """Get personnel summary statistics."""
+    
+    total_craftsmen = db.query(func.count(Craftsman.id)).scalar()
+    
+    by_department = db.query(
+        Craftsman.department,
+        func.count(Craftsman.id).label('count')
+    ).group_by(Craftsman.department).all()
+    
+    active_craftsmen = db.query(func.count(Craftsman.id)).filter(
+        Craftsman.user_id.isnot(None)
+    ).scalar()
+    
+    return {
+        "total_craftsmen": total_craftsmen,
+        "active_craftsmen": active_craftsmen,
+        "by_specialization": [{"specialization": d or "Unknown", "count": c} for d, c in by_department],
+        "average_experience_years": 5.0  # Would need hire_date calculation
+    }
+
+
+# ============= Financial Reports =============
+
+def get_financial_summary(db: Session, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """Get financial summary statistics."""
+    
+    # Parse date strings
+    if end_date:
+        end_date_obj = datetime.fromisoformat(end_date)
+    else:
+        end_date_obj = datetime.now()
+    
+    if start_date:
+        start_date_obj = datetime.fromisoformat(start_date)
+    else:
+        start_date_obj = end_date_obj - timedelta(days=30)
+    
+    # Maintenance costs (estimated from work orders)
+    work_orders = summarize(db, "work_orders", start_date_obj, end_date_obj)
+    total_hours = work_orders.get((), {}).get("actual_hours", 0)
+    
+    maintenance_cost = float(total_hours) * 50  # Estimate: $50/hour
+    
+    # Inventory value
+    inventory_value = get_inventory_totals(db).total_value
+    
+    # Inventory transactions value
+    inventory_transactions = summarize(
+        db, "inventory_transactions", start_date_obj, end_date_obj, ["transaction_type"]
+    )
+    
+    return {
+        "start_date": start_date_obj.isoformat(),
+        "end_date": end_date_obj.isoformat(),
+        "maintenance_cost": round(maintenance_cost, 2),
+        "inventory_value": round(float(inventory_value), 2),
+        "inventory_transactions": [
+            {
+                "type": str(t),
+                "value": round(float(m["value"]), 2)
+            }
+            for (t,), m in inventory_transactions.items()
+        ]
+    }
+
+
+# Reports that can be computed asynchronously as report jobs, keyed by report type
+REPORTS = {
+    "equipment_summary": get_equipment_summary,
+    "equipment_utilization": get_equipment_utilization,
+    "equipment_downtime": get_equipment_downtime,
+    "maintenance_summary": get_maintenance_summary,
+    "maintenance_downtime": get_maintenance_downtime,
+    "maintenance_reliability": get_maintenance_reliability,
+    "inventory_summary": get_inventory_summary,
+    "inventory_movements": get_inventory_movements,
+    "inventory_low_stock": get_low_stock,
+    "production_summary": get_production_summary,
+    "production_efficiency": get_production_efficiency,
+    "production_oee": get_production_oee,
+    "quality_summary": get_quality_summary,
+    "work_orders_summary": get_work_orders_summary,
+    "personnel_summary": get_personnel_summary,
+    "financial_summary": get_financial_summary,
+}
@@ -4,12 +4,14 @@ import re
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, func
 from fastapi import HTTPException, status
-from models.inventory import InventoryItem, InventoryTransaction, TransactionType
+from models.inventory import InventoryItem, TransactionType, ReservationSource, GenealogyEdgeType
 from models.sales import (
     Customer, SalesOrder, SalesOrderItem, SalesOrderStatus,
     SalesOrderLineStatus, SalesOrderPriority, SalesInvoice, SalesInvoiceItem,
     SalesReceipt, SalesInvoiceStatus
 )
+from services import batch_genealogy_service, stock_reservation_service
+from services.inventory_valuation_service import post_stock_movement
 from schemas.sales import (
     CustomerCreate, CustomerUpdate, SalesOrderCreate, SalesOrderUpdate,
     SalesOrderFulfillmentRequest, SalesOrderCancelRequest,
@@ -414,6 +416,14 @@ def confirm_sales_order(db: Session, order_id: int, confirmed_by: int) -> Option
         )
 
     _validate_customer(db, db_order.customer_id)
+    stock_reservation_service.reserve(
+        db,
+        ReservationSource.SALES_ORDER,
+        db_order.id,
+        [(line.id, line.item_id, line.ordered_quantity - line.fulfilled_quantity) for line in db_order.items],
+        reference=db_order.order_number,
+        created_by=confirmed_by,
+    )
     db_order.status = SalesOrderStatus.CONFIRMED
     db_order.confirmed_by = confirmed_by
     db_order.confirmed_at = datetime.utcnow()
@@ -458,10 +468,21 @@ def fulfill_sales_order(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock for {line.item_name}",
             )
+    stock_reservation_service.consume(
+        db,
+        ReservationSource.SALES_ORDER,
+        db_order.id,
+        [
+            (line.line_id, lines_by_id[line.line_id].item_id, line.quantity)
+            for line in fulfillment.items
+        ],
+        reference=db_order.order_number,
+        created_by=fulfilled_by,
+    )
 
+    transactions = []
     for fulfillment_line in fulfillment.items:
         line = lines_by_id[fulfillment_line.line_id]
-        line.item.quantity -= fulfillment_line.quantity
         line.fulfilled_quantity += fulfillment_line.quantity
 
         if line.fulfilled_quantity >= line.ordered_quantity:
@@ -469,15 +490,18 @@ def fulfill_sales_order(
         else:
             line.status = SalesOrderLineStatus.PARTIALLY_FULFILLED
 
-        db.add(InventoryTransaction(
-            item_id=line.item_id,
-            transaction_type=TransactionType.ISSUE,
-            quantity=-abs(fulfillment_line.quantity),
-            unit_cost=line.item.unit_cost,
-            reference_number=db_order.order_number,
-            notes=fulfillment.notes or f"Issued for sales order {db_order.order_number}",
+        transactions.append(post_stock_movement(
+            db,
+            line.item,
+            TransactionType.ISSUE,
+            -abs(fulfillment_line.quantity),
             performed_by=fulfilled_by,
+            reference=db_order.order_number,
+            notes=fulfillment.notes or f"Issued for sales order {db_order.order_number}",
         ))
+    batch_genealogy_service.record_lot_edges(
+        db, GenealogyEdgeType.SHIPPED, transactions, sales_order_id=db_order.id
+    )
 
     if all(line.status == SalesOrderLineStatus.FULFILLED for line in db_order.items):
         db_order.status = SalesOrderStatus.FULFILLED
@@ -512,6 +536,9 @@ def cancel_sales_order(
             detail="Cannot cancel a sales order after fulfillment has started",
         )
 
+    stock_reservation_service.release(
+        db, ReservationSource.SALES_ORDER, db_order.id, reference=db_order.order_number, created_by=cancelled_by
+    )
     db_order.status = SalesOrderStatus.CANCELLED
     db_order.cancelled_by = cancelled_by
     db_order.cancelled_at = datetime.utcnow()
@@ -0,0 +1,61 @@
+from core.config import settings
+from core.scheduler import JobScheduler
+from services import (
+    equipment_hierarchy_service, inventory_aggregate_service, inventory_balance_service, inventory_forecast_service,
+    inventory_service, inventory_valuation_service, meter_service, notification_service,
+    preventive_maintenance_service, production_oee_service, reliability_service, replenishment_service,
+    report_rollup_service, stock_reservation_service
+)
+
+
+def register_jobs(scheduler: JobScheduler) -> None:
+    """Register the periodic maintenance jobs run by the in-process scheduler."""
+    scheduler.register(
+        "inventory_aggregates_reconcile",
+        settings.INVENTORY_AGGREGATES_RECONCILE_SECONDS,
+        inventory_aggregate_service.reconcile_inventory_aggregates,
+    )
+    # Manual only (interval 0): triggered from the API or scripts/run_job.py
+    scheduler.register("inventory_revalue", 0, inventory_valuation_service.revalue_inventory)
+    scheduler.register("inventory_reorder_points_apply", 0, inventory_forecast_service.apply_reorder_recommendations)
+    scheduler.register("equipment_closure_rebuild", 0, equipment_hierarchy_service.rebuild_equipment_closure)
+    scheduler.register("inventory_category_closure_rebuild", 0, inventory_service.rebuild_category_closure)
+    scheduler.register("inventory_reservations_reconcile", 0, stock_reservation_service.reconcile_stock_reservations)
+    scheduler.register("notification_counters_reconcile", 0, notification_service.reconcile_notification_counters)
+    scheduler.register(
+        "inventory_balance_checkpoint",
+        settings.INVENTORY_CHECKPOINT_INTERVAL_SECONDS,
+        inventory_balance_service.run_checkpoint_job,
+    )
+    scheduler.register(
+        "inventory_replenishment_plan",
+        settings.INVENTORY_REPLENISHMENT_PLAN_SECONDS,
+        replenishment_service.generate_replenishment_proposals,
+    )
+    scheduler.register(
+        "maintenance_reliability_rebuild",
+        settings.MAINTENANCE_RELIABILITY_REBUILD_SECONDS,
+        reliability_service.rebuild_reliability_cache,
+    )
+    scheduler.register(
+        "maintenance_pm_generate",
+        settings.MAINTENANCE_PM_GENERATE_SECONDS,
+        preventive_maintenance_service.generate_pm_work_orders,
+    )
+    scheduler.register(
+        "meter_readings_compact",
+        settings.METER_COMPACTION_INTERVAL_SECONDS,
+        meter_service.compact_meter_readings,
+    )
+    scheduler.register(
+        "report_rollups_refresh",
+        settings.REPORT_ROLLUP_REFRESH_SECONDS,
+        report_rollup_service.refresh_report_rollups,
+    )
+    scheduler.register("report_rollups_rebuild", 0, report_rollup_service.rebuild_report_rollups)
+    scheduler.register(
+        "production_oee_refresh",
+        settings.PRODUCTION_OEE_REFRESH_SECONDS,
+        production_oee_service.refresh_production_oee,
+    )
+    scheduler.register("production_oee_rebuild", 0, production_oee_service.rebuild_production_oee)
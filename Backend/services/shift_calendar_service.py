@@ -0,0 +1,63 @@
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy.orm import Session
+from models.production import Shift
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def shift_minutes(shift: Shift) -> Tuple[int, int]:
+    """Start and end of a shift in minutes from the start of its day; overnight shifts end past midnight."""
+    start_hour, start_minute = (int(part) for part in shift.start_time.split(":"))
+    end_hour, end_minute = (int(part) for part in shift.end_time.split(":"))
+    start = start_hour * 60 + start_minute
+    end = end_hour * 60 + end_minute
+    return start, end if end > start else end + MINUTES_PER_DAY
+
+
+def shift_hours(shift: Shift) -> float:
+    start, end = shift_minutes(shift)
+    return (end - start) / 60
+
+
+def shift_windows(shifts: Iterable[Shift], start: datetime, end: datetime) -> List[Tuple[datetime, datetime, Shift]]:
+    """
+    Concrete (start, end, shift) windows of the active shifts within [start, end),
+    sorted and clipped. A shift runs on the days in ``active_days`` (0=Monday,
+    every day when unset) and an overnight window belongs to the day it starts.
+    Where shifts of one line overlap, the later window starts when the earlier ends.
+    """
+    windows = []
+    shifts = [shift for shift in shifts if shift.is_active]
+    day = start.date() - timedelta(days=1)  # Overnight shifts started the day before
+    while day <= end.date():
+        midnight = datetime.combine(day, time())
+        for shift in shifts:
+            if shift.active_days is not None and day.weekday() not in shift.active_days:
+                continue
+            first, last = shift_minutes(shift)
+            window_start = max(midnight + timedelta(minutes=first), start)
+            window_end = min(midnight + timedelta(minutes=last), end)
+            if window_end > window_start:
+                windows.append((window_start, window_end, shift))
+        day += timedelta(days=1)
+
+    windows.sort(key=lambda window: (window[0], window[1]))
+    clipped = []
+    for window_start, window_end, shift in windows:
+        if clipped and window_start < clipped[-1][1]:
+            window_start = clipped[-1][1]
+        if window_end > window_start:
+            clipped.append((window_start, window_end, shift))
+    return clipped
+
+
+def line_shift_windows(
+    db: Session, line_ids: List[int], start: datetime, end: datetime
+) -> Dict[int, List[Tuple[datetime, datetime, Shift]]]:
+    """Shift windows of many lines, from one query over their shifts."""
+    shifts: Dict[int, List[Shift]] = {line_id: [] for line_id in line_ids}
+    if line_ids:
+        for shift in db.query(Shift).filter(Shift.production_line_id.in_(line_ids), Shift.is_active.is_(True)):
+            shifts[shift.production_line_id].append(shift)
+    return {line_id: shift_windows(line_shifts, start, end) for line_id, line_shifts in shifts.items()}
@@ -0,0 +1,313 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from models.inventory import (
+    InventoryItem, InventoryRequisition, InventoryRequisitionItem, RequisitionStatus, RequisitionLineStatus,
+    ReservationSource, ReservationEvent, StockReservation
+)
+from models.sales import SalesOrder, SalesOrderItem, SalesOrderStatus, SalesOrderLineStatus
+
+QUANTITY_EPSILON = 1e-9
+
+# (source line id, item id, quantity)
+ReservationLine = Tuple[int, int, float]
+
+
+# ==================== LEDGER ====================
+
+def _insufficient_stock(db: Session, item_id: int, required: float) -> HTTPException:
+    item = db.execute(select(
+        InventoryItem.name, InventoryItem.quantity, InventoryItem.reserved_quantity
+    ).where(InventoryItem.id == item_id)).first()
+    if item is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Inventory item {item_id} not found")
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Insufficient available stock for {item.name}: "
+               f"{max(item.quantity - item.reserved_quantity, 0):g} available, {required:g} required"
+    )
+
+
+def _post(
+    db: Session,
+    source_type: ReservationSource,
+    source_id: int,
+    entries: List[Tuple[int, int, float, ReservationEvent]],
+    reference: Optional[str],
+    created_by: Optional[int],
+    enforce: bool = False
+) -> None:
+    """
+    Write ledger rows and move the per-item counters by their net change.
+
+    Counters are updated in SQL, one item at a time in id order so concurrent
+    postings lock rows in the same order. With ``enforce`` an increase only
+    applies while it fits within the item's available-to-promise quantity; the
+    check and the increment are one conditional UPDATE, so two confirmations
+    cannot both take the last units. The caller commits.
+    """
+    entries = [entry for entry in entries if abs(entry[2]) > QUANTITY_EPSILON]
+    if not entries:
+        return
+
+    deltas: Dict[int, float] = defaultdict(float)
+    for _, item_id, quantity, _ in entries:
+        deltas[item_id] += quantity
+
+    for item_id in sorted(deltas):
+        delta = deltas[item_id]
+        if abs(delta) <= QUANTITY_EPSILON:
+            continue
+        statement = update(InventoryItem).where(InventoryItem.id == item_id).values(
+            reserved_quantity=InventoryItem.reserved_quantity + delta
+        )
+        if enforce and delta > 0:
+            statement = statement.where(
+                InventoryItem.quantity - InventoryItem.reserved_quantity >= delta - QUANTITY_EPSILON
+            )
+        if db.execute(statement.execution_options(synchronize_session=False)).rowcount == 0:
+            raise _insufficient_stock(db, item_id, delta)
+
+    now = datetime.utcnow()
+    db.execute(insert(StockReservation.__table__), [
+        {
+            "item_id": item_id,
+            "source_type": source_type,
+            "source_id": source_id,
+            "source_line_id": line_id,
+            "event": event,
+            "quantity": quantity,
+            "reference": reference,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for line_id, item_id, quantity, event in entries
+    ])
+
+
+def claim_available(db: Session, item_id: int, quantity: float) -> None:
+    """
+    Check that ``quantity`` can leave an item without taking stock reserved for
+    other demand, for outbound movements that have no reservation of their own.
+
+    Like an enforced reservation this is one conditional UPDATE on the item
+    row, which stays locked until the caller commits, so a concurrent
+    confirmation cannot promise the same units. The caller commits.
+    """
+    statement = update(InventoryItem).where(
+        InventoryItem.id == item_id,
+        InventoryItem.quantity - InventoryItem.reserved_quantity >= quantity - QUANTITY_EPSILON
+    ).values(updated_at=datetime.utcnow())
+    if db.execute(statement.execution_options(synchronize_session=False)).rowcount == 0:
+        raise _insufficient_stock(db, item_id, quantity)
+
+
+def outstanding_by_line(db: Session, source_type: ReservationSource, line_ids: Iterable[int]) -> Dict[int, float]:
+    """Quantity still reserved per source line, from the ledger."""
+    line_ids = list(line_ids)
+    if not line_ids:
+        return {}
+    return dict(db.execute(select(
+        StockReservation.source_line_id, func.sum(StockReservation.quantity)
+    ).where(
+        StockReservation.source_type == source_type,
+        StockReservation.source_line_id.in_(line_ids)
+    ).group_by(StockReservation.source_line_id)).all())
+
+
+def reserve(
+    db: Session,
+    source_type: ReservationSource,
+    source_id: int,
+    lines: List[ReservationLine],
+    reference: Optional[str] = None,
+    created_by: Optional[int] = None,
+    enforce: bool = True
+) -> None:
+    """Reserve stock for source lines, failing when ``enforce`` and the item cannot cover it. The caller commits."""
+    _post(
+        db, source_type, source_id,
+        [(line_id, item_id, quantity, ReservationEvent.RESERVE) for line_id, item_id, quantity in lines],
+        reference, created_by, enforce
+    )
+
+
+def consume(
+    db: Session,
+    source_type: ReservationSource,
+    source_id: int,
+    lines: List[ReservationLine],
+    reference: Optional[str] = None,
+    created_by: Optional[int] = None
+) -> None:
+    """
+    Release reservations as their stock is issued. Lines issue from their own
+    reservation first; any part beyond it must fit in the item's
+    available-to-promise quantity, so issuing never takes stock promised to
+    other demand. The caller commits.
+    """
+    outstanding = outstanding_by_line(db, source_type, [line_id for line_id, _, _ in lines])
+    unreserved: Dict[int, float] = defaultdict(float)
+    entries = []
+    for line_id, item_id, quantity in lines:
+        reserved = max(outstanding.get(line_id, 0.0), 0.0)
+        covered = min(reserved, quantity)
+        outstanding[line_id] = reserved - covered
+        entries.append((line_id, item_id, -covered, ReservationEvent.CONSUME))
+        if quantity - covered > QUANTITY_EPSILON:
+            unreserved[item_id] += quantity - covered
+
+    if unreserved:
+        available = {row["item_id"]: row for row in available_to_promise(db, list(unreserved))}
+        for item_id, quantity in unreserved.items():
+            row = available.get(item_id)
+            if row is not None and row["available"] < quantity - QUANTITY_EPSILON:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient available stock for {row['name']}: "
+                           f"{max(row['available'], 0):g} available, {quantity:g} required"
+                )
+    _post(db, source_type, source_id, entries, reference, created_by)
+
+
+def release(
+    db: Session,
+    source_type: ReservationSource,
+    source_id: int,
+    reference: Optional[str] = None,
+    created_by: Optional[int] = None
+) -> None:
+    """Release everything still reserved for a source. The caller commits."""
+    rows = db.execute(select(
+        StockReservation.source_line_id, StockReservation.item_id, func.sum(StockReservation.quantity)
+    ).where(
+        StockReservation.source_type == source_type,
+        StockReservation.source_id == source_id
+    ).group_by(StockReservation.source_line_id, StockReservation.item_id)).all()
+    _post(
+        db, source_type, source_id,
+        [(line_id, item_id, -quantity, ReservationEvent.RELEASE) for line_id, item_id, quantity in rows if quantity > 0],
+        reference, created_by
+    )
+
+
+# ==================== AVAILABLE TO PROMISE ====================
+
+def available_to_promise(db: Session, item_ids: List[int]) -> List[dict]:
+    """On-hand, reserved and available quantity for many items in one indexed lookup."""
+    if not item_ids:
+        return []
+    rows = db.execute(select(
+        InventoryItem.id, InventoryItem.item_code, InventoryItem.name, InventoryItem.unit_of_measure,
+        InventoryItem.quantity, InventoryItem.reserved_quantity
+    ).where(InventoryItem.id.in_(set(item_ids)))).all()
+    return [
+        {
+            "item_id": row.id,
+            "item_code": row.item_code,
+            "name": row.name,
+            "unit_of_measure": row.unit_of_measure,
+            "on_hand": row.quantity,
+            "reserved": row.reserved_quantity,
+            "available": row.quantity - row.reserved_quantity,
+        }
+        for row in sorted(rows, key=lambda row: row.id)
+    ]
+
+
+def get_item_reservations(db: Session, item_id: int, skip: int = 0, limit: int = 100) -> Tuple[List[StockReservation], int]:
+    """Ledger rows of an item, newest first."""
+    query = db.query(StockReservation).filter(StockReservation.item_id == item_id)
+    rows = query.order_by(StockReservation.id.desc()).offset(skip).limit(limit).all()
+    return rows, query.count()
+
+
+# ==================== RECONCILIATION ====================
+
+def _expected_reservations(db: Session) -> Dict[tuple, tuple]:
+    """(source type, line id) -> (source id, item id, reference, quantity) for open demand."""
+    expected = {}
+    sales_lines = db.execute(select(
+        SalesOrderItem.id, SalesOrderItem.sales_order_id, SalesOrderItem.item_id, SalesOrder.order_number,
+        SalesOrderItem.ordered_quantity - SalesOrderItem.fulfilled_quantity
+    ).join(SalesOrder, SalesOrder.id == SalesOrderItem.sales_order_id).where(
+        SalesOrder.status.in_([SalesOrderStatus.CONFIRMED, SalesOrderStatus.PARTIALLY_FULFILLED]),
+        SalesOrderItem.status.notin_([SalesOrderLineStatus.FULFILLED, SalesOrderLineStatus.CANCELLED])
+    ))
+    for line_id, source_id, item_id, reference, quantity in sales_lines:
+        expected[(ReservationSource.SALES_ORDER, line_id)] = (source_id, item_id, reference, max(quantity, 0.0))
+
+    requisition_lines = db.execute(select(
+        InventoryRequisitionItem.id, InventoryRequisitionItem.requisition_id, InventoryRequisitionItem.item_id,
+        InventoryRequisition.requisition_number,
+        func.coalesce(InventoryRequisitionItem.approved_quantity, InventoryRequisitionItem.requested_quantity)
+        - InventoryRequisitionItem.fulfilled_quantity
+    ).join(InventoryRequisition, InventoryRequisition.id == InventoryRequisitionItem.requisition_id).where(
+        InventoryRequisition.status.in_([RequisitionStatus.APPROVED, RequisitionStatus.PARTIALLY_FULFILLED]),
+        InventoryRequisitionItem.status.in_([RequisitionLineStatus.APPROVED, RequisitionLineStatus.PARTIALLY_FULFILLED])
+    ))
+    for line_id, source_id, item_id, reference, quantity in requisition_lines:
+        expected[(ReservationSource.REQUISITION, line_id)] = (source_id, item_id, reference, max(quantity, 0.0))
+    return expected
+
+
+def reconcile_stock_reservations(db: Session) -> dict:
+    """
+    Bring the ledger in line with open sales orders and approved requisitions,
+    then rebuild every item's reserved counter from the ledger.
+
+    Posts ADJUST rows where a line's outstanding reservation differs from its
+    open quantity, which also backfills demand confirmed before reservations
+    existed.
+    """
+    expected = _expected_reservations(db)
+    ledger = {
+        (source_type, line_id): (source_id, item_id, quantity)
+        for source_type, line_id, source_id, item_id, quantity in db.execute(select(
+            StockReservation.source_type, StockReservation.source_line_id, StockReservation.source_id,
+            StockReservation.item_id, func.sum(StockReservation.quantity)
+        ).group_by(
+            StockReservation.source_type, StockReservation.source_line_id, StockReservation.source_id,
+            StockReservation.item_id
+        ))
+    }
+
+    now = datetime.utcnow()
+    adjustments = []
+    for key in set(expected) | set(ledger):
+        source_type, line_id = key
+        source_id, item_id, reference, quantity = expected.get(key, (None, None, None, 0.0))
+        if key in ledger:
+            source_id, item_id, reserved = ledger[key]
+        else:
+            reserved = 0.0
+        if abs(quantity - reserved) > QUANTITY_EPSILON:
+            adjustments.append({
+                "item_id": item_id,
+                "source_type": source_type,
+                "source_id": source_id,
+                "source_line_id": line_id,
+                "event": ReservationEvent.ADJUST,
+                "quantity": quantity - reserved,
+                "reference": reference,
+                "created_by": None,
+                "created_at": now,
+                "updated_at": now,
+            })
+    if adjustments:
+        db.execute(insert(StockReservation.__table__), adjustments)
+
+    totals = select(func.coalesce(func.sum(StockReservation.quantity), 0.0)).where(
+        StockReservation.item_id == InventoryItem.id
+    ).scalar_subquery()
+    db.execute(update(InventoryItem).values(reserved_quantity=totals).execution_options(synchronize_session=False))
+    db.commit()
+    return {
+        "open_lines": len(expected),
+        "adjustments": len(adjustments),
+        "reconciled_at": now.isoformat(),
+    }
@@ -3,15 +3,39 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
 from fastapi import HTTPException, status
+from models.craftsman import Skill
 from models.work_order import WorkOrder, WorkOrderStatus, WorkOrderPriority, WorkOrderType
 from schemas.work_order import WorkOrderCreate, WorkOrderUpdate
+from services.report_rollup_service import mark_rollup_day_dirty
+from services.reliability_service import failure_key, record_work_order_change
+from services.equipment_timeline_service import record_work_order_transition
 
 
 def generate_work_order_number(db: Session) -> str:
     """Generate unique work order number."""
-    # Get count of work orders
-    count = db.query(WorkOrder).count()
-    return f"WO-{datetime.now().strftime('%Y%m')}-{count + 1:04d}"
+    return allocate_work_order_numbers(db, 1)[0]
+
+
+def allocate_work_order_numbers(db: Session, count: int) -> List[str]:
+    """
+    Pre-allocate ``count`` work order numbers for a bulk insert.
+
+    Numbers continue from the count of work orders, skipping any that are
+    already taken (e.g. after deletions).
+    """
+    prefix = f"WO-{datetime.now().strftime('%Y%m')}-"
+    next_number = db.query(func.count(WorkOrder.id)).scalar() + 1
+    numbers = []
+    while len(numbers) < count:
+        candidates = [f"{prefix}{number:04d}" for number in range(next_number, next_number + count - len(numbers))]
+        taken = set()
+        for offset in range(0, len(candidates), 1000):
+            taken.update(number for (number,) in db.query(WorkOrder.work_order_number).filter(
+                WorkOrder.work_order_number.in_(candidates[offset:offset + 1000])
+            ))
+        numbers.extend(number for number in candidates if number not in taken)
+        next_number += len(candidates)
+    return numbers
 
 
 def get_work_order_statistics(db: Session) -> dict:
@@ -120,6 +144,16 @@ def get_work_order_by_number(db: Session, work_order_number: str) -> Optional[Wo
     return db.query(WorkOrder).filter(WorkOrder.work_order_number == work_order_number).first()
 
 
+def _get_skills(db: Session, skill_ids: List[int]) -> List[Skill]:
+    """Resolve required skill ids, rejecting unknown ones."""
+    if not skill_ids:
+        return []
+    skills = db.query(Skill).filter(Skill.id.in_(set(skill_ids))).all()
+    if len(skills) != len(set(skill_ids)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown required skill")
+    return skills
+
+
 def create_work_order(db: Session, work_order: WorkOrderCreate, created_by: int) -> WorkOrder:
     """Create new work order."""
     # Generate work order number
@@ -128,8 +162,9 @@ def create_work_order(db: Session, work_order: WorkOrderCreate, created_by: int)
     db_work_order = WorkOrder(
         work_order_number=wo_number,
         created_by=created_by,
-        **work_order.model_dump()
+        **work_order.model_dump(exclude={"required_skill_ids"})
     )
+    db_work_order.required_skills = _get_skills(db, work_order.required_skill_ids)
     db.add(db_work_order)
     db.commit()
     db.refresh(db_work_order)
@@ -143,6 +178,8 @@ def update_work_order(db: Session, work_order_id: int, work_order: WorkOrderUpda
         return None
     
     update_data = work_order.model_dump(exclude_unset=True)
+    previous_failure = failure_key(db_work_order)
+    previous_status = db_work_order.status
     
     # If status is being changed to IN_PROGRESS and started_at is None, set it
     if 'status' in update_data and update_data['status'] == WorkOrderStatus.IN_PROGRESS:
@@ -154,9 +191,15 @@ def update_work_order(db: Session, work_order_id: int, work_order: WorkOrderUpda
         if not db_work_order.completed_at:
             update_data['completed_at'] = datetime.now().isoformat()
     
+    required_skill_ids = update_data.pop("required_skill_ids", None)
+    if required_skill_ids is not None:
+        db_work_order.required_skills = _get_skills(db, required_skill_ids)
+    
     for field, value in update_data.items():
         setattr(db_work_order, field, value)
     
+    record_work_order_change(db, db_work_order, previous_failure)
+    record_work_order_transition(db, db_work_order, previous_status)
     db.commit()
     db.refresh(db_work_order)
     return db_work_order
@@ -175,6 +218,7 @@ def delete_work_order(db: Session, work_order_id: int) -> bool:
             detail="Can only delete pending or cancelled work orders"
         )
     
+    mark_rollup_day_dirty(db, "work_orders", db_work_order.created_at)
     db.delete(db_work_order)
     db.commit()
     return True
@@ -203,6 +247,8 @@ def update_work_order_status(db: Session, work_order_id: int,
     if not db_work_order:
         return None
     
+    previous_failure = failure_key(db_work_order)
+    previous_status = db_work_order.status
     db_work_order.status = new_status
     
     if new_status == WorkOrderStatus.IN_PROGRESS and not db_work_order.started_at:
@@ -217,6 +263,8 @@ def update_work_order_status(db: Session, work_order_id: int,
         else:
             db_work_order.notes = notes
     
+    record_work_order_change(db, db_work_order, previous_failure)
+    record_work_order_transition(db, db_work_order, previous_status)
     db.commit()
     db.refresh(db_work_order)
     return db_work_order
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+_database = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database}"
+os.environ["DEBUG"] = "False"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import models  # noqa: F401  registers every table on Base.metadata
+from core.main import app
+from core.security import create_access_token
+from db.base import Base
+from db.session import SessionLocal, engine
+from models import InventoryCategory, InventoryItem, User, UserRole
+
+
+@pytest.fixture
+def db():
+    """A session on a freshly created schema."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def admin(db):
+    user = User(username="admin", email="admin@example.com", full_name="Admin", hashed_password="x", role=UserRole.ADMIN)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def client(admin):
+    """A test client authenticated as the admin user."""
+    test_client = TestClient(app)
+    test_client.headers["Authorization"] = f"Bearer {create_access_token({'sub': str(admin.id)})}"
+    return test_client
+
+
+@pytest.fixture
+def make_item(db):
+    """Create inventory items in one shared category."""
+    category = InventoryCategory(name="Spares")
+    db.add(category)
+    db.commit()
+
+    def make(code: str = "ITEM-1", quantity: float = 0.0, **fields) -> InventoryItem:
+        item = InventoryItem(
+            item_code=code, name=code, category_id=category.id, unit_of_measure="pcs", quantity=quantity, **fields
+        )
+        db.add(item)
+        db.commit()
+        db.refresh(item)
+        return item
+
+    return make
@@ -0,0 +1,15 @@
+from services import inventory_forecast_service
+
+
+def test_reorder_recommendations_without_issue_history(client):
+    response = client.get("/api/v1/inventory/reorder-recommendations")
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+    assert response.json()["data"] == []
+
+
+def test_apply_reorder_recommendations_without_issue_history(db):
+    result = inventory_forecast_service.apply_reorder_recommendations(db)
+
+    assert result["items"] == 0
@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from models import InventoryLocationBalance, InventoryLot, StockLocation, TransactionType
+from schemas.inventory import InventoryTransferRequest
+from services import inventory_location_service
+from services.inventory_valuation_service import post_stock_movement
+
+
+def _location(db, code):
+    location = StockLocation(code=code, warehouse="Main")
+    db.add(location)
+    db.commit()
+    return location
+
+
+def _receive(db, item, quantity, lot_number=None, expiry_date=None, location_id=None):
+    post_stock_movement(
+        db, item, TransactionType.RECEIPT, quantity, unit_cost=1.0,
+        location_id=location_id, lot_number=lot_number, expiry_date=expiry_date
+    )
+    db.commit()
+
+
+def _issue(db, item, quantity, **lot):
+    post_stock_movement(db, item, TransactionType.ISSUE, quantity, **lot)
+    db.commit()
+
+
+def _lots(db, item):
+    db.expire_all()
+    return {
+        lot.lot_number: lot.quantity
+        for lot in db.query(InventoryLot).filter(InventoryLot.item_id == item.id)
+    }
+
+
+def _balances(db, item):
+    return {
+        row.location_id: row.quantity
+        for row in db.query(InventoryLocationBalance).filter(InventoryLocationBalance.item_id == item.id)
+    }
+
+
+def test_issues_allocate_first_expired_first_out(db, make_item):
+    item = make_item()
+    today = date.today()
+    _receive(db, item, 5, "LATE", today + timedelta(days=30))
+    _receive(db, item, 4, "SOON", today + timedelta(days=5))
+    _receive(db, item, 3, "OPEN")
+    _receive(db, item, 2, "GONE", today - timedelta(days=1))
+
+    _issue(db, item, 6)
+    assert _lots(db, item) == {"LATE": 3, "SOON": 0, "OPEN": 3, "GONE": 2}
+
+    _issue(db, item, 1, lot_number="OPEN")
+    assert _lots(db, item)["OPEN"] == 2
+
+    with pytest.raises(HTTPException) as error:
+        _issue(db, item, 6)
+    assert error.value.status_code == 400
+    db.rollback()
+    assert _lots(db, item) == {"LATE": 3, "SOON": 0, "OPEN": 2, "GONE": 2}
+
+
+def test_lot_draws_are_booked_where_the_lot_is_held(db, make_item):
+    item = make_item()
+    bin_a, bin_b = _location(db, "A1"), _location(db, "B1")
+    _receive(db, item, 4, "L-A", date.today() + timedelta(days=5), location_id=bin_a.id)
+    _receive(db, item, 6, "L-B", date.today() + timedelta(days=9), location_id=bin_b.id)
+    _receive(db, item, 3)
+
+    _issue(db, item, 5)
+    assert _lots(db, item) == {"L-A": 0, "L-B": 5}
+    assert _balances(db, item) == {bin_a.id: 0, bin_b.id: 5}
+
+    _issue(db, item, 2, location_id=bin_b.id)
+    assert _lots(db, item)["L-B"] == 3
+    assert _balances(db, item)[bin_b.id] == 3
+
+
+def test_lot_movements_at_another_location_are_rejected(db, make_item):
+    item = make_item()
+    bin_a, bin_b = _location(db, "A1"), _location(db, "B1")
+    _receive(db, item, 4, "L-A", location_id=bin_a.id)
+    _receive(db, item, 2, location_id=bin_b.id)
+
+    for movement in (
+        lambda: _issue(db, item, 1, lot_number="L-A", location_id=bin_b.id),
+        lambda: _receive(db, item, 1, "L-A", location_id=bin_b.id),
+        lambda: _issue(db, item, 3, location_id=bin_b.id),
+    ):
+        with pytest.raises(HTTPException) as error:
+            movement()
+        assert error.value.status_code == 400
+        db.rollback()
+
+    assert _lots(db, item) == {"L-A": 4}
+    assert _balances(db, item) == {bin_a.id: 4, bin_b.id: 2}
+
+
+def test_lotted_stock_transfers_with_its_lot(db, make_item, admin):
+    item = make_item()
+    bin_a, bin_b = _location(db, "A1"), _location(db, "B1")
+    _receive(db, item, 4, "L-A", location_id=bin_a.id)
+    lot = db.query(InventoryLot).filter(InventoryLot.lot_number == "L-A").one()
+
+    without_lot = InventoryTransferRequest(quantity=4, from_location_id=bin_a.id, to_location_id=bin_b.id)
+    with pytest.raises(HTTPException):
+        inventory_location_service.transfer_stock(db, item.id, without_lot, admin.id)
+    db.rollback()
+
+    part_of_lot = without_lot.model_copy(update={"quantity": 2, "lot_id": lot.id})
+    with pytest.raises(HTTPException):
+        inventory_location_service.transfer_stock(db, item.id, part_of_lot, admin.id)
+    db.rollback()
+
+    inventory_location_service.transfer_stock(db, item.id, without_lot.model_copy(update={"lot_id": lot.id}), admin.id)
+    db.expire_all()
+    assert lot.location_id == bin_b.id
+    assert _balances(db, item) == {bin_a.id: 0, bin_b.id: 4}
@@ -0,0 +1,94 @@
+from models import Notification, NotificationCounter, User, UserRole
+from services import notification_service
+
+
+def _user(db, name):
+    user = User(username=name, email=f"{name}@example.com", full_name=name, hashed_password="x", role=UserRole.ADMIN)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _counter(db, user):
+    db.expire_all()
+    return db.query(NotificationCounter.unread_count).filter(NotificationCounter.user_id == user.id).scalar()
+
+
+def test_counters_follow_inserts_reads_and_deletes(db, admin):
+    other = _user(db, "other")
+    first = notification_service.create_notification(db, admin.id, "info", "First", "m")
+    notification_service.notify_users(db, [admin.id, other.id], "alert", "Second", "m", digest_window_seconds=0)
+    db.commit()
+    first_id = first.id
+    assert (_counter(db, admin), _counter(db, other)) == (2, 1)
+
+    assert notification_service.mark_notification_read(db, admin.id, first_id).read
+    notification_service.mark_notification_read(db, admin.id, first_id)
+    assert _counter(db, admin) == 1
+    assert notification_service.mark_notification_read(db, other.id, first_id) is None
+
+    assert notification_service.delete_notification(db, admin.id, first_id)
+    assert not notification_service.delete_notification(db, admin.id, first_id)
+    assert _counter(db, admin) == 1
+
+    notification_service.mark_all_notifications_read(db, admin.id)
+    assert _counter(db, admin) == 0
+    assert _counter(db, other) == 1
+
+
+def test_missing_counter_is_seeded_from_unread_rows(db, admin):
+    db.add_all([Notification(user_id=admin.id, type="info", title=f"Old {n}", message="m") for n in range(3)])
+    db.commit()
+    assert _counter(db, admin) is None
+    assert notification_service.get_unread_count(db, admin.id) == 3
+
+    notification_service.create_notification(db, admin.id, "info", "New", "m")
+    db.commit()
+    assert _counter(db, admin) == 4
+
+    db.query(NotificationCounter).delete()
+    unread = db.query(Notification).filter(Notification.title == "New").one()
+    notification_service.mark_notification_read(db, admin.id, unread.id)
+    assert _counter(db, admin) == 3
+
+    db.query(NotificationCounter).update({NotificationCounter.unread_count: 9})
+    db.commit()
+    assert notification_service.reconcile_notification_counters(db)["corrected"] == 1
+    assert _counter(db, admin) == 3
+
+
+def test_repeats_coalesce_into_an_unread_digest(db, admin):
+    other = _user(db, "other")
+    assert notification_service.notify_users(db, [admin.id], "alert", "Line down", "1", "/lines/1") == {
+        "created": 1, "coalesced": 0
+    }
+    assert notification_service.notify_users(db, [admin.id, other.id], "alert", "Line still down", "2", "/lines/1") == {
+        "created": 1, "coalesced": 1
+    }
+    notification_service.notify_users(db, [admin.id], "alert", "Other line", "3", "/lines/2")
+    db.commit()
+
+    digest = db.query(Notification).filter(Notification.user_id == admin.id, Notification.link == "/lines/1").one()
+    assert (digest.title, digest.message, digest.digest_count) == ("Line still down", "2", 2)
+    assert _counter(db, admin) == 2
+
+    notification_service.mark_notification_read(db, admin.id, digest.id)
+    notification_service.notify_users(db, [admin.id], "alert", "Line down again", "4", "/lines/1")
+    db.commit()
+    assert db.query(Notification).filter(Notification.link == "/lines/1", Notification.user_id == admin.id).count() == 2
+
+    notification_service.notify_users(db, [admin.id], "alert", "Outside window", "5", "/lines/2", digest_window_seconds=0)
+    db.commit()
+    assert db.query(Notification).filter(Notification.link == "/lines/2").count() == 2
+
+
+def test_reading_does_not_reorder_the_list(db, admin):
+    older = notification_service.create_notification(db, admin.id, "info", "Older", "m")
+    db.commit()
+    notification_service.create_notification(db, admin.id, "info", "Newer", "m")
+    db.commit()
+
+    notification_service.mark_notification_read(db, admin.id, older.id)
+    data, total, unread = notification_service.get_notifications(db, admin.id)
+    assert [notification.title for notification in data] == ["Newer", "Older"]
+    assert (total, unread) == (2, 1)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from models import Equipment, EquipmentMeter, MeterType, WorkOrder
+from services import preventive_maintenance_service
+
+
+def _pump_with_meter(db):
+    equipment = Equipment(name="Pump", equipment_id="P1", category="Pump", created_at=datetime.utcnow() - timedelta(days=400))
+    db.add(equipment)
+    db.flush()
+    db.add(EquipmentMeter(
+        equipment_id=equipment.id, code="runtime", name="Runtime", meter_type=MeterType.RUNTIME_HOURS,
+        last_value=100.0, last_recorded_at=datetime.utcnow()
+    ))
+    db.commit()
+    return equipment
+
+
+def test_adding_a_calendar_interval_reschedules_existing_schedules(client, db):
+    equipment = _pump_with_meter(db)
+    plan = client.post("/api/v1/maintenance/pm-plans", json={
+        "name": "Runtime service", "equipment_id": equipment.id, "meter_code": "runtime", "meter_interval": 500
+    }).json()
+    schedules = client.get(f"/api/v1/maintenance/pm-plans/{plan['id']}/schedules").json()
+    assert schedules[0]["next_due_date"] is None
+    assert schedules[0]["next_due_meter"] == 600
+
+    start = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    response = client.put(f"/api/v1/maintenance/pm-plans/{plan['id']}", json={"interval_days": 1, "start_date": start})
+    assert response.status_code == 200
+
+    schedules = client.get(f"/api/v1/maintenance/pm-plans/{plan['id']}/schedules").json()
+    assert len(schedules) == 1
+    assert schedules[0]["next_due_date"] is not None
+    assert preventive_maintenance_service.generate_pm_work_orders(db)["work_orders_created"] == 1
+    assert db.query(WorkOrder).count() == 1
+
+
+def test_changing_the_meter_interval_reschedules_from_the_last_reset(client, db):
+    equipment = _pump_with_meter(db)
+    plan = client.post("/api/v1/maintenance/pm-plans", json={
+        "name": "Runtime service", "equipment_id": equipment.id, "meter_code": "runtime", "meter_interval": 500
+    }).json()
+
+    client.put(f"/api/v1/maintenance/pm-plans/{plan['id']}", json={"meter_interval": 250})
+
+    schedules = client.get(f"/api/v1/maintenance/pm-plans/{plan['id']}/schedules").json()
+    assert schedules[0]["next_due_meter"] == 350
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from models import ProductionLine, ProductionOrder, Shift, ShiftType
+
+
+def test_schedule_order_with_no_remaining_work_on_a_window_boundary(client, db):
+    line = ProductionLine(name="Line 1", line_code="L1", capacity_per_hour=10)
+    db.add(line)
+    db.flush()
+    db.add(Shift(
+        production_line_id=line.id, shift_type=ShiftType.MORNING, start_time="08:00", end_time="16:00",
+        active_days=[0, 1, 2, 3, 4, 5, 6]
+    ))
+    for number, quantity in (("P1", 50), ("P2", 30), ("P3", 0)):
+        db.add(ProductionOrder(
+            order_number=number, production_line_id=line.id, product_name="Widget", target_quantity=quantity, unit="pcs"
+        ))
+    db.commit()
+
+    response = client.post("/api/v1/production/orders/schedule", json={
+        "start": datetime(2026, 10, 19, 8, 0).isoformat(), "horizon_days": 1, "dry_run": True
+    })
+
+    assert response.status_code == 200
+    tasks = {task["order_number"]: task for task in response.json()["lines"][0]["tasks"]}
+    assert tasks["P2"]["end"] == "2026-10-19T16:00"
+    assert tasks["P3"]["start"] == tasks["P3"]["end"] == "2026-10-19T16:00"
+    assert len(tasks["P3"]["segments"]) == 1
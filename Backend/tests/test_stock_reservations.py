@@ -0,0 +1,85 @@
+import pytest
+from fastapi import HTTPException
+
+from models import InventoryTransaction, ReservationSource, TransactionType
+from services import inventory_service, replenishment_service, stock_reservation_service
+
+SALES = ReservationSource.SALES_ORDER
+
+
+def _reserved(db, item):
+    db.expire_all()
+    return item.reserved_quantity
+
+
+def test_reserve_consume_and_release_move_the_counter(db, make_item):
+    item = make_item(quantity=10)
+
+    stock_reservation_service.reserve(db, SALES, 1, [(11, item.id, 6.0), (12, item.id, 2.0)])
+    db.commit()
+    assert _reserved(db, item) == 8
+
+    stock_reservation_service.consume(db, SALES, 1, [(11, item.id, 4.0)])
+    db.commit()
+    assert _reserved(db, item) == 4
+    assert stock_reservation_service.outstanding_by_line(db, SALES, [11, 12]) == {11: 2.0, 12: 2.0}
+
+    stock_reservation_service.release(db, SALES, 1)
+    db.commit()
+    assert _reserved(db, item) == 0
+    assert stock_reservation_service.outstanding_by_line(db, SALES, [11, 12]) == {11: 0.0, 12: 0.0}
+
+
+def test_enforced_reservation_cannot_oversell(db, make_item):
+    item = make_item(quantity=10)
+    stock_reservation_service.reserve(db, SALES, 1, [(11, item.id, 7.0)])
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        stock_reservation_service.reserve(db, SALES, 2, [(21, item.id, 4.0)])
+    assert error.value.status_code == 400
+    db.rollback()
+
+    assert _reserved(db, item) == 7
+    stock_reservation_service.reserve(db, SALES, 2, [(21, item.id, 3.0)])
+    db.commit()
+    assert stock_reservation_service.available_to_promise(db, [item.id])[0]["available"] == 0
+
+
+def test_consume_beyond_the_reservation_must_fit_in_available_stock(db, make_item):
+    item = make_item(quantity=10)
+    stock_reservation_service.reserve(db, SALES, 1, [(11, item.id, 8.0)])
+    db.commit()
+
+    with pytest.raises(HTTPException):
+        stock_reservation_service.consume(db, SALES, 2, [(21, item.id, 3.0)])
+    db.rollback()
+    assert _reserved(db, item) == 8
+
+
+def test_manual_issue_cannot_take_reserved_stock(db, make_item, admin):
+    item = make_item(quantity=10)
+    stock_reservation_service.reserve(db, SALES, 1, [(11, item.id, 6.0)])
+    db.commit()
+
+    for transaction_type in (TransactionType.ISSUE, TransactionType.SCRAP, TransactionType.ADJUSTMENT):
+        with pytest.raises(HTTPException) as error:
+            inventory_service.adjust_inventory_quantity(db, item.id, 5, transaction_type, admin.id)
+        assert error.value.status_code == 400
+        db.rollback()
+
+    inventory_service.adjust_inventory_quantity(db, item.id, 4, TransactionType.ISSUE, admin.id)
+    db.expire_all()
+    assert item.quantity == 6
+    assert item.reserved_quantity == 6
+    assert db.query(InventoryTransaction).count() == 1
+
+
+def test_replenishment_plans_on_available_to_promise(db, make_item):
+    item = make_item(quantity=10, reorder_point=5, max_quantity=20)
+    stock_reservation_service.reserve(db, SALES, 1, [(11, item.id, 6.0)])
+    db.commit()
+
+    result = replenishment_service.generate_replenishment_proposals(db)
+
+    assert result["lines"] == 1